@@ -53,6 +53,10 @@ fun requireDirectory(path: Path) {
     require(path.isDirectory()) { "Argument has to be directory" }
 }
 
+fun requireDirectoryOrFile(path: Path) {
+    require(path.isDirectory() || path.isFile()) { "Argument has to be directory or file" }
+}
+
 fun getSubdirectories(path: Path): List<Path> {
     return Files.walk(path, 1)
         .filter { Files.isDirectory(it) && !it.equals(path) }
@@ -18,6 +18,14 @@ abstract class BaseAnalysisCliTask : org.jetbrains.intellij.tasks.RunIdeTask() {
     @get:Input
     val output: String? by project
 
+    // Name of the runner to which the analysis daemon delegates the batches
+    @get:Input
+    val delegate: String? by project
+
+    // Directory for the IDE config and system files, allows several tasks to run at the same time
+    @get:Input
+    val sandbox: String? by project
+
     init {
         jvmArgs = listOf(
             "-Djava.awt.headless=true",
@@ -28,6 +36,10 @@ abstract class BaseAnalysisCliTask : org.jetbrains.intellij.tasks.RunIdeTask() {
         maxHeapSize = "20g"
         standardInput = System.`in`
         standardOutput = System.`out`
+        sandbox?.let {
+            configDir.set(project.file("$it/config"))
+            systemDir.set(project.file("$it/system"))
+        }
     }
 }
 
@@ -81,7 +93,8 @@ tasks {
         args = listOfNotNull(
             runner,
             input?.let { "--input=$it" },
-            output?.let { "--output=$it" }
+            output?.let { "--output=$it" },
+            delegate?.let { "--runner=$it" }
         )
     }
 
@@ -91,7 +104,8 @@ tasks {
             runner,
             input?.let { "--input=$it" },
             output?.let { "--output=$it" },
-            venv?.let { "--venv=$it" }
+            venv?.let { "--venv=$it" },
+            delegate?.let { "--runner=$it" }
         )
     }
 }
@@ -0,0 +1,103 @@
+package org.jetbrains.research.lupa
+
+import org.jetbrains.research.lupa.kotlinAnalysis.JavaReflectionsFunctionsAnalysisRunner
+import org.jetbrains.research.lupa.kotlinAnalysis.KotlinClonesAnalysisRunner
+import org.jetbrains.research.lupa.kotlinAnalysis.KotlinDependenciesAnalysisRunner
+import org.jetbrains.research.lupa.kotlinAnalysis.KotlinGradleDependenciesAnalysisRunner
+import org.jetbrains.research.lupa.kotlinAnalysis.KotlinGradleDependenciesByModulesAnalysisRunner
+import org.jetbrains.research.lupa.kotlinAnalysis.KotlinGradlePluginsAnalysisRunner
+import org.jetbrains.research.lupa.kotlinAnalysis.KotlinGradlePropertiesAnalysisRunner
+import org.jetbrains.research.lupa.kotlinAnalysis.KotlinProjectMetricsAnalysisAnalysisRunner
+import org.jetbrains.research.lupa.kotlinAnalysis.KotlinRangesAnalysisRunner
+import org.jetbrains.research.lupa.kotlinAnalysis.ProjectsTaggingRunner
+import org.jetbrains.research.lupa.kotlinAnalysis.StdlibInterfacesAnalysisRunner
+import org.jetbrains.research.lupa.pythonAnalysis.PythonCallExpressionsAnalysisRunner
+import org.jetbrains.research.lupa.pythonAnalysis.PythonImportsAnalysisRunner
+import org.jetbrains.research.pluginUtilities.runners.BaseRunner
+import org.jetbrains.research.pluginUtilities.runners.IORunnerArgsParser
+import org.jetbrains.research.pluginUtilities.runners.RunnerArgsParser
+
+/**
+ * Runner that keeps the IDE running and analyses the batches received from the standard input.
+ *
+ * Each input line is a tab-separated command:
+ * - `ANALYZE <input> <output>` runs the delegate runner on the batch and responds with `DONE` or `FAILED <message>`;
+ * - `PING` responds with `PONG` and is used as a health check;
+ * - `EXIT` stops the daemon.
+ *
+ * Responses are printed to the standard output on separate lines starting with [RESPONSE_PREFIX],
+ * so they can be distinguished from the IDE logs.
+ */
+object AnalysisDaemonRunner : BaseRunner<DaemonRunnerArgs, DaemonRunnerArgsParser>
+    ("analysis-daemon", DaemonRunnerArgsParser) {
+    private const val RESPONSE_PREFIX = "LUPA_DAEMON"
+    private const val SEPARATOR = "\t"
+
+    private val delegates: Map<String, (List<String>) -> Unit> = mapOf(
+        "kotlin-dependencies-analysis" to delegate(KotlinDependenciesAnalysisRunner::run, IORunnerArgsParser),
+        "kotlin-clones-analysis" to delegate(KotlinClonesAnalysisRunner::run, IORunnerArgsParser),
+        "kotlin-ranges-analysis" to delegate(KotlinRangesAnalysisRunner::run, IORunnerArgsParser),
+        "kotlin-project-tags-analysis" to delegate(ProjectsTaggingRunner::run, IORunnerArgsParser),
+        "kotlin-gradle-dependencies-analysis" to delegate(
+            KotlinGradleDependenciesAnalysisRunner::run,
+            IORunnerArgsParser,
+        ),
+        "kotlin-gradle-dependencies-by-modules-analysis" to delegate(
+            KotlinGradleDependenciesByModulesAnalysisRunner::run,
+            IORunnerArgsParser,
+        ),
+        "kotlin-gradle-properties-analysis" to delegate(KotlinGradlePropertiesAnalysisRunner::run, IORunnerArgsParser),
+        "kotlin-gradle-plugins-analysis" to delegate(KotlinGradlePluginsAnalysisRunner::run, IORunnerArgsParser),
+        "kotlin-project-metrics-analysis" to delegate(
+            KotlinProjectMetricsAnalysisAnalysisRunner::run,
+            IORunnerArgsParser,
+        ),
+        "java-reflections-analysis" to delegate(JavaReflectionsFunctionsAnalysisRunner::run, IORunnerArgsParser),
+        "kotlin-stdlib-interfaces-analysis" to delegate(StdlibInterfacesAnalysisRunner::run, IORunnerArgsParser),
+        "python-imports-analysis" to delegate(PythonImportsAnalysisRunner::run, IORunnerArgsParser),
+        "python-call-expressions-analysis" to delegate(
+            PythonCallExpressionsAnalysisRunner::run,
+            IORunnerArgsWithVenvParser,
+        ),
+    )
+
+    private fun <A> delegate(run: (A) -> Unit, parser: RunnerArgsParser<A>): (List<String>) -> Unit =
+        { args -> run(parser.parse(args)) }
+
+    private fun respond(response: String) {
+        println("$RESPONSE_PREFIX$SEPARATOR$response")
+        System.out.flush()
+    }
+
+    override fun run(args: DaemonRunnerArgs) {
+        val delegate = requireNotNull(delegates[args.runner]) { "Unknown runner: ${args.runner}" }
+
+        respond("READY")
+        while (true) {
+            val command = readLine()?.trim()?.split(SEPARATOR) ?: break
+            when (command.first()) {
+                "PING" -> respond("PONG")
+                "EXIT" -> break
+                "ANALYZE" -> {
+                    // A malformed command fails only itself, the daemon keeps waiting for the next one
+                    try {
+                        val (input, output) = command.drop(1).takeIf { it.size == 2 }
+                            ?: throw IllegalArgumentException("Expected ANALYZE <input> <output>, got: $command")
+                        val delegateArgs = listOfNotNull(
+                            args.runner,
+                            "--input=$input",
+                            "--output=$output",
+                            args.venvDir?.let { "--venv=$it" },
+                        )
+
+                        delegate(delegateArgs)
+                        respond("DONE")
+                    } catch (ex: Exception) {
+                        respond("FAILED$SEPARATOR${ex.message?.replace(Regex("\\s+"), " ")}")
+                    }
+                }
+                else -> respond("FAILED${SEPARATOR}Unknown command: ${command.first()}")
+            }
+        }
+    }
+}
@@ -1,9 +1,12 @@
 package org.jetbrains.research.lupa
 
 import com.xenomachina.argparser.ArgParser
+import com.xenomachina.argparser.default
 import org.jetbrains.research.lupa.kotlinAnalysis.util.requireDirectory
+import org.jetbrains.research.lupa.kotlinAnalysis.util.requireDirectoryOrFile
 import org.jetbrains.research.pluginUtilities.runners.IORunnerArgs
 import org.jetbrains.research.pluginUtilities.runners.RunnerArgsParser
+import java.nio.file.Path
 import java.nio.file.Paths
 
 /** Arguments data class for input and output directory names arguments,
@@ -11,7 +14,7 @@ import java.nio.file.Paths
 class IORunnerArgsWithVenv(parser: ArgParser) : IORunnerArgs(parser) {
     val venvDir by parser.storing(
         "--venv",
-        help = "The path to the virtual environment",
+        help = "The path to the virtual environment or to the file mapping the projects to their virtual environments",
     ) {
         if (this == "") null else Paths.get(this)
     }
@@ -24,7 +27,34 @@ object IORunnerArgsWithVenvParser : RunnerArgsParser<IORunnerArgsWithVenv> {
             .run {
                 requireDirectory(inputDir)
                 outputDir.toFile().mkdirs()
-                venvDir?.let { requireDirectory(it) }
+                venvDir?.let { requireDirectoryOrFile(it) }
+                this
+            }
+    }
+}
+
+/** Arguments data class for the name of the runner to which the analysis daemon delegates the batches,
+ *  and also for the path to the virtual environment.*/
+class DaemonRunnerArgs(parser: ArgParser) {
+    val runner by parser.storing(
+        "--runner",
+        help = "The name of the runner to which the batches are delegated",
+    )
+
+    val venvDir by parser.storing(
+        "--venv",
+        help = "The path to the virtual environment or to the file mapping the projects to their virtual environments",
+    ) {
+        if (this == "") null else Paths.get(this)
+    }.default<Path?>(null)
+}
+
+/** Parser for the analysis daemon arguments. */
+object DaemonRunnerArgsParser : RunnerArgsParser<DaemonRunnerArgs> {
+    override fun parse(args: List<String>): DaemonRunnerArgs {
+        return ArgParser(args.drop(1).toTypedArray()).parseInto(::DaemonRunnerArgs)
+            .run {
+                venvDir?.let { requireDirectoryOrFile(it) }
                 this
             }
     }
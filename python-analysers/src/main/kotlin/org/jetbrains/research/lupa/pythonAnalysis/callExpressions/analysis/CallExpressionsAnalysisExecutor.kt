@@ -1,8 +1,10 @@
 package org.jetbrains.research.lupa.pythonAnalysis.callExpressions.analysis
 
+import com.google.gson.JsonParser
 import com.intellij.openapi.application.ApplicationManager
 import com.intellij.openapi.project.Project
 import com.intellij.util.io.exists
+import com.intellij.util.io.isFile
 import com.jetbrains.python.actions.PyQualifiedNameProvider
 import com.jetbrains.python.psi.PyCallExpression
 import com.jetbrains.python.psi.PyDecorator
@@ -48,8 +50,18 @@ class CallExpressionsAnalysisExecutor(
     override val controlledResourceManagers: Set<ResourceManager> = setOf(expressionsDataWriter)
     override val requiredFileExtensions: Set<FileExtension> = PYTHON_EXTENSIONS
 
+    /**
+     * Virtual environments of the projects by their names,
+     * if the [path to the virtual environment][venv] is a mapping file instead of a virtual environment.
+     */
+    private val venvByProjectName: Map<String, Path>? by lazy {
+        venv?.takeIf { it.isFile() }?.let { readVenvMapping(it) }
+    }
+
     override fun analyse(project: Project) {
-        setupVenv(project, venv)
+        // The projects missing from the mapping fall back to their local virtual environments
+        val globalVenv = venvByProjectName.let { if (it != null) it[project.name] else venv }
+        setupVenv(project, globalVenv)
 
         val typeEvalContext = TypeEvalContext.deepCodeInsight(project)
         val pyResolveContext = PyResolveContext.defaultContext(typeEvalContext)
@@ -117,6 +129,18 @@ class CallExpressionsAnalysisExecutor(
         logger.warn("The analysis will run without the SDK.")
     }
 
+    /**
+     * Reads the [mapping file][mappingPath] created by the `create_venv_for_each_project.py` script with the
+     * `--venv-pool` option. It is a json list of objects with the `project_name`, `fingerprint` and `venv_path` keys.
+     */
+    private fun readVenvMapping(mappingPath: Path): Map<String, Path> {
+        logger.info("Reading the virtual environments of the projects from $mappingPath.")
+        return JsonParser.parseString(mappingPath.toFile().readText()).asJsonArray.associate { item ->
+            val venvInfo = item.asJsonObject
+            venvInfo.get("project_name").asString to Paths.get(venvInfo.get("venv_path").asString)
+        }
+    }
+
     /**
      * Trying to set up a virtual environment.
      *
@@ -2,7 +2,7 @@
 This script analyzes Python call expressions.
 
 It accepts
-    * path to csv file with FQ names.
+    * path to csv file or Parquet dataset with FQ names.
     * path to the folder where to save the stats.
     * path to the csv file with labeled projects by python version.
 
@@ -19,6 +19,8 @@ from call_expressions_column import CallExpressionsColumn
 
 import pandas as pd
 
+from utils.df_utils import read_dataframe
+
 logging.basicConfig(level=logging.INFO)
 
 
@@ -26,7 +28,7 @@ def configure_parser(parser: argparse.ArgumentParser):
     parser.add_argument(
         '--input',
         type=lambda value: Path(value).absolute(),
-        help='path to csv file with FQ names',
+        help='path to csv file or Parquet dataset with FQ names',
         required=True,
     )
 
@@ -46,10 +48,15 @@ def configure_parser(parser: argparse.ArgumentParser):
 
 def collect_stats(fq_names: pd.DataFrame) -> pd.DataFrame:
     total_stats = fq_names.drop(CallExpressionsColumn.CATEGORY.value, axis=1).drop_duplicates()
-    total_stats = total_stats.value_counts([CallExpressionsColumn.FQ_NAME.value])
+    # The unobserved categories of the Parquet data must not be counted
+    total_stats = total_stats.groupby(CallExpressionsColumn.FQ_NAME.value, observed=True).size()
+    total_stats = total_stats.sort_values(ascending=False)
     total_stats = total_stats.reset_index(name=CallExpressionsColumn.TOTAL.value)
 
-    grouped_stats = fq_names.groupby([CallExpressionsColumn.FQ_NAME.value, CallExpressionsColumn.CATEGORY.value])
+    grouped_stats = fq_names.groupby(
+        [CallExpressionsColumn.FQ_NAME.value, CallExpressionsColumn.CATEGORY.value],
+        observed=True,
+    )
     stats = grouped_stats[CallExpressionsColumn.PROJECT_NAME.value].count()
     stats = stats.reset_index(name=CallExpressionsColumn.COUNT.value)
     stats = stats.pivot(
@@ -79,7 +86,7 @@ def main():
 
     output_path.mkdir(parents=True, exist_ok=True)
 
-    fq_names = pd.read_csv(input_path, keep_default_na=False)
+    fq_names = read_dataframe(input_path, keep_default_na=False)
     logging.info(f'Received {len(fq_names)} FQ names.')
 
     if python_versions_path is None:
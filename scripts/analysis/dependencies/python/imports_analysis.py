@@ -2,7 +2,7 @@
 This script analyzes Python imports.
 
 It accepts
-    * path to csv file with FQ names.
+    * path to csv file or Parquet dataset with FQ names.
     * path to the folder where to save the stats.
     * path to the csv file with labeled projects by python version.
 
@@ -28,6 +28,8 @@ from analysis.dependencies.python.imports_column import ImportsColumn
 
 import pandas as pd
 
+from utils.df_utils import read_dataframe
+
 logging.basicConfig(level=logging.INFO)
 
 # These are the default Python arguments passed to import_directives_analysis.py
@@ -43,7 +45,7 @@ def configure_parser(parser: argparse.ArgumentParser):
     parser.add_argument(
         '--input',
         type=lambda value: Path(value).absolute(),
-        help='path to csv file with fq names',
+        help='path to csv file or Parquet dataset with fq names',
         required=True,
     )
 
@@ -62,7 +64,8 @@ def configure_parser(parser: argparse.ArgumentParser):
 
 
 def collect_stats(imports: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    total_stats = imports.value_counts([ImportsColumn.IMPORT.value])
+    # The unobserved categories of the Parquet data must not be counted
+    total_stats = imports.groupby(ImportsColumn.IMPORT.value, observed=True).size().sort_values(ascending=False)
     total_stats = total_stats.reset_index(name=ImportsColumn.COUNT.value)
     total_stats.rename(columns={ImportsColumn.IMPORT.value: ImportsColumn.FQ_NAME.value}, inplace=True)
 
@@ -106,7 +109,7 @@ def main():
 
     output_path.mkdir(parents=True, exist_ok=True)
 
-    imports = pd.read_csv(input_path, keep_default_na=False)
+    imports = read_dataframe(input_path, keep_default_na=False)
     logging.info(f'Received {len(imports)} imports.')
 
     if python_versions_path is None:
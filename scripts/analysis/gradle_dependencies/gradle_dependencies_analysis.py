@@ -12,6 +12,7 @@ from analysis.gradle_dependencies.column_names_utils import (
 
 import pandas as pd
 
+from utils.df_utils import read_dataframe
 from utils.file_utils import Extensions, create_directory
 
 GradleDependenciesStats = Dict[str, Any]
@@ -73,7 +74,7 @@ def analyze_full_names_stats(path_to_result_dir: str, meta: pd.DataFrame, df: pd
 
 
 def get_gradle_dependencies(path_to_dependencies: str, path_to_tagged_projects: str, tags: List[str]) -> pd.DataFrame:
-    dependencies = pd.read_csv(path_to_dependencies)
+    dependencies = read_dataframe(path_to_dependencies)
     if path_to_tagged_projects:
         tagged_projects = dict(pd.read_csv(path_to_tagged_projects).values)
         dependencies = dependencies[
@@ -107,7 +108,7 @@ def analyze(
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
 
-    parser.add_argument('--input', type=str, help='path to csv file with gradle dependencies csv with columns:'
+    parser.add_argument('--input', type=str, help='path to csv file or Parquet dataset with gradle dependencies:'
                                                   'project_name -- project name'
                                                   'group_id -- dependency group id'
                                                   'artifact_id -- dependency artifact id'
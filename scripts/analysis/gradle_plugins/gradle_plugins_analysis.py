@@ -8,6 +8,7 @@ from analysis.gradle_plugins.column_names_utils import GradlePluginsStatsColumn
 
 import pandas as pd
 
+from utils.df_utils import read_dataframe
 from utils.file_utils import Extensions, create_directory
 
 GradlePluginsStats = Dict[str, Any]
@@ -43,7 +44,7 @@ def analyze_plugins_stats(path_to_result_dir: str, df: pd.DataFrame):
 
 
 def get_gradle_plugins(path_to_plugins: str) -> pd.DataFrame:
-    return pd.read_csv(path_to_plugins)
+    return read_dataframe(path_to_plugins)
 
 
 def analyze(path_to_plugins: str, path_to_result_dir: str):
@@ -58,7 +59,7 @@ def analyze(path_to_plugins: str, path_to_result_dir: str):
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
 
-    parser.add_argument('--input', type=str, help='path to gradle properties csv file with columns:'
+    parser.add_argument('--input', type=str, help='path to gradle plugins csv file or Parquet dataset with columns:'
                                                   'project_name -- project name'
                                                   'plugin_id -- plugin id', required=True)
     parser.add_argument('--output', type=str, help='path to output dir with result', required=True)
@@ -0,0 +1,121 @@
+"""
+This script compares the in-tree bin packing engine with the ``binpackp`` package on random project sizes.
+
+For each fit strategy, it measures the packing time of both implementations and checks that their bin assignments
+are identical. The ``binpackp`` package is only a test dependency: install it from ``requirements-test.txt``.
+
+It optionally accepts:
+    * number of projects (default is 10000);
+    * batch constraint (default is 1000000);
+    * maximum number of open batches for the Next Fit strategy (default is 3);
+    * number of projects above which ``binpackp`` is not run, since it is too slow (default is 20000);
+    * seed for random number generator.
+"""
+import argparse
+import logging
+import time
+from typing import Callable, List, Tuple
+
+import numpy as np
+from binpackp.bins import NumberBin
+from binpackp.fit import BinReduction, Fit
+
+from plugin_runner.bin_packing import FitStrategy, pack
+
+logger = logging.getLogger(__name__)
+
+
+class IndexedNumberBin(NumberBin):
+    @classmethod
+    def size(cls, item):
+        _, value = item
+        return super().size(value)
+
+
+def configure_parser(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--number-of-projects', type=int, default=10000, help='Number of projects.')
+    parser.add_argument('--batch-constraint', type=int, default=1000000, help='Batch constraint.')
+    parser.add_argument(
+        '--max-open-batches',
+        type=int,
+        default=3,
+        help='Maximum number of open batches for the Next Fit strategy.',
+    )
+    parser.add_argument(
+        '--reference-limit',
+        type=int,
+        default=20000,
+        help='Number of projects above which binpackp is not run, since it is too slow.',
+    )
+    parser.add_argument('--random-state', type=int, help='Seed for random number generator.')
+
+
+def pack_with_binpackp(sizes: List[int], capacity: int, strategy: FitStrategy, max_open_bins: int) -> List[List[int]]:
+    items = list(enumerate(sizes))
+
+    if strategy == FitStrategy.FIRST_FIT:
+        result = Fit.ffd(IndexedNumberBin, capacity, items)
+    elif strategy == FitStrategy.BEST_FIT:
+        result = Fit.bfd(IndexedNumberBin, capacity, items)
+    elif strategy == FitStrategy.WORST_FIT:
+        result = Fit.wfd(IndexedNumberBin, capacity, items)
+    else:
+        result = Fit.fit(
+            IndexedNumberBin,
+            capacity,
+            items,
+            sort=True,
+            max_open_bins=max_open_bins,
+            bin_reduction=BinReduction.first,
+        )
+
+    return [[index for index, _ in result_bin] for result_bin in result.bins]
+
+
+def measure(function: Callable[..., List[List[int]]], *args, **kwargs) -> Tuple[List[List[int]], float]:
+    start_time = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start_time
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser()
+    configure_parser(parser)
+    args = parser.parse_args()
+
+    # Project sizes are heavy-tailed, so they are drawn from a log-normal distribution
+    generator = np.random.default_rng(args.random_state)
+    sizes = generator.lognormal(mean=np.log(args.batch_constraint / 50), sigma=1.5, size=args.number_of_projects)
+    sizes = np.clip(sizes.astype(int), 0, args.batch_constraint).tolist()
+
+    for strategy in FitStrategy:
+        bins, engine_time = measure(
+            pack,
+            sizes,
+            args.batch_constraint,
+            strategy,
+            max_open_bins=args.max_open_batches,
+        )
+
+        if args.number_of_projects > args.reference_limit:
+            logger.info(f'{strategy.value}: {engine_time:.3f}s, {len(bins)} batches.')
+            continue
+
+        expected_bins, reference_time = measure(
+            pack_with_binpackp,
+            sizes,
+            args.batch_constraint,
+            strategy,
+            args.max_open_batches,
+        )
+
+        logger.info(
+            f'{strategy.value}: {engine_time:.3f}s (binpackp: {reference_time:.3f}s), {len(bins)} batches, '
+            f'identical: {bins == expected_bins}.',
+        )
+
+
+if __name__ == '__main__':
+    main()
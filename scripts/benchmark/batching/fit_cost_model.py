@@ -0,0 +1,149 @@
+"""
+This script fits a cost model for the cost model batcher over the results of the batcher benchmark.
+
+It accepts:
+    * path to the output directory of the batcher benchmark;
+    * path to a yaml file where the cost model will be saved.
+
+It also optionally accepts:
+    * language whose metrics will be used (by default, the total metrics will be used);
+    * list of metrics the model will depend on (by default, all the metrics found in the projects);
+    * path to the logs file (by default, the logs will be written to stderr.).
+"""
+import argparse
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from benchmark.batching.batcher_benchmark import BenchmarkResultColumn, RunType
+from benchmark.metrics_collection.metrics import MetricName
+from plugin_runner.cost_model import fit_cost_model
+from benchmark.sampling.stratified_sampling import read_projects_metrics
+from utils.file_utils import Extensions, get_subdirectories
+from utils.language import Language
+
+logger = logging.getLogger(__name__)
+
+BATCH_DIRECTORY_PREFIX = 'batch_'
+
+
+def configure_parser(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        'benchmark_output',
+        type=lambda value: Path(value).absolute(),
+        help=(
+            'Path to the output directory of the batcher benchmark. '
+            'Must contain the "batches" folder and the "benchmark_data.csv" file.'
+        ),
+    )
+
+    parser.add_argument(
+        'output_path',
+        type=lambda value: Path(value).absolute(),
+        help='Path to a yaml file where the cost model will be saved.',
+    )
+
+    parser.add_argument(
+        '--language',
+        choices=Language.values(),
+        help='Language whose metrics will be used. By default, the total metrics will be used.',
+    )
+
+    parser.add_argument(
+        '--features',
+        nargs='+',
+        choices=sorted(MetricName.values()),
+        help='Metrics the model will depend on. By default, all the metrics found in the projects.',
+    )
+
+    parser.add_argument(
+        '--logs-path',
+        type=lambda value: Path(value).absolute(),
+        help='Path to a file where you want to save the logs. By default, the logs will be written to stderr.',
+    )
+
+
+def read_batch_metrics(batches_path: Path, language: Optional[Language]) -> pd.DataFrame:
+    """
+    Read the metrics of the projects of each batch created by the batcher benchmark and sum them up.
+
+    :param batches_path: Path to the folder with the batches.
+    :param language: Language, the metrics for which must be read. If None, the total field will be used.
+    :return: Dataframe indexed by batch with the sums of the project metrics of each batch.
+    """
+    batch_projects = {}
+    for batch_path in map(Path, get_subdirectories(batches_path)):
+        if not batch_path.name.startswith(BATCH_DIRECTORY_PREFIX):
+            continue
+
+        batch_index = int(batch_path.name[len(BATCH_DIRECTORY_PREFIX):])
+        batch_projects[batch_index] = [Path(project).resolve() for project in get_subdirectories(batch_path)]
+
+    all_projects = [project for projects in batch_projects.values() for project in projects]
+    metrics = read_projects_metrics(all_projects, language)
+
+    batch_metrics = {
+        batch_index: pd.DataFrame([metrics[project] or {} for project in projects]).sum()
+        for batch_index, projects in batch_projects.items()
+    }
+
+    return pd.DataFrame.from_dict(batch_metrics, orient='index')
+
+
+def read_batch_results(benchmark_data_path: Path) -> pd.DataFrame:
+    """
+    Read the benchmark results and average them for each batch.
+
+    Only the benchmark runs are taken into account. If there are none of them, the warm-up runs are used.
+
+    :param benchmark_data_path: Path to the csv file with the benchmark results.
+    :return: Dataframe indexed by batch with the mean time and RSS of each batch.
+    """
+    data = pd.read_csv(benchmark_data_path)
+
+    benchmark_runs = data[data[BenchmarkResultColumn.TYPE.value] == RunType.BENCHMARK.value]
+    if benchmark_runs.empty:
+        logger.warning('There are no benchmark runs. The warm-up runs will be used.')
+        benchmark_runs = data
+
+    return benchmark_runs.groupby(BenchmarkResultColumn.BATCH.value)[BenchmarkResultColumn.metrics()].mean()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    configure_parser(parser)
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        filename=args.logs_path,
+        level=logging.INFO,
+        format='%(asctime)s | %(levelname)s | %(name)s | %(message)s',
+        force=True,
+    )
+
+    language = Language.from_value(args.language)
+
+    batch_metrics = read_batch_metrics(args.benchmark_output / 'batches', language)
+    batch_results = read_batch_results(args.benchmark_output / f'benchmark_data.{Extensions.CSV.value}')
+
+    features: List[str] = args.features or sorted(batch_metrics.columns)
+
+    model = fit_cost_model(
+        batch_metrics,
+        batch_results[BenchmarkResultColumn.TIME.value],
+        batch_results[BenchmarkResultColumn.RSS.value],
+        features,
+        language,
+    )
+
+    logger.info(f'Time: {model.time_intercept} + {dict(zip(model.features, model.time_coefficients))}')
+    logger.info(f'RSS: {model.rss_intercept} + {dict(zip(model.features, model.rss_coefficients))}')
+
+    model.save(args.output_path)
+
+
+if __name__ == '__main__':
+    main()
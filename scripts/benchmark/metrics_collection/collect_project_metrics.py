@@ -5,28 +5,45 @@ It accepts:
     * ``dataset_path`` -- Path to the dataset with projects.
     * ``config_path`` -- Path to a yaml config. More information about the config can be found in the README file.
 
+Besides the metric file in each project, the metrics of all projects are saved to the metrics store in the dataset root.
+
 You can also specify:
     * ``--n-cpu`` -- Number of workers for a parallel execution. By default, it is equal to the number of CPUs.
+    * ``--incremental`` -- Skip the projects that have not changed since their metrics were collected last time.
+    * ``--chunk-size`` -- Size of the file chunks in megabytes. The projects larger than it are split into chunks
+      that are processed by different workers. By default, it is 64. If it is 0, the projects are not split.
     * ``--logs-path`` -- Path to a file where you want to save the logs. By default, the logs will be written to stderr.
 """
 import json
 import logging
 from argparse import ArgumentParser
-from functools import partial
-from multiprocessing import Pool
+from collections import defaultdict
+from dataclasses import dataclass
+from multiprocessing.pool import Pool
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple, Union
 
 from benchmark.metrics_collection.config import SCHEMA
 from benchmark.metrics_collection.metrics import MetricName
+from benchmark.metrics_collection.fingerprint import get_project_fingerprint
+from benchmark.metrics_collection.metrics_store import MetricsStore, MetricsStoreEntry
+from benchmark.metrics_collection.project_scanner import (
+    collect_values,
+    merge_values,
+    scan_files,
+    scan_project,
+    split_into_chunks,
+)
 
 from utils.file_utils import FileSystemItem, get_all_file_system_items
 from utils.config_utils import check_config
+from utils.language import Language
 
 from yaml import dump, safe_load
 
 METRICS_FILE = 'project_metrics.yaml'
 TOTAL_FIELD_NAME = 'total'
+DEFAULT_CHUNK_SIZE = 64
 
 
 logger = logging.getLogger(__name__)
@@ -51,6 +68,25 @@ def configure_parser(parser: ArgumentParser) -> None:
         help='Number of workers for a parallel execution. By default, it is equal to the number of CPUs in the system.',
     )
 
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help=(
+            'Skip the projects that have not changed since their metrics were collected last time: '
+            'their HEAD commit or, if they are not git repositories, their files are the same.'
+        ),
+    )
+
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=(
+            'Size of the file chunks in megabytes. The projects larger than it are split into chunks that are '
+            'processed by different workers. If it is 0, the projects are not split.'
+        ),
+    )
+
     parser.add_argument(
         '--logs-path',
         type=lambda value: Path(value),
@@ -58,6 +94,25 @@ def configure_parser(parser: ArgumentParser) -> None:
     )
 
 
+@dataclass
+class ProjectChunks:
+    project: Path
+    fingerprint: Optional[str]
+    chunks: List[List[Tuple[Path, int]]]
+
+
+def _get_metric_values(values: Dict[MetricName, Dict[Language, int]]) -> Dict[str, Dict[str, int]]:
+    metric_values = {
+        metric.value: {language.value: value for language, value in language_values.items()}
+        for metric, language_values in values.items()
+    }
+
+    for metric, language_metrics in metric_values.items():
+        metric_values[metric][TOTAL_FIELD_NAME] = sum(metric for metric in language_metrics.values())
+
+    return metric_values
+
+
 def collect_project_metrics(
     project: Path,
     metric_configs: Dict[MetricName, Dict],
@@ -65,7 +120,8 @@ def collect_project_metrics(
     """
     Collect all metrics specified in ``metric_configs`` from ``project``.
 
-    All metrics will be grouped by language and also a total value will be given.
+    All metrics will be grouped by language and also a total value will be given. The project files are scanned
+    only once: each of them is read at most once, and all the metrics are collected from the same content.
 
     :param project: Path to the project.
     :param metric_configs: Dictionary, where for each metric to be collect, a config is specified.
@@ -75,44 +131,165 @@ def collect_project_metrics(
     if not project.exists() or not project.is_dir():
         return None
 
-    files = get_all_file_system_items(project)
-    files = [file for file in files if file.name != METRICS_FILE and file.exists()]
-
-    if not files:
+    values = scan_project(project, metric_configs, {METRICS_FILE})
+    if values is None:
         return None
 
-    metric_values = {
-        metric.value: {language.value: value for language, value in metric.execute(files, **config).items()}
-        for metric, config in metric_configs.items()
-    }
-
-    for metric, language_metrics in metric_values.items():
-        metric_values[metric][TOTAL_FIELD_NAME] = sum(metric for metric in language_metrics.values())
-
-    return metric_values
+    return _get_metric_values(values)
 
 
-def collect_and_save_metrics(project: Path, metric_configs: Dict[MetricName, Dict]) -> None:
+def collect_and_save_metrics(
+    project: Path,
+    metric_configs: Dict[MetricName, Dict],
+    store: Optional[MetricsStore] = None,
+    previous_entry: Optional[Tuple[int, Optional[str]]] = None,
+    chunk_size: Optional[int] = None,
+    incremental: bool = False,
+) -> Union[MetricsStoreEntry, ProjectChunks, None]:
     """
     Collect all metrics specified in ``metric_configs`` from ``project`` and save them.
 
     Metrics will be saved in the project root in yaml format.
 
+    In the incremental mode, the project fingerprint is computed and saved to the store entry. If the previous store
+    entry of the project is passed and the project fingerprint has not changed since then, the metrics are not
+    collected again. If the metric file has been removed meanwhile (e.g. ``git clean`` removes it
+    when the dataset is updated), it is restored from the metrics store.
+
+    If the chunk size is passed and the total size of the project files exceeds it, the metrics are not collected.
+    Instead, the project files are split into chunks, whose values can be collected in parallel with
+    ``collect_values`` and then saved with ``save_chunked_metrics``.
+
     :param project: Path to the project.
     :param metric_configs: Dictionary, where for each metric to be collect, a config is specified.
+    :param store: Metrics store of the dataset. Used to restore the removed metric files.
+    :param previous_entry: Modification time of the metric file in nanoseconds and the project fingerprint recorded in
+    the metrics store.
+    :param chunk_size: Size of the file chunks in bytes. By default, the project is not split.
+    :param incremental: Whether to compute the project fingerprint. Otherwise, it is not computed, since it may take
+    an extra walk over the project files, and the previous entry is ignored.
+    :return: Entry for the metrics store or, if the project is split, its chunks. If the project does not exist,
+    is empty or has not changed, None will be returned.
     """
-    logging.info(f'Collecting {project.name} metrics.')
-    metrics = collect_project_metrics(project, metric_configs)
+    if not project.is_dir():
+        logging.warning(f'{project.name} does not exist.')
+        return None
+
+    save_path = project / METRICS_FILE
+    fingerprint = get_project_fingerprint(project, metric_configs, {METRICS_FILE}) if incremental else None
+
+    if fingerprint is not None and previous_entry is not None and previous_entry[1] == fingerprint:
+        previous_mtime_ns, _ = previous_entry
+        if save_path.exists() and save_path.stat().st_mtime_ns == previous_mtime_ns:
+            logging.info(f'{project.name} has not changed. Skipping.')
+            return None
+
+        metrics = store.get_metrics(project.name) if store is not None and not save_path.exists() else None
+        if metrics:
+            logging.info(f'{project.name} has not changed. Restoring its metrics from the metrics store.')
+            return _save_metrics(project, metrics, fingerprint)
+
+    if chunk_size is None:
+        logging.info(f'Collecting {project.name} metrics.')
+        metrics = collect_project_metrics(project, metric_configs)
+    else:
+        files = [(file, stat.st_size) for file, stat in scan_files(project, {METRICS_FILE})]
+        if sum(size for _, size in files) > chunk_size:
+            chunks = split_into_chunks(files, chunk_size)
+            logging.info(f'{project.name} is large. Splitting its files into {len(chunks)} chunks.')
+            return ProjectChunks(project, fingerprint, chunks)
+
+        logging.info(f'Collecting {project.name} metrics.')
+        metrics = _get_metric_values(collect_values(files, metric_configs)) if files else None
 
     if metrics is None or len(metrics) == 0:
         logging.warning(f'{project.name} does not exist or is empty.')
-        return
+        return None
 
     logging.info(f'Saving {project.name} metrics.')
+    return _save_metrics(project, metrics, fingerprint)
+
+
+def save_chunked_metrics(
+    project_chunks: ProjectChunks,
+    partial_values: List[Dict[MetricName, Dict[Language, int]]],
+) -> MetricsStoreEntry:
+    """
+    Merge the metric values collected from the chunks of a project and save them.
+
+    Metrics will be saved in the project root in yaml format.
+
+    :param project_chunks: Chunks of the project.
+    :param partial_values: Metric values of each chunk grouped by language.
+    :return: Entry for the metrics store.
+    """
+    project = project_chunks.project
+    metrics = _get_metric_values(merge_values(partial_values))
+
+    logging.info(f'Saving {project.name} metrics.')
+    return _save_metrics(project, metrics, project_chunks.fingerprint)
+
+
+def _save_metrics(
+    project: Path,
+    metrics: Dict[str, Dict[str, int]],
+    fingerprint: Optional[str],
+) -> MetricsStoreEntry:
     save_path = project / METRICS_FILE
     with open(save_path, mode='w') as output:
         dump(metrics, output)
 
+    return MetricsStoreEntry(project.name, save_path.stat().st_mtime_ns, metrics, fingerprint)
+
+
+def _collect_and_save_metrics(arguments: Tuple) -> Union[MetricsStoreEntry, ProjectChunks, None]:
+    return collect_and_save_metrics(*arguments)
+
+
+def _collect_chunk_values(
+    arguments: Tuple[int, List[Tuple[Path, int]], Dict[MetricName, Dict]],
+) -> Tuple[int, Dict[MetricName, Dict[Language, int]]]:
+    project_index, chunk, metric_configs = arguments
+    return project_index, collect_values(chunk, metric_configs)
+
+
+def collect_chunked_metrics(
+    pool: Pool,
+    projects_chunks: List[ProjectChunks],
+    metric_configs: Dict[MetricName, Dict],
+) -> List[MetricsStoreEntry]:
+    """
+    Collect the metrics of the split projects chunk by chunk in parallel and save them.
+
+    The chunks of all the projects are distributed among the workers, which take the next chunk as soon as they are
+    done with the previous one. The largest chunks are processed first, so the smallest ones fill up the tail. The
+    metrics of a project are saved as soon as all its chunks are processed.
+
+    :param pool: Pool of workers.
+    :param projects_chunks: Chunks of the projects.
+    :param metric_configs: Dictionary, where for each metric to be collect, a config is specified.
+    :return: Entries for the metrics store.
+    """
+    tasks = [
+        (project_index, chunk, metric_configs)
+        for project_index, project_chunks in enumerate(projects_chunks)
+        for chunk in project_chunks.chunks
+    ]
+    tasks.sort(key=lambda task: sum(size for _, size in task[1]), reverse=True)
+
+    entries = []
+    partial_values = defaultdict(list)
+    for index, (project_index, values) in enumerate(pool.imap_unordered(_collect_chunk_values, tasks), start=1):
+        partial_values[project_index].append(values)
+
+        project_chunks = projects_chunks[project_index]
+        if len(partial_values[project_index]) == len(project_chunks.chunks):
+            entries.append(save_chunked_metrics(project_chunks, partial_values.pop(project_index)))
+
+        logging.info(f'Processed {index} of {len(tasks)} chunks.')
+
+    return entries
+
 
 def main():
     parser = ArgumentParser()
@@ -141,8 +318,35 @@ def main():
         MetricName(metric): config if config is not None else {} for metric, config in config['metrics'].items()
     }
 
+    store = MetricsStore.for_dataset(args.dataset_path)
+    previous_entries = store.load_fingerprints() if args.incremental else {}
+    chunk_size = args.chunk_size * 2 ** 20 if args.chunk_size > 0 else None
+
+    updated_entries = []
+    projects_chunks = []
     with Pool(args.n_cpu) as pool:
-        pool.map(partial(collect_and_save_metrics, metric_configs=metric_configs), projects)
+        tasks = [
+            (project, metric_configs, store, previous_entries.get(project.name), chunk_size, args.incremental)
+            for project in projects
+        ]
+
+        # The results are handled in the order of completion, so the progress is not held up by the large projects
+        for index, result in enumerate(pool.imap_unordered(_collect_and_save_metrics, tasks), start=1):
+            if isinstance(result, ProjectChunks):
+                projects_chunks.append(result)
+            elif result is not None:
+                updated_entries.append(result)
+
+            logging.info(f'Processed {index} of {len(projects)} projects.')
+
+        if projects_chunks:
+            logging.info(f'Collecting the metrics of {len(projects_chunks)} large projects by chunks.')
+            updated_entries.extend(collect_chunked_metrics(pool, projects_chunks, metric_configs))
+
+    logging.info(f'The metrics of {len(updated_entries)} of {len(projects)} projects were updated.')
+
+    logging.info('Saving the metrics store.')
+    store.update(updated_entries)
 
 
 if __name__ == '__main__':
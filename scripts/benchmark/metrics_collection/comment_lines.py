@@ -0,0 +1,356 @@
+"""
+This module contains a counter of the comment lines of Python and Kotlin files.
+
+The counter is a state machine that processes a file in one pass without building per-line strings. It jumps between
+the openings of the multi-line lexemes, i.e. the triple-quoted strings in Python and the block comments and raw strings
+in Kotlin, which are searched with regexps. If an opening does not start its line, only this line is lexed to check
+that the opening does not belong to a single-line string or comment. Between the multi-line lexemes, the lines that
+start with a single-line comment are counted by a regexp over the whole region.
+
+A line is a comment line if it has at least one non-whitespace character and all such characters belong to comments.
+The blank lines are never comment lines, even inside the multi-line comments: they are handled separately.
+
+In Python, the comments are the ``#`` comments and the docstrings, i.e. the triple-quoted strings that start
+a statement: they start a line outside of any brackets and do not continue an expression. To know the bracket depth,
+the brackets are counted in the code of each region, without the single-line strings and comments. In Kotlin,
+the comments are the ``//`` comments and the (possibly nested) ``/* */`` comments.
+"""
+import re
+from typing import AnyStr, Dict, Optional, Pattern, Tuple
+
+from utils.language import Language
+
+# Whitespace that is removed by ``str.strip``, except for "\n". In ASCII text, ``str.strip`` also removes
+# the information separators, unlike ``bytes.strip``.
+ASCII_WHITESPACE = r'[ \t\x0b\x0c\x1c-\x1f]'
+ASCII_WHITESPACE_CHARACTERS = b' \t\x0b\x0c\x1c\x1d\x1e\x1f'
+UNICODE_WHITESPACE = r'[^\S\n]'
+ASCII_NON_WHITESPACE = r'[^\n \t\x0b\x0c\x1c-\x1f]'
+UNICODE_NON_WHITESPACE = r'\S'
+
+# The lines that start with a single-line comment
+_PYTHON_COMMENT_LINE_PATTERN = r'\n{whitespace}*#'
+_KOTLIN_COMMENT_LINE_PATTERN = r'\n{whitespace}*//'
+
+# The code of a line before its first comment or multi-line lexeme. The quotes are written as \x22 and \x27
+# to avoid escaping.
+_PYTHON_LINE_CODE_PATTERN = (
+    r'(?:'
+    r'[^\n#\x22\x27]+'
+    r'|\x22(?!\x22\x22)[^\x22\\\n]*(?:\\.[^\x22\\\n]*)*\x22?'
+    r'|\x27(?!\x27\x27)[^\x27\\\n]*(?:\\.[^\x27\\\n]*)*\x27?'
+    r')*'
+)
+_KOTLIN_LINE_CODE_PATTERN = (
+    r'(?:'
+    r'[^\n/\x22\x27]+'
+    r'|/(?![/*])'
+    r'|\x22(?!\x22\x22)[^\x22\\\n]*(?:\\.[^\x22\\\n]*)*\x22?'
+    r'|\x27[^\x27\\\n]*(?:\\.[^\x27\\\n]*)*\x27?'
+    r')*'
+)
+
+# The single-line strings and comments of a region between the multi-line lexemes, which can contain any brackets.
+# The pattern is applied only to the lexical characters of the region.
+_PYTHON_NON_CODE_PATTERN = (
+    r'#[^\n]*'
+    r'|\x22[^\x22\\\n]*(?:\\.[^\x22\\\n]*)*\x22?'
+    r'|\x27[^\x27\\\n]*(?:\\.[^\x27\\\n]*)*\x27?'
+)
+
+# The text before a multi-line comment on its first line, except for the indentation, if the comment starts the line
+_LINE_PREFIXES = {
+    Language.PYTHON: ['', 'r', 'R', 'u', 'U'],
+    Language.KOTLIN: [''],
+}
+
+# The block comments that start and end on the same line and do not contain nested comments, followed by a line comment
+_KOTLIN_SINGLE_LINE_COMMENTS_PATTERN = (
+    r'(?:/\*[^*/\n]*(?:(?:\*(?!/)|/(?!\*))[^*/\n]*)*\*/{whitespace}*)*'
+    r'(?://[^\n]*)?(?=\n)'
+)
+
+# The rest of the line after a multi-line comment if it has no code
+_PYTHON_CLOSING_LINE_PATTERN = r'{whitespace}*(?:#[^\n]*)?(?=\n)'
+_KOTLIN_CLOSING_LINE_PATTERN = r'{whitespace}*' + _KOTLIN_SINGLE_LINE_COMMENTS_PATTERN
+
+# The lines that are not blank. The whitespace does not include "\n", so the match does not leave the line.
+_NON_EMPTY_LINE_PATTERN = r'\n{whitespace}*{non_whitespace}'
+
+# The openings of the multi-line lexemes. Each pattern starts with a literal, so it is searched fast, and consumes
+# only one character, so the overlapping openings, e.g. in a run of quotes, are found too.
+_MULTI_LINE_OPENING_PATTERNS = {
+    Language.PYTHON: [r'\x22(?=\x22\x22)', r'\x27(?=\x27\x27)'],
+    Language.KOTLIN: [r'/(?=\*)', r'\x22(?=\x22\x22)'],
+}
+
+# A docstring cannot follow these characters, since they continue an expression
+_PYTHON_EXPRESSION_CONTINUATION = '([{,=+-*/%<>|&^~@.\\'
+
+# The characters that delimit the single-line strings and comments in Python, and the brackets. The other characters are
+# removed before the lexing, except for the escaped ones, which are removed along with their backslashes first.
+_PYTHON_LEXICAL_CHARACTERS = b'()[]{}#\x22\x27\\\n'
+_PYTHON_NON_LEXICAL_CHARACTERS = bytes(sorted(set(range(256)) - set(_PYTHON_LEXICAL_CHARACTERS)))
+_PYTHON_ESCAPE_SEQUENCE_PATTERN = rb'\\[^\n]'
+_PYTHON_OPENING_BRACKETS = b'([{'
+_PYTHON_CLOSING_BRACKETS = b')]}'
+
+COMMENT_LANGUAGES = frozenset({Language.PYTHON, Language.KOTLIN})
+
+
+def _compile(pattern: str, binary: bool) -> Pattern:
+    pattern = pattern.replace('{whitespace}', ASCII_WHITESPACE if binary else UNICODE_WHITESPACE)
+    pattern = pattern.replace('{non_whitespace}', ASCII_NON_WHITESPACE if binary else UNICODE_NON_WHITESPACE)
+    return re.compile(pattern.encode() if binary else pattern, re.DOTALL)
+
+
+def _compile_for_languages(patterns: Dict[Language, str]) -> Dict[Tuple[Language, bool], Pattern]:
+    return {
+        (language, binary): _compile(pattern, binary)
+        for language, pattern in patterns.items()
+        for binary in [False, True]
+    }
+
+
+_COMMENT_LINE_REGEXPS = _compile_for_languages({
+    Language.PYTHON: _PYTHON_COMMENT_LINE_PATTERN,
+    Language.KOTLIN: _KOTLIN_COMMENT_LINE_PATTERN,
+})
+_LINE_CODE_REGEXPS = _compile_for_languages({
+    Language.PYTHON: _PYTHON_LINE_CODE_PATTERN,
+    Language.KOTLIN: _KOTLIN_LINE_CODE_PATTERN,
+})
+_CLOSING_LINE_REGEXPS = _compile_for_languages({
+    Language.PYTHON: _PYTHON_CLOSING_LINE_PATTERN,
+    Language.KOTLIN: _KOTLIN_CLOSING_LINE_PATTERN,
+})
+_NON_EMPTY_LINE_REGEXPS = {binary: _compile(_NON_EMPTY_LINE_PATTERN, binary) for binary in [False, True]}
+_PYTHON_NON_CODE_REGEXP = _compile(_PYTHON_NON_CODE_PATTERN, binary=True)
+_PYTHON_ESCAPE_SEQUENCE_REGEXP = re.compile(_PYTHON_ESCAPE_SEQUENCE_PATTERN)
+_LINE_PREFIX_SETS = {
+    (language, binary): frozenset(prefix.encode() if binary else prefix for prefix in prefixes)
+    for language, prefixes in _LINE_PREFIXES.items()
+    for binary in [False, True]
+}
+_MULTI_LINE_OPENING_REGEXPS = {
+    (language, binary): [_compile(pattern, binary) for pattern in patterns]
+    for language, patterns in _MULTI_LINE_OPENING_PATTERNS.items()
+    for binary in [False, True]
+}
+
+
+def _find_python_string_end(text: AnyStr, start: int) -> int:
+    quotes = text[start:start + 3]
+    backslash = b'\\' if isinstance(text, bytes) else '\\'
+
+    end = text.find(quotes, start + 3)
+    while end != -1:
+        # The quotes are escaped if they follow an odd number of backslashes
+        escape_start = end
+        while text[escape_start - 1:escape_start] == backslash:
+            escape_start -= 1
+
+        if (end - escape_start) % 2 == 0:
+            return end + 3
+
+        end = text.find(quotes, end + 1)
+
+    return len(text)
+
+
+def _find_kotlin_raw_string_end(text: AnyStr, start: int) -> int:
+    quotes = text[start:start + 3]
+
+    end = text.find(quotes, start + 3)
+    if end == -1:
+        return len(text)
+
+    # The raw strings can end with quotes, e.g. """"quoted"""" is "quoted"
+    end += 3
+    while text[end:end + 1] == quotes[:1]:
+        end += 1
+
+    return end
+
+
+def _find_block_comment_end(text: AnyStr, start: int) -> int:
+    opening, closing = (b'/*', b'*/') if isinstance(text, bytes) else ('/*', '*/')
+
+    depth = 1
+    position = start + 2
+    while depth > 0:
+        closing_start = text.find(closing, position)
+        if closing_start == -1:
+            return len(text)
+
+        # The markers do not overlap, so in "/*/" only the opening one counts
+        opening_start = text.find(opening, position, closing_start + 1)
+        if opening_start == -1:
+            depth -= 1
+            position = closing_start + 2
+        else:
+            depth += 1
+            position = opening_start + 2
+
+    return position
+
+
+def _find_previous_python_code_character(text: AnyStr, position: int) -> Optional[AnyStr]:
+    """
+    Find the last non-whitespace character before the position that does not belong to a comment.
+
+    :param text: Text of a Python file.
+    :param position: Position of a line start to search before.
+    :return: The character. If there is no such character, None will be returned.
+    """
+    binary = isinstance(text, bytes)
+    line_code_regexp = _LINE_CODE_REGEXPS[Language.PYTHON, binary]
+    newline, comment_start = (b'\n', b'#') if binary else ('\n', '#')
+    whitespace = ASCII_WHITESPACE_CHARACTERS if binary else None
+
+    line_end = position
+    while line_end > 0:
+        line_start = text.rfind(newline, 0, line_end) + 1
+
+        # Usually, the line ends with code and has no comment, so the lexing is not needed
+        last_character = text[max(line_start, line_end - 1):line_end]
+        if last_character.strip(whitespace) and text.find(comment_start, line_start, line_end) == -1:
+            return last_character
+
+        code_end = line_code_regexp.match(text, line_start, line_end).end()
+        code = text[line_start:code_end].rstrip(whitespace)
+        if code:
+            return code[-1:]
+
+        line_end = line_start - 1
+
+    return None
+
+
+def _get_python_bracket_depth_change(code: AnyStr) -> int:
+    """
+    Count the opening brackets minus the closing brackets of the Python code, except for its strings and comments.
+
+    :param code: Code without multi-line lexemes. If it is str, it is lexed as UTF-8, where only the ASCII characters
+    matter.
+    :return: The change of the bracket depth.
+    """
+    if isinstance(code, str):
+        code = code.encode('utf-8', 'surrogatepass')
+
+    # Usually, most of the characters are not lexical, so the lexing regexp runs over a much shorter text
+    code = _PYTHON_ESCAPE_SEQUENCE_REGEXP.sub(b'', code).translate(None, _PYTHON_NON_LEXICAL_CHARACTERS)
+    code = _PYTHON_NON_CODE_REGEXP.sub(b'', code)
+    return sum(map(code.count, _PYTHON_OPENING_BRACKETS)) - sum(map(code.count, _PYTHON_CLOSING_BRACKETS))
+
+
+def count_comment_lines(text: AnyStr, language: Language) -> int:
+    """
+    Count the comment lines of a Python or Kotlin file.
+
+    :param text: Content of the file, where all the line endings are LF, the first line starts with LF, and the last
+    line ends with LF. If it is bytes, it must be ASCII.
+    :param language: Language of the file. Must be one of ``COMMENT_LANGUAGES``.
+    :return: Number of comment lines.
+    """
+    binary = isinstance(text, bytes)
+    comment_line_regexp = _COMMENT_LINE_REGEXPS[language, binary]
+    line_code_regexp = _LINE_CODE_REGEXPS[language, binary]
+    line_prefixes = _LINE_PREFIX_SETS[language, binary]
+    closing_line_regexp = _CLOSING_LINE_REGEXPS[language, binary]
+    non_empty_line_regexp = _NON_EMPTY_LINE_REGEXPS[binary]
+    is_python = language == Language.PYTHON
+    if binary:
+        newline, backslash, comment_start, asterisk = b'\n', b'\\', b'#', b'*'
+        block_comment_opening, block_comment_closing = b'/*', b'*/'
+        whitespace = ASCII_WHITESPACE_CHARACTERS
+        expression_continuation = _PYTHON_EXPRESSION_CONTINUATION.encode()
+    else:
+        newline, backslash, comment_start, asterisk = '\n', '\\', '#', '*'
+        block_comment_opening, block_comment_closing = '/*', '*/'
+        whitespace = None
+        expression_continuation = _PYTHON_EXPRESSION_CONTINUATION
+
+    opening_starts = [
+        match.start()
+        for opening_regexp in _MULTI_LINE_OPENING_REGEXPS[language, binary]
+        for match in opening_regexp.finditer(text)
+    ]
+    opening_starts.sort()
+
+    number_of_comment_lines = 0
+
+    # Number of the Python brackets that are open before the region
+    bracket_depth = 0
+
+    # The region is the code between the multi-line lexemes. The openings before the position are already processed.
+    region_start = 0
+    position = 0
+    for start in opening_starts:
+        if start < position:
+            continue
+
+        line_start = text.rfind(newline, 0, start) + 1
+
+        # Usually, the opening starts its line, so the line has nothing to lex
+        starts_line = line_start >= position and text[line_start:start].lstrip(whitespace) in line_prefixes
+        if not starts_line:
+            code_end = line_code_regexp.match(text, line_start if line_start > position else position).end()
+            if code_end != start:
+                # The opening belongs to a single-line comment or string
+                position = text.find(newline, start) if code_end < start else code_end
+                continue
+
+        number_of_comment_lines += len(comment_line_regexp.findall(text, region_start, start))
+
+        if is_python:
+            end = text.find(text[start:start + 3], start + 3)
+            end = end + 3 if end != -1 and text[end - 1:end] != backslash else _find_python_string_end(text, start)
+
+            # The extra closing brackets are syntax errors, they do not close the next brackets
+            bracket_depth = max(bracket_depth + _get_python_bracket_depth_change(text[region_start:start]), 0)
+
+            # Inside the brackets, a string continues an expression, e.g. an implicit concatenation
+            is_comment = starts_line and bracket_depth == 0
+            if is_comment:
+                # Usually, the previous line ends with code and has no comment, so the lexing is not needed
+                previous_line_end = line_start - 1
+                previous_line_start = text.rfind(newline, 0, previous_line_end) + 1
+                previous_character = text[max(previous_line_start, previous_line_end - 1):previous_line_end]
+                if (
+                    not previous_character.strip(whitespace)
+                    or text.find(comment_start, previous_line_start, previous_line_end) != -1
+                ):
+                    previous_character = _find_previous_python_code_character(text, previous_line_end)
+
+                is_comment = previous_character is None or previous_character not in expression_continuation
+        elif text[start + 1:start + 2] == asterisk:
+            end = text.find(block_comment_closing, start + 2)
+            if end == -1 or text.find(block_comment_opening, start + 2, end + 1) != -1:
+                end = _find_block_comment_end(text, start)
+            else:
+                end += 2
+
+            is_comment = True
+        else:
+            end = _find_kotlin_raw_string_end(text, start)
+            is_comment = False
+
+        region_start = position = end
+        if is_comment:
+            is_closing_line_clean = starts_line
+            first_line_end = text.find(newline, start, end)
+            if first_line_end != -1:
+                number_of_comment_lines += starts_line
+
+                last_line_start = text.rfind(newline, start, end) + 1
+                number_of_comment_lines += len(non_empty_line_regexp.findall(text, first_line_end, last_line_start))
+                is_closing_line_clean = True
+
+            closing_line_match = closing_line_regexp.match(text, end) if is_closing_line_clean else None
+            if closing_line_match is not None:
+                number_of_comment_lines += 1
+                region_start = position = closing_line_match.end()
+
+    number_of_comment_lines += len(comment_line_regexp.findall(text, region_start))
+    return number_of_comment_lines
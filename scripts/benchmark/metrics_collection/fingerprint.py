@@ -0,0 +1,111 @@
+"""
+This module contains functions that compute a fingerprint of a project, which changes whenever the project changes.
+
+If the project is a git repository, the fingerprint is its HEAD commit, which is read directly from the ``.git``
+folder. Otherwise, the fingerprint is built from the number, the total size and the latest modification time of
+the project files.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from benchmark.metrics_collection.metrics import MetricName
+
+GIT_FOLDER = '.git'
+REF_PREFIX = 'ref: '
+
+
+def get_head_commit(project: Path) -> Optional[str]:
+    """
+    Read the HEAD commit of a git repository without running git.
+
+    :param project: Path to the project.
+    :return: Hash of the HEAD commit. If the project is not a git repository or the commit cannot be resolved, None will
+    be returned.
+    """
+    git_folder = project / GIT_FOLDER
+    if not git_folder.is_dir():
+        return None
+
+    try:
+        head = (git_folder / 'HEAD').read_text().strip()
+        if not head.startswith(REF_PREFIX):
+            # Detached HEAD
+            return head
+
+        ref = head[len(REF_PREFIX):]
+        ref_path = git_folder / ref
+        if ref_path.is_file():
+            return ref_path.read_text().strip()
+
+        packed_refs_path = git_folder / 'packed-refs'
+        if not packed_refs_path.is_file():
+            return None
+
+        with open(packed_refs_path) as file:
+            for line in file:
+                commit, _, name = line.strip().partition(' ')
+                if name == ref:
+                    return commit
+    except OSError:
+        return None
+
+    return None
+
+
+def get_directory_fingerprint(project: Path, ignored_files: Optional[Set[str]] = None) -> str:
+    """
+    Build a fingerprint of the project files from their metadata, without reading them.
+
+    :param project: Path to the project.
+    :param ignored_files: Names of the files in the project root that must not be taken into account.
+    :return: Fingerprint with the number of files, their total size and the latest modification time.
+    """
+    ignored_files = ignored_files or set()
+
+    number_of_files = 0
+    total_size = 0
+    latest_mtime_ns = 0
+    # The modification times of the directories are not used, since saving the metric file changes them
+    for root, _, files in os.walk(project):
+        for file in files:
+            if root == str(project) and file in ignored_files:
+                continue
+
+            try:
+                stat = os.stat(os.path.join(root, file))
+            except OSError:
+                # Broken symlinks
+                continue
+
+            number_of_files += 1
+            total_size += stat.st_size
+            latest_mtime_ns = max(latest_mtime_ns, stat.st_mtime_ns)
+
+    return f'{number_of_files}:{total_size}:{latest_mtime_ns}'
+
+
+def get_project_fingerprint(
+    project: Path,
+    metric_configs: Dict[MetricName, Dict],
+    ignored_files: Optional[Set[str]] = None,
+) -> str:
+    """
+    Compute a fingerprint of the project and the metric configs it is processed with.
+
+    :param project: Path to the project.
+    :param metric_configs: Dictionary, where for each metric to be collected, a config is specified.
+    :param ignored_files: Names of the files in the project root that must not be taken into account.
+    :return: Fingerprint, which changes if the HEAD commit of the project, its files (if it is not a git repository) or
+    the metric configs change.
+    """
+    configs = json.dumps({metric.value: config for metric, config in metric_configs.items()}, sort_keys=True)
+    configs_hash = hashlib.sha256(configs.encode('utf-8')).hexdigest()[:16]
+
+    head_commit = get_head_commit(project)
+    if head_commit is not None:
+        return f'{configs_hash}:git:{head_commit}'
+
+    return f'{configs_hash}:fs:{get_directory_fingerprint(project, ignored_files)}'
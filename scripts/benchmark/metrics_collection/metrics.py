@@ -3,8 +3,16 @@ from abc import ABC, abstractmethod
 from enum import Enum, unique
 from os.path import getsize
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Type
-
+from typing import Dict, Iterable, List, Optional, Set, Type
+
+from benchmark.metrics_collection.comment_lines import (
+    ASCII_WHITESPACE,
+    ASCII_WHITESPACE_CHARACTERS,
+    COMMENT_LANGUAGES,
+    UNICODE_WHITESPACE,
+    count_comment_lines,
+)
+from utils.file_utils import get_file_bytes
 from utils.language import Language, group_files_by_language
 from utils.python.requirements_utils import PYTHON_REQUIREMENTS_FILE_NAME_REGEXP, gather_requirements_from_file
 
@@ -46,6 +54,23 @@ class NumberOfFiles(Metric):
         return {language: len(file_group) for language, file_group in group_files_by_language(files).items()}
 
 
+# The patterns match the whole lines of a text where all the line endings are "\n". Each match starts with the "\n"
+# before the line, so the regexp engine can quickly skip to the line starts, and the text must start with "\n" too.
+_EMPTY_LINE_PATTERN = r'\n{whitespace}*(?=\n)'
+_COMMENT_LINE_PATTERN = (
+    r'\n{whitespace}*(?:'
+    r'(?:#|//)[^\n]*'
+    r'|(?=""")[^\n]*"""{whitespace}*'
+    r"|(?=''')[^\n]*'''{whitespace}*"
+    r'|(?=/\*)[^\n]*\*/{whitespace}*'
+    r')(?=\n)'
+)
+
+_BINARY_COMMENT_LINE_REGEXP = re.compile(_COMMENT_LINE_PATTERN.format(whitespace=ASCII_WHITESPACE).encode())
+_TEXT_EMPTY_LINE_REGEXP = re.compile(_EMPTY_LINE_PATTERN.format(whitespace=UNICODE_WHITESPACE))
+_TEXT_COMMENT_LINE_REGEXP = re.compile(_COMMENT_LINE_PATTERN.format(whitespace=UNICODE_WHITESPACE))
+
+
 class NumberOfLines(Metric):
     @classmethod
     def collect_from_files(cls, files: List[Path], **kwargs) -> Dict[Language, int]:
@@ -55,8 +80,9 @@ class NumberOfLines(Metric):
         List of keyword arguments:
 
         - ``ignore_empty_lines`` -- Is it necessary to ignore empty lines. By default, false.
-        - ``ignore_comments`` -- Is it necessary to ignore comments. By default, false. Only Python and Kotlin comment
-          processing is supported.
+        - ``ignore_comments`` -- Is it necessary to ignore comments. By default, false. For Python and Kotlin,
+          the multi-line comments and docstrings are also ignored. For other languages, only the lines that look like
+          Python or Kotlin single-line comments are ignored.
 
         :param files: List of the file paths. All files must exist.
         :param kwargs: Additional arguments. See above.
@@ -70,19 +96,103 @@ class NumberOfLines(Metric):
         for language, file_group in group_files_by_language(files).items():
             lines_by_language[language] = 0
             for file in file_group:
-                with open(file, encoding='utf-8', mode='r', errors='ignore') as f:
-                    for line in f:
-                        if ignore_empty_lines and not line.strip():
-                            continue
+                content = get_file_bytes(file)
+                lines_by_language[language] += cls.count_lines_in_bytes(
+                    content,
+                    ignore_empty_lines,
+                    ignore_comments,
+                    language,
+                )
 
-                        if ignore_comments and cls._is_single_line_comment(line):
-                            continue
+        return lines_by_language
 
-                        # TODO: add multi-line comments support
+    @classmethod
+    def count_lines(cls, lines: Iterable[str], ignore_empty_lines: bool = False, ignore_comments: bool = False) -> int:
+        """
+        Count the lines of a file line by line.
 
-                        lines_by_language[language] += 1
+        Only the single-line comments are recognized.
 
-        return lines_by_language
+        :param lines: Lines of the file.
+        :param ignore_empty_lines: Is it necessary to ignore empty lines.
+        :param ignore_comments: Is it necessary to ignore comments.
+        :return: Number of lines.
+        """
+        number_of_lines = 0
+        for line in lines:
+            if ignore_empty_lines and not line.strip():
+                continue
+
+            if ignore_comments and cls._is_single_line_comment(line):
+                continue
+
+            number_of_lines += 1
+
+        return number_of_lines
+
+    @classmethod
+    def count_lines_in_bytes(
+        cls,
+        content: bytes,
+        ignore_empty_lines: bool = False,
+        ignore_comments: bool = False,
+        language: Optional[Language] = None,
+    ) -> int:
+        """
+        Count the lines of a file from its binary content.
+
+        The content is not split into lines: the line endings are counted with ``bytes.count`` and the empty and
+        comment lines are found over the whole buffer. The content is decoded only if it is not ASCII and the decoding
+        can change the result.
+
+        For Python and Kotlin, the comment lines are counted by ``count_comment_lines``, which also supports
+        the multi-line comments. Otherwise, the result is the same as the one of ``count_lines`` for the lines of
+        the file opened in text mode with the UTF-8 encoding, universal newlines and ignored decoding errors.
+
+        :param content: Content of the file.
+        :param ignore_empty_lines: Is it necessary to ignore empty lines.
+        :param ignore_comments: Is it necessary to ignore comments.
+        :param language: Language of the file.
+        :return: Number of lines.
+        """
+        if not content:
+            return 0
+
+        if content.isascii():
+            text = content
+            newline, carriage_return = b'\n', b'\r'
+            empty_line_regexp, comment_line_regexp = None, _BINARY_COMMENT_LINE_REGEXP
+        elif not ignore_empty_lines and not ignore_comments and b'\r' not in content:
+            # The decoder never drops ASCII bytes, so only the last line can disappear if it is not valid UTF-8
+            last_line = content[content.rfind(b'\n') + 1:]
+            return content.count(b'\n') + (1 if last_line.decode('utf-8', errors='ignore') else 0)
+        else:
+            text = content.decode('utf-8', errors='ignore')
+            newline, carriage_return = '\n', '\r'
+            empty_line_regexp, comment_line_regexp = _TEXT_EMPTY_LINE_REGEXP, _TEXT_COMMENT_LINE_REGEXP
+
+        # Universal newlines
+        if carriage_return in text:
+            text = text.replace(carriage_return + newline, newline).replace(carriage_return, newline)
+
+        if text and not text.endswith(newline):
+            text += newline
+
+        text = newline + text
+        number_of_lines = text.count(newline) - 1
+
+        if ignore_empty_lines and empty_line_regexp is None:
+            # Without the whitespace, the blank lines become empty, so they can be counted without a regexp
+            number_of_lines -= text.translate(None, ASCII_WHITESPACE_CHARACTERS).split(newline).count(b'') - 2
+        elif ignore_empty_lines:
+            number_of_lines -= len(empty_line_regexp.findall(text))
+
+        if ignore_comments and language in COMMENT_LANGUAGES:
+            number_of_lines -= count_comment_lines(text, language)
+        elif ignore_comments:
+            number_of_lines -= len(comment_line_regexp.findall(text))
+
+        return number_of_lines
 
     @staticmethod
     def _is_single_line_comment(line: str) -> bool:
@@ -162,7 +272,15 @@ class NumberOfDependencies(Metric):
         }
 
     @staticmethod
-    def _collect_number_of_python_requirements(files: List[Path]) -> Optional[int]:
+    def is_python_requirements_file(file: Path) -> bool:
+        return re.match(PYTHON_REQUIREMENTS_FILE_NAME_REGEXP, file.name) is not None
+
+    @staticmethod
+    def is_kotlin_requirements_file(file: Path) -> bool:
+        return file.name in ('build.gradle.kts', 'build.gradle')
+
+    @classmethod
+    def _collect_number_of_python_requirements(cls, files: List[Path]) -> Optional[int]:
         """
         Collect the number of python requirements from ``files``.
 
@@ -171,10 +289,7 @@ class NumberOfDependencies(Metric):
         :param files: List of the file paths.
         :return: Number of python requirements. If no files with dependencies are found, None will be returned
         """
-        requirements_files = list(filter(
-            lambda file: re.match(PYTHON_REQUIREMENTS_FILE_NAME_REGEXP, file.name) is not None,
-            files,
-        ))
+        requirements_files = list(filter(cls.is_python_requirements_file, files))
 
         if not requirements_files:
             return None
@@ -192,20 +307,28 @@ class NumberOfDependencies(Metric):
         :param files: List of the file paths.
         :return: Number of kotlin requirements. If no files with dependencies are found, None will be returned
         """
-        requirements_files = list(filter(lambda file: file.name in ('build.gradle.kts', 'build.gradle'), files))
+        requirements_files = list(filter(cls.is_kotlin_requirements_file, files))
         if not requirements_files:
             return None
 
         number_of_requirements = 0
         for requirements_file in requirements_files:
             with open(requirements_file, mode='r', encoding='utf-8', errors='ignore') as f:
-                content = f.read().lower()
-                number_of_requirements += sum(
-                    content.count(statement) for statement in cls._KOTLIN_CONFIGURATION_ACCESSOR_KEYWORDS
-                )
+                number_of_requirements += cls.count_kotlin_requirements(f.read())
 
         return number_of_requirements
 
+    @classmethod
+    def count_kotlin_requirements(cls, content: str) -> int:
+        """
+        Count the number of kotlin requirements in the content of a ``build.gradle.kts`` or ``build.gradle`` file.
+
+        :param content: Content of the file.
+        :return: Number of occurrences of the configuration accessor keywords.
+        """
+        content = content.lower()
+        return sum(content.count(statement) for statement in cls._KOTLIN_CONFIGURATION_ACCESSOR_KEYWORDS)
+
 
 @unique
 class MetricName(Enum):
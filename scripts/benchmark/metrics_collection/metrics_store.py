@@ -0,0 +1,168 @@
+"""
+This module contains a store of the project metrics of a whole dataset.
+
+The store is a SQLite database located in the dataset root. Next to the metrics of each project, it keeps
+the modification time of the project metric file, so that the readers can detect the stale entries and read the metric
+files only for them, and the project fingerprint, so that the metrics collection can skip the unchanged projects.
+"""
+import logging
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRICS_STORE_FILE = 'project_metrics.sqlite'
+
+ProjectMetrics = Dict[str, Dict[str, int]]
+
+
+@dataclass
+class MetricsStoreEntry:
+    project: str
+    mtime_ns: int
+    metrics: ProjectMetrics
+    fingerprint: Optional[str] = None
+
+
+class MetricsStore:
+    """
+    A store of the project metrics keyed by project name.
+
+    The metrics are kept in the long format: one row for each project, metric and field (a language or the total
+    value), so any metric can be loaded for all projects at once.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    @classmethod
+    def for_dataset(cls, dataset: Path) -> 'MetricsStore':
+        return cls(dataset / METRICS_STORE_FILE)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS projects ('
+            'project TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, fingerprint TEXT)',
+        )
+
+        # The stores written before the incremental collection was introduced have no fingerprints
+        columns = {column for _, column, *_ in connection.execute('PRAGMA table_info(projects)')}
+        if 'fingerprint' not in columns:
+            connection.execute('ALTER TABLE projects ADD COLUMN fingerprint TEXT')
+
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS metrics ('
+            'project TEXT NOT NULL, field TEXT NOT NULL, metric TEXT NOT NULL, value NUMERIC, '
+            'PRIMARY KEY (project, field, metric))',
+        )
+        return connection
+
+    def update(self, entries: Iterable[MetricsStoreEntry]) -> None:
+        """
+        Add or replace the metrics of the projects.
+
+        :param entries: Store entries with the metrics in the format of the metric file.
+        """
+        connection = self._connect()
+        try:
+            with connection:
+                for entry in entries:
+                    connection.execute('DELETE FROM metrics WHERE project = ?', (entry.project,))
+                    connection.execute(
+                        'INSERT OR REPLACE INTO projects VALUES (?, ?, ?)',
+                        (entry.project, entry.mtime_ns, entry.fingerprint),
+                    )
+                    connection.executemany(
+                        'INSERT INTO metrics VALUES (?, ?, ?, ?)',
+                        [
+                            (entry.project, field, metric, value)
+                            for metric, values in entry.metrics.items()
+                            if values is not None
+                            for field, value in values.items()
+                            if value is not None
+                        ],
+                    )
+        finally:
+            connection.close()
+
+    def load(self, field: str) -> Dict[str, Tuple[int, Dict[str, int]]]:
+        """
+        Load the metrics of all projects for one field.
+
+        :param field: Language name or the total field name.
+        :return: Dictionary where for each project the modification time of its metric file in nanoseconds and its
+        metrics for the field are specified. If the store does not exist, the dictionary will be empty.
+        """
+        if not self.path.exists():
+            return {}
+
+        try:
+            connection = self._connect()
+        except sqlite3.DatabaseError as error:
+            logger.warning(f'Unable to read the metrics store {self.path}: {error}')
+            return {}
+
+        try:
+            rows = connection.execute('SELECT project, mtime_ns FROM projects')
+            projects = {project: (mtime_ns, {}) for project, mtime_ns in rows}
+
+            rows = connection.execute(
+                'SELECT project, metric, value FROM metrics WHERE field = ? ORDER BY project, metric',
+                (field,),
+            )
+            for project, metric, value in rows:
+                if project in projects:
+                    projects[project][1][metric] = value
+        finally:
+            connection.close()
+
+        return projects
+
+    def load_fingerprints(self) -> Dict[str, Tuple[int, Optional[str]]]:
+        """
+        Load the fingerprints of all projects.
+
+        :return: Dictionary where for each project the modification time of its metric file in nanoseconds and its
+        fingerprint are specified. If the store does not exist, the dictionary will be empty.
+        """
+        if not self.path.exists():
+            return {}
+
+        try:
+            connection = self._connect()
+        except sqlite3.DatabaseError as error:
+            logger.warning(f'Unable to read the metrics store {self.path}: {error}')
+            return {}
+
+        try:
+            rows = connection.execute('SELECT project, mtime_ns, fingerprint FROM projects')
+            return {project: (mtime_ns, fingerprint) for project, mtime_ns, fingerprint in rows}
+        finally:
+            connection.close()
+
+    def get_metrics(self, project: str) -> Optional[ProjectMetrics]:
+        """
+        Get the metrics of a project.
+
+        :param project: Project name.
+        :return: Metrics in the format of the metric file. If there is no project in the store, None will be returned.
+        """
+        if not self.path.exists():
+            return None
+
+        connection = self._connect()
+        try:
+            if connection.execute('SELECT 1 FROM projects WHERE project = ?', (project,)).fetchone() is None:
+                return None
+
+            metrics = {}
+            rows = connection.execute('SELECT metric, field, value FROM metrics WHERE project = ?', (project,))
+            for metric, field, value in rows:
+                metrics.setdefault(metric, {})[field] = value
+        finally:
+            connection.close()
+
+        return metrics
@@ -0,0 +1,143 @@
+"""
+This script compares the line counter of the ``number_of_lines`` metric with the naive line-by-line counter.
+
+For Python and Kotlin, it measures the time of counting the lines of the same files with both counters: the naive one
+decodes each file, splits it into lines and checks every line, while the metric counts the lines in the binary content
+and finds the multi-line comments with a lexer. The files are read into memory in advance, so only the counting is
+measured.
+
+It optionally accepts:
+    * path to a folder with Python and Kotlin files, e.g. a dataset (by default, the files are generated);
+    * number of lines of each generated file (default is 10000);
+    * number of generated files of each language (default is 20);
+    * number of repetitions, the best time of which is taken (default is 5).
+"""
+import argparse
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmark.metrics_collection.comment_lines import COMMENT_LANGUAGES
+from benchmark.metrics_collection.metrics import NumberOfLines
+from benchmark.metrics_collection.project_scanner import decode_lines
+
+from utils.file_utils import get_all_file_system_items, get_file_bytes
+from utils.language import Language
+
+logger = logging.getLogger(__name__)
+
+# Code fragments that the generated files consist of. They include the comment markers inside strings.
+_FRAGMENTS = {
+    Language.PYTHON: [
+        'def function(argument: int) -> int:\n',
+        '    """\n    Docstring.\n\n    :param argument: Argument.\n    """\n',
+        '    value = argument * 2  # Comment\n',
+        '    # Comment\n',
+        "    text = 'String with # inside'\n",
+        '    if value > 10:\n        value -= 10\n',
+        '    for index in range(value):\n        text += str(index)\n',
+        '\n',
+        '    query = """\n    SELECT 1\n    """\n',
+        "    result = {'value': value, 'text': text, 'query': query}\n",
+        '    return len(result)\n\n\n',
+    ],
+    Language.KOTLIN: [
+        'fun function(argument: Int): Int {\n',
+        '    /**\n     * KDoc.\n     *\n     * @param argument Argument.\n     */\n',
+        '    var value = argument * 2 // Comment\n',
+        '    // Comment\n',
+        '    var text = "String with /* inside"\n',
+        '    if (value > 10) {\n        value -= 10\n    }\n',
+        '    for (index in 0 until value) {\n        text += index.toString()\n    }\n',
+        '\n',
+        '    /* Comment */\n',
+        '    val result = mapOf("value" to value, "text" to text)\n',
+        '    return result.size\n}\n\n',
+    ],
+}
+
+
+def configure_parser(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--path',
+        type=lambda value: Path(value),
+        help='Path to a folder with Python and Kotlin files. By default, the files are generated.',
+    )
+    parser.add_argument('--number-of-lines', type=int, default=10000, help='Number of lines of each generated file.')
+    parser.add_argument('--number-of-files', type=int, default=20, help='Number of generated files of each language.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of repetitions, the best time of which is taken.')
+
+
+def generate_content(language: Language, number_of_lines: int) -> bytes:
+    fragments = _FRAGMENTS[language]
+
+    lines = []
+    index = 0
+    while len(lines) < number_of_lines:
+        lines.extend(fragments[index % len(fragments)].splitlines(keepends=True))
+        index += 1
+
+    return ''.join(lines[:number_of_lines]).encode('utf-8')
+
+
+def read_contents(path: Path) -> Dict[Language, List[bytes]]:
+    contents = {language: [] for language in COMMENT_LANGUAGES}
+    for file in get_all_file_system_items(path):
+        language = Language.from_file_path(file)
+        if language in contents:
+            contents[language].append(get_file_bytes(file))
+
+    return contents
+
+
+def count_lines_naively(content: bytes, ignore_empty_lines: bool, ignore_comments: bool, language: Language) -> int:
+    return NumberOfLines.count_lines(decode_lines(content), ignore_empty_lines, ignore_comments)
+
+
+def measure(counter: Callable[..., int], contents: List[bytes], repeat: int, **kwargs) -> float:
+    best_time = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for content in contents:
+            counter(content, **kwargs)
+        best_time = min(best_time, time.perf_counter() - start_time)
+
+    return best_time
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser()
+    configure_parser(parser)
+    args = parser.parse_args()
+
+    if args.path is not None:
+        contents = read_contents(args.path)
+    else:
+        contents = {
+            language: [generate_content(language, args.number_of_lines)] * args.number_of_files
+            for language in COMMENT_LANGUAGES
+        }
+
+    for language in sorted(contents, key=lambda item: item.value):
+        for ignore_empty_lines, ignore_comments in [(False, False), (True, False), (False, True), (True, True)]:
+            kwargs = {
+                'ignore_empty_lines': ignore_empty_lines,
+                'ignore_comments': ignore_comments,
+                'language': language,
+            }
+
+            naive_time = measure(count_lines_naively, contents[language], args.repeat, **kwargs)
+            metric_time = measure(NumberOfLines.count_lines_in_bytes, contents[language], args.repeat, **kwargs)
+
+            logger.info(
+                f'{language.value} ({len(contents[language])} files), ignore_empty_lines: {ignore_empty_lines}, '
+                f'ignore_comments: {ignore_comments}: {metric_time:.3f}s (naive: {naive_time:.3f}s), '
+                f'speedup: {naive_time / metric_time if metric_time > 0 else float("inf"):.1f}x.',
+            )
+
+
+if __name__ == '__main__':
+    main()
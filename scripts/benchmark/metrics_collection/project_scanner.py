@@ -0,0 +1,207 @@
+"""
+This module contains a scanner that collects all the project metrics in a single pass over the project files.
+
+Unlike ``MetricName.execute``, which collects each metric separately, the scanner walks the project once with
+``os.scandir``, stats each file once, and reads each file at most once: only if one of the metrics needs its content.
+All the metrics are fed from the same binary buffer, which is decoded only for the dependency files, and their values
+are the same as the ones of the metric classes.
+
+The values of the disjoint parts of a project can be collected separately and merged, so a large project can be split
+into chunks of files that are processed in parallel.
+"""
+import io
+import os
+from collections import defaultdict
+from itertools import chain
+from pathlib import Path
+from typing import DefaultDict, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from benchmark.metrics_collection.metrics import MetricArgument, MetricName, NumberOfDependencies, NumberOfLines
+from utils.file_utils import get_file_bytes
+from utils.language import Language
+from utils.python.requirements_utils import gather_requirements_from_lines
+
+
+def scan_files(root: Path, ignored_files: Set[str]) -> Iterator[Tuple[Path, os.stat_result]]:
+    """
+    Walk the directory and yield all its files along with their stats.
+
+    Like ``os.walk``, the scanner does not follow the symlinks to directories. The symlinks to files are followed, and
+    the broken ones are skipped.
+
+    :param root: Path to the directory.
+    :param ignored_files: Names of the files that must be skipped at any depth.
+    :yield: File paths along with their stats.
+    """
+    directories = [root]
+    while directories:
+        directory = directories.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+
+        for entry in entries:
+            try:
+                is_directory = entry.is_dir()
+            except OSError:
+                is_directory = False
+
+            if is_directory:
+                if not entry.is_symlink():
+                    directories.append(Path(entry.path))
+                continue
+
+            if entry.name in ignored_files:
+                continue
+
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+
+            yield Path(entry.path), stat
+
+
+def decode_lines(content: bytes) -> List[str]:
+    """
+    Decode the file content into lines in the same way as ``open(path, encoding='utf-8', errors='ignore')`` does.
+
+    :param content: Content of the file.
+    :return: List of lines with universal newlines.
+    """
+    with io.TextIOWrapper(io.BytesIO(content), encoding='utf-8', errors='ignore') as text:
+        return text.readlines()
+
+
+def collect_values(
+    files: Iterable[Tuple[Path, int]],
+    metric_configs: Dict[MetricName, Dict],
+) -> Dict[MetricName, Dict[Language, int]]:
+    """
+    Collect all metrics specified in ``metric_configs`` from the files in a single pass.
+
+    The files can be any part of a project, e.g. a chunk of a large project: the values of its parts can be merged
+    with ``merge_values``.
+
+    :param files: File paths along with their sizes.
+    :param metric_configs: Dictionary, where for each metric to be collected, a config is specified.
+    :return: Metric values grouped by language.
+    """
+    values: Dict[MetricName, DefaultDict[Language, int]] = {metric: defaultdict(int) for metric in metric_configs}
+
+    lines_config = metric_configs.get(MetricName.NUMBER_OF_LINES)
+    ignore_empty_lines = bool(lines_config and lines_config.get(MetricArgument.IGNORE_EMPTY_LINES.value, False))
+    ignore_comments = bool(lines_config and lines_config.get(MetricArgument.IGNORE_COMMENTS.value, False))
+
+    for file, size in files:
+        language = Language.from_file_path(file)
+
+        if MetricName.NUMBER_OF_FILES in values:
+            values[MetricName.NUMBER_OF_FILES][language] += 1
+
+        if MetricName.FILE_SIZE in values:
+            values[MetricName.FILE_SIZE][language] += size
+
+        dependencies_language = None
+        if MetricName.NUMBER_OF_DEPENDENCIES in values:
+            if NumberOfDependencies.is_python_requirements_file(file):
+                dependencies_language = Language.PYTHON
+            elif NumberOfDependencies.is_kotlin_requirements_file(file):
+                dependencies_language = Language.KOTLIN
+
+        if MetricName.NUMBER_OF_LINES not in values and dependencies_language is None:
+            continue
+
+        try:
+            content = get_file_bytes(file)
+        except OSError:
+            continue
+
+        if MetricName.NUMBER_OF_LINES in values:
+            values[MetricName.NUMBER_OF_LINES][language] += NumberOfLines.count_lines_in_bytes(
+                content,
+                ignore_empty_lines,
+                ignore_comments,
+                language,
+            )
+
+        if dependencies_language == Language.PYTHON:
+            number_of_dependencies = len(gather_requirements_from_lines(decode_lines(content), file))
+            values[MetricName.NUMBER_OF_DEPENDENCIES][Language.PYTHON] += number_of_dependencies
+        elif dependencies_language == Language.KOTLIN:
+            number_of_dependencies = NumberOfDependencies.count_kotlin_requirements(''.join(decode_lines(content)))
+            values[MetricName.NUMBER_OF_DEPENDENCIES][Language.KOTLIN] += number_of_dependencies
+
+    return {metric: dict(language_values) for metric, language_values in values.items()}
+
+
+def merge_values(
+    partial_values: Iterable[Dict[MetricName, Dict[Language, int]]],
+) -> Dict[MetricName, Dict[Language, int]]:
+    """
+    Merge the metric values collected from the disjoint parts of a project.
+
+    All the metrics are additive, so the values of the same metric and language are summed up.
+
+    :param partial_values: Metric values of the project parts grouped by language.
+    :return: Metric values of the whole project grouped by language.
+    """
+    values: Dict[MetricName, DefaultDict[Language, int]] = {}
+    for part_values in partial_values:
+        for metric, language_values in part_values.items():
+            metric_values = values.setdefault(metric, defaultdict(int))
+            for language, value in language_values.items():
+                metric_values[language] += value
+
+    return {metric: dict(language_values) for metric, language_values in values.items()}
+
+
+def split_into_chunks(files: List[Tuple[Path, int]], chunk_size: int) -> List[List[Tuple[Path, int]]]:
+    """
+    Split the files into chunks of about the same total size.
+
+    The files are added to a chunk in the given order until the chunk size is reached, so a file larger than the chunk
+    size gets a chunk of its own.
+
+    :param files: File paths along with their sizes.
+    :param chunk_size: Total size of the files in a chunk in bytes.
+    :return: List of chunks.
+    """
+    chunks = []
+    chunk = []
+    total_size = 0
+    for file, size in files:
+        if chunk and total_size + size > chunk_size:
+            chunks.append(chunk)
+            chunk = []
+            total_size = 0
+
+        chunk.append((file, size))
+        total_size += size
+
+    if chunk:
+        chunks.append(chunk)
+
+    return chunks
+
+
+def scan_project(
+    project: Path,
+    metric_configs: Dict[MetricName, Dict],
+    ignored_files: Optional[Set[str]] = None,
+) -> Optional[Dict[MetricName, Dict[Language, int]]]:
+    """
+    Collect all metrics specified in ``metric_configs`` from ``project`` in a single pass.
+
+    :param project: Path to the project.
+    :param metric_configs: Dictionary, where for each metric to be collected, a config is specified.
+    :param ignored_files: Names of the files that must be skipped at any depth.
+    :return: Metric values grouped by language. If there are no files in the project, None will be returned.
+    """
+    files = ((file, stat.st_size) for file, stat in scan_files(project, ignored_files or set()))
+    first_file = next(files, None)
+    if first_file is None:
+        return None
+
+    return collect_values(chain([first_file], files), metric_configs)
@@ -21,6 +21,7 @@ import pandas as pd
 import yaml
 
 from benchmark.metrics_collection.collect_project_metrics import METRICS_FILE, TOTAL_FIELD_NAME
+from benchmark.metrics_collection.metrics_store import MetricsStore
 from benchmark.sampling.config import ConfigField, SCHEMA
 from utils.config_utils import check_config
 from utils.file_utils import FileSystemItem, get_all_file_system_items
@@ -87,6 +88,50 @@ def read_project_metrics(project: Path, language: Optional[Language]) -> Optiona
     }
 
 
+def read_projects_metrics(projects: List[Path], language: Optional[Language]) -> Dict[Path, Optional[Dict[str, int]]]:
+    """
+    Read the metrics of several projects at once.
+
+    The metrics are loaded in bulk from the metrics store of each dataset the projects belong to (see
+    ``MetricsStore``). The metric file of a project is read only if the project is missing from the store or the
+    modification time of the file differs from the one recorded in the store.
+
+    :param projects: Paths to the projects with the metric files.
+    :param language: Language, the metrics for which must be read. If None, the total field will be used.
+    :return: Dictionary where for each project its language metrics are specified. If the metric file of a project
+    is not found, None will be specified for it.
+    """
+    field = TOTAL_FIELD_NAME if language is None else language.value
+
+    stored_metrics = {}
+    project_metrics = {}
+    stale_projects = 0
+    for project in projects:
+        dataset = project.parent
+        if dataset not in stored_metrics:
+            stored_metrics[dataset] = MetricsStore.for_dataset(dataset).load(field)
+
+        try:
+            mtime_ns = (project / METRICS_FILE).stat().st_mtime_ns
+        except OSError:
+            logger.warning(f'File with metrics not found in {project.name}')
+            project_metrics[project] = None
+            continue
+
+        stored_mtime_ns, metrics = stored_metrics[dataset].get(project.name, (None, None))
+        if stored_mtime_ns == mtime_ns:
+            project_metrics[project] = metrics
+            continue
+
+        stale_projects += 1
+        project_metrics[project] = read_project_metrics(project, language)
+
+    if stale_projects:
+        logger.info(f'The metric files of {stale_projects} projects were read, since the metrics store is stale.')
+
+    return project_metrics
+
+
 def read_metrics(dataset: Path, language: Optional[Language]) -> Optional[pd.DataFrame]:
     """
     Read metric files from ``dataset`` into a dataframe.
@@ -101,7 +146,9 @@ def read_metrics(dataset: Path, language: Optional[Language]) -> Optional[pd.Dat
 
     projects = get_all_file_system_items(dataset, item_type=FileSystemItem.SUBDIR, with_subdirs=False)
 
-    metrics_by_project = {project.name: read_project_metrics(project, language) for project in projects}
+    metrics_by_project = {
+        project.name: metrics for project, metrics in read_projects_metrics(projects, language).items()
+    }
     metrics = pd.DataFrame.from_dict(metrics_by_project, orient='index')
     if metrics.isna().values.all():
         return None
@@ -43,6 +43,16 @@ class RepositoriesTable:
 
             self._conn.execute(self.format_sql(query, username, repo_name, last_pull_date))
 
+    def update_analysis_date(self, username: str, repo_name: str, last_analysis_date: datetime.date):
+        if self._conn is not None:
+            query = sql.SQL("""
+            update {table_name}
+            set {analysis_date_col} = {analysis_date}
+            where {username_col} = {username}
+            and {repo_name_col} = {repo_name}""")
+
+            self._conn.execute(self.format_sql(query, username, repo_name, last_analysis_date=last_analysis_date))
+
     def insert(self, username: str, repo_name: str, last_pull_date: datetime.date):
         if self._conn is not None:
             query = sql.SQL("""
@@ -75,7 +85,13 @@ class RepositoriesTable:
         return self._conn.execute(self.format_sql(query), has_res=True)
 
     @staticmethod
-    def format_sql(query: sql.SQL, username: str = None, repo_name: str = None, last_pull_date=None) -> sql.Composed:
+    def format_sql(
+        query: sql.SQL,
+        username: str = None,
+        repo_name: str = None,
+        last_pull_date=None,
+        last_analysis_date=None,
+    ) -> sql.Composed:
         return query.format(table_name=Identifier(RepositoriesTableNames.TABLE.value),
                             username_col=Identifier(RepositoriesTableNames.USERNAME.value),
                             repo_name_col=Identifier(RepositoriesTableNames.REPO_NAME.value),
@@ -83,4 +99,5 @@ class RepositoriesTable:
                             analysis_date_col=Identifier(RepositoriesTableNames.LAST_ANALYSIS_DATE.value),
                             username=Literal(username),
                             repo_name=Literal(repo_name),
-                            pull_date=sql.Literal(last_pull_date))
+                            pull_date=sql.Literal(last_pull_date),
+                            analysis_date=sql.Literal(last_analysis_date))
@@ -0,0 +1,290 @@
+"""This module contains a client for the analysis daemon that keeps one IDE running for many batches."""
+import logging
+import queue
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Callable, IO, List, Optional, Union
+
+from plugin_runner.batch_scheduler import BatchResult, BatchTask
+from utils.process_tree_utils import kill_process_tree
+from utils.run_process_utils import PROJECT_ROOT
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_PREFIX = 'LUPA_DAEMON'
+SEPARATOR = '\t'
+
+STARTUP_TIMEOUT_DEFAULT = 30 * 60  # In seconds
+PING_TIMEOUT_DEFAULT = 60  # In seconds
+
+
+class DaemonCommand:
+    ANALYZE = 'ANALYZE'
+    PING = 'PING'
+    EXIT = 'EXIT'
+
+
+class DaemonResponse:
+    READY = 'READY'
+    PONG = 'PONG'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+
+
+class DaemonError(Exception):
+    pass
+
+
+class AnalysisDaemon:
+    """
+    A client of the ``analysis-daemon`` runner.
+
+    The daemon is a single IDE process that analyses the batches it receives over the standard input, so the
+    Gradle and IDE startup is paid once instead of once per batch. The protocol is line-based and tab-separated:
+    the client sends ``ANALYZE <input> <output>``, ``PING`` or ``EXIT`` commands, and the daemon prints its responses
+    on separate lines starting with ``LUPA_DAEMON``. All other daemon output goes to the log of the current batch.
+
+    Before each batch, the daemon is pinged as a health check. The daemon is restarted if it has died, if it does
+    not respond to the ping in time, or if it has processed the specified number of batches, since the IDE memory
+    grows over time. If the batch timeout is specified, the daemon that has not finished a batch in time is killed,
+    so it is started again before the next batch.
+    """
+
+    def __init__(
+        self,
+        command: List[str],
+        log_path: Path,
+        cwd: Optional[Union[str, Path]] = PROJECT_ROOT,
+        restart_after: Optional[int] = None,
+        startup_timeout: float = STARTUP_TIMEOUT_DEFAULT,
+        ping_timeout: float = PING_TIMEOUT_DEFAULT,
+        batch_timeout: Optional[float] = None,
+    ):
+        """
+        Create a daemon client. The daemon is started lazily, before the first batch.
+
+        :param command: Command that starts the daemon.
+        :param log_path: Path to the file where the daemon output that is not related to any batch is written.
+        :param cwd: Working directory of the daemon process.
+        :param restart_after: Number of batches after which the daemon is restarted. By default, it is never restarted.
+        :param startup_timeout: Time, in seconds, to wait for the daemon to start.
+        :param ping_timeout: Time, in seconds, to wait for the daemon to respond to the health check.
+        :param batch_timeout: Time, in seconds, to wait for the daemon to analyse a batch. By default, wait until
+        the daemon responds or dies.
+
+        :raises ValueError: If the number of batches after which the daemon is restarted or the batch timeout is not
+        positive.
+        """
+        if restart_after is not None and restart_after < 1:
+            raise ValueError('The number of batches after which the daemon is restarted must be positive.')
+
+        if batch_timeout is not None and batch_timeout <= 0:
+            raise ValueError('The batch timeout must be positive.')
+
+        self.command = command
+        self.log_path = log_path
+        self.cwd = cwd
+        self.restart_after = restart_after
+        self.startup_timeout = startup_timeout
+        self.ping_timeout = ping_timeout
+        self.batch_timeout = batch_timeout
+
+        self._process: Optional[subprocess.Popen] = None
+        self._responses: queue.Queue = queue.Queue()
+        self._reader: Optional[threading.Thread] = None
+        self._log_lock = threading.Lock()
+        self._daemon_log_file: Optional[IO] = None
+        self._log_file: Optional[IO] = None
+        self._processed_batches = 0
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> None:
+        """
+        Start the daemon and wait until it is ready.
+
+        :raises DaemonError: If the daemon has not become ready within the startup timeout.
+        """
+        logger.info('Starting the analysis daemon.')
+
+        self._daemon_log_file = open(self.log_path, 'a')
+        self._log_file = self._daemon_log_file
+        self._responses = queue.Queue()
+        self._process = subprocess.Popen(
+            self.command,
+            cwd=self.cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            bufsize=1,
+        )
+        self._reader = threading.Thread(target=self._read_output, args=(self._process, self._responses), daemon=True)
+        self._reader.start()
+        self._processed_batches = 0
+
+        if self._wait_for_response(self.startup_timeout) != DaemonResponse.READY:
+            self.stop()
+            raise DaemonError('The analysis daemon has not started.')
+
+    def stop(self) -> None:
+        """Ask the daemon to exit and kill it if it does not exit in time."""
+        if self._process is None:
+            return
+
+        logger.info('Stopping the analysis daemon.')
+
+        if self.is_alive():
+            try:
+                self._send(DaemonCommand.EXIT)
+                self._process.wait(self.ping_timeout)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+
+        self.kill()
+
+    def kill(self) -> None:
+        """Kill the daemon without asking it to exit, e.g. if it is stuck on a batch."""
+        if self._process is None:
+            return
+
+        if self.is_alive():
+            kill_process_tree(self._process.pid)
+            self._process.wait()
+
+        if self._reader is not None:
+            self._reader.join()
+
+        self._daemon_log_file.close()
+        self._process = None
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+    def ping(self) -> bool:
+        """
+        Check the daemon health.
+
+        :return: True if the daemon has responded to the ping within the ping timeout.
+        """
+        if not self.is_alive():
+            return False
+
+        try:
+            self._send(DaemonCommand.PING)
+        except OSError:
+            return False
+
+        return self._wait_for_response(self.ping_timeout) == DaemonResponse.PONG
+
+    def analyze(self, task: BatchTask) -> BatchResult:
+        """
+        Analyse the batch with the daemon, restarting the daemon beforehand if necessary.
+
+        The exit code of the result is 0 if the batch has been analysed successfully and 1 otherwise.
+
+        :param task: Batch to analyse.
+        :return: Batch result.
+        """
+        self._ensure_healthy()
+
+        logger.info(f'Starting batch {task.index} processing on the analysis daemon.')
+        start_time = time.time()
+
+        with open(task.log_path, 'w+') as log_file:
+            self._set_log_file(log_file)
+            try:
+                self._send(DaemonCommand.ANALYZE, str(task.batch_path), str(task.output_path))
+                response = self._wait_for_response(self.batch_timeout)
+            except OSError:
+                response = None
+            finally:
+                self._set_log_file(self._daemon_log_file)
+
+        self._processed_batches += 1
+        duration = time.time() - start_time
+
+        failure = 'the analysis daemon has died'
+        if response is None and self.is_alive():
+            # The daemon is stuck on the batch, so it is killed and will be started again before the next batch
+            failure = f'the analysis daemon has not finished it in {self.batch_timeout}s'
+            self.kill()
+
+        exit_code = 0
+        if response != DaemonResponse.DONE:
+            exit_code = 1
+            logger.warning(f'Batch {task.index} failed: {response or failure}.')
+
+        logger.info(f'Finished batch {task.index} processing in {duration}s')
+        return BatchResult(task.index, exit_code, duration)
+
+    def run(
+        self,
+        tasks: List[BatchTask],
+        on_finish: Optional[Callable[[BatchTask, BatchResult], None]] = None,
+    ) -> List[BatchResult]:
+        """
+        Analyse all the batches one by one and stop the daemon.
+
+        :param tasks: List of batches to analyse.
+        :param on_finish: Function that is called as soon as a batch is finished.
+        :return: List of batch results in the order of the batches.
+        """
+        results = []
+        try:
+            for task in tasks:
+                result = self.analyze(task)
+                if on_finish is not None:
+                    on_finish(task, result)
+                results.append(result)
+        finally:
+            self.stop()
+
+        return results
+
+    def _ensure_healthy(self) -> None:
+        if self._process is None:
+            self.start()
+        elif self.restart_after is not None and self._processed_batches >= self.restart_after:
+            logger.info(f'The analysis daemon has processed {self._processed_batches} batches. Restarting.')
+            self.restart()
+        elif not self.ping():
+            logger.warning('The analysis daemon has not passed the health check. Restarting.')
+            self.restart()
+
+    def _send(self, command: str, *arguments: str) -> None:
+        self._process.stdin.write(SEPARATOR.join([command, *arguments]) + '\n')
+        self._process.stdin.flush()
+
+    def _wait_for_response(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Wait for the next daemon response.
+
+        :param timeout: Time, in seconds, to wait. By default, wait until the daemon responds or dies.
+        :return: Response or None if the daemon has not responded in time or has died.
+        """
+        try:
+            return self._responses.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _set_log_file(self, log_file: IO) -> None:
+        with self._log_lock:
+            self._log_file = log_file
+
+    def _read_output(self, process: subprocess.Popen, responses: queue.Queue) -> None:
+        for line in process.stdout:
+            if line.startswith(RESPONSE_PREFIX + SEPARATOR):
+                responses.put(line[len(RESPONSE_PREFIX + SEPARATOR):].rstrip('\n'))
+                continue
+
+            with self._log_lock:
+                self._log_file.write(line)
+                self._log_file.flush()
+
+        # The daemon has died, so nobody waits for responses any longer
+        responses.put(None)
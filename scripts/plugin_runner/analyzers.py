@@ -1,14 +1,27 @@
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Optional
 
 from utils.language import Language
 
+# The column types are pandas dtypes. The categorical columns are stored as dictionary-encoded strings in Parquet.
+CATEGORY = 'category'
+INTEGER = 'Int64'
+BOOLEAN = 'boolean'
+
 
 @dataclass
 class Analyzer:
     name: str
     output_file: str
     language: Language
+    # Types of the output columns. The columns that are not listed are strings.
+    schema: Optional[Dict[str, str]] = None
+    separator: str = ','
+    # Column with the project names. If it is None, the output cannot be updated by project.
+    project_column: Optional[str] = 'project_name'
+    # Whether the output can be parsed as csv. Some analyzers write free-text fields without quotes, so the fields may
+    # contain the separator, and such output is merged only line by line.
+    parseable: bool = True
 
     @staticmethod
     def get_analyzers_names(analyzers: List['Analyzer']) -> List[str]:
@@ -24,18 +37,110 @@ class Analyzer:
 
 
 AVAILABLE_ANALYZERS = [
-    Analyzer('kotlin-dependencies', 'import_directives_data.csv', Language.KOTLIN),
-    Analyzer('kotlin-clones', 'method_data.txt', Language.KOTLIN),
-    Analyzer('kotlin-ranges', 'ranges_data.csv', Language.KOTLIN),
-    Analyzer('kotlin-project-tags', 'project_tags_data.csv', Language.KOTLIN),
-    Analyzer('kotlin-gradle-dependencies', 'gradle_dependencies_data.csv', Language.KOTLIN),
-    Analyzer('kotlin-gradle-dependencies-by-modules', 'gradle_dependencies_by_modules_data.csv', Language.KOTLIN),
-    Analyzer('kotlin-gradle-properties', 'gradle_properties_data.csv', Language.KOTLIN),
-    Analyzer('kotlin-gradle-plugins', 'gradle_plugins_data.csv', Language.KOTLIN),
-    Analyzer('kotlin-project-metrics', 'project_metrics_data.csv', Language.KOTLIN),
-    Analyzer('java-reflections', 'reflection_data.csv', Language.KOTLIN),
-    Analyzer('kotlin-stdlib-interfaces', 'stdlib_interfaces_data.csv', Language.KOTLIN),
-
-    Analyzer('python-imports', 'import_statements_data.csv', Language.PYTHON),
-    Analyzer('python-call-expressions', 'call_expressions_data.csv', Language.PYTHON),
+    Analyzer(
+        'kotlin-dependencies',
+        'import_directives_data.csv',
+        Language.KOTLIN,
+        {'project_name': CATEGORY, 'import': CATEGORY},
+    ),
+    Analyzer('kotlin-clones', 'method_data.txt', Language.KOTLIN, project_column=None),
+    Analyzer('kotlin-ranges', 'ranges_data.csv', Language.KOTLIN, separator='\t', project_column='project'),
+    Analyzer(
+        'kotlin-project-tags',
+        'project_tags_data.csv',
+        Language.KOTLIN,
+        {'project_name': CATEGORY, 'tag': CATEGORY},
+        parseable=False,
+    ),
+    Analyzer(
+        'kotlin-gradle-dependencies',
+        'gradle_dependencies_data.csv',
+        Language.KOTLIN,
+        {
+            'project_name': CATEGORY,
+            'group_id': CATEGORY,
+            'artifact_id': CATEGORY,
+            'config': CATEGORY,
+            'version': CATEGORY,
+        },
+    ),
+    Analyzer(
+        'kotlin-gradle-dependencies-by-modules',
+        'gradle_dependencies_by_modules_data.csv',
+        Language.KOTLIN,
+        {
+            'project_name': CATEGORY,
+            'module_name': CATEGORY,
+            'group_id': CATEGORY,
+            'artifact_id': CATEGORY,
+            'config': CATEGORY,
+        },
+    ),
+    Analyzer(
+        'kotlin-gradle-properties',
+        'gradle_properties_data.csv',
+        Language.KOTLIN,
+        {'project_name': CATEGORY, 'property_key': CATEGORY, 'property_value': CATEGORY},
+        parseable=False,
+    ),
+    Analyzer(
+        'kotlin-gradle-plugins',
+        'gradle_plugins_data.csv',
+        Language.KOTLIN,
+        {
+            'project_name': CATEGORY,
+            'plugin_id': CATEGORY,
+            'plugin_version': CATEGORY,
+            'plugin_args': CATEGORY,
+            'applied': BOOLEAN,
+            'allProjects': BOOLEAN,
+        },
+        parseable=False,
+    ),
+    Analyzer(
+        'kotlin-project-metrics',
+        'project_metrics_data.csv',
+        Language.KOTLIN,
+        {
+            'project_name': CATEGORY,
+            'module_name': CATEGORY,
+            'files_count': INTEGER,
+            'lines_count': INTEGER,
+            'symbols_count': INTEGER,
+        },
+    ),
+    Analyzer(
+        'java-reflections',
+        'reflection_data.csv',
+        Language.KOTLIN,
+        {'project': CATEGORY},
+        project_column='project',
+    ),
+    Analyzer(
+        'kotlin-stdlib-interfaces',
+        'stdlib_interfaces_data.csv',
+        Language.KOTLIN,
+        {
+            'project_name': CATEGORY,
+            'interface_path': CATEGORY,
+            'interface_name': CATEGORY,
+            'function_name': CATEGORY,
+            'base_interfaces': CATEGORY,
+            'has_super': BOOLEAN,
+        },
+        parseable=False,
+    ),
+
+    Analyzer(
+        'python-imports',
+        'import_statements_data.csv',
+        Language.PYTHON,
+        {'project_name': CATEGORY, 'import': CATEGORY},
+    ),
+    Analyzer(
+        'python-call-expressions',
+        'call_expressions_data.csv',
+        Language.PYTHON,
+        {'project_name': CATEGORY, 'fq_name': CATEGORY, 'category': CATEGORY},
+    ),
 ]
@@ -8,8 +8,14 @@ It accepts:
     * data to analyse using the plugin.
 
 It also optionally accepts:
-    * flag that specifies whether the database should be used to analyse only updated repositories (default is false);
+    * flag that specifies whether the database should be used to analyse only updated repositories (default is false).
+      In this case, only their data is replaced in the merged data, and their analysis date is updated in the database;
     * index of batch to start from (default is 0);
+    * number of batches to process in parallel (default is 1, or the number of workers of the execution plan);
+    * limit of the total RSS of the batches processed in parallel, in gigabytes (default is no limit);
+    * flag that specifies whether the batches should be processed by a single long-lived IDE (default is false);
+    * number of batches after which the long-lived IDE is restarted (default is never);
+    * format of the merged data: csv or parquet (default is csv);
     * plugin task name: cli or pythin-cli (default is cli);
     * additional plugin arguments.
 """
@@ -17,24 +23,36 @@ import argparse
 import json
 import logging
 import os
-import time
+from datetime import date
 from pathlib import Path
-from typing import Callable, Dict, List
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 import yaml
 
 from plugin_runner.batcher import BatcherName
 from plugin_runner.batching_config import BATCHING_SCHEMA, ConfigField
-from benchmark.sampling.stratified_sampling import read_project_metrics
+from benchmark.sampling.stratified_sampling import read_projects_metrics
 from data_collection.db_connect import DatabaseConn
 from data_collection.repositories_table import RepositoriesTable
 
 from plugin_runner.additional_arguments import AdditionalArguments
+from plugin_runner.analysis_daemon import AnalysisDaemon
 from plugin_runner.analyzers import AVAILABLE_ANALYZERS, Analyzer
-from plugin_runner.merge_data import merge
+from plugin_runner.batch_scheduler import BatchResult, BatchScheduler, BatchTask
+from plugin_runner.execution_plan import EXECUTION_PLAN_FILE, ExecutionPlan
+from plugin_runner.merge_data import OutputFormat, clear_merged_data, merge, update_merged_data
+from plugin_runner.run_manifest import (
+    BatchRecord,
+    BatchStatus,
+    MANIFEST_FILE,
+    RunManifest,
+    get_batch_input_hash,
+    get_project_version,
+)
 from utils.config_utils import check_config
 from utils.file_utils import Extensions, clear_directory, create_directory, get_subdirectories
 from utils.language import Language
+from utils.process_tree_utils import KB_IN_GB
 from utils.run_process_utils import run_in_subprocess
 
 logger = logging.getLogger(__name__)
@@ -47,8 +65,14 @@ def main():
     configure_parser(parser)
 
     args = parser.parse_args()
+    if args.daemon and args.parallel > 1:
+        parser.error('--daemon cannot be used together with --parallel.')
+
     additional_arguments = AdditionalArguments.parse_additional_arguments(args.kwargs)
 
+    # The repositories that are updated during the analysis will be reanalysed next time
+    analysis_date = date.today()
+
     with open(args.batching_config) as file:
         batching_config = yaml.safe_load(file)
 
@@ -64,31 +88,129 @@ def main():
         if filter_repositories_predicate(args.use_db)(project)
     ]
 
-    batches = split_into_batches(projects_paths, batching_config)
+    batches, plan = plan_batches(projects_paths, batching_config)
     batch_paths = create_batches(batches, args.output / 'batches')
 
+    workers = args.parallel
+    if plan is not None:
+        plan.save(args.output / EXECUTION_PLAN_FILE)
+
+        workers = len(plan.queues)
+        if args.parallel > 1 and args.parallel != workers:
+            logger.warning(f'The number of workers is taken from the execution plan: {workers}.')
+
+    if args.daemon and workers > 1:
+        logger.error('--daemon cannot be used together with an execution plan for several workers.')
+        return
+
     analyzer = Analyzer.get_analyzer_by_name(AVAILABLE_ANALYZERS, args.data)
 
     logs_dir = args.output / 'logs'
     create_directory(logs_dir)
 
+    # The costs only order the shared queue of several workers, and reading the metrics of all projects is not free
+    batch_costs = None
+    if workers > 1 and plan is None:
+        batch_costs = get_batch_costs(batches, batching_config)
+
+    manifest = RunManifest(args.output / MANIFEST_FILE)
+    analysis_arguments = [args.task_name, analyzer.name, *additional_arguments]
+
+    tasks = []
+    input_hashes = {}
     batch_output_paths = []
     for index, batch_path in enumerate(batch_paths[args.start_from:], start=args.start_from):
         batch_output_path = args.output / 'output' / f'batch_{index}'
         batch_output_paths.append(batch_output_path)
+
+        # The updated projects must be analyzed again, even if the batch has been processed with the old versions.
+        # With the database, the projects that are not git repositories are compared by their files.
+        project_versions = {project: get_project_version(project, args.use_db) for project in batches[index]}
+        input_hashes[index] = get_batch_input_hash(batches[index], analysis_arguments, project_versions)
+        if manifest.is_completed(index, input_hashes[index]):
+            logger.info(f'Batch {index} has already been processed. Skipping.')
+            continue
+
+        # The batch might have been partially processed before, so the old data must be removed
         create_directory(batch_output_path)
+        clear_directory(batch_output_path)
 
-        command = get_analyzer_command(args.task_name, analyzer, batch_path, batch_output_path, additional_arguments)
         log_file_path = logs_dir / f'log_batch_{index}.{Extensions.TXT}'
+        task_cost = 0 if batch_costs is None else batch_costs[index]
+        tasks.append(BatchTask(index, batch_path, batch_output_path, log_file_path, task_cost))
+
+    if workers > 1 and tasks:
+        # Concurrent runs must only find up-to-date tasks, otherwise they will rebuild the plugin simultaneously
+        logger.info('Building the plugin.')
+        run_in_subprocess(['./gradlew', ':lupa-runner:buildPlugin'])
+
+    def build_command(task: BatchTask, slot: int) -> List[str]:
+        sandbox = args.output / 'sandboxes' / f'worker_{slot}' if workers > 1 else None
+        return get_analyzer_command(
+            args.task_name,
+            analyzer,
+            task.batch_path,
+            task.output_path,
+            additional_arguments,
+            sandbox,
+        )
+
+    def save_result(task: BatchTask, result: BatchResult) -> None:
+        status = BatchStatus.COMPLETED if result.exit_code == 0 else BatchStatus.FAILED
+        manifest.add_record(
+            BatchRecord(
+                task.index,
+                input_hashes[task.index],
+                status.value,
+                result.exit_code,
+                result.duration,
+                str(task.output_path),
+            ),
+        )
+
+    if args.daemon:
+        daemon = AnalysisDaemon(
+            get_daemon_command(args.task_name, analyzer, additional_arguments),
+            logs_dir / f'log_daemon.{Extensions.TXT}',
+            restart_after=args.daemon_restart_after,
+            batch_timeout=None if args.daemon_batch_timeout is None else args.daemon_batch_timeout * 60,
+        )
+        results = daemon.run(tasks, on_finish=save_result)
+    else:
+        memory_limit = None if args.memory_limit is None else int(args.memory_limit * KB_IN_GB)
+        scheduler = BatchScheduler(workers, build_command, memory_limit=memory_limit, on_finish=save_result)
+        results = scheduler.run(tasks, plan)
+
+    failed_batches = [result.index for result in results if result.exit_code != 0]
+    if failed_batches:
+        logger.warning(f'{len(failed_batches)} batches failed: {failed_batches}. Rerun the command to retry them.')
+
+    output_format = OutputFormat(args.output_format)
+    if args.use_db:
+        # Only the data of the successfully reanalyzed projects is replaced, the failed ones will be retried next time
+        completed_indices = [
+            index
+            for index in range(args.start_from, len(batch_paths))
+            if manifest.is_completed(index, input_hashes[index])
+        ]
+        completed_projects = {project.name for index in completed_indices for project in batches[index]}
+
+        update_merged_data(
+            [args.output / 'output' / f'batch_{index}' for index in completed_indices],
+            args.output,
+            args.data,
+            completed_projects,
+            workers,
+            output_format,
+        )
+        update_analysis_dates(completed_projects, analysis_date)
+        return
 
-        with open(log_file_path, 'w+') as log_file:
-            start_time = time.time()
-            run_in_subprocess(command, stdout_file=log_file, stderr_file=log_file)
-            end_time = time.time()
-
-        logger.info(f'Finished batch {index} processing in {end_time - start_time}s')
+    if len(tasks) < len(batch_output_paths):
+        # The data of the processed batches will be merged again along with the new ones
+        clear_merged_data(args.output, args.data, output_format)
 
-    merge(batch_output_paths, args.output, args.data)
+    merge(batch_output_paths, args.output, args.data, workers, output_format)
 
 
 def get_analyzer_command(
@@ -97,8 +219,9 @@ def get_analyzer_command(
     batch_path: Path,
     batch_output_path: Path,
     additional_arguments: List[str],
+    sandbox: Optional[Path] = None,
 ) -> List[str]:
-    return [
+    command = [
         './gradlew',
         f':lupa-runner:{task_name}',
         f'-Prunner={analyzer.name}-analysis',
@@ -107,6 +230,24 @@ def get_analyzer_command(
         *additional_arguments,
     ]
 
+    if sandbox is not None:
+        # Without a daemon, the IDE process is a descendant of the command process, so its memory can be tracked
+        command.extend([f'-Psandbox={sandbox}', '--no-daemon'])
+
+    return command
+
+
+def get_daemon_command(task_name: str, analyzer: Analyzer, additional_arguments: List[str]) -> List[str]:
+    return [
+        './gradlew',
+        f':lupa-runner:{task_name}',
+        '-Prunner=analysis-daemon',
+        f'-Pdelegate={analyzer.name}-analysis',
+        *additional_arguments,
+        # Without a daemon, the IDE process is a descendant of the command process, so it can be killed if it hangs
+        '--no-daemon',
+    ]
+
 
 def split_into_batches(project_paths: List[Path], batching_config: Dict) -> List[List[Path]]:
     """
@@ -117,21 +258,32 @@ def split_into_batches(project_paths: List[Path], batching_config: Dict) -> List
     validation.
     :return: List of batches. Each batch is a list of project paths included in that batch.
     """
+    batches, _ = plan_batches(project_paths, batching_config)
+    return batches
+
+
+def plan_batches(project_paths: List[Path], batching_config: Dict) -> Tuple[List[List[Path]], Optional[ExecutionPlan]]:
+    """
+    Split projects into batches and plan their execution using a batcher specified in a batching config.
+
+    :param project_paths: The project paths.
+    :param batching_config: The batching config. Must be valid: use ``BATCHING_SCHEMA`` from ``batching_config.py`` for
+    validation.
+    :return: List of batches and their execution plan or None if the batcher does not plan the execution.
+    """
     batcher_config = batching_config[ConfigField.BATCHER_CONFIG.value]
     batcher = BatcherName(batcher_config.pop(ConfigField.NAME.value))
 
     metric_name = batching_config.get(ConfigField.METRIC.value)
+    batch_constraints = batching_config.get(ConfigField.BATCH_CONSTRAINTS.value)
 
     projects_for_batching = {project: {} for project in project_paths}
-    batch_constraints = {}
 
-    # Since batching_config is valid, if the 'metric' field is not None,
-    # then the 'language' and 'batch_constraints' fields are not None either.
-    if metric_name is not None:
-        projects = {
-            project: read_project_metrics(project, Language.from_value(batching_config[ConfigField.LANGUAGE.value]))
-            for project in project_paths
-        }
+    # Since batching_config is valid, if the 'batch_constraints' field is not None,
+    # then the 'language' field is specified too.
+    if batch_constraints is not None:
+        language = Language.from_value(batching_config[ConfigField.LANGUAGE.value])
+        projects = read_projects_metrics(project_paths, language)
 
         projects_for_batching = {project: metrics for project, metrics in projects.items() if metrics is not None}
 
@@ -140,16 +292,46 @@ def split_into_batches(project_paths: List[Path], batching_config: Dict) -> List
                 f'{len(projects) - len(projects_for_batching)} projects without the metric file will be skipped.',
             )
 
-        batch_constraints = {metric_name: batching_config[ConfigField.BATCH_CONSTRAINTS.value][metric_name]}
+        # If the metric is not specified, all the batch constraints are used
+        if metric_name is not None:
+            batch_constraints = {metric_name: batch_constraints[metric_name]}
 
-    return batcher.execute(
+    return batcher.plan(
         projects_for_batching,
-        batch_constraints,
+        batch_constraints or {},
         batching_config.get(ConfigField.IGNORE_OVERSIZED_PROJECTS.value, True),
         **batcher_config,
     )
 
 
+def get_batch_costs(batches: List[List[Path]], batching_config: Dict) -> List[float]:
+    """
+    Predict the processing cost of each batch.
+
+    If a metric is specified in the batching config, the cost of a batch is the sum of the metric values of its
+    projects, otherwise it is the number of projects in the batch.
+
+    :param batches: List of batches. Each batch is a list of project paths included in that batch.
+    :param batching_config: The batching config. Must be valid: use ``BATCHING_SCHEMA`` from ``batching_config.py`` for
+    validation.
+    :return: List of batch costs.
+    """
+    metric_name = batching_config.get(ConfigField.METRIC.value)
+    if metric_name is None:
+        return [len(batch) for batch in batches]
+
+    language = Language.from_value(batching_config[ConfigField.LANGUAGE.value])
+
+    metrics = read_projects_metrics([project for batch in batches for project in batch], language)
+
+    costs = []
+    for batch in batches:
+        batch_metrics = [metrics[project] for project in batch]
+        costs.append(sum(project_metrics.get(metric_name, 0) for project_metrics in batch_metrics if project_metrics))
+
+    return costs
+
+
 def create_batches(batches: List[List[Path]], output: Path) -> List[Path]:
     """
     For each batch, creates a folder containing links to the projects included in that batch.
@@ -176,6 +358,15 @@ def create_batches(batches: List[List[Path]], output: Path) -> List[Path]:
     return batch_paths
 
 
+def update_analysis_dates(project_names: Set[str], analysis_date: date) -> None:
+    table = RepositoriesTable(DatabaseConn())
+    for project_name in sorted(project_names):
+        username, repo_name = project_name.split('#', maxsplit=1)
+        table.update_analysis_date(username, repo_name, analysis_date)
+
+    logger.info(f'The analysis date of {len(project_names)} repositories was updated.')
+
+
 def filter_repositories_predicate(use_db: bool) -> Callable[[str], bool]:
     if not use_db:
         return lambda _: True
@@ -206,7 +397,14 @@ def configure_parser(parser: argparse.ArgumentParser) -> None:
         help='Path to a yaml config. More information about the config can be found in the README file.',
     )
 
-    parser.add_argument('--use-db', help='Use database to analyse only updated repositories.', action='store_true')
+    parser.add_argument(
+        '--use-db',
+        help=(
+            'Use database to analyse only updated repositories. '
+            'Their data is replaced in the merged data, and their analysis date is updated.'
+        ),
+        action='store_true',
+    )
 
     parser.add_argument(
         '--start-from',
@@ -216,6 +414,60 @@ def configure_parser(parser: argparse.ArgumentParser) -> None:
         type=int,
     )
 
+    parser.add_argument(
+        '--parallel',
+        help=(
+            'Number of batches to process in parallel. Each of them will be run in its own IDE sandbox. '
+            'If the batcher plans the execution, the number of workers of the plan is used instead.'
+        ),
+        default=1,
+        type=int,
+    )
+
+    parser.add_argument(
+        '--memory-limit',
+        help=(
+            'Limit of the total RSS of the batches processed in parallel, in gigabytes. '
+            'New batches are held back when it is approached, and the largest batch is requeued when it is exceeded.'
+        ),
+        type=float,
+    )
+
+    parser.add_argument(
+        '--daemon',
+        help=(
+            'Process all the batches by a single long-lived IDE instead of starting the IDE for each batch. '
+            'Cannot be used together with --parallel.'
+        ),
+        action='store_true',
+    )
+
+    parser.add_argument(
+        '--daemon-restart-after',
+        help='Number of batches after which the long-lived IDE is restarted. By default, it is never restarted.',
+        type=int,
+    )
+
+    parser.add_argument(
+        '--daemon-batch-timeout',
+        help=(
+            'Time, in minutes, for the long-lived IDE to process a batch. If it is exceeded, the batch fails and '
+            'the IDE is restarted. By default, there is no timeout.'
+        ),
+        type=float,
+    )
+
+    parser.add_argument(
+        '--output-format',
+        help=(
+            'Format of the merged data. The parquet format requires the pyarrow package. '
+            'The kotlin-clones data is always merged in its own format, and the data with unquoted free-text fields, '
+            'such as the kotlin-gradle-properties one, is always merged as csv.'
+        ),
+        default=OutputFormat.CSV.value,
+        choices=OutputFormat.values(),
+    )
+
     configure_analysis_arguments(parser)
 
 
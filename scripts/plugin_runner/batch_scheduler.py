@@ -0,0 +1,247 @@
+"""This module contains a scheduler that runs the analysis batches on a fixed number of worker slots."""
+import logging
+import subprocess
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, IO, List, Optional, Union
+
+from plugin_runner.execution_plan import ExecutionPlan
+from utils.file_utils import clear_directory
+from utils.process_tree_utils import get_process_tree_rss, kill_process_tree
+from utils.run_process_utils import PROJECT_ROOT
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_DEFAULT = 1  # In seconds
+
+
+@dataclass
+class BatchTask:
+    index: int
+    batch_path: Path
+    output_path: Path
+    log_path: Path
+    cost: float = 0
+
+
+@dataclass
+class BatchResult:
+    index: int
+    exit_code: int
+    duration: float
+    peak_rss: int = 0
+
+
+@dataclass
+class _RunningBatch:
+    task: BatchTask
+    slot: int
+    process: subprocess.Popen
+    log_file: IO
+    start_time: float
+    rss: int = 0
+    peak_rss: int = 0
+
+
+class BatchScheduler:
+    """
+    A scheduler that runs batches on a fixed number of worker slots.
+
+    Each worker slot processes at most one batch at a time. If there are several slots, the batches are dispatched in
+    descending order of their predicted cost (Longest Processing Time first), so that the most expensive batches do not
+    end up at the tail of the run. With a single slot, the batches are processed in the order in which they are passed.
+    If an execution plan is passed, each worker slot processes only the batches from its own queue of the plan.
+
+    If a memory limit is specified, the RSS of the batch process trees is sampled from procfs on every check:
+        1. Each running batch reserves the larger of its current RSS and the expected batch RSS: the mean peak RSS of
+           the finished batches or, until any batch finishes, the memory limit divided by the number of workers.
+           A new batch is held back while its expected RSS (or its peak RSS, if it was requeued) does not fit into
+           the limit along with the reservations.
+        2. If the total RSS exceeds the limit, the largest running batch is killed, its output is cleared,
+           and it is put back at the head of the queue. The last running batch is never requeued.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        build_command: Callable[[BatchTask, int], List[str]],
+        cwd: Optional[Union[str, Path]] = PROJECT_ROOT,
+        poll_interval: float = POLL_INTERVAL_DEFAULT,
+        memory_limit: Optional[int] = None,
+        on_finish: Optional[Callable[[BatchTask, BatchResult], None]] = None,
+    ):
+        """
+        Create a scheduler.
+
+        :param workers: Number of worker slots.
+        :param build_command: Function that builds a command for the given batch and the index of the worker slot
+        the batch is dispatched to.
+        :param cwd: Working directory of the batch processes.
+        :param poll_interval: Interval, in seconds, between checks of the running batches.
+        :param memory_limit: Limit of the total RSS of the running batches in kilobytes. By default, no limit.
+        :param on_finish: Function that is called as soon as a batch is finished. Requeued batches are not finished.
+
+        :raises ValueError: If the number of workers is not positive.
+        """
+        if workers < 1:
+            raise ValueError('The number of workers must be positive.')
+
+        self.workers = workers
+        self.build_command = build_command
+        self.cwd = cwd
+        self.poll_interval = poll_interval
+        self.memory_limit = memory_limit
+        self.on_finish = on_finish
+        self._finished_peak_rss: List[int] = []
+        self._requeued_peak_rss: Dict[int, int] = {}
+
+    def run(self, tasks: List[BatchTask], plan: Optional[ExecutionPlan] = None) -> List[BatchResult]:
+        """
+        Run all the batches and wait for them to finish.
+
+        :param tasks: List of batches to run.
+        :param plan: Execution plan of the batches. If specified, it must have a queue for each worker slot and must
+        contain all the batches to run. By default, the batches are dispatched to any free slot.
+        :return: List of batch results sorted by batch index.
+        """
+        queues = self._create_queues(tasks, plan)
+        free_slots = list(range(self.workers))
+        running: List[_RunningBatch] = []
+        results = []
+
+        def release(batch: _RunningBatch) -> None:
+            running.remove(batch)
+            free_slots.append(batch.slot)
+            free_slots.sort()
+
+        try:
+            while any(queues) or running:
+                self._sample_memory(running)
+
+                if self._is_under_pressure(running) and len(running) > 1:
+                    batch = max(running, key=lambda running_batch: running_batch.rss)
+                    release(batch)
+                    queues[batch.slot].appendleft(self._requeue(batch))
+
+                for slot in list(free_slots):
+                    queue = queues[slot]
+                    if not queue or not self._can_admit(queue[0], running):
+                        continue
+
+                    free_slots.remove(slot)
+                    running.append(self._start(queue.popleft(), slot))
+
+                finished = [batch for batch in running if batch.process.poll() is not None]
+                if not finished:
+                    time.sleep(self.poll_interval)
+                    continue
+
+                for batch in finished:
+                    release(batch)
+                    results.append(self._finish(batch))
+        finally:
+            for batch in running:
+                logger.warning(f'Terminating batch {batch.task.index}.')
+                kill_process_tree(batch.process.pid)
+                batch.process.wait()
+                batch.log_file.close()
+
+        return sorted(results, key=lambda result: result.index)
+
+    def _create_queues(self, tasks: List[BatchTask], plan: Optional[ExecutionPlan]) -> List[Deque[BatchTask]]:
+        if plan is None:
+            if self.workers > 1:
+                tasks = sorted(tasks, key=lambda task: task.cost, reverse=True)
+
+            # All the slots share the same queue
+            return [deque(tasks)] * self.workers
+
+        if len(plan.queues) != self.workers:
+            raise ValueError('The execution plan must have a queue for each worker.')
+
+        tasks_by_index = {task.index: task for task in tasks}
+        planned_indices = {index for queue in plan.queues for index in queue}
+        if not tasks_by_index.keys() <= planned_indices:
+            raise ValueError('The execution plan must contain all the batches to run.')
+
+        # The batches that are not passed have already been processed
+        return [
+            deque(tasks_by_index[index] for index in queue if index in tasks_by_index)
+            for queue in plan.queues
+        ]
+
+    def _sample_memory(self, running: List[_RunningBatch]) -> None:
+        if self.memory_limit is None:
+            return
+
+        for batch in running:
+            batch.rss = get_process_tree_rss(batch.process.pid)
+            batch.peak_rss = max(batch.peak_rss, batch.rss)
+
+    def _is_under_pressure(self, running: List[_RunningBatch]) -> bool:
+        if self.memory_limit is None:
+            return False
+
+        return sum(batch.rss for batch in running) > self.memory_limit
+
+    def _get_expected_rss(self) -> float:
+        if not self._finished_peak_rss:
+            return self.memory_limit / self.workers
+
+        return sum(self._finished_peak_rss) / len(self._finished_peak_rss)
+
+    def _can_admit(self, task: BatchTask, running: List[_RunningBatch]) -> bool:
+        # The first batch is always admitted, otherwise the run will never end
+        if self.memory_limit is None or not running:
+            return True
+
+        expected_rss = self._get_expected_rss()
+        reserved_rss = sum(max(batch.rss, expected_rss) for batch in running)
+        task_rss = max(expected_rss, self._requeued_peak_rss.get(task.index, 0))
+        if reserved_rss + task_rss <= self.memory_limit:
+            return True
+
+        logger.debug(f'Holding back new batches: {reserved_rss} KB are reserved by {len(running)} batches.')
+        return False
+
+    def _requeue(self, batch: _RunningBatch) -> BatchTask:
+        logger.warning(f'Memory limit exceeded. Requeuing batch {batch.task.index} ({batch.rss} KB).')
+        self._requeued_peak_rss[batch.task.index] = batch.peak_rss
+
+        kill_process_tree(batch.process.pid)
+        batch.process.wait()
+        batch.log_file.close()
+
+        # Partial results must not get into the merged data
+        clear_directory(batch.task.output_path)
+
+        return batch.task
+
+    def _start(self, task: BatchTask, slot: int) -> _RunningBatch:
+        logger.info(f'Starting batch {task.index} processing on worker {slot}.')
+
+        log_file = open(task.log_path, 'w+')
+        process = subprocess.Popen(self.build_command(task, slot), cwd=self.cwd, stdout=log_file, stderr=log_file)
+
+        return _RunningBatch(task, slot, process, log_file, time.time())
+
+    def _finish(self, batch: _RunningBatch) -> BatchResult:
+        duration = time.time() - batch.start_time
+        batch.log_file.close()
+
+        if batch.peak_rss > 0:
+            self._finished_peak_rss.append(batch.peak_rss)
+
+        exit_code = batch.process.returncode
+        if exit_code != 0:
+            logger.warning(f'Batch {batch.task.index} exited with code {exit_code}.')
+
+        logger.info(f'Finished batch {batch.task.index} processing in {duration}s')
+        result = BatchResult(batch.task.index, exit_code, duration, batch.peak_rss)
+
+        if self.on_finish is not None:
+            self.on_finish(batch.task, result)
+
+        return result
@@ -1,11 +1,14 @@
 import logging
+import math
 from abc import ABC, abstractmethod
 from enum import Enum, unique
 from pathlib import Path
-from typing import Any, Dict, List, Set, Tuple, Type
+from typing import Dict, List, Optional, Set, Tuple, Type
 
-from binpackp.bins import NumberBin
-from binpackp.fit import BPResult, BinReduction, Fit
+from plugin_runner.bin_packing import FitStrategy, pack
+from plugin_runner.cost_model import CostModel
+from plugin_runner.execution_plan import ExecutionPlan, SchedulingAlgorithm
+from utils.process_tree_utils import KB_IN_GB
 
 logger = logging.getLogger(__name__)
 
@@ -37,11 +40,38 @@ class Batcher(ABC):
         """
         raise NotImplementedError
 
+    @classmethod
+    def plan(
+        cls,
+        projects: Dict[Path, Dict[str, int]],
+        batch_constraints: Dict[str, int],
+        ignore_oversized_projects: bool = IGNORE_OVERSIZED_PROJECTS_DEFAULT,
+        **kwargs,
+    ) -> Tuple[List[List[Path]], Optional[ExecutionPlan]]:
+        """
+        Split projects into batches and plan their execution.
+
+        By default, the batchers do not plan the execution, and the batches are dispatched by the batch scheduler.
+
+        :param projects: Dictionary where for each project metrics are specified.
+        :param batch_constraints: Dictionary where for each metric batch constraint is specified.
+        :param ignore_oversized_projects: Whether to ignore projects that do not fit fully into one batch. By default,
+        true.
+        :param kwargs: Additional arguments.
+        :return: List of batches and the execution plan of these batches or None if there is no plan.
+        """
+        return cls.split_into_batches(projects, batch_constraints, ignore_oversized_projects, **kwargs), None
+
 
 @unique
 class BatcherArgument(Enum):
     BATCH_SIZE = 'batch_size'
     MAX_OPEN_BATCHES = 'max_open_batches'
+    COST_MODEL = 'cost_model'
+    TARGET_TIME = 'target_time'
+    MEMORY_LIMIT = 'memory_limit'
+    WORKERS = 'workers'
+    SCHEDULING_ALGORITHM = 'scheduling_algorithm'
 
 
 class DummyBatcher(Batcher):
@@ -90,17 +120,27 @@ class OneDimensionalAnyFitBatcher(Batcher):
         projects: List[Tuple[Path, int]],
         batch_constraint: int,
         **kwargs,
-    ) -> BPResult:
+    ) -> List[List[Path]]:
         """
         Split projects into batches using an any fit heuristic.
 
         :param projects: List of tuples where for each project metric is specified.
         :param batch_constraint: Batch constraint.
         :param kwargs: Additional arguments.
-        :return: Instance of ``BPResult``.
+        :return: List of batches. Each batch is a list of project paths included in that batch. Batches may be empty.
         """
         raise NotImplementedError
 
+    @staticmethod
+    def _pack(
+        projects: List[Tuple[Path, int]],
+        batch_constraint: int,
+        strategy: FitStrategy,
+        **kwargs,
+    ) -> List[List[Path]]:
+        bins = pack([metric_value for _, metric_value in projects], batch_constraint, strategy, **kwargs)
+        return [[projects[index][0] for index in result_bin] for result_bin in bins]
+
     @classmethod
     def split_into_batches(
         cls,
@@ -148,20 +188,11 @@ class OneDimensionalAnyFitBatcher(Batcher):
 
         heuristic_result = cls.heuristic_split(projects_for_batching, constraint_value, **kwargs)
 
-        batches = [
-            [project for project, _ in result_bin] for result_bin in heuristic_result.bins if len(result_bin) > 0
-        ]
+        batches = [result_bin for result_bin in heuristic_result if len(result_bin) > 0]
 
         return batches + oversized_batches
 
 
-class NamedNumberBin(NumberBin):
-    @classmethod
-    def size(cls, item: Tuple[Any, int]):
-        _, value = item
-        return super().size(value)
-
-
 class OneDimensionalFirstFitDecreasingBatcher(OneDimensionalAnyFitBatcher):
     """
     A class implementing an 1D First Fit Decreasing batching strategy.
@@ -172,8 +203,8 @@ class OneDimensionalFirstFitDecreasingBatcher(OneDimensionalAnyFitBatcher):
     """
 
     @classmethod
-    def heuristic_split(cls, projects: List[Tuple[Path, int]], batch_constraint: int, **kwargs) -> BPResult:
-        return Fit.ffd(NamedNumberBin, batch_constraint, projects)
+    def heuristic_split(cls, projects: List[Tuple[Path, int]], batch_constraint: int, **kwargs) -> List[List[Path]]:
+        return cls._pack(projects, batch_constraint, FitStrategy.FIRST_FIT)
 
 
 class OneDimensionalBestFitDecreasingBatcher(OneDimensionalAnyFitBatcher):
@@ -186,8 +217,8 @@ class OneDimensionalBestFitDecreasingBatcher(OneDimensionalAnyFitBatcher):
     """
 
     @classmethod
-    def heuristic_split(cls, projects: List[Tuple[Path, int]], batch_constraint: int, **kwargs) -> BPResult:
-        return Fit.bfd(NamedNumberBin, batch_constraint, projects)
+    def heuristic_split(cls, projects: List[Tuple[Path, int]], batch_constraint: int, **kwargs) -> List[List[Path]]:
+        return cls._pack(projects, batch_constraint, FitStrategy.BEST_FIT)
 
 
 class OneDimensionalWorstFitDecreasingBatcher(OneDimensionalAnyFitBatcher):
@@ -200,8 +231,8 @@ class OneDimensionalWorstFitDecreasingBatcher(OneDimensionalAnyFitBatcher):
     """
 
     @classmethod
-    def heuristic_split(cls, projects: List[Tuple[Path, int]], batch_constraint: int, **kwargs) -> BPResult:
-        return Fit.wfd(NamedNumberBin, batch_constraint, projects)
+    def heuristic_split(cls, projects: List[Tuple[Path, int]], batch_constraint: int, **kwargs) -> List[List[Path]]:
+        return cls._pack(projects, batch_constraint, FitStrategy.WORST_FIT)
 
 
 class OneDimensionalNextFitDecreasingBatcher(OneDimensionalAnyFitBatcher):
@@ -218,17 +249,315 @@ class OneDimensionalNextFitDecreasingBatcher(OneDimensionalAnyFitBatcher):
     """
 
     @classmethod
-    def heuristic_split(cls, projects: List[Tuple[Path, int]], batch_constraint: int, **kwargs) -> BPResult:
-        return Fit.fit(
-            NamedNumberBin,
-            batch_constraint,
+    def heuristic_split(cls, projects: List[Tuple[Path, int]], batch_constraint: int, **kwargs) -> List[List[Path]]:
+        return cls._pack(
             projects,
-            sort=True,
+            batch_constraint,
+            FitStrategy.NEXT_FIT,
             max_open_bins=kwargs.get(BatcherArgument.MAX_OPEN_BATCHES.value, 1),
-            bin_reduction=BinReduction.first,
         )
 
 
+def vector_first_fit_decreasing(
+    sizes: Dict[Path, Tuple[float, ...]],
+    capacities: Tuple[float, ...],
+    ignore_oversized_projects: bool = IGNORE_OVERSIZED_PROJECTS_DEFAULT,
+) -> List[List[Path]]:
+    """
+    Split projects into batches using the First Fit Decreasing algorithm by dominant resource.
+
+    Each project has a size vector, and each batch has a capacity vector of the same length. The algorithm is as
+    follows:
+        1. Divide each size by the corresponding capacity. The largest of these shares is the dominant share of
+           the project.
+        2. Sort the projects in descending order of their dominant shares.
+        3. Place each project in the first batch where every size fits into the remaining capacity. If there is no
+           such batch, open a new one.
+
+    :param sizes: Dictionary where for each project its size vector is specified.
+    :param capacities: Capacity vector of a batch. Infinite capacities are allowed.
+    :param ignore_oversized_projects: Whether to ignore projects that do not fit fully into one batch. By default,
+    true. False means that each of such projects will be placed in a separate batch.
+    :return: List of batches. Each batch is a list of project paths included in that batch.
+    """
+
+    def get_dominant_share(size: Tuple[float, ...]) -> float:
+        return max((value / capacity for value, capacity in zip(size, capacities)), default=0)
+
+    def fits(load: Tuple[float, ...], size: Tuple[float, ...]) -> bool:
+        return all(
+            load_value + value <= capacity for load_value, value, capacity in zip(load, size, capacities)
+        )
+
+    oversized_batches = [[project] for project, size in sizes.items() if get_dominant_share(size) > 1]
+    if oversized_batches:
+        if ignore_oversized_projects:
+            logger.warning(f'{len(oversized_batches)} oversized projects will be ignored.')
+            oversized_batches.clear()
+        else:
+            logger.warning(f'{len(oversized_batches)} oversized projects will be placed in separate batches.')
+
+    projects_for_batching = [(project, size) for project, size in sizes.items() if get_dominant_share(size) <= 1]
+    projects_for_batching.sort(key=lambda item: get_dominant_share(item[1]), reverse=True)
+
+    batches: List[List[Path]] = []
+    loads: List[Tuple[float, ...]] = []
+    for project, size in projects_for_batching:
+        for index, load in enumerate(loads):
+            if fits(load, size):
+                batches[index].append(project)
+                loads[index] = tuple(load_value + value for load_value, value in zip(load, size))
+                break
+        else:
+            batches.append([project])
+            loads.append(size)
+
+    return batches + oversized_batches
+
+
+class MultiDimensionalFirstFitDecreasingBatcher(Batcher):
+    """
+    A class implementing a multidimensional First Fit Decreasing batching strategy.
+
+    Unlike the 1D batchers, it respects all batch constraints at once: each metric with a constraint is a dimension
+    of the project size vector. It splits projects into batches using the First Fit Decreasing algorithm by
+    dominant resource (see ``vector_first_fit_decreasing``).
+    """
+
+    @classmethod
+    def split_into_batches(
+        cls,
+        projects: Dict[Path, Dict[str, int]],
+        batch_constraints: Dict[str, int],
+        ignore_oversized_projects: bool = IGNORE_OVERSIZED_PROJECTS_DEFAULT,
+        **kwargs,
+    ) -> List[List[Path]]:
+        """
+        Split projects into batches, using a multidimensional First Fit Decreasing batching strategy.
+
+        :param projects: Dictionary where for each project metrics are specified. Projects that do not have all the
+        constrained metrics will be skipped.
+        :param batch_constraints: Dictionary where for each metric batch constraint is specified.
+        :param ignore_oversized_projects: Whether to ignore projects that exceed at least one batch constraint.
+        By default, true.
+        :param kwargs: Will be ignored.
+        :return: List of batches. Each batch is a list of project paths included in that batch.
+        :raises ValueError: If no batch constraints are passed.
+        """
+        if not batch_constraints:
+            raise ValueError('You must pass at least one batch constraint.')
+
+        constraint_names = list(batch_constraints.keys())
+
+        sizes = {
+            project: tuple(metrics[name] for name in constraint_names)
+            for project, metrics in projects.items()
+            if all(metrics.get(name) is not None for name in constraint_names)
+        }
+
+        if len(projects) != len(sizes):
+            logger.warning(
+                f'{len(projects) - len(sizes)} projects without '
+                f'one of the {constraint_names} metrics will be skipped.',
+            )
+
+        return vector_first_fit_decreasing(
+            sizes,
+            tuple(batch_constraints[name] for name in constraint_names),
+            ignore_oversized_projects,
+        )
+
+
+class CostModelBatcher(Batcher):
+    """
+    A class implementing a batching strategy based on the predicted batch processing cost.
+
+    The cost model predicts the batch time and RSS as the IDE startup cost plus the sum of the project costs
+    (see ``CostModel``). The batcher splits projects into batches using following algorithm:
+        1. For each project, predict its time and RSS and divide them by the capacity of a batch: the target time and
+           the memory limit minus the IDE startup cost.
+        2. Sort the projects in descending order of the largest of the two values.
+        3. Use First Fit algorithm: each project is placed in the first batch where both the time and the RSS fit
+           (see ``vector_first_fit_decreasing``).
+
+    It accepts the following additional arguments:
+        * cost_model -- Path to a yaml file with a cost model. Required.
+        * target_time -- Target processing time of a batch in seconds. By default, no limit.
+        * memory_limit -- Limit of the batch RSS in gigabytes. By default, no limit.
+
+    At least one of the target time and the memory limit must be specified.
+    """
+
+    @classmethod
+    def split_into_batches(
+        cls,
+        projects: Dict[Path, Dict[str, int]],
+        batch_constraints: Dict[str, int],
+        ignore_oversized_projects: bool = IGNORE_OVERSIZED_PROJECTS_DEFAULT,
+        **kwargs,
+    ) -> List[List[Path]]:
+        """
+        Split projects into batches, using the predicted batch processing cost.
+
+        :param projects: Dictionary where for each project metrics are specified. If the metrics of a project are
+        empty, they will be read from the project metric file for the language of the cost model.
+        :param batch_constraints: Will be ignored.
+        :param ignore_oversized_projects: Whether to ignore projects whose predicted cost does not fit into a batch.
+        By default, true.
+        :param kwargs: Additional arguments. See above.
+        :return: List of batches. Each batch is a list of project paths included in that batch.
+        :raises ValueError: If the cost model is not specified, if neither the target time nor the memory limit is
+        specified, or if the IDE startup cost exceeds them.
+        """
+        if batch_constraints:
+            logger.warning('Batch constraints will be ignored.')
+
+        model_path = kwargs.get(BatcherArgument.COST_MODEL.value)
+        if model_path is None:
+            raise ValueError('You must pass the path to a cost model.')
+
+        target_time = kwargs.get(BatcherArgument.TARGET_TIME.value)
+        memory_limit = kwargs.get(BatcherArgument.MEMORY_LIMIT.value)
+        if target_time is None and memory_limit is None:
+            raise ValueError('You must pass the target time, the memory limit, or both.')
+
+        model = CostModel.load(Path(model_path))
+
+        time_capacity = math.inf if target_time is None else target_time - model.time_intercept
+        rss_capacity = math.inf if memory_limit is None else memory_limit * KB_IN_GB - model.rss_intercept
+        if time_capacity <= 0 or rss_capacity <= 0:
+            raise ValueError('The predicted IDE startup cost exceeds the target time or the memory limit.')
+
+        read_metrics = model.read_projects_metrics([project for project, metrics in projects.items() if not metrics])
+
+        sizes = {}
+        for project, metrics in projects.items():
+            metrics = metrics or read_metrics[project]
+            if metrics is None:
+                continue
+
+            sizes[project] = (model.get_project_time(metrics), model.get_project_rss(metrics))
+
+        if len(projects) != len(sizes):
+            logger.warning(f'{len(projects) - len(sizes)} projects without metrics will be skipped.')
+
+        return vector_first_fit_decreasing(sizes, (time_capacity, rss_capacity), ignore_oversized_projects)
+
+
+class LongestProcessingTimeBatcher(Batcher):
+    """
+    A class implementing a batching strategy that balances a fixed number of parallel workers.
+
+    Unlike the bin packing batchers, it minimizes the time when the slowest worker finishes (the makespan) rather than
+    the number of batches. It splits projects into batches using following algorithm:
+        1. Partition the projects between the workers by their metric values, which are treated as the project costs,
+           using the Longest Processing Time first or the Karmarkar–Karp algorithm (see ``SchedulingAlgorithm``).
+        2. Split the projects of each worker into batches using the First Fit Decreasing algorithm, so that the cost of
+           each batch does not exceed the batch constraint.
+        3. Each worker processes its batches in descending order of their costs.
+
+    The batches are returned worker by worker, and the assignment of batches to workers is returned as an execution
+    plan by the ``plan`` method.
+
+    It accepts the following additional arguments:
+        * workers -- Number of workers. Required.
+        * scheduling_algorithm -- Algorithm that partitions the projects between the workers: 'lpt' or
+          'karmarkar_karp'. By default, 'lpt'.
+    """
+
+    @classmethod
+    def split_into_batches(
+        cls,
+        projects: Dict[Path, Dict[str, int]],
+        batch_constraints: Dict[str, int],
+        ignore_oversized_projects: bool = IGNORE_OVERSIZED_PROJECTS_DEFAULT,
+        **kwargs,
+    ) -> List[List[Path]]:
+        batches, _ = cls.plan(projects, batch_constraints, ignore_oversized_projects, **kwargs)
+        return batches
+
+    @classmethod
+    def plan(
+        cls,
+        projects: Dict[Path, Dict[str, int]],
+        batch_constraints: Dict[str, int],
+        ignore_oversized_projects: bool = IGNORE_OVERSIZED_PROJECTS_DEFAULT,
+        **kwargs,
+    ) -> Tuple[List[List[Path]], Optional[ExecutionPlan]]:
+        """
+        Split projects into batches and assign the batches to the workers, so that the makespan is minimal.
+
+        :param projects: Dictionary where for each project metrics are specified.
+        :param batch_constraints: Dictionary with exactly one metric, whose values are the project costs, and the
+        constraint of the batch cost.
+        :param ignore_oversized_projects: Whether to ignore projects whose cost exceeds the batch constraint. By
+        default, true. False means that each of such projects will be placed in a separate batch of its worker.
+        :param kwargs: Additional arguments. See above.
+        :return: List of batches and the execution plan of these batches.
+        :raises ValueError: If the number of batch constraints is not one or if the number of workers is not positive.
+        """
+        if len(batch_constraints) != 1:
+            raise ValueError('You must pass exactly one batch constraint.')
+
+        workers = kwargs.get(BatcherArgument.WORKERS.value)
+        if workers is None or workers < 1:
+            raise ValueError('You must pass a positive number of workers.')
+
+        algorithm = SchedulingAlgorithm(
+            kwargs.get(BatcherArgument.SCHEDULING_ALGORITHM.value, SchedulingAlgorithm.LONGEST_PROCESSING_TIME.value),
+        )
+
+        constraint_name, constraint_value = next(iter(batch_constraints.items()))
+
+        costs = {
+            project: metrics[constraint_name]
+            for project, metrics in projects.items()
+            if metrics.get(constraint_name) is not None
+        }
+
+        if len(projects) != len(costs):
+            logger.warning(
+                f"{len(projects) - len(costs)} projects without the '{constraint_name}' metric will be skipped.",
+            )
+
+        oversized_projects = [project for project, cost in costs.items() if cost > constraint_value]
+        if oversized_projects:
+            if ignore_oversized_projects:
+                logger.warning(f'{len(oversized_projects)} oversized projects will be ignored.')
+                for project in oversized_projects:
+                    del costs[project]
+            else:
+                logger.warning(f'{len(oversized_projects)} oversized projects will be placed in separate batches.')
+
+        project_paths = list(costs.keys())
+        project_costs = list(costs.values())
+
+        batches = []
+        batch_costs = []
+        queues = []
+        for worker_projects in algorithm.partition(project_costs, workers):
+            worker_batches = [
+                [project_paths[index]] for index in worker_projects if project_costs[index] > constraint_value
+            ]
+
+            regular_projects = [index for index in worker_projects if project_costs[index] <= constraint_value]
+            regular_costs = [project_costs[index] for index in regular_projects]
+            for result_bin in pack(regular_costs, constraint_value, FitStrategy.FIRST_FIT):
+                if result_bin:
+                    worker_batches.append([project_paths[regular_projects[index]] for index in result_bin])
+
+            worker_batches.sort(key=lambda batch: sum(costs[project] for project in batch), reverse=True)
+
+            queues.append(list(range(len(batches), len(batches) + len(worker_batches))))
+            batches.extend(worker_batches)
+            batch_costs.extend(sum(costs[project] for project in batch) for batch in worker_batches)
+
+        plan = ExecutionPlan(queues, batch_costs)
+        logger.info(f'{len(batches)} batches are planned for {workers} workers. Makespan: {plan.get_makespan()}.')
+
+        return batches, plan
+
+
 @unique
 class BatcherName(Enum):
     DUMMY_BATCHER = 'dummy_batcher'
@@ -236,6 +565,9 @@ class BatcherName(Enum):
     ONE_DIMENSIONAL_BEST_FIT_DECREASING = '1d_best_fit_decreasing'
     ONE_DIMENSIONAL_WORST_FIT_DECREASING = '1d_worst_fit_decreasing'
     ONE_DIMENSIONAL_NEXT_FIT_DECREASING = '1d_next_fit_decreasing'
+    MULTIDIMENSIONAL_FIRST_FIT_DECREASING = 'nd_first_fit_decreasing'
+    COST_MODEL = 'cost_model'
+    LONGEST_PROCESSING_TIME = 'longest_processing_time'
 
     def execute(
         self,
@@ -251,6 +583,15 @@ class BatcherName(Enum):
             **kwargs,
         )
 
+    def plan(
+        self,
+        projects: Dict[Path, Dict[str, int]],
+        batch_constraints: Dict[str, int],
+        ignore_oversized_batches: bool = IGNORE_OVERSIZED_PROJECTS_DEFAULT,
+        **kwargs,
+    ) -> Tuple[List[List[Path]], Optional[ExecutionPlan]]:
+        return BATCHER_NAME_TO_CLASS[self].plan(projects, batch_constraints, ignore_oversized_batches, **kwargs)
+
     @classmethod
     def values(cls) -> Set[str]:
         return {metric.value for metric in cls}
@@ -262,4 +603,7 @@ BATCHER_NAME_TO_CLASS: Dict[BatcherName, Type[Batcher]] = {
     BatcherName.ONE_DIMENSIONAL_BEST_FIT_DECREASING: OneDimensionalBestFitDecreasingBatcher,
     BatcherName.ONE_DIMENSIONAL_WORST_FIT_DECREASING: OneDimensionalWorstFitDecreasingBatcher,
     BatcherName.ONE_DIMENSIONAL_NEXT_FIT_DECREASING: OneDimensionalNextFitDecreasingBatcher,
+    BatcherName.MULTIDIMENSIONAL_FIRST_FIT_DECREASING: MultiDimensionalFirstFitDecreasingBatcher,
+    BatcherName.COST_MODEL: CostModelBatcher,
+    BatcherName.LONGEST_PROCESSING_TIME: LongestProcessingTimeBatcher,
 }
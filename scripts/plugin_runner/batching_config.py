@@ -1,6 +1,7 @@
 from enum import Enum, unique
 
 from plugin_runner.batcher import BatcherArgument, BatcherName
+from plugin_runner.execution_plan import SchedulingAlgorithm
 from benchmark.metrics_collection.metrics import MetricName
 from utils.language import Language
 
@@ -22,7 +23,7 @@ BATCHING_SCHEMA = {
         'type': 'string',
         'required': False,
         'allowed': [*Language.values(), None],
-        'dependencies': [ConfigField.METRIC.value, ConfigField.BATCH_CONSTRAINTS.value],
+        'dependencies': [ConfigField.BATCH_CONSTRAINTS.value],
     },
     ConfigField.METRIC.value: {
         'type': 'string',
@@ -35,7 +36,7 @@ BATCHING_SCHEMA = {
         'required': False,
         'keysrules': {'type': 'string', 'allowed': MetricName.values()},
         'valuesrules': {'type': 'integer'},
-        'dependencies': [ConfigField.LANGUAGE.value, ConfigField.METRIC.value],
+        'dependencies': [ConfigField.LANGUAGE.value],
     },
     ConfigField.IGNORE_OVERSIZED_PROJECTS.value: {'type': 'boolean', 'required': False},
     ConfigField.BATCHER_CONFIG.value: {
@@ -54,6 +55,35 @@ BATCHING_SCHEMA = {
                 'min': 1,
                 'dependencies': {ConfigField.NAME.value: [BatcherName.ONE_DIMENSIONAL_NEXT_FIT_DECREASING.value]},
             },
+            BatcherArgument.COST_MODEL.value: {
+                'type': 'string',
+                'required': False,
+                'dependencies': {ConfigField.NAME.value: [BatcherName.COST_MODEL.value]},
+            },
+            BatcherArgument.TARGET_TIME.value: {
+                'type': 'number',
+                'required': False,
+                'min': 0,
+                'dependencies': {ConfigField.NAME.value: [BatcherName.COST_MODEL.value]},
+            },
+            BatcherArgument.MEMORY_LIMIT.value: {
+                'type': 'number',
+                'required': False,
+                'min': 0,
+                'dependencies': {ConfigField.NAME.value: [BatcherName.COST_MODEL.value]},
+            },
+            BatcherArgument.WORKERS.value: {
+                'type': 'integer',
+                'required': False,
+                'min': 1,
+                'dependencies': {ConfigField.NAME.value: [BatcherName.LONGEST_PROCESSING_TIME.value]},
+            },
+            BatcherArgument.SCHEDULING_ALGORITHM.value: {
+                'type': 'string',
+                'required': False,
+                'allowed': SchedulingAlgorithm.values(),
+                'dependencies': {ConfigField.NAME.value: [BatcherName.LONGEST_PROCESSING_TIME.value]},
+            },
         },
     },
 }
@@ -0,0 +1,251 @@
+"""
+This module contains an implementation of the 1D bin packing heuristics used by the batchers.
+
+The heuristics reproduce the bin assignments and the bin order of the ``binpackp`` package, but the bin lookup takes
+O(log n) instead of O(n), so even hundreds of thousands of items are packed in seconds:
+    * First Fit uses a segment tree over the bins that stores the maximum available volume;
+    * Best Fit uses a sorted array of the bins;
+    * Worst Fit uses a heap of the bins;
+    * Next-k-Fit scans only the k open bins.
+"""
+import bisect
+import heapq
+from enum import Enum, unique
+from typing import List, Sequence, Set
+
+import numpy as np
+
+
+@unique
+class FitStrategy(Enum):
+    FIRST_FIT = 'first_fit'
+    BEST_FIT = 'best_fit'
+    WORST_FIT = 'worst_fit'
+    NEXT_FIT = 'next_fit'
+
+    @classmethod
+    def values(cls) -> Set[str]:
+        return {strategy.value for strategy in cls}
+
+
+class _Bins:
+    """Storage of the bin items that keeps the order in which the bins are closed."""
+
+    def __init__(self):
+        self.items: List[List[int]] = []
+        self.closed: List[int] = []
+
+    def open(self) -> int:
+        self.items.append([])
+        return len(self.items) - 1
+
+    def close(self, bin_index: int) -> None:
+        self.closed.append(bin_index)
+
+    def get_result(self, open_bins: Sequence[int]) -> List[List[int]]:
+        return [self.items[bin_index] for bin_index in [*self.closed, *open_bins]]
+
+
+def pack(
+    sizes: Sequence[float],
+    capacity: float,
+    strategy: FitStrategy,
+    sort: bool = True,
+    max_open_bins: int = 1,
+) -> List[List[int]]:
+    """
+    Pack the items into bins of the same capacity.
+
+    Like in ``binpackp``, the packing starts with one empty bin, an item whose size equals the capacity is always put
+    in a new bin, and a bin is closed as soon as it is full. The result contains the closed bins in the order in which
+    they were closed, followed by the open bins in the order in which the strategy considers them. It may contain
+    empty bins.
+
+    :param sizes: Sizes of the items. All sizes must be non-negative and must not exceed the capacity.
+    :param capacity: Bin capacity. Must be positive.
+    :param strategy: Strategy that selects a bin for an item.
+    :param sort: Whether to sort the items in descending order of their sizes before packing. Items of the same size
+    keep their order.
+    :param max_open_bins: Maximum number of open bins for the Next Fit strategy. When it is exceeded, the first open
+    bin is closed. By default, 1.
+    :return: List of bins. Each bin is a list of indices of the items included in that bin.
+    :raises ValueError: If the capacity is not positive or if some item sizes are negative or exceed the capacity.
+    """
+    item_sizes = np.asarray(sizes, dtype=float)
+    if capacity <= 0:
+        raise ValueError('The capacity must be positive.')
+
+    if item_sizes.size > 0 and (item_sizes.min() < 0 or item_sizes.max() > capacity):
+        raise ValueError('Item sizes must be non-negative and must not exceed the capacity.')
+
+    order = np.argsort(-item_sizes, kind='stable') if sort else np.arange(len(item_sizes))
+
+    # Python scalars are much faster than NumPy ones in the packing loops
+    item_indices = order.tolist()
+    item_sizes = item_sizes[order].tolist()
+
+    if strategy == FitStrategy.FIRST_FIT:
+        return _first_fit(item_indices, item_sizes, capacity)
+
+    if strategy == FitStrategy.BEST_FIT:
+        return _best_fit(item_indices, item_sizes, capacity)
+
+    if strategy == FitStrategy.WORST_FIT:
+        return _worst_fit(item_indices, item_sizes, capacity)
+
+    return _next_fit(item_indices, item_sizes, capacity, max_open_bins)
+
+
+def _first_fit(item_indices: List[int], item_sizes: List[float], capacity: float) -> List[List[int]]:
+    bins = _Bins()
+
+    # A segment tree with the available volumes of the bins in the leaves. Closed and unused bins are marked with -1.
+    leaves = 1
+    while leaves < len(item_indices) + 1:
+        leaves *= 2
+    tree = [-1.0] * (2 * leaves)
+
+    def update(bin_index: int, available_volume: float) -> None:
+        node = leaves + bin_index
+        tree[node] = available_volume
+        node //= 2
+        while node:
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+            node //= 2
+
+    def find_first(size: float) -> int:
+        if tree[1] < size:
+            return -1
+
+        node = 1
+        while node < leaves:
+            node = 2 * node if tree[2 * node] >= size else 2 * node + 1
+        return node - leaves
+
+    update(bins.open(), capacity)
+    for item_index, size in zip(item_indices, item_sizes):
+        if size == capacity:
+            full_bin = bins.open()
+            bins.items[full_bin].append(item_index)
+            bins.close(full_bin)
+            continue
+
+        bin_index = find_first(size)
+        if bin_index == -1:
+            bin_index = bins.open()
+            available_volume = capacity
+        else:
+            available_volume = tree[leaves + bin_index]
+
+        bins.items[bin_index].append(item_index)
+        available_volume -= size
+        if available_volume == 0:
+            bins.close(bin_index)
+            available_volume = -1
+        update(bin_index, available_volume)
+
+    open_bins = [bin_index for bin_index in range(len(bins.items)) if tree[leaves + bin_index] >= 0]
+    return bins.get_result(open_bins)
+
+
+def _best_fit(item_indices: List[int], item_sizes: List[float], capacity: float) -> List[List[int]]:
+    bins = _Bins()
+
+    # The open bins are sorted by their available volume. Bins with the same volume are sorted by the time of their
+    # last change, which is the order that the stable sort after each insertion gives in binpackp.
+    open_bins = [(capacity, 0, bins.open())]
+    for time, (item_index, size) in enumerate(zip(item_indices, item_sizes), start=1):
+        if size == capacity:
+            full_bin = bins.open()
+            bins.items[full_bin].append(item_index)
+            bins.close(full_bin)
+            continue
+
+        position = bisect.bisect_left(open_bins, (size, -1))
+        if position == len(open_bins):
+            available_volume, bin_index = capacity, bins.open()
+        else:
+            available_volume, last_change, bin_index = open_bins[position]
+            if size == 0:
+                bins.items[bin_index].append(item_index)
+                continue
+            del open_bins[position]
+
+        bins.items[bin_index].append(item_index)
+        available_volume -= size
+        if available_volume == 0:
+            bins.close(bin_index)
+        else:
+            bisect.insort(open_bins, (available_volume, time, bin_index))
+
+    return bins.get_result([bin_index for _, _, bin_index in open_bins])
+
+
+def _worst_fit(item_indices: List[int], item_sizes: List[float], capacity: float) -> List[List[int]]:
+    bins = _Bins()
+
+    # The open bins are kept in a heap by their available volume in descending order. A changed bin goes before
+    # the bins with the same volume, and a new one goes after them, which is the order that the stable sort after
+    # each insertion gives in binpackp.
+    open_bins = [(-capacity, 0, bins.open())]
+    for time, (item_index, size) in enumerate(zip(item_indices, item_sizes), start=1):
+        if size == capacity:
+            full_bin = bins.open()
+            bins.items[full_bin].append(item_index)
+            bins.close(full_bin)
+            continue
+
+        if not open_bins or -open_bins[0][0] < size:
+            bin_index = bins.open()
+            bins.items[bin_index].append(item_index)
+            heapq.heappush(open_bins, (size - capacity, time, bin_index))
+            continue
+
+        negative_volume, _, bin_index = open_bins[0]
+        bins.items[bin_index].append(item_index)
+        if size == 0:
+            continue
+
+        heapq.heappop(open_bins)
+        if -negative_volume - size == 0:
+            bins.close(bin_index)
+        else:
+            heapq.heappush(open_bins, (negative_volume + size, -time, bin_index))
+
+    return bins.get_result([bin_index for _, _, bin_index in sorted(open_bins)])
+
+
+def _next_fit(
+    item_indices: List[int],
+    item_sizes: List[float],
+    capacity: float,
+    max_open_bins: int,
+) -> List[List[int]]:
+    bins = _Bins()
+
+    open_bins = [bins.open()]
+    available_volumes = [capacity]
+    for item_index, size in zip(item_indices, item_sizes):
+        if size == capacity:
+            full_bin = bins.open()
+            bins.items[full_bin].append(item_index)
+            bins.close(full_bin)
+            continue
+
+        for position, available_volume in enumerate(available_volumes):
+            if size <= available_volume:
+                bins.items[open_bins[position]].append(item_index)
+                available_volumes[position] -= size
+                if available_volumes[position] == 0:
+                    bins.close(open_bins.pop(position))
+                    available_volumes.pop(position)
+                break
+        else:
+            open_bins.append(bins.open())
+            bins.items[open_bins[-1]].append(item_index)
+            available_volumes.append(capacity - size)
+            if 1 <= max_open_bins < len(open_bins):
+                bins.close(open_bins.pop(0))
+                available_volumes.pop(0)
+
+    return bins.get_result(open_bins)
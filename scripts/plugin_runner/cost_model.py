@@ -0,0 +1,133 @@
+"""This module contains a linear model that predicts the processing time and RSS of a batch from its project metrics."""
+import logging
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from benchmark.sampling.stratified_sampling import read_projects_metrics
+from utils.language import Language
+
+logger = logging.getLogger(__name__)
+
+TIME = 'time'
+RSS = 'rss'
+
+
+@dataclass
+class CostModel:
+    """
+    A linear model of the batch processing cost.
+
+    The batch time (in seconds) and the batch RSS (in kilobytes) are predicted as an intercept, which is the cost
+    of the IDE startup, plus the sum of the project costs. The cost of a project is a linear combination of its metrics.
+    """
+
+    features: List[str]
+    time_intercept: float
+    time_coefficients: List[float]
+    rss_intercept: float
+    rss_coefficients: List[float]
+    language: Optional[str] = None
+
+    def get_project_time(self, metrics: Dict[str, int]) -> float:
+        return self._get_project_cost(metrics, self.time_coefficients)
+
+    def get_project_rss(self, metrics: Dict[str, int]) -> float:
+        return self._get_project_cost(metrics, self.rss_coefficients)
+
+    def predict_time(self, projects: List[Dict[str, int]]) -> float:
+        return self.time_intercept + sum(self.get_project_time(metrics) for metrics in projects)
+
+    def predict_rss(self, projects: List[Dict[str, int]]) -> float:
+        return self.rss_intercept + sum(self.get_project_rss(metrics) for metrics in projects)
+
+    def read_projects_metrics(self, projects: List[Path]) -> Dict[Path, Optional[Dict[str, int]]]:
+        return read_projects_metrics(projects, None if self.language is None else Language.from_value(self.language))
+
+    def save(self, path: Path) -> None:
+        with open(path, 'w') as file:
+            yaml.safe_dump(asdict(self), file)
+
+    @classmethod
+    def load(cls, path: Path) -> 'CostModel':
+        with open(path) as file:
+            return cls(**yaml.safe_load(file))
+
+    def _get_project_cost(self, metrics: Dict[str, int], coefficients: List[float]) -> float:
+        return sum(coefficient * metrics.get(feature, 0) for feature, coefficient in zip(self.features, coefficients))
+
+
+def _fit_non_negative(features: np.ndarray, target: np.ndarray) -> Tuple[float, List[float]]:
+    """
+    Fit a linear regression with an intercept and non-negative coefficients.
+
+    The regression is fitted by the least squares method. While some coefficients are negative, the feature with
+    the most negative coefficient is excluded, and the regression is fitted again. Excluded features get zero
+    coefficients, so a project can never make a batch cheaper.
+
+    :param features: Matrix of the feature values, one row per observation.
+    :param target: Vector of the target values.
+    :return: Intercept and list of coefficients.
+    """
+    active = list(range(features.shape[1]))
+    coefficients = np.zeros(features.shape[1])
+
+    while True:
+        design = np.column_stack([np.ones(len(target)), features[:, active]])
+        solution, *_ = np.linalg.lstsq(design, target, rcond=None)
+
+        intercept, active_coefficients = solution[0], solution[1:]
+        if len(active_coefficients) == 0 or active_coefficients.min() >= 0:
+            break
+
+        active.pop(int(active_coefficients.argmin()))
+
+    coefficients[active] = active_coefficients
+    return float(intercept), coefficients.tolist()
+
+
+def fit_cost_model(
+    batch_metrics: pd.DataFrame,
+    batch_time: pd.Series,
+    batch_rss: pd.Series,
+    features: List[str],
+    language: Optional[Language] = None,
+) -> CostModel:
+    """
+    Fit a cost model over the benchmark results.
+
+    :param batch_metrics: Dataframe indexed by batch with the sums of the project metrics of each batch.
+    :param batch_time: Series indexed by batch with the processing time of each batch in seconds.
+    :param batch_rss: Series indexed by batch with the peak RSS of each batch in kilobytes.
+    :param features: List of metrics the model depends on. Missing metric values are considered to be zero.
+    :param language: Language, the metrics for which were used. If None, the total metrics were used.
+    :return: Fitted cost model.
+    :raises ValueError: If there are no batches with both metrics and results.
+    """
+    data = pd.concat(
+        [batch_metrics.reindex(columns=features).fillna(0), batch_time.rename(TIME), batch_rss.rename(RSS)],
+        axis=1,
+        join='inner',
+    )
+    if data.empty:
+        raise ValueError('There are no batches with both metrics and benchmark results.')
+
+    if len(data) <= len(features):
+        logger.warning(f'The model with {len(features)} features is fitted on {len(data)} batches only.')
+
+    feature_values = data[features].to_numpy(dtype=float)
+    time_intercept, time_coefficients = _fit_non_negative(feature_values, data[TIME].to_numpy(dtype=float))
+    rss_intercept, rss_coefficients = _fit_non_negative(feature_values, data[RSS].to_numpy(dtype=float))
+
+    return CostModel(
+        features,
+        time_intercept,
+        time_coefficients,
+        rss_intercept,
+        rss_coefficients,
+        None if language is None else language.value,
+    )
@@ -0,0 +1,121 @@
+"""
+This module contains an execution plan that assigns batches to a fixed number of workers.
+
+It also contains the algorithms that balance the workers, so that the slowest of them finishes as early as possible
+(i.e. they minimize the makespan).
+"""
+import heapq
+import json
+from dataclasses import asdict, dataclass
+from enum import Enum, unique
+from pathlib import Path
+from typing import List, Sequence, Set
+
+EXECUTION_PLAN_FILE = 'execution_plan.json'
+
+
+@dataclass
+class ExecutionPlan:
+    """
+    Assignment of batches to workers.
+
+    Each worker processes the batches from its queue one by one, in the order in which they are listed.
+    """
+
+    queues: List[List[int]]
+    costs: List[float]
+
+    def get_worker_costs(self) -> List[float]:
+        return [sum(self.costs[index] for index in queue) for queue in self.queues]
+
+    def get_makespan(self) -> float:
+        return max(self.get_worker_costs(), default=0)
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump(asdict(self), file, indent=4)
+
+    @classmethod
+    def load(cls, path: Path) -> 'ExecutionPlan':
+        with open(path) as file:
+            return cls(**json.load(file))
+
+
+def longest_processing_time(costs: Sequence[float], workers: int) -> List[List[int]]:
+    """
+    Partition the items between the workers using the Longest Processing Time first algorithm.
+
+    The items are sorted in descending order of their costs, and each of them is assigned to the least loaded worker.
+    The makespan is at most 4/3 of the optimal one.
+
+    :param costs: Costs of the items.
+    :param workers: Number of workers.
+    :return: List of worker queues. Each queue is a list of indices of the items in descending order of their costs.
+    """
+    queues: List[List[int]] = [[] for _ in range(workers)]
+
+    loads = [(0.0, worker) for worker in range(workers)]
+    for index in sorted(range(len(costs)), key=lambda item: costs[item], reverse=True):
+        load, worker = heapq.heappop(loads)
+        queues[worker].append(index)
+        heapq.heappush(loads, (load + costs[index], worker))
+
+    return queues
+
+
+def karmarkar_karp(costs: Sequence[float], workers: int) -> List[List[int]]:
+    """
+    Partition the items between the workers using the multiway Karmarkar–Karp (largest differencing) algorithm.
+
+    Each item starts as a partial partition, where one worker gets the item and the others get nothing. Then the two
+    partitions with the largest difference between their most and least loaded workers are repeatedly merged: the most
+    loaded worker of one partition is combined with the least loaded worker of the other, and so on. The algorithm
+    usually gives a smaller makespan than LPT when there are few items per worker.
+
+    :param costs: Costs of the items.
+    :param workers: Number of workers.
+    :return: List of worker queues. Each queue is a list of indices of the items in descending order of their costs.
+    """
+    # Each partition is a list of (load, items) pairs sorted in descending order of load. The counter breaks ties,
+    # so that the partitions themselves are never compared.
+    partitions = []
+    for counter, (index, cost) in enumerate(enumerate(costs)):
+        partition = [(cost, [index])] + [(0, []) for _ in range(workers - 1)]
+        heapq.heappush(partitions, (-cost, counter, partition))
+
+    counter = len(costs)
+    while len(partitions) > 1:
+        _, _, first = heapq.heappop(partitions)
+        _, _, second = heapq.heappop(partitions)
+
+        merged = [
+            (first_load + second_load, first_items + second_items)
+            for (first_load, first_items), (second_load, second_items) in zip(first, reversed(second))
+        ]
+        merged.sort(key=lambda subset: subset[0], reverse=True)
+
+        heapq.heappush(partitions, (merged[-1][0] - merged[0][0], counter, merged))
+        counter += 1
+
+    if not partitions:
+        return [[] for _ in range(workers)]
+
+    _, _, partition = partitions[0]
+    return [sorted(items, key=lambda item: costs[item], reverse=True) for _, items in partition]
+
+
+@unique
+class SchedulingAlgorithm(Enum):
+    LONGEST_PROCESSING_TIME = 'lpt'
+    KARMARKAR_KARP = 'karmarkar_karp'
+
+    def partition(self, costs: Sequence[float], workers: int) -> List[List[int]]:
+        if self == SchedulingAlgorithm.KARMARKAR_KARP:
+            return karmarkar_karp(costs, workers)
+
+        return longest_processing_time(costs, workers)
+
+    @classmethod
+    def values(cls) -> Set[str]:
+        return {algorithm.value for algorithm in cls}
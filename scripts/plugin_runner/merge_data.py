@@ -1,79 +1,462 @@
 """This class contains methods for merging analysis results from different batches into a single file."""
 import logging
 import os
+import shutil
 import pandas as pd
-from plugin_runner.analyzers import AVAILABLE_ANALYZERS, Analyzer
-from typing import List
-from utils.file_utils import get_files_by_name
+from enum import Enum, unique
+from multiprocessing import Pool
+from pathlib import Path
+from plugin_runner.analyzers import AVAILABLE_ANALYZERS, Analyzer, BOOLEAN, CATEGORY, INTEGER
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Optional, Set, TextIO, Tuple
+from utils.file_utils import Extensions, create_directory, get_files_by_name
 
 PROJECT_INDEX = 'project_index.csv'
 METHOD_INDEX = 'method_index.csv'
 
+CHUNK_SIZE = 100000
+COPY_BUFFER_SIZE = 2 ** 20
+
 logging.basicConfig(level=logging.DEBUG)
 
 
-def merge(batch_output_paths: List[str], output_dir: str, analyzer_name: str):
+@unique
+class OutputFormat(str, Enum):
+    CSV = 'csv'
+    PARQUET = 'parquet'
+
+    @classmethod
+    def values(cls) -> List[str]:
+        return [output_format.value for output_format in cls]
+
+
+def merge(batch_output_paths: List[str], output_dir: str, analyzer_name: str, n_cpu: int = 1,
+          output_format: OutputFormat = OutputFormat.CSV):
     analyzer = Analyzer.get_analyzer_by_name(AVAILABLE_ANALYZERS, analyzer_name)
     if analyzer.name == 'kotlin-clones':
-        merge_clones(batch_output_paths, output_dir, analyzer.output_file)
+        if output_format != OutputFormat.CSV:
+            logging.warning(f'The {analyzer.name} data can be merged only in its own format.')
+        merge_clones(batch_output_paths, output_dir, analyzer.output_file, n_cpu)
+        return
+
+    if get_output_format(analyzer, output_format) != output_format:
+        logging.warning(f'The {analyzer.name} data has unquoted free-text fields, so it can be merged only as csv.')
+        output_format = OutputFormat.CSV
+
+    if output_format == OutputFormat.PARQUET:
+        merge_csv_to_parquet(
+            batch_output_paths,
+            analyzer.output_file,
+            output_dir,
+            schema=analyzer.schema,
+            sep=analyzer.separator,
+        )
     else:
         merge_csv(batch_output_paths, analyzer.output_file, output_dir)
 
 
-def merge_csv(batch_output_paths: List[str], csv_filename: str, result_dir: str):
-    result_df = pd.DataFrame()
+def get_output_format(analyzer: Analyzer, output_format: OutputFormat) -> OutputFormat:
+    """Get the format in which the analyzer data is merged: the data that cannot be parsed is merged as csv."""
+    if output_format == OutputFormat.PARQUET and not analyzer.parseable:
+        return OutputFormat.CSV
+    return output_format
+
+
+def get_merged_file_names(analyzer_name: str, output_format: OutputFormat = OutputFormat.CSV) -> List[str]:
+    analyzer = Analyzer.get_analyzer_by_name(AVAILABLE_ANALYZERS, analyzer_name)
+    if analyzer.name == 'kotlin-clones':
+        return [PROJECT_INDEX, METHOD_INDEX, analyzer.output_file]
+    if get_output_format(analyzer, output_format) == OutputFormat.PARQUET:
+        return [os.path.basename(get_parquet_dataset_path('', analyzer.output_file))]
+    return [analyzer.output_file]
+
 
+def clear_merged_data(output_dir: str, analyzer_name: str, output_format: OutputFormat = OutputFormat.CSV):
+    for file_name in get_merged_file_names(analyzer_name, output_format):
+        file_path = os.path.join(output_dir, file_name)
+        if os.path.isdir(file_path):
+            logging.info(f'Removing the previously merged {file_path} dataset...')
+            shutil.rmtree(file_path)
+        elif os.path.exists(file_path):
+            logging.info(f'Removing the previously merged {file_path} file...')
+            os.remove(file_path)
+
+
+def _read_csv_columns(file_path: str, sep: str = '\t') -> Optional[List[str]]:
+    try:
+        return list(pd.read_csv(file_path, sep=sep, nrows=0).columns)
+    except pd.errors.EmptyDataError:
+        logging.warning(f'File {file_path} is empty!')
+        return None
+
+
+def _collect_csv_columns(
+    batch_output_paths: List[str],
+    csv_filename: str,
+    sep: str = '\t',
+) -> Tuple[List[Tuple[str, List[str]]], List[str]]:
+    files_columns = []
     for batch_output_path in batch_output_paths:
-        try:
-            logging.info(f'Searching for {csv_filename} files in {batch_output_path}...')
-            file_paths = get_files_by_name(batch_output_path, csv_filename)
-            for file_path in file_paths:
-                logging.info(f'Merging {file_path} file...')
-                batch_df = pd.read_csv(file_path, sep='\t')
-                result_df = pd.concat([result_df, batch_df])
-        except pd.errors.EmptyDataError:
-            logging.warning(f'File {batch_output_path} is empty!')
+        logging.info(f'Searching for {csv_filename} files in {batch_output_path}...')
+        for file_path in get_files_by_name(batch_output_path, csv_filename):
+            columns = _read_csv_columns(file_path, sep)
+            if columns is not None:
+                files_columns.append((file_path, columns))
+
+    # The columns are united in the order of their appearance, as pd.concat does
+    all_columns = list(dict.fromkeys(column for _, columns in files_columns for column in columns))
+    return files_columns, all_columns
+
+
+def _copy_csv_rows(file_path: str, output: TextIO, buffer_size: int = COPY_BUFFER_SIZE):
+    with open(file_path, newline='') as fin:
+        # Skipping the header
+        fin.readline()
+
+        last_chunk = ''
+        for chunk in iter(lambda: fin.read(buffer_size), ''):
+            output.write(chunk)
+            last_chunk = chunk
+
+    if last_chunk and not last_chunk.endswith('\n'):
+        output.write('\n')
+
+
+def merge_csv(batch_output_paths: List[str], csv_filename: str, result_dir: str, chunk_size: int = CHUNK_SIZE):
+    """
+    Merge the csv files with the given name from all batches into a single file with constant memory.
+
+    The header is written once. The rows of the files that have the same columns as the merged file are copied as is,
+    in fixed-size buffers. The other files are read in chunks, and their columns are aligned with the merged file ones,
+    the missing values being left empty.
+
+    :param batch_output_paths: Paths to the batch outputs.
+    :param csv_filename: Name of the csv files to merge.
+    :param result_dir: Directory to save the merged file to.
+    :param chunk_size: Number of rows in the chunks in which the files with other columns are read.
+    """
+    files_columns, all_columns = _collect_csv_columns(batch_output_paths, csv_filename)
+
+    with open(os.path.join(result_dir, csv_filename), 'a', newline='') as fout:
+        if not files_columns:
+            return
+
+        pd.DataFrame(columns=all_columns).to_csv(fout, index=False, sep='\t')
+
+        for file_path, columns in files_columns:
+            logging.info(f'Merging {file_path} file...')
+            if columns == all_columns:
+                _copy_csv_rows(file_path, fout)
+                continue
+
+            for batch_df in pd.read_csv(file_path, sep='\t', chunksize=chunk_size):
+                batch_df.reindex(columns=all_columns).to_csv(fout, index=False, header=False, sep='\t')
+
+
+def _get_arrow_schema(columns: List[str], schema: Dict[str, str]):
+    import pyarrow as pa
+
+    arrow_types = {
+        CATEGORY: pa.dictionary(pa.int32(), pa.string()),
+        INTEGER: pa.int64(),
+        BOOLEAN: pa.bool_(),
+    }
+    return pa.schema([(column, arrow_types.get(schema.get(column), pa.string())) for column in columns])
+
+
+def merge_csv_to_parquet(
+    batch_output_paths: List[str],
+    csv_filename: str,
+    result_dir: str,
+    chunk_size: int = CHUNK_SIZE,
+    schema: Optional[Dict[str, str]] = None,
+    sep: str = '\t',
+):
+    """
+    Merge the csv files with the given name from all batches into a partitioned Parquet dataset with constant memory.
+
+    The dataset is a directory named after the csv file with the ``.parquet`` extension, where each chunk of each file
+    is saved as a separate part. The columns are typed according to the schema: the categorical columns are stored as
+    dictionary-encoded strings, and the columns that are not in the schema are stored as strings. So all the parts have
+    the same schema. Requires the ``pyarrow`` package.
+
+    :param batch_output_paths: Paths to the batch outputs.
+    :param csv_filename: Name of the csv files to merge.
+    :param result_dir: Directory to save the merged dataset to.
+    :param chunk_size: Number of rows in a part.
+    :param schema: Dictionary, where for the typed columns, their pandas dtypes are specified.
+    :param sep: Separator of the csv files.
+    """
+    schema = schema or {}
+    files_columns, all_columns = _collect_csv_columns(batch_output_paths, csv_filename, sep)
+    arrow_schema = _get_arrow_schema(all_columns, schema)
+
+    # The strings are read as is, while the empty values of the other types are missing
+    dtypes = {column: schema.get(column, str) for column in all_columns}
+    na_values = {column: [''] for column in all_columns if schema.get(column, CATEGORY) != CATEGORY}
+
+    dataset_path = get_parquet_dataset_path(result_dir, csv_filename)
+    create_directory(dataset_path)
+
+    # The parts are appended to the existing ones
+    part_index = max((_get_part_index(part_path) for part_path in _get_part_paths(dataset_path)), default=-1) + 1
+    for file_path, _ in files_columns:
+        logging.info(f'Merging {file_path} file...')
+        batch_dfs = pd.read_csv(
+            file_path,
+            sep=sep,
+            dtype=dtypes,
+            keep_default_na=False,
+            na_values=na_values,
+            chunksize=chunk_size,
+        )
+
+        for batch_df in batch_dfs:
+            batch_df = batch_df.reindex(columns=all_columns).astype({
+                column: schema.get(column, object) for column in all_columns
+            })
+
+            part_path = os.path.join(dataset_path, f'part-{part_index:05d}.{Extensions.PARQUET.value}')
+            batch_df.to_parquet(part_path, index=False, schema=arrow_schema)
+            part_index += 1
+
+
+def get_parquet_dataset_path(result_dir: str, csv_filename: str) -> str:
+    return os.path.join(result_dir, f'{Path(csv_filename).stem}.{Extensions.PARQUET.value}')
+
+
+def _get_part_paths(dataset_path: str) -> List[str]:
+    if not os.path.isdir(dataset_path):
+        return []
+    return sorted(
+        os.path.join(dataset_path, file_name)
+        for file_name in os.listdir(dataset_path)
+        if file_name.startswith('part-') and file_name.endswith(f'.{Extensions.PARQUET.value}')
+    )
+
+
+def _get_part_index(part_path: str) -> int:
+    return int(Path(part_path).stem[len('part-'):])
+
+
+def _get_field(line: str, sep: str, index: int) -> Optional[str]:
+    fields = line.rstrip('\r\n').split(sep, index + 1)
+    return fields[index] if index < len(fields) else None
+
+
+def remove_projects_from_csv(file_path: str, result_path: str, project_column: str, projects: Set[str],
+                             sep: str = ',', buffer_size: int = COPY_BUFFER_SIZE):
+    """
+    Copy the csv file without the rows of the given projects with constant memory.
+
+    The rows are filtered as lines, which are not parsed beyond the project column, so the rest of each kept line is
+    copied as is.
+
+    :param file_path: Path to the csv file.
+    :param result_path: Path to save the copy to.
+    :param project_column: Column with the project names.
+    :param projects: Names of the projects to remove.
+    :param sep: Separator of the csv file.
+    :param buffer_size: Approximate size of the chunks in which the file is read.
+    """
+    with open(file_path, newline='') as fin:
+        with open(result_path, 'w', newline='') as fout:
+            header = fin.readline()
+            if not header:
+                return
+
+            fout.write(header)
+            column_index = header.rstrip('\r\n').split(sep).index(project_column)
+            for lines in iter(lambda: fin.readlines(buffer_size), []):
+                fout.writelines(line for line in lines if _get_field(line, sep, column_index) not in projects)
+
+
+def remove_projects_from_parquet(dataset_path: str, project_column: str, projects: Set[str]):
+    """
+    Remove the rows of the given projects from the partitioned Parquet dataset part by part.
+
+    Only the parts that contain the projects are rewritten, and the parts that become empty are removed.
+
+    :param dataset_path: Path to the Parquet dataset.
+    :param project_column: Column with the project names.
+    :param projects: Names of the projects to remove.
+    """
+    for part_path in _get_part_paths(dataset_path):
+        is_removed = pd.read_parquet(part_path, columns=[project_column])[project_column].isin(projects)
+        if not is_removed.any():
+            continue
+
+        if is_removed.all():
+            os.remove(part_path)
             continue
 
-    with open(os.path.join(result_dir, csv_filename), 'a') as fout:
-        result_df.to_csv(fout, index=False, sep='\t')
+        part_df = pd.read_parquet(part_path)
+        tmp_part_path = f'{part_path}.tmp'
+        part_df[~is_removed.values].to_parquet(tmp_part_path, index=False)
+        os.replace(tmp_part_path, part_path)
+
+
+def update_merged_data(batch_output_paths: List[str], output_dir: str, analyzer_name: str, projects: Set[str],
+                       n_cpu: int = 1, output_format: OutputFormat = OutputFormat.CSV):
+    """
+    Replace the data of the given projects in the merged data with the data from the batches.
+
+    The merged data is keyed by the project column of the analyzer: the rows of the reanalyzed projects are removed,
+    and the batch data is merged in. The csv file is rewritten into a temporary directory and then replaces the merged
+    file, while in the Parquet dataset only the parts with these projects are rewritten.
+
+    :param batch_output_paths: Paths to the outputs of the batches with the reanalyzed projects.
+    :param output_dir: Directory with the merged data.
+    :param analyzer_name: Name of the analyzer.
+    :param projects: Names of the reanalyzed projects.
+    :param n_cpu: Number of workers that process the batches.
+    :param output_format: Format of the merged data.
+    """
+    analyzer = Analyzer.get_analyzer_by_name(AVAILABLE_ANALYZERS, analyzer_name)
+    merged_path = os.path.join(output_dir, analyzer.output_file)
+
+    if analyzer.project_column is None:
+        logging.warning(f'The {analyzer.name} data is not keyed by project, so the batch data is appended to it.')
+    elif get_output_format(analyzer, output_format) == OutputFormat.PARQUET:
+        remove_projects_from_parquet(
+            get_parquet_dataset_path(output_dir, analyzer.output_file),
+            analyzer.project_column,
+            projects,
+        )
+    elif os.path.exists(merged_path):
+        with TemporaryDirectory(dir=output_dir) as tmp_dir:
+            previous_data_dir = os.path.join(tmp_dir, 'previous')
+            result_dir = os.path.join(tmp_dir, 'result')
+            create_directory(previous_data_dir)
+            create_directory(result_dir)
+
+            # The previous data is merged as one more batch, so the merged file is replaced at once
+            logging.info(f'Removing the data of {len(projects)} projects from {merged_path}...')
+            remove_projects_from_csv(
+                merged_path,
+                os.path.join(previous_data_dir, analyzer.output_file),
+                analyzer.project_column,
+                projects,
+                analyzer.separator,
+            )
+            merge_csv([previous_data_dir, *batch_output_paths], analyzer.output_file, result_dir)
+            os.replace(os.path.join(result_dir, analyzer.output_file), merged_path)
+        return
+
+    merge(batch_output_paths, output_dir, analyzer_name, n_cpu, output_format)
+
+
+def _read_max_index(file_path: str, column: int, chunk_size: int = CHUNK_SIZE) -> int:
+    max_index = -1
+    try:
+        for dataframe in pd.read_csv(file_path, header=None, sep='\t', usecols=[column], chunksize=chunk_size):
+            if not dataframe.empty:
+                max_index = max(max_index, int(dataframe[column].max()))
+    except pd.errors.EmptyDataError:
+        logging.warning(f'File {file_path} is empty!')
+    return max_index
 
 
-def merge_clones(batch_output_paths: List[str], output_dir: str, result_file_name: str):
-    last_project_index = -1
-    last_method_index = -1
+def get_index_offsets(batch_output_paths: List[str]) -> List[Tuple[int, int]]:
+    """
+    Compute the offsets of the project and method indexes of each batch in the merged clones data.
+
+    The indexes of each batch start from 0, so the indexes of a batch are shifted by the number of indexes in all the
+    previous batches, i.e. by the sum of their max indexes plus one.
+
+    :param batch_output_paths: Paths to the batch outputs in the merge order.
+    :return: List of the project and method index offsets of each batch.
+    """
+    offsets = []
+    project_offset = 0
+    method_offset = 0
     for batch_output_path in batch_output_paths:
-        project_df = move_indexes_dataframe(batch_output_path, output_dir, PROJECT_INDEX, last_project_index + 1)
-        method_df = move_indexes_dataframe(batch_output_path, output_dir, METHOD_INDEX, last_project_index + 1,
-                                           last_method_index + 1)
-        move_indexes_file(batch_output_path, output_dir, result_file_name,
-                          last_project_index + 1, last_method_index + 1)
+        offsets.append((project_offset, method_offset))
+        project_offset += _read_max_index(os.path.join(batch_output_path, PROJECT_INDEX), 0) + 1
+        method_offset += _read_max_index(os.path.join(batch_output_path, METHOD_INDEX), 1) + 1
+    return offsets
 
-        last_project_index = project_df[0].max()
-        last_method_index = method_df[1].max()
 
+def move_batch_indexes(batch_output_path: str, output_dir: str, result_file_name: str, project_offset: int,
+                       method_offset: int):
+    move_indexes_dataframe(batch_output_path, output_dir, PROJECT_INDEX, project_offset)
+    move_indexes_dataframe(batch_output_path, output_dir, METHOD_INDEX, project_offset, method_offset)
+    move_indexes_file(batch_output_path, output_dir, result_file_name, project_offset, method_offset)
 
-def move_indexes_dataframe(batch_output_path: str, output_path: str, filename: str, project_offset: int,
-                           method_offset: int = None, sep: str = '\t') -> pd.DataFrame:
-    dataframe = pd.read_csv(os.path.join(batch_output_path, filename), header=None, sep='\t')
-    dataframe[0] = dataframe[0].apply(lambda x: x + project_offset)
-    if method_offset:
-        dataframe[1] = dataframe[1].apply(lambda x: x + method_offset)
-    with open(os.path.join(output_path, filename), 'a') as fout:
-        dataframe.to_csv(fout, index=False, header=False, sep=sep)
-    return dataframe
 
+def merge_clones(batch_output_paths: List[str], output_dir: str, result_file_name: str, n_cpu: int = 1):
+    """
+    Merge the clones data from all batches, shifting the project and method indexes of each batch.
+
+    The index offsets of all batches are computed up front, so the batches can be processed in parallel. In this case,
+    each batch is processed into a temporary directory, and the results are concatenated in the batch order.
 
-def move_indexes_line(line: str, project_offset: int, method_offset: int, sep: str = ',') -> str:
-    project_index, method_index, rest = line.split(sep, maxsplit=2)
-    project_index = str(int(project_index) + project_offset)
-    method_index = str(int(method_index) + method_offset)
-    return sep.join([project_index, method_index, rest])
+    :param batch_output_paths: Paths to the batch outputs in the merge order.
+    :param output_dir: Directory to save the merged data to.
+    :param result_file_name: Name of the file with the methods data.
+    :param n_cpu: Number of workers that process the batches.
+    """
+    offsets = get_index_offsets(batch_output_paths)
+
+    if n_cpu <= 1:
+        for batch_output_path, (project_offset, method_offset) in zip(batch_output_paths, offsets):
+            move_batch_indexes(batch_output_path, output_dir, result_file_name, project_offset, method_offset)
+        return
+
+    with TemporaryDirectory(dir=output_dir) as tmp_dir:
+        part_dirs = []
+        for index in range(len(batch_output_paths)):
+            part_dirs.append(os.path.join(tmp_dir, f'batch_{index}'))
+            create_directory(part_dirs[-1])
+
+        with Pool(n_cpu) as pool:
+            pool.starmap(
+                move_batch_indexes,
+                [
+                    (batch_output_path, part_dir, result_file_name, project_offset, method_offset)
+                    for batch_output_path, part_dir, (project_offset, method_offset)
+                    in zip(batch_output_paths, part_dirs, offsets)
+                ],
+            )
+
+        for file_name in [PROJECT_INDEX, METHOD_INDEX, result_file_name]:
+            with open(os.path.join(output_dir, file_name), 'a') as fout:
+                for part_dir in part_dirs:
+                    part_path = os.path.join(part_dir, file_name)
+                    if os.path.exists(part_path):
+                        with open(part_path) as fin:
+                            shutil.copyfileobj(fin, fout, COPY_BUFFER_SIZE)
+
+
+def move_indexes_dataframe(batch_output_path: str, output_path: str, filename: str, project_offset: int,
+                           method_offset: Optional[int] = None, sep: str = '\t', chunk_size: int = CHUNK_SIZE):
+    try:
+        dataframes = pd.read_csv(os.path.join(batch_output_path, filename), header=None, sep='\t',
+                                 chunksize=chunk_size)
+    except pd.errors.EmptyDataError:
+        logging.warning(f'File {os.path.join(batch_output_path, filename)} is empty!')
+        return
+
+    with open(os.path.join(output_path, filename), 'a') as fout:
+        for dataframe in dataframes:
+            dataframe[0] += project_offset
+            if method_offset is not None:
+                dataframe[1] += method_offset
+            dataframe.to_csv(fout, index=False, header=False, sep=sep)
 
 
 def move_indexes_file(batch_output_path: str, output_path: str, filename: str, project_offset: int,
-                      method_offset: int, sep: str = ','):
+                      method_offset: int, sep: str = ',', buffer_size: int = COPY_BUFFER_SIZE):
     with open(os.path.join(batch_output_path, filename)) as batch_output:
-        lines = [move_indexes_line(line, project_offset, method_offset, sep) for line in batch_output.readlines()]
-    with open(os.path.join(output_path, filename), 'a') as final_output:
-        final_output.writelines(lines)
+        with open(os.path.join(output_path, filename), 'a') as final_output:
+            last_line = ''
+            for lines in iter(lambda: batch_output.readlines(buffer_size), []):
+                moved_lines = [
+                    f'{int(project_index) + project_offset}{sep}{int(method_index) + method_offset}{sep}{rest}'
+                    for project_index, method_index, rest in (line.split(sep, maxsplit=2) for line in lines)
+                ]
+                final_output.writelines(moved_lines)
+                last_line = moved_lines[-1]
+
+            if last_line and not last_line.endswith('\n'):
+                final_output.write('\n')
@@ -1,32 +1,69 @@
+import fcntl
+import hashlib
+import json
 import logging
+import os
+import shutil
 import subprocess
+import tempfile
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from copy import copy
 from distutils.version import Version
+from enum import Enum, unique
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Set, TextIO, Union
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
-from utils.python.pypi_utils import check_package_exists, get_available_versions
-from utils.python.requirements_utils import Requirements
+from pkg_resources import parse_version
+
+from utils.python.pypi_utils import DEFAULT_MAX_WORKERS, check_packages_exist, get_packages_available_versions
+from utils.python.requirements_utils import (
+    Requirements,
+    gather_requirements_from_file,
+    gather_unparsed_lines_from_file,
+    normalize_requirement,
+)
 
 logger = logging.getLogger(__name__)
 
+# The ioctl request that clones a file on the file systems with copy-on-write support, e.g. Btrfs or XFS
+FICLONE = 0x40049409
+
+# The console scripts are not linked from the store, since their shebangs point to the interpreter that installed them
+STORE_IGNORED_DIRS = {'bin'}
+
+# The wheels for the store are resolved with the --report option of pip install, which is supported since pip 22.2
+MIN_STORE_PIP_VERSION = parse_version('22.2')
+
+
+@unique
+class LinkMode(Enum):
+    HARDLINK = 'hardlink'
+    REFLINK = 'reflink'
 
-def filter_unavailable_packages(requirements: Requirements) -> Requirements:
+    @classmethod
+    def values(cls) -> Set[str]:
+        return {mode.value for mode in cls}
+
+
+def filter_unavailable_packages(requirements: Requirements, max_workers: int = DEFAULT_MAX_WORKERS) -> Requirements:
     """
     Remove all package names that are not on PyPI.
 
     :param requirements: Dictionary, where for each package the specs are listed.
                          The spec is a pair of operator and version.
+    :param max_workers: Maximum number of the concurrent requests to PyPI.
     :return: Dictionary, where for each package the specs are listed. The spec is a pair of operator and version.
     """
-    logger.info('Filtering unavailable packages.')
+    logger.info(f'Filtering unavailable packages among {len(requirements)} packages.')
 
-    filtered_requirements = copy(requirements)
-    for package_name in requirements.keys():
-        logger.info(f'Checking {package_name}.')
-
-        exists = check_package_exists(package_name)
+    existence_by_package_name = check_packages_exist(requirements.keys(), max_workers)
 
+    filtered_requirements = copy(requirements)
+    for package_name, exists in existence_by_package_name.items():
         if exists is None:
             logger.warning(f'Unable to check the {package_name} package. Skipping.')
             continue
@@ -39,22 +76,29 @@ def filter_unavailable_packages(requirements: Requirements) -> Requirements:
     return filtered_requirements
 
 
-def filter_unavailable_versions(specs: Requirements) -> Requirements:
+def filter_unavailable_versions(specs: Requirements, max_workers: int = DEFAULT_MAX_WORKERS) -> Requirements:
     """
     Remove all versions of packages that are not on PyPI.
 
     :param specs: Dictionary, where for each package the specs are listed.
                   The spec is a pair of operator and version.
+    :param max_workers: Maximum number of the concurrent requests to PyPI.
     :return: Dictionary, where for each package the specs are listed. The spec is a pair of operator and version.
              The specs contain only those versions which are available on the PyPI.
     """
-    logger.info('Filtering unavailable versions.')
+    logger.info(f'Filtering unavailable versions of {len(specs)} packages.')
+
+    # The packages without specs are kept as is, so their versions are not requested
+    packages_with_specs = [package_name for package_name, package_specs in specs.items() if package_specs]
+    available_versions_by_package_name = get_packages_available_versions(packages_with_specs, max_workers)
 
     filtered_requirements = {}
     for package_name, package_specs in specs.items():
-        logger.info(f'Checking {package_name} versions.')
+        if not package_specs:
+            filtered_requirements[package_name] = package_specs
+            continue
 
-        available_versions = get_available_versions(package_name)
+        available_versions = available_versions_by_package_name[package_name]
 
         filtered_specs = package_specs
         if available_versions:
@@ -111,24 +155,63 @@ def create_requirements_file(version_by_package_name: Dict[str, Optional[Version
     return path_to_requirements_file
 
 
-def create_venv(venv_path: Path) -> None:
+def _run_command(command: List[Union[str, Path]], log_file: Optional[TextIO] = None) -> int:
+    """
+    Run the command, writing its output to the log file.
+
+    :param command: The command.
+    :param log_file: The file where the output is written. If it is None, the output is not redirected.
+    :return: Return code of the command.
+    """
+    if log_file is None:
+        return subprocess.run(command).returncode
+
+    log_file.write(f'$ {" ".join(map(str, command))}\n')
+    log_file.flush()
+    return subprocess.run(command, stdout=log_file, stderr=subprocess.STDOUT).returncode
+
+
+def create_venv(venv_path: Path, log_file: Optional[TextIO] = None) -> int:
     """
     Create a virtual environment in the passed path.
 
     :param venv_path: The path where the virtual environment will be created.
+    :param log_file: The file where the output is written. If it is None, the output is not redirected.
+    :return: Return code of the venv module.
     """
-    logger.info('Creating virtual environment.')
+    logger.info(f'Creating virtual environment {venv_path}.')
 
     venv_path.mkdir(exist_ok=True, parents=True)
 
-    subprocess.run(
+    return _run_command(
         [
             'python3',
             '-m',
             'venv',
             str(venv_path),
         ],
+        log_file,
+    )
+
+
+def get_venv_pip_version() -> Optional[Version]:
+    """
+    Get the version of pip that is installed into the virtual environments created by ``create_venv``.
+
+    The venv module installs the pip bundled with the ensurepip module of the interpreter.
+
+    :return: The version of pip. If it cannot be determined, None will be returned.
+    """
+    process = subprocess.run(
+        ['python3', '-c', 'import ensurepip; print(ensurepip.version())'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
     )
+    if process.returncode != 0 or not process.stdout.strip():
+        return None
+
+    return parse_version(process.stdout.strip())
 
 
 def install_requirements(
@@ -137,6 +220,9 @@ def install_requirements(
     no_package_dependencies: bool,
     for_each: bool,
     no_cache: bool,
+    wheelhouse_path: Optional[Path] = None,
+    log_file: Optional[TextIO] = None,
+    use_index: bool = False,
 ):
     """
     Install all requirements from the requirements file in the virtual environment.
@@ -146,6 +232,10 @@ def install_requirements(
     :param no_package_dependencies: Whether it is necessary to not install dependencies for each package.
     :param for_each: Is it necessary to call `pip install` for each requirement individually or for the whole file.
     :param no_cache: Whether it is necessary to not cache packages.
+    :param wheelhouse_path: The path to the folder with the prebuilt wheels. If it is specified, the packages will be
+                            installed only from this folder, without accessing PyPI, unless ``use_index`` is set.
+    :param log_file: The file where the pip output is written. If it is None, the output is not redirected.
+    :param use_index: Whether PyPI is accessed along with the wheelhouse, e.g. for the packages missing from it.
     :return: Pip return code or number of pip errors if for_each flag is specified.
     """
     logger.info(f'Installing requirements from {requirements_path}.')
@@ -162,11 +252,401 @@ def install_requirements(
     if no_cache:
         pip_command.append('--no-cache-dir')
 
+    if wheelhouse_path is not None:
+        if not use_index:
+            pip_command.append('--no-index')
+        pip_command.extend(['--find-links', str(wheelhouse_path)])
+
     if for_each:
         errors = 0
         with open(requirements_path, 'r') as requirements_file:
             for requirement in requirements_file:
-                errors += subprocess.run(pip_command + [requirement.strip()]).returncode != 0
+                errors += _run_command(pip_command + [requirement.strip()], log_file) != 0
         return errors
 
-    return subprocess.run(pip_command + ['-r', str(requirements_path)]).returncode
+    return _run_command(pip_command + ['-r', str(requirements_path)], log_file)
+
+
+def gather_unique_requirements(requirements_paths: Iterable[Path]) -> List[str]:
+    """
+    Gather the requirements from the requirements files, leaving only one copy of each requirement.
+
+    The requirements are normalized, so the same requirements written differently in different files are merged.
+    The lines that cannot be parsed are skipped, they can be gathered with ``gather_unparsed_requirement_lines``.
+
+    :param requirements_paths: Paths to the requirements files.
+    :return: Sorted list of the unique requirements.
+    """
+    return sorted(
+        {
+            normalize_requirement(requirement)
+            for requirements_path in requirements_paths
+            for requirement in gather_requirements_from_file(requirements_path)
+        },
+    )
+
+
+def gather_unparsed_requirement_lines(requirements_paths: Iterable[Path]) -> List[str]:
+    """
+    Gather the lines of the requirements files that are skipped by ``gather_unique_requirements``.
+
+    Such lines, e.g. ``-e .``, the URLs of the packages or the pip options, cannot be normalized,
+    and their meaning may depend on the location of the file.
+
+    :param requirements_paths: Paths to the requirements files.
+    :return: Sorted list of the unique lines.
+    """
+    return sorted(
+        {
+            line
+            for requirements_path in requirements_paths
+            for line in gather_unparsed_lines_from_file(requirements_path)
+        },
+    )
+
+
+def get_requirements_fingerprint(requirements: Iterable[str], no_package_dependencies: bool) -> str:
+    """
+    Calculate the fingerprint of the set of requirements, which identifies the virtual environment with them.
+
+    :param requirements: The normalized requirements, e.g. gathered with ``gather_unique_requirements``.
+    :param no_package_dependencies: Whether the dependencies of each package are not installed.
+    :return: SHA-256 hash of the requirements.
+    """
+    lines = sorted(set(requirements))
+    if no_package_dependencies:
+        lines.append('--no-deps')
+    return hashlib.sha256('\n'.join(lines).encode('utf-8')).hexdigest()
+
+
+def get_requirements_files_fingerprint(
+    requirements_by_file: Iterable[Iterable[str]],
+    no_package_dependencies: bool,
+) -> str:
+    """
+    Calculate the fingerprint of the requirements files, which are installed one by one in the given order.
+
+    :param requirements_by_file: The normalized requirements of each file, e.g. gathered with
+                                 ``gather_unique_requirements``. The files without requirements are skipped.
+    :param no_package_dependencies: Whether the dependencies of each package are not installed.
+    :return: SHA-256 hash of the fingerprints of the files.
+    """
+    fingerprints = [
+        get_requirements_fingerprint(requirements, no_package_dependencies)
+        for requirements in map(list, requirements_by_file)
+        if requirements
+    ]
+    return hashlib.sha256('\n'.join(fingerprints).encode('utf-8')).hexdigest()
+
+
+def build_wheelhouse(
+    requirements: Iterable[str],
+    wheelhouse_path: Path,
+    no_package_dependencies: bool,
+    no_cache: bool,
+    max_workers: int = 1,
+    log_path: Optional[Path] = None,
+) -> List[str]:
+    """
+    Build the wheels of the requirements and their dependencies into the wheelhouse folder.
+
+    Each requirement is built by a separate `pip wheel` call, so the conflicting requirements of different projects
+    do not break each other. The wheels which are already in the wheelhouse are not built again. Each call saves its
+    wheels into its own temporary folder, from which the finished wheels are moved into the wheelhouse, so the
+    concurrent calls never find a partially written wheel there.
+
+    :param requirements: The requirements.
+    :param wheelhouse_path: The path to the folder where the wheels will be saved.
+    :param no_package_dependencies: Whether it is necessary to not build the dependencies of each package.
+    :param no_cache: Whether it is necessary to not cache packages.
+    :param max_workers: Maximum number of the concurrent `pip wheel` calls.
+    :param log_path: The path to the file where the pip output is written. If it is None, the output is not redirected.
+    :return: List of the requirements that could not be built.
+    """
+    requirements = list(requirements)
+    logger.info(f'Building the wheels of {len(requirements)} requirements into {wheelhouse_path}.')
+
+    wheelhouse_path.mkdir(exist_ok=True, parents=True)
+
+    pip_command = [
+        'python3',
+        '-m',
+        'pip',
+        'wheel',
+        '--disable-pip-version-check',
+        '--find-links',
+        str(wheelhouse_path),
+    ]
+
+    if no_package_dependencies:
+        pip_command.append('--no-deps')
+
+    if no_cache:
+        pip_command.append('--no-cache-dir')
+
+    log_file = None if log_path is None else open(log_path, 'w')
+    log_lock = threading.Lock()
+
+    def run_pip_wheel(command: List[str]) -> int:
+        if log_file is None:
+            return subprocess.run(command).returncode
+
+        # The output is collected first, so the outputs of the concurrent calls are not mixed in the log
+        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        with log_lock:
+            log_file.write(f'$ {" ".join(command)}\n{process.stdout}')
+            log_file.flush()
+        return process.returncode
+
+    def build_wheel(requirement: str) -> bool:
+        # The temporary folder is in the wheelhouse, so the wheels are moved atomically, but pip does not search in it
+        with tempfile.TemporaryDirectory(prefix='.build-', dir=wheelhouse_path) as wheel_dir:
+            return_code = run_pip_wheel(pip_command + ['--wheel-dir', wheel_dir, requirement])
+            for wheel_path in Path(wheel_dir).glob('*.whl'):
+                os.replace(wheel_path, wheelhouse_path / wheel_path.name)
+        return return_code == 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            results = list(executor.map(build_wheel, requirements))
+    finally:
+        if log_file is not None:
+            log_file.close()
+
+    failed_requirements = [requirement for requirement, is_built in zip(requirements, results) if not is_built]
+    logger.info(f'Built the wheels of {len(requirements) - len(failed_requirements)} requirements.')
+    return failed_requirements
+
+
+def _reflink(source_path: Path, destination_path: Path) -> None:
+    with open(source_path, 'rb') as source_file, open(destination_path, 'wb') as destination_file:
+        fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+
+
+def link_file(source_path: Path, destination_path: Path, link_mode: LinkMode) -> bool:
+    """
+    Link the file to the destination, replacing the existing one. If the file cannot be linked, it is copied.
+
+    :param source_path: Path to the file.
+    :param destination_path: Path to the link.
+    :param link_mode: Whether to create a hardlink, or a reflink, which is a copy-on-write clone of the file.
+    :return: Whether the file was linked, not copied.
+    """
+    if destination_path.exists() or destination_path.is_symlink():
+        destination_path.unlink()
+
+    try:
+        if link_mode == LinkMode.HARDLINK:
+            os.link(source_path, destination_path)
+        else:
+            _reflink(source_path, destination_path)
+        return True
+    except OSError:
+        # E.g. the file systems are different, or the file system does not support reflinks
+        if destination_path.exists():
+            destination_path.unlink()
+        shutil.copy2(source_path, destination_path)
+        return False
+
+
+def link_tree(
+    source_dir: Path,
+    destination_dir: Path,
+    link_mode: LinkMode,
+    ignored_dirs: Optional[Set[str]] = None,
+) -> int:
+    """
+    Link all the files of the source folder into the destination folder, keeping their relative paths.
+
+    :param source_dir: The source folder.
+    :param destination_dir: The destination folder. The existing folders are merged with the linked ones.
+    :param link_mode: Whether to create hardlinks or reflinks.
+    :param ignored_dirs: Names of the top-level folders of the source folder that are not linked.
+    :return: Number of the files that were copied, since they could not be linked.
+    """
+    copied_files = 0
+    for root, dirs, files in os.walk(source_dir):
+        root = Path(root)
+        if root == source_dir and ignored_dirs:
+            dirs[:] = [directory for directory in dirs if directory not in ignored_dirs]
+
+        destination_root = destination_dir / root.relative_to(source_dir)
+        destination_root.mkdir(parents=True, exist_ok=True)
+        for file in files:
+            copied_files += not link_file(root / file, destination_root / file, link_mode)
+
+    return copied_files
+
+
+def get_site_packages_path(venv_path: Path) -> Optional[Path]:
+    """
+    Find the folder with the installed packages of the virtual environment.
+
+    :param venv_path: The path where the virtual environment is located.
+    :return: The path to the site-packages folder. If there is no such folder, None will be returned.
+    """
+    return next(venv_path.glob('lib/python*/site-packages'), None)
+
+
+def _resolve_wheels(
+    venv_path: Path,
+    requirements_path: Path,
+    wheelhouse_path: Path,
+    no_package_dependencies: bool,
+    log_file: Optional[TextIO] = None,
+) -> Optional[List[Path]]:
+    """
+    Find the wheels in the wheelhouse that pip would install into the virtual environment from the requirements file.
+
+    :param venv_path: The path where the virtual environment is located.
+    :param requirements_path: The path to the requirements file.
+    :param wheelhouse_path: The path to the folder with the prebuilt wheels.
+    :param no_package_dependencies: Whether it is necessary to not install dependencies for each package.
+    :param log_file: The file where the pip output is written. If it is None, the output is not redirected.
+    :return: Paths to the wheels. If the requirements cannot be resolved only with the wheels, None will be returned.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        report_path = Path(temp_dir) / 'report.json'
+
+        # The report requires MIN_STORE_PIP_VERSION, which is checked with get_venv_pip_version beforehand
+        pip_command = [
+            venv_path / 'bin' / 'pip',
+            'install',
+            '--disable-pip-version-check',
+            '--dry-run',
+            '--ignore-installed',
+            '--quiet',
+            '--report',
+            str(report_path),
+            '--no-index',
+            '--find-links',
+            str(wheelhouse_path),
+        ]
+
+        if no_package_dependencies:
+            pip_command.append('--no-deps')
+
+        if _run_command(pip_command + ['-r', str(requirements_path)], log_file) != 0:
+            return None
+
+        with open(report_path) as report_file:
+            report = json.load(report_file)
+
+    wheel_paths = []
+    for item in report.get('install', []):
+        url = urlparse(item.get('download_info', {}).get('url', ''))
+        if url.scheme != 'file' or not url.path.endswith('.whl'):
+            return None
+        wheel_paths.append(Path(url2pathname(url.path)))
+
+    return wheel_paths
+
+
+_store_entry_locks: Dict[Path, threading.Lock] = defaultdict(threading.Lock)
+_store_entry_locks_guard = threading.Lock()
+
+
+def _add_wheel_to_store(
+    venv_path: Path,
+    wheel_path: Path,
+    store_path: Path,
+    log_file: Optional[TextIO] = None,
+) -> Optional[Path]:
+    """
+    Install the wheel into its own folder in the store, unless it has already been installed.
+
+    The wheel is installed into a temporary folder first, which is then renamed, so the other processes using the same
+    store never see a partially installed wheel.
+
+    :param venv_path: The path to the virtual environment whose pip installs the wheel.
+    :param wheel_path: The path to the wheel.
+    :param store_path: The path to the store.
+    :param log_file: The file where the pip output is written. If it is None, the output is not redirected.
+    :return: The path to the folder with the installed wheel. If the wheel cannot be installed, None will be returned.
+    """
+    # The name of a wheel consists of the package name, version and the supported platforms
+    entry_path = store_path / wheel_path.stem
+
+    with _store_entry_locks_guard:
+        entry_lock = _store_entry_locks[entry_path]
+
+    with entry_lock:
+        if entry_path.exists():
+            return entry_path
+
+        store_path.mkdir(parents=True, exist_ok=True)
+        temp_path = Path(tempfile.mkdtemp(prefix=f'.{wheel_path.stem}.', dir=store_path))
+
+        pip_command = [
+            venv_path / 'bin' / 'pip',
+            'install',
+            '--disable-pip-version-check',
+            '--no-deps',
+            '--no-index',
+            '--target',
+            str(temp_path),
+            str(wheel_path),
+        ]
+
+        if _run_command(pip_command, log_file) != 0:
+            shutil.rmtree(temp_path, ignore_errors=True)
+            return None
+
+        try:
+            temp_path.rename(entry_path)
+        except OSError:
+            # The wheel has been installed by another process in the meantime
+            shutil.rmtree(temp_path, ignore_errors=True)
+
+        return entry_path
+
+
+def install_requirements_from_store(
+    venv_path: Path,
+    requirements_path: Path,
+    wheelhouse_path: Path,
+    store_path: Path,
+    no_package_dependencies: bool,
+    link_mode: LinkMode = LinkMode.HARDLINK,
+    log_file: Optional[TextIO] = None,
+) -> int:
+    """
+    Install all requirements from the requirements file in the virtual environment by linking them from the store.
+
+    Each wheel from the wheelhouse is installed into the store only once, and then the files of the installed wheels
+    are linked into the site-packages folder of each virtual environment that requires them.
+    The hardlinks share the files with the store, so the linked files must not be modified.
+
+    :param venv_path: The path where the virtual environment is located.
+    :param requirements_path: The path to the requirements file.
+    :param wheelhouse_path: The path to the folder with the prebuilt wheels.
+    :param store_path: The path to the folder where the wheels are installed.
+    :param no_package_dependencies: Whether it is necessary to not install dependencies for each package.
+    :param link_mode: Whether to create hardlinks or reflinks.
+    :param log_file: The file where the pip output is written. If it is None, the output is not redirected.
+    :return: 0 if all the requirements were linked, otherwise 1.
+    """
+    logger.info(f'Linking requirements from {requirements_path}.')
+
+    site_packages_path = get_site_packages_path(venv_path)
+    if site_packages_path is None:
+        logger.error(f'Unable to find the site-packages folder of {venv_path}.')
+        return 1
+
+    wheel_paths = _resolve_wheels(venv_path, requirements_path, wheelhouse_path, no_package_dependencies, log_file)
+    if wheel_paths is None:
+        logger.warning(f'Unable to resolve the requirements from {requirements_path} with the wheelhouse.')
+        return 1
+
+    entry_paths = [_add_wheel_to_store(venv_path, wheel_path, store_path, log_file) for wheel_path in wheel_paths]
+    if None in entry_paths:
+        logger.warning(f'Unable to install the requirements from {requirements_path} into the store.')
+        return 1
+
+    copied_files = sum(
+        link_tree(entry_path, site_packages_path, link_mode, STORE_IGNORED_DIRS) for entry_path in entry_paths
+    )
+    if copied_files:
+        logger.warning(f'{copied_files} files were copied into {site_packages_path}, since they could not be linked.')
+
+    return 0
@@ -9,6 +9,11 @@ It accepts
     * flag that allows you not to install dependencies for each package (--no-deps flag for pip).
     * flag that allows you not to cache packages (--no-cache-dir flag for pip).
     * flag that allows you to install requirements individually.
+    * path to the SQLite database where the PyPI metadata is cached (by default, the metadata is not cached).
+    * number of hours after which the cached PyPI metadata is revalidated (default is 24).
+    * flag that specifies whether only the cached PyPI metadata should be used (default is false).
+    * maximum number of the concurrent requests to PyPI (default is 16).
+    * maximum number of the requests to PyPI per second (default is 50).
 
 In the current version of the script, if we find different versions of the same library
 in different requirement files, we will choose the newest (largest) version.
@@ -28,6 +33,8 @@ from plugin_runner.python_venv.common import (
     merge_requirements,
 )
 
+from utils.python.pypi_cache import configure_cache_arguments, create_cache
+from utils.python.pypi_utils import DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND, set_cache, set_rate_limit
 from utils.python.requirements_utils import gather_requirements
 
 logger = logging.getLogger(__name__)
@@ -84,6 +91,25 @@ def configure_arguments(parser: argparse.ArgumentParser) -> None:
         action='store_true',
     )
 
+    configure_cache_arguments(parser)
+
+    parser.add_argument(
+        '--pypi-workers',
+        help=f'Maximum number of the concurrent requests to PyPI. By default, {DEFAULT_MAX_WORKERS}.',
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+    )
+
+    parser.add_argument(
+        '--pypi-rate-limit',
+        help=(
+            'Maximum number of the requests to PyPI per second. If it is 0, the requests are not limited. '
+            f'By default, {DEFAULT_REQUESTS_PER_SECOND}.'
+        ),
+        type=float,
+        default=DEFAULT_REQUESTS_PER_SECOND,
+    )
+
 
 def main() -> int:
     parser = argparse.ArgumentParser()
@@ -92,14 +118,16 @@ def main() -> int:
     logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
 
     args = parser.parse_args()
+    set_cache(create_cache(parser, args))
+    set_rate_limit(args.pypi_rate_limit)
 
     requirements = gather_requirements(args.dataset_path)
 
     if not args.no_package_name_validation:
-        requirements = filter_unavailable_packages(requirements)
+        requirements = filter_unavailable_packages(requirements, args.pypi_workers)
 
     if not args.no_version_validation:
-        requirements = filter_unavailable_versions(requirements)
+        requirements = filter_unavailable_versions(requirements, args.pypi_workers)
 
     version_by_package_name = merge_requirements(requirements)
     requirements_path = create_requirements_file(version_by_package_name, args.venv_path.parent)
@@ -6,22 +6,77 @@ It accepts
     * flag that allows you not to install dependencies for each package (--no-deps flag for pip).
     * flag that allows you not to cache packages (--no-cache-dir flag for pip).
     * flag that allows you to install requirements individually.
+    * number of the virtual environments created concurrently (default is 1).
+    * path to the folder where the wheels of all the requirements are prebuilt.
+    * path to the folder where the logs of each project are saved.
+    * path to the folder with the pool of the virtual environments shared by the projects.
+    * path to the folder where each wheel is installed once and linked into the virtual environments.
+    * how the files are linked from this folder: "hardlink" or "reflink" (default is "hardlink").
 
 The virtual environment is created in the root of the project in the folder named ".venv".
+
+If the wheelhouse is specified, the wheels of the requirements of all the projects are built into it first, each unique
+requirement only once, and then the requirements are installed only from it, without accessing PyPI. If some
+requirements are missing from the wheelhouse, e.g. the ones that cannot be parsed or whose wheels failed to build,
+the requirements file is installed again from PyPI, still using the wheels from the wheelhouse.
+
+If the folder with the logs is specified, the output of the creation of each virtual environment is saved into
+"<project name>.log", and the exit code of each step into "summary.csv".
+
+If the pool of the virtual environments is specified, the projects whose requirements files have the same normalized
+requirements share one virtual environment, which is created in the pool folder and named after the fingerprint of
+the requirements files. As in the ".venv" folders, the requirements files are installed one by one.
+The projects whose requirements files have lines that cannot be parsed as requirements, e.g. "-e ." or URLs,
+get their own ".venv" folder, since such lines cannot be normalized and may depend on the project folder.
+The virtual environment of each project is saved into "venv_mapping.json" in the pool folder, which can be passed
+to the Python analyzers instead of a virtual environment, e.g. "--kwargs venv=path/to/pool/venv_mapping.json".
+The virtual environments created without errors are reused by the next runs.
+
+If the site-packages store is specified along with the wheelhouse, each wheel is installed into the store only once,
+and the installed files are hardlinked or reflinked into the site-packages folder of each virtual environment,
+so the popular packages take the disk space only once. If the requirements cannot be resolved only with the wheels,
+they are installed with pip from PyPI, which also uses the wheels from the wheelhouse. The store requires pip 22.2
+or newer in the virtual environments.
 """
 
 import argparse
+import csv
+import json
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from itertools import chain
 from pathlib import Path
+from typing import Dict, List, Optional, TextIO
 
-from plugin_runner.python_venv.common import create_venv, install_requirements
+from plugin_runner.python_venv.common import (
+    LinkMode,
+    MIN_STORE_PIP_VERSION,
+    build_wheelhouse,
+    create_venv,
+    gather_unique_requirements,
+    gather_unparsed_requirement_lines,
+    get_requirements_files_fingerprint,
+    get_venv_pip_version,
+    install_requirements,
+    install_requirements_from_store,
+)
 
 from utils.file_utils import FileSystemItem, get_all_file_system_items
 from utils.python.requirements_utils import gather_requirements_file_paths
 
 logger = logging.getLogger(__name__)
 
+VENV_STEP = 'venv'
+SUMMARY_FILE_NAME = 'summary.csv'
+WHEELHOUSE_LOG_FILE_NAME = 'wheelhouse.log'
+
+VENV_MAPPING_FILE_NAME = 'venv_mapping.json'
+POOLED_REQUIREMENTS_FILE_NAME = 'requirements_{index}.txt'
+# This file is created in a pooled virtual environment when all its requirements have been installed
+COMPLETED_MARKER_FILE_NAME = '.completed'
+
 
 def configure_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
@@ -56,6 +111,299 @@ def configure_arguments(parser: argparse.ArgumentParser) -> None:
         action='store_true',
     )
 
+    parser.add_argument(
+        '--n-cpu',
+        help='Number of the virtual environments created concurrently. By default, 1.',
+        type=int,
+        default=1,
+    )
+
+    parser.add_argument(
+        '--wheelhouse',
+        help=(
+            'Path to the folder where the wheels of the requirements of all the projects will be prebuilt. '
+            'If specified, the requirements will be installed from this folder, and from PyPI only if some of them '
+            'are missing from it.'
+        ),
+        type=lambda value: Path(value).absolute(),
+    )
+
+    parser.add_argument(
+        '--logs-dir',
+        help=(
+            'Path to the folder where the pip output for each project and the summary with the exit codes '
+            'will be saved. By default, the output is not redirected.'
+        ),
+        type=lambda value: Path(value).absolute(),
+    )
+
+    parser.add_argument(
+        '--venv-pool',
+        help=(
+            'Path to the folder where one virtual environment will be created for each unique set of requirements '
+            'and shared by all the projects with this set, instead of the ".venv" folder in each project. '
+            f'The virtual environment of each project will be saved into the "{VENV_MAPPING_FILE_NAME}" file.'
+        ),
+        type=lambda value: Path(value).absolute(),
+    )
+
+    parser.add_argument(
+        '--site-packages-store',
+        help=(
+            'Path to the folder where each wheel from the wheelhouse will be installed only once. The installed files '
+            'will be linked into the virtual environments that require them. Can be used only with --wheelhouse.'
+        ),
+        type=lambda value: Path(value).absolute(),
+    )
+
+    parser.add_argument(
+        '--link-mode',
+        help=(
+            'How the files from the site-packages store are linked: "hardlink" or "reflink" (a copy-on-write clone, '
+            'supported by Btrfs or XFS). If a file cannot be linked, it is copied. By default, "hardlink".'
+        ),
+        choices=LinkMode.values(),
+        default=LinkMode.HARDLINK.value,
+    )
+
+
+@dataclass
+class ProjectResult:
+    project_name: str
+    # Exit code of each step: the creation of the virtual environment and the installation of each requirements file
+    exit_code_by_step: Dict[str, int]
+    log_path: Optional[Path] = None
+
+    @property
+    def is_error(self) -> bool:
+        return any(exit_code != 0 for exit_code in self.exit_code_by_step.values())
+
+
+def install_project_requirements(
+    venv_path: Path,
+    requirements_path: Path,
+    args: argparse.Namespace,
+    log_file: Optional[TextIO] = None,
+) -> int:
+    """
+    Install the requirements into the virtual environment, linking them from the site-packages store if it is set.
+
+    :param venv_path: The path where the virtual environment is located.
+    :param requirements_path: The path to the requirements file.
+    :param args: Parsed arguments of the script.
+    :param log_file: The file where the pip output is written. If it is None, the output is not redirected.
+    :return: Pip return code or number of pip errors if the --pip-for-each flag is specified.
+    """
+    def install(use_index: bool) -> int:
+        return install_requirements(
+            venv_path,
+            requirements_path,
+            args.no_package_dependencies,
+            args.pip_for_each,
+            args.no_cache,
+            args.wheelhouse,
+            log_file,
+            use_index,
+        )
+
+    if args.site_packages_store is not None:
+        exit_code = install_requirements_from_store(
+            venv_path,
+            requirements_path,
+            args.wheelhouse,
+            args.site_packages_store,
+            args.no_package_dependencies,
+            LinkMode(args.link_mode),
+            log_file,
+        )
+        if exit_code == 0:
+            return exit_code
+
+        # The wheelhouse alone is usually not enough in this case, so the missing packages are downloaded from PyPI
+        logger.warning(f'Installing requirements from {requirements_path} from PyPI and the wheelhouse.')
+        return install(use_index=True)
+
+    exit_code = install(use_index=False)
+    if exit_code == 0 or args.wheelhouse is None:
+        return exit_code
+
+    # The unparsed requirements and the ones whose wheels failed to build are missing from the wheelhouse
+    logger.warning(f'Installing requirements from {requirements_path} from PyPI and the wheelhouse.')
+    return install(use_index=True)
+
+
+def create_venv_with_requirements(
+    name: str,
+    venv_path: Path,
+    requirements_path_by_step: Dict[str, Path],
+    args: argparse.Namespace,
+) -> ProjectResult:
+    """
+    Create the virtual environment and install the requirements into it.
+
+    :param name: Name of the result, which is also the name of the log file.
+    :param venv_path: The path where the virtual environment will be created.
+    :param requirements_path_by_step: Paths to the requirements files by the names of their installation steps.
+    :param args: Parsed arguments of the script.
+    :return: Result with the exit codes of each step.
+    """
+    log_path = None if args.logs_dir is None else args.logs_dir / f'{name}.log'
+    log_file = None if log_path is None else open(log_path, 'w')
+
+    try:
+        exit_code_by_step = {VENV_STEP: create_venv(venv_path, log_file)}
+
+        # If we have an error when installing requirements from some file,
+        # we should try to install requirements from other files instead of skipping them.
+        for step, requirements_path in requirements_path_by_step.items():
+            exit_code_by_step[step] = install_project_requirements(venv_path, requirements_path, args, log_file)
+    finally:
+        if log_file is not None:
+            log_file.close()
+
+    return ProjectResult(name, exit_code_by_step, log_path)
+
+
+def create_project_venv(project: Path, args: argparse.Namespace) -> ProjectResult:
+    """
+    Create the virtual environment for the project and install its requirements.
+
+    :param project: Path to the project.
+    :param args: Parsed arguments of the script.
+    :return: Result with the exit codes of each step.
+    """
+    logger.info(f'Creating a virtual environment for the "{project.name}".')
+
+    requirements_path_by_step = {
+        str(requirements_path.relative_to(project)): requirements_path
+        for requirements_path in gather_requirements_file_paths(project)
+    }
+    return create_venv_with_requirements(project.name, project / '.venv', requirements_path_by_step, args)
+
+
+def create_pooled_venv(
+    fingerprint: str,
+    requirements_by_file: List[List[str]],
+    args: argparse.Namespace,
+) -> ProjectResult:
+    """
+    Create the virtual environment with the requirements in the pool, unless it has already been created.
+
+    The requirements of each file are saved into a separate file in the virtual environment and installed one by one,
+    so the conflicting requirements of different files do not prevent the installation of the other files.
+
+    :param fingerprint: Fingerprint of the requirements files, which is the name of the virtual environment.
+    :param requirements_by_file: The normalized requirements of each file.
+    :param args: Parsed arguments of the script.
+    :return: Result with the exit codes of each step.
+    """
+    venv_path = args.venv_pool / fingerprint
+    if (venv_path / COMPLETED_MARKER_FILE_NAME).exists():
+        logger.info(f'The virtual environment {venv_path} has already been created.')
+        return ProjectResult(fingerprint, {VENV_STEP: 0})
+
+    logger.info(f'Creating a virtual environment with {len(requirements_by_file)} requirements files in {venv_path}.')
+
+    venv_path.mkdir(parents=True, exist_ok=True)
+    requirements_path_by_step = {}
+    for index, requirements in enumerate(requirements_by_file):
+        step = POOLED_REQUIREMENTS_FILE_NAME.format(index=index)
+        requirements_path_by_step[step] = venv_path / step
+        requirements_path_by_step[step].write_text(''.join(f'{requirement}\n' for requirement in requirements))
+
+    result = create_venv_with_requirements(fingerprint, venv_path, requirements_path_by_step, args)
+
+    # The virtual environments with errors are created again by the next run
+    if not result.is_error:
+        (venv_path / COMPLETED_MARKER_FILE_NAME).touch()
+
+    return result
+
+
+def save_summary(results: List[ProjectResult], summary_path: Path) -> None:
+    """
+    Save the exit code of each step for each project into the csv file.
+
+    :param results: Results of the projects.
+    :param summary_path: Path to the csv file.
+    """
+    with open(summary_path, 'w', newline='') as file:
+        writer = csv.writer(file, lineterminator='\n')
+        writer.writerow(['project_name', 'step', 'exit_code'])
+        for result in results:
+            for step, exit_code in result.exit_code_by_step.items():
+                writer.writerow([result.project_name, step, exit_code])
+
+
+def save_venv_mapping(fingerprint_by_project_name: Dict[str, str], venv_pool: Path, mapping_path: Path) -> None:
+    """
+    Save the virtual environment of each project into the json file.
+
+    The file is a list of objects with the ``project_name``, ``fingerprint`` and ``venv_path`` keys. It can be passed
+    to the Python analyzers instead of the virtual environment, e.g. with ``--kwargs venv=path/to/venv_mapping.json``
+    for the batch processing. Unlike csv, json needs no quoting, so any project name or path is read back as is.
+
+    :param fingerprint_by_project_name: Fingerprint of the requirements of each project.
+    :param venv_pool: Path to the pool of the virtual environments.
+    :param mapping_path: Path to the json file.
+    """
+    mapping = [
+        {'project_name': project_name, 'fingerprint': fingerprint, 'venv_path': str(venv_pool / fingerprint)}
+        for project_name, fingerprint in sorted(fingerprint_by_project_name.items())
+    ]
+    with open(mapping_path, 'w') as file:
+        json.dump(mapping, file, indent=4)
+
+
+def create_venvs_in_pool(
+    projects: List[Path],
+    requirements_by_file_by_project: Dict[Path, List[List[str]]],
+    args: argparse.Namespace,
+) -> List[ProjectResult]:
+    """
+    Create one virtual environment in the pool for each unique list of requirements files, and save the mapping file.
+
+    :param projects: Paths to the projects.
+    :param requirements_by_file_by_project: The normalized requirements of each requirements file of each project.
+    :param args: Parsed arguments of the script.
+    :return: Result of each project, which is the result of its virtual environment.
+    """
+    fingerprint_by_project = {
+        project: get_requirements_files_fingerprint(
+            requirements_by_file_by_project[project],
+            args.no_package_dependencies,
+        )
+        for project in projects
+    }
+    requirements_by_fingerprint = {
+        fingerprint: requirements_by_file_by_project[project]
+        for project, fingerprint in fingerprint_by_project.items()
+    }
+    logger.info(f'{len(projects)} projects have {len(requirements_by_fingerprint)} unique sets of requirements.')
+
+    with ThreadPoolExecutor(max_workers=max(args.n_cpu, 1)) as executor:
+        fingerprint_results = executor.map(
+            lambda item: create_pooled_venv(*item, args),
+            requirements_by_fingerprint.items(),
+        )
+        result_by_fingerprint = {result.project_name: result for result in fingerprint_results}
+
+    # The projects whose virtual environments were not created fall back to their local ones
+    save_venv_mapping(
+        {
+            project.name: fingerprint
+            for project, fingerprint in fingerprint_by_project.items()
+            if result_by_fingerprint[fingerprint].exit_code_by_step[VENV_STEP] == 0
+        },
+        args.venv_pool,
+        args.venv_pool / VENV_MAPPING_FILE_NAME,
+    )
+
+    return [
+        replace(result_by_fingerprint[fingerprint], project_name=project.name)
+        for project, fingerprint in fingerprint_by_project.items()
+    ]
+
 
 def main() -> bool:
     parser = argparse.ArgumentParser()
@@ -64,33 +412,76 @@ def main() -> bool:
     logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
 
     args = parser.parse_args()
+    if args.site_packages_store is not None:
+        if args.wheelhouse is None:
+            parser.error('--site-packages-store cannot be used without --wheelhouse.')
+
+        pip_version = get_venv_pip_version()
+        if pip_version is None or pip_version < MIN_STORE_PIP_VERSION:
+            parser.error(
+                f'--site-packages-store requires pip {MIN_STORE_PIP_VERSION} or newer in the virtual environments, '
+                f'but python3 provides pip {pip_version}. Upgrade python3 or do not use --site-packages-store.',
+            )
 
     projects = get_all_file_system_items(args.dataset_path, item_type=FileSystemItem.SUBDIR, with_subdirs=False)
 
-    is_error = False
-    for project in projects:
-        logger.info(f'Creating a virtual environment for the "{project.name}".')
+    if args.logs_dir is not None:
+        args.logs_dir.mkdir(parents=True, exist_ok=True)
 
-        requirements_file_paths = gather_requirements_file_paths(project)
+    requirements_by_file_by_project = {}
+    unparsed_lines_by_project = {}
+    if args.wheelhouse is not None or args.venv_pool is not None:
+        for project in projects:
+            # The files are sorted, so the same files of different projects are installed in the same order
+            requirements_paths = sorted(gather_requirements_file_paths(project))
+            # The requirements of each file are kept apart, since the files are installed one by one
+            requirements_by_file = (gather_unique_requirements([path]) for path in requirements_paths)
+            requirements_by_file_by_project[project] = list(filter(None, requirements_by_file))
+            unparsed_lines_by_project[project] = gather_unparsed_requirement_lines(requirements_paths)
+            if unparsed_lines_by_project[project]:
+                logger.warning(
+                    f'The requirements of "{project.name}" that cannot be parsed are not prebuilt or pooled: '
+                    f'{", ".join(unparsed_lines_by_project[project])}.',
+                )
 
-        venv_path = project / '.venv'
-        create_venv(venv_path)
+    if args.wheelhouse is not None:
+        failed_requirements = build_wheelhouse(
+            sorted(set(chain.from_iterable(chain.from_iterable(requirements_by_file_by_project.values())))),
+            args.wheelhouse,
+            args.no_package_dependencies,
+            args.no_cache,
+            args.n_cpu,
+            None if args.logs_dir is None else args.logs_dir / WHEELHOUSE_LOG_FILE_NAME,
+        )
+        if failed_requirements:
+            logger.warning(f'Unable to build the wheels of {len(failed_requirements)} requirements.')
 
-        for requirements_file in requirements_file_paths:
-            exit_code = install_requirements(
-                venv_path,
-                requirements_file,
-                args.no_package_dependencies,
-                args.pip_for_each,
-                args.no_cache,
-            )
+    results = []
+    local_projects = projects
+    if args.venv_pool is not None:
+        # The unparsed lines, e.g. "-e .", may depend on the project folder, so such projects get their own environments
+        local_projects = [project for project in projects if unparsed_lines_by_project[project]]
+        pooled_projects = [project for project in projects if not unparsed_lines_by_project[project]]
+        results = create_venvs_in_pool(pooled_projects, requirements_by_file_by_project, args)
+
+    # The work is done by the pip subprocesses, so the threads are enough
+    with ThreadPoolExecutor(max_workers=max(args.n_cpu, 1)) as executor:
+        results += executor.map(lambda project: create_project_venv(project, args), local_projects)
+
+    failed_results = [result for result in results if result.is_error]
+    for result in failed_results:
+        failed_steps = [step for step, exit_code in result.exit_code_by_step.items() if exit_code != 0]
+        log_message = '' if result.log_path is None else f' See {result.log_path}.'
+        logger.error(
+            f'Failed to create the environment of "{result.project_name}": {", ".join(failed_steps)}.{log_message}',
+        )
+
+    logger.info(f'Created {len(results) - len(failed_results)} of {len(results)} virtual environments without errors.')
 
-            # If we have an error when installing requirements from some file,
-            # we should try to install requirements from other files instead of skipping them.
-            if exit_code != 0:
-                is_error = True
+    if args.logs_dir is not None:
+        save_summary(results, args.logs_dir / SUMMARY_FILE_NAME)
 
-    return is_error
+    return bool(failed_results)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,54 @@
+"""
+This script builds the offline classifier index, which allows to determine the Python version without access to PyPI.
+
+It accepts
+    * paths to the dumps of the PyPI metadata.
+    * path where to save the index.
+
+Each dump is a JSON lines file, optionally compressed with gzip. Each line is either a response of the PyPI JSON API
+for a package version, or a flat record with the `name`, `version` and `classifiers` fields, like the rows of the PyPI
+distribution metadata exported from BigQuery.
+"""
+
+import argparse
+import logging
+from pathlib import Path
+
+from plugin_runner.python_version.classifier_index import ClassifierIndex
+
+logger = logging.getLogger(__name__)
+
+
+def configure_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        'dump_paths',
+        help='Paths to the dumps of the PyPI metadata.',
+        type=lambda value: Path(value).absolute(),
+        nargs='+',
+    )
+
+    parser.add_argument(
+        'index_path',
+        help='Path where you want to save the index. The existing index will be replaced.',
+        type=lambda value: Path(value).absolute(),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    configure_arguments(parser)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
+
+    args = parser.parse_args()
+
+    missing_dump_paths = [str(dump_path) for dump_path in args.dump_paths if not dump_path.exists()]
+    if missing_dump_paths:
+        parser.error(f'The dumps do not exist: {", ".join(missing_dump_paths)}.')
+
+    ClassifierIndex.build(args.dump_paths, args.index_path)
+    logger.info(f'The index has been saved to {args.index_path}.')
+
+
+if __name__ == '__main__':
+    main()
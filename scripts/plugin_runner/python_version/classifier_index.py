@@ -0,0 +1,293 @@
+"""
+This module contains an offline index of the Python classifiers of the PyPI packages.
+
+The index is a SQLite database built from a dump of the PyPI metadata. For each package version, it keeps only
+the Python classifiers, and the distinct sets of them are stored once, since most of the versions share them.
+The versions of a package are sorted once when the package is looked up for the first time, and the wildcard versions
+such as ``1.2.*`` are resolved with a binary search over their releases.
+"""
+import gzip
+import json
+import logging
+import sqlite3
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from distutils.version import Version
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from pkg_resources import parse_version
+
+from utils.python.requirements_utils import normalize_requirement_name
+
+logger = logging.getLogger(__name__)
+
+PYTHON_CLASSIFIER_PREFIX = 'Programming Language :: Python'
+
+# The number of packages whose sorted versions are kept in memory
+VERSIONS_CACHE_SIZE = 4096
+
+# Classifiers are separated by this character in the stored classifier sets
+CLASSIFIER_SEPARATOR = '\n'
+
+# The number of package versions inserted into the index at once
+INSERT_BATCH_SIZE = 100000
+
+
+def _parse_version(version: str) -> Optional[Version]:
+    try:
+        return parse_version(version)
+    except Exception:
+        # Depending on the setuptools version, either the invalid versions are parsed as the legacy ones,
+        # or InvalidVersion is raised
+        return None
+
+
+def _normalize_version(version: str) -> str:
+    parsed_version = _parse_version(version)
+    return version if parsed_version is None else str(parsed_version)
+
+
+def _get_release(version: Version) -> Optional[Tuple[int, ...]]:
+    # The releases are sorted in the same order as the versions only in the default epoch
+    if getattr(version, 'epoch', None) != 0:
+        return None
+    return getattr(version, 'release', None)
+
+
+@dataclass
+class SortedVersions:
+    """Versions of a package sorted in the version order, with the versions that can be matched by a wildcard."""
+
+    versions: List[Version]
+    wildcard_versions: List[Version]
+    releases: List[Tuple[int, ...]]
+
+    @classmethod
+    def from_versions(cls, versions: Iterable[Version]) -> 'SortedVersions':
+        versions = sorted(versions)
+        wildcard_versions = [version for version in versions if _get_release(version) is not None]
+        return cls(versions, wildcard_versions, [_get_release(version) for version in wildcard_versions])
+
+    @staticmethod
+    def _select(versions: List[Version]) -> Optional[Version]:
+        return next(
+            (version for version in reversed(versions) if not version.is_prerelease),
+            versions[-1] if versions else None,
+        )
+
+    def get_latest(self) -> Optional[Version]:
+        """
+        Get the latest version, which is the greatest version that is not a pre-release, if there is such a version.
+
+        :return: The version. If there are no versions, None will be returned.
+        """
+        return self._select(self.versions)
+
+    def find_by_wildcard(self, wildcard: str) -> Optional[Version]:
+        """
+        Find the latest version matched by a wildcard, i.e. whose release starts with the wildcard prefix.
+
+        :param wildcard: Version that ends with ``.*``, e.g. ``1.2.*``.
+        :return: The version. If no version is matched, None will be returned.
+        """
+        try:
+            prefix = tuple(int(part) for part in wildcard[:-len('.*')].split('.'))
+        except ValueError:
+            return None
+
+        # The matched releases are between the prefix and the prefix with the last part incremented
+        start = bisect_left(self.releases, prefix)
+        end = bisect_left(self.releases, (*prefix[:-1], prefix[-1] + 1), start)
+        return self._select(self.wildcard_versions[start:end])
+
+
+def _read_dump_records(dump_path: Path) -> Iterator[Tuple[str, str, List[str]]]:
+    """
+    Read the package versions and their classifiers from a dump of the PyPI metadata.
+
+    The dump is a JSON lines file, optionally compressed with gzip. Each line is either a response of the PyPI JSON API
+    for a package version, or a flat record with the ``name``, ``version`` and ``classifiers`` fields, like the rows
+    of the PyPI distribution metadata exported from BigQuery.
+
+    :param dump_path: Path to the dump.
+    :yield: Package name, version and classifiers.
+    """
+    open_dump = gzip.open if dump_path.suffix == '.gz' else open
+    with open_dump(dump_path, 'rt', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+                record = record.get('info', record)
+                yield record['name'], record['version'], record.get('classifiers') or []
+            except (ValueError, KeyError, AttributeError, TypeError):
+                logger.warning(f'Unable to parse the line {line_number} of {dump_path}.')
+
+
+class ClassifierIndex:
+    """
+    An offline index of the Python classifiers of the PyPI package versions.
+
+    It has the same lookups as the ``pypi_utils`` module, so it can be used instead of PyPI.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+        self._connection = None
+        self._versions_cache = OrderedDict()
+
+    def __getstate__(self):
+        # The connection is opened again by each process
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if not self.path.exists():
+                raise FileNotFoundError(f'The classifier index {self.path} does not exist.')
+            self._connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+        return self._connection
+
+    @staticmethod
+    def _create_tables(connection: sqlite3.Connection) -> None:
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS classifier_sets (id INTEGER PRIMARY KEY, classifiers TEXT NOT NULL UNIQUE)',
+        )
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS versions ('
+            'package TEXT NOT NULL, version TEXT NOT NULL, classifier_set INTEGER NOT NULL, '
+            'PRIMARY KEY (package, version)) WITHOUT ROWID',
+        )
+
+    @classmethod
+    def build(cls, dump_paths: Iterable[Path], path: Path) -> 'ClassifierIndex':
+        """
+        Build the index from the dumps of the PyPI metadata, replacing the existing one.
+
+        If a package version occurs several times, its last occurrence is kept.
+
+        :param dump_paths: Paths to the dumps. See ``_read_dump_records`` for the format.
+        :param path: Path where the index is saved.
+        :return: The index.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            path.unlink()
+
+        connection = sqlite3.connect(path)
+        try:
+            with connection:
+                cls._create_tables(connection)
+
+                classifier_set_ids = {}
+                number_of_versions = 0
+                for dump_path in dump_paths:
+                    logger.info(f'Reading {dump_path}.')
+                    number_of_versions += cls._insert_dump(connection, dump_path, classifier_set_ids)
+        finally:
+            connection.close()
+
+        logger.info(f'Indexed {number_of_versions} package versions with {len(classifier_set_ids)} classifier sets.')
+        return cls(path)
+
+    @staticmethod
+    def _insert_dump(connection: sqlite3.Connection, dump_path: Path, classifier_set_ids: Dict[str, int]) -> int:
+        """
+        Insert the package versions from a dump into the index.
+
+        :param connection: Connection to the index.
+        :param dump_path: Path to the dump.
+        :param classifier_set_ids: Ids of the classifier sets already inserted. It is updated with the new ones.
+        :return: Number of the inserted package versions.
+        """
+        number_of_versions = 0
+        rows = []
+        for name, version, classifiers in _read_dump_records(dump_path):
+            python_classifiers = {
+                classifier for classifier in classifiers if classifier.startswith(PYTHON_CLASSIFIER_PREFIX)
+            }
+            python_classifiers = CLASSIFIER_SEPARATOR.join(sorted(python_classifiers))
+
+            classifier_set_id = classifier_set_ids.get(python_classifiers)
+            if classifier_set_id is None:
+                classifier_set_id = len(classifier_set_ids)
+                classifier_set_ids[python_classifiers] = classifier_set_id
+                connection.execute('INSERT INTO classifier_sets VALUES (?, ?)', (classifier_set_id, python_classifiers))
+
+            rows.append((normalize_requirement_name(name), _normalize_version(version), classifier_set_id))
+            if len(rows) >= INSERT_BATCH_SIZE:
+                connection.executemany('INSERT OR REPLACE INTO versions VALUES (?, ?, ?)', rows)
+                number_of_versions += len(rows)
+                rows.clear()
+
+        connection.executemany('INSERT OR REPLACE INTO versions VALUES (?, ?, ?)', rows)
+        return number_of_versions + len(rows)
+
+    def get_sorted_versions(self, package_name: str) -> SortedVersions:
+        """
+        Get the sorted versions of the package. The recently used ones are kept in memory.
+
+        :param package_name: PyPI package name.
+        :return: The sorted versions. If there is no package in the index, they will be empty.
+        """
+        package_name = normalize_requirement_name(package_name)
+
+        sorted_versions = self._versions_cache.get(package_name)
+        if sorted_versions is not None:
+            self._versions_cache.move_to_end(package_name)
+            return sorted_versions
+
+        rows = self._connect().execute('SELECT version FROM versions WHERE package = ?', (package_name,))
+        versions = [_parse_version(version) for version, in rows]
+        sorted_versions = SortedVersions.from_versions(version for version in versions if version is not None)
+
+        self._versions_cache[package_name] = sorted_versions
+        if len(self._versions_cache) > VERSIONS_CACHE_SIZE:
+            self._versions_cache.popitem(last=False)
+
+        return sorted_versions
+
+    def get_available_versions(self, package_name: str) -> Set[Version]:
+        """
+        Collect all the versions of the package in the index.
+
+        :param package_name: PyPI package name.
+        :return: Set of versions. If there is no package in the index, the set will be empty.
+        """
+        return set(self.get_sorted_versions(package_name).versions)
+
+    def get_package_classifiers(self, package_name: str, package_version: Optional[str] = None) -> Set[str]:
+        """
+        Return the set of Python classifiers of the given package by version.
+
+        If no version is specified, the classifiers of the latest version will be returned.
+
+        :param package_name: The name of the PyPI package.
+        :param package_version: The version of the PyPI package.
+        :return: Set of Python classifiers. If there is no package version in the index, the set will be empty.
+        """
+        if package_version is None:
+            latest_version = self.get_sorted_versions(package_name).get_latest()
+            if latest_version is None:
+                return set()
+            package_version = str(latest_version)
+        else:
+            package_version = _normalize_version(package_version)
+
+        row = self._connect().execute(
+            'SELECT classifiers FROM versions JOIN classifier_sets ON classifier_set = id '
+            'WHERE package = ? AND version = ?',
+            (normalize_requirement_name(package_name), package_version),
+        ).fetchone()
+
+        if row is None or not row[0]:
+            return set()
+
+        return set(row[0].split(CLASSIFIER_SEPARATOR))
@@ -5,28 +5,51 @@ It accepts
     * path to the folder with python projects.
     * path to `csv` file, where to save versions.
     * path to the file where to save the logs.
+    * path to the SQLite database where the PyPI metadata is cached (by default, the metadata is not cached).
+    * number of hours after which the cached PyPI metadata is revalidated (default is 24).
+    * flag that specifies whether only the cached PyPI metadata should be used (default is false).
+    * path to the offline classifier index built by `build_classifier_index.py` (by default, PyPI is used).
+    * number of workers for a parallel execution (default is 1).
+    * flag that specifies whether the projects already saved to the csv table should be skipped (default is false).
 
 First, we try to determine the version using the classifiers from the `setup.py` or `setup.cfg` files. If this fails,
 for each project we collect the requirements and use their classifiers specified on the PyPI to determine the version.
+If the offline classifier index is specified, the classifiers are looked up in it instead of PyPI.
+
+The Python versions determined by each requirement are memoized and shared by all the workers, so the requirements
+common to many projects are resolved once. The version of each project is saved to the csv table as soon as it is
+determined, so the table contains the processed projects even if the script is interrupted.
 """
 
 import argparse
+import csv
 import logging
-import re
 from copy import copy
+from multiprocessing import Manager
+from multiprocessing.pool import Pool
 from pathlib import Path
-from typing import List, Optional, Set
-
-import pandas as pd
+from typing import Callable, Iterable, List, MutableMapping, Optional, Set, Tuple
 
+from plugin_runner.python_version.classifier_index import ClassifierIndex, SortedVersions
 from plugin_runner.python_version.python_classifiers import PythonClassifiers, PythonVersion
 
 from utils.file_utils import FileSystemItem, get_all_file_system_items, get_file_content
-from utils.python.pypi_utils import get_available_versions, get_package_classifiers
+from utils.python.pypi_cache import PyPICache, configure_cache_arguments, create_cache
+from utils.python.pypi_utils import PyPIError, get_available_versions, get_cache, get_package_classifiers, set_cache
 from utils.python.requirements_utils import Requirements, gather_requirements
 
 logger = logging.getLogger(__name__)
 
+# Python versions determined by the requirements. The key is a package name and a version, which is None for
+# the requirements without a version.
+VersionMemo = MutableMapping[Tuple[str, Optional[str]], Optional[PythonVersion]]
+
+OUTPUT_COLUMNS = ['project_name', 'python_version']
+
+# The state of a worker process, which is set by the pool initializer
+_classifier_index: Optional[ClassifierIndex] = None
+_memo: Optional[VersionMemo] = None
+
 
 def _try_to_find_version_in_setup_file(file_path: Path) -> Optional[PythonVersion]:
     """
@@ -71,17 +94,86 @@ def _try_to_determine_version_using_classifiers(classifiers: Set[str]) -> Option
     return PythonVersion.PYTHON_MIXED
 
 
-def _try_to_determine_version_using_requirements(requirements: Requirements) -> Optional[PythonVersion]:
+def _get_classifiers_from_pypi(package_name: str, version: Optional[str]) -> Set[str]:
+    return get_package_classifiers(package_name, version, raise_on_error=True)
+
+
+def _get_sorted_versions_from_pypi(package_name: str) -> SortedVersions:
+    return SortedVersions.from_versions(get_available_versions(package_name, raise_on_error=True))
+
+
+def _try_to_determine_version_using_requirement(
+    package_name: str,
+    version: Optional[str],
+    get_classifiers: Callable[[str, Optional[str]], Set[str]],
+    get_sorted_versions: Callable[[str], SortedVersions],
+) -> Optional[PythonVersion]:
+    """
+    Try to determine the Python version using the classifiers of the required package version.
+
+    :param package_name: The name of the package.
+    :param version: The required version. If it ends with ".*", the latest existing version with the same release prefix
+    is taken instead. If it is None, the latest version is taken.
+    :param get_classifiers: Function that returns the classifiers of the package version.
+    :param get_sorted_versions: Function that returns the sorted versions of the package.
+    :return: Python version. If it could not be determined will be returned None.
+    """
+    if version is not None and version.endswith('.*'):
+        matched_version = get_sorted_versions(package_name).find_by_wildcard(version)
+        if matched_version is None:
+            return None
+
+        version = str(matched_version)
+
+    return _try_to_determine_version_using_classifiers(get_classifiers(package_name, version))
+
+
+def _try_to_determine_version_using_requirements(
+    requirements: Requirements,
+    classifier_index: Optional[ClassifierIndex] = None,
+    memo: Optional[VersionMemo] = None,
+) -> Optional[PythonVersion]:
     """
     Try to determine the python version using the requirements files.
 
     All requirements are considered to determine the version, except those that use the operators "<", ">", "!=".
-    Also, if the version ends with ".*", any existing version with the same prefix is taken instead.
+    Also, if the version ends with ".*", the latest existing version with the same release prefix is taken instead.
 
     :param requirements: Dictionary, where for each package the collected specs are listed.
                          The spec is a pair of operator and version.
+    :param classifier_index: Offline classifier index. If it is None, the classifiers are requested from PyPI.
+    :param memo: Python versions already determined by the requirements. It is updated with the new ones.
     :return: Python version. If it could not be determined will be returned None.
     """
+    if classifier_index is None:
+        get_classifiers = _get_classifiers_from_pypi
+        get_sorted_versions = _get_sorted_versions_from_pypi
+    else:
+        get_classifiers = classifier_index.get_package_classifiers
+        get_sorted_versions = classifier_index.get_sorted_versions
+
+    def get_requirement_version(package_name: str, version: Optional[str]) -> Optional[PythonVersion]:
+        key = (package_name, version)
+        if memo is not None and key in memo:
+            return memo[key]
+
+        try:
+            python_version = _try_to_determine_version_using_requirement(
+                package_name,
+                version,
+                get_classifiers,
+                get_sorted_versions,
+            )
+        except PyPIError as error:
+            # The failure may be transient, so it is not memoized and the requirement is looked up again next time
+            logger.warning(f'Unable to use the {package_name} package (version = {version}): {error}')
+            return None
+
+        if memo is not None:
+            memo[key] = python_version
+
+        return python_version
+
     # In this set we will store the versions that were determined using the full requirements specs (name + version)
     package_specs_versions = set()
 
@@ -95,25 +187,7 @@ def _try_to_determine_version_using_requirements(requirements: Requirements) ->
             if operator in {'<', '>', '!='}:
                 continue
 
-            version = str(version)
-
-            # If the version ends with ".*", then replace that version with any suitable version that is in PyPI.
-            if version.endswith('.*'):
-                available_versions = get_available_versions(package_name)
-                prefix = re.sub(r'\.\*$', '', version)
-                available_versions = {
-                    available_version
-                    for available_version in available_versions
-                    if str(available_version).startswith(prefix)
-                }
-
-                if not available_versions:
-                    continue
-
-                version = str(available_versions.pop())
-
-            version_classifiers = get_package_classifiers(package_name, version)
-            python_version = _try_to_determine_version_using_classifiers(version_classifiers)
+            python_version = get_requirement_version(package_name, str(version))
             if python_version is not None:
                 package_specs_versions.add(python_version)
 
@@ -130,8 +204,7 @@ def _try_to_determine_version_using_requirements(requirements: Requirements) ->
     package_name_versions = set()
 
     for package_name in packages_without_specs:
-        package_classifiers = get_package_classifiers(package_name)
-        python_version = _try_to_determine_version_using_classifiers(package_classifiers)
+        python_version = get_requirement_version(package_name, None)
         if python_version is not None:
             package_name_versions.add(python_version)
 
@@ -163,7 +236,11 @@ def _find_setup_files(project_path: Path) -> List[Path]:
     return get_all_file_system_items(project_path, lambda name: name == 'setup.py' or name == 'setup.cfg')
 
 
-def determine_version(project_path: Path) -> Optional[PythonVersion]:
+def determine_version(
+    project_path: Path,
+    classifier_index: Optional[ClassifierIndex] = None,
+    memo: Optional[VersionMemo] = None,
+) -> Optional[PythonVersion]:
     """
     Determine the Python version used in the project.
 
@@ -172,6 +249,8 @@ def determine_version(project_path: Path) -> Optional[PythonVersion]:
     determine the version using requirements files.
 
     :param project_path: The path to the project for which you want to determine the version.
+    :param classifier_index: Offline classifier index. If it is None, the classifiers are requested from PyPI.
+    :param memo: Python versions already determined by the requirements. It is updated with the new ones.
     :return: The Python version used in the project. If the version could not be determined, None is returned.
     """
     logger.info(f'Processing {project_path.name}.')
@@ -190,7 +269,7 @@ def determine_version(project_path: Path) -> Optional[PythonVersion]:
     logger.info('Try to determine the Python version using the requirements files.')
 
     requirements = gather_requirements(project_path)
-    python_version = _try_to_determine_version_using_requirements(requirements)
+    python_version = _try_to_determine_version_using_requirements(requirements, classifier_index, memo)
     if python_version is not None:
         logger.info(f'Determined Python version: {python_version.value}')
         return python_version
@@ -199,6 +278,79 @@ def determine_version(project_path: Path) -> Optional[PythonVersion]:
     return None
 
 
+def _init_worker(cache: Optional[PyPICache], classifier_index: Optional[ClassifierIndex], memo: VersionMemo) -> None:
+    global _classifier_index, _memo
+    set_cache(cache)
+    _classifier_index = classifier_index
+    _memo = memo
+
+
+def _determine_project_version(project_path: Path) -> Tuple[str, Optional[PythonVersion]]:
+    return project_path.name, determine_version(project_path, _classifier_index, _memo)
+
+
+def read_processed_projects(output_path: Path) -> Set[str]:
+    """
+    Read the names of the projects whose versions are already saved.
+
+    :param output_path: Path to the csv table with the versions.
+    :return: Set of project names. If the table does not exist, the set will be empty.
+    """
+    if not output_path.exists():
+        return set()
+
+    with open(output_path, newline='') as file:
+        return {row[OUTPUT_COLUMNS[0]] for row in csv.DictReader(file)}
+
+
+def determine_versions(
+    projects: List[Path],
+    output_path: Path,
+    classifier_index: Optional[ClassifierIndex] = None,
+    n_cpu: int = 1,
+    append: bool = False,
+) -> None:
+    """
+    Determine the Python versions of the projects and save them to the csv table as soon as they are determined.
+
+    With several workers, the projects are processed by a pool of processes, which share the Python versions
+    determined by the requirements, so each requirement is resolved once.
+
+    :param projects: Paths to the projects.
+    :param output_path: Path to the csv table with the versions.
+    :param classifier_index: Offline classifier index. If it is None, the classifiers are requested from PyPI.
+    :param n_cpu: Number of workers.
+    :param append: Whether to append the versions to the existing table.
+    """
+    output_path.parent.mkdir(exist_ok=True, parents=True)
+    write_header = not append or not output_path.exists() or output_path.stat().st_size == 0
+
+    with open(output_path, 'a' if append else 'w', newline='') as file:
+        writer = csv.writer(file, lineterminator='\n')
+        if write_header:
+            writer.writerow(OUTPUT_COLUMNS)
+            file.flush()
+
+        def save_versions(results: Iterable[Tuple[str, Optional[PythonVersion]]]) -> None:
+            # Each version is flushed at once, so the table contains all the processed projects if the script crashes
+            for index, (project_name, version) in enumerate(results, start=1):
+                writer.writerow([project_name, None if version is None else version.value])
+                file.flush()
+
+                if index % 100 == 0:
+                    logger.info(f'Processed {index} of {len(projects)} projects.')
+
+        if n_cpu <= 1:
+            _init_worker(get_cache(), classifier_index, {})
+            save_versions(map(_determine_project_version, projects))
+            return
+
+        with Manager() as manager:
+            memo = manager.dict()
+            with Pool(n_cpu, initializer=_init_worker, initargs=(get_cache(), classifier_index, memo)) as pool:
+                save_versions(pool.imap(_determine_project_version, projects))
+
+
 def configure_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         'dataset_path',
@@ -218,6 +370,36 @@ def configure_arguments(parser: argparse.ArgumentParser) -> None:
         type=lambda value: Path(value).absolute(),
     )
 
+    configure_cache_arguments(parser)
+
+    parser.add_argument(
+        '--classifier-index',
+        help=(
+            'Path to the offline classifier index built by the `build_classifier_index.py` script. '
+            'If specified, the classifiers are looked up in it instead of PyPI.'
+        ),
+        type=lambda value: Path(value).absolute(),
+    )
+
+    parser.add_argument(
+        '--n-cpu',
+        help=(
+            'Number of workers for a parallel execution. '
+            'The workers share the Python versions determined by the requirements. By default, 1.'
+        ),
+        type=int,
+        default=1,
+    )
+
+    parser.add_argument(
+        '--resume',
+        help=(
+            'If specified, the projects that are already in the csv table are skipped, '
+            'and the versions of the other projects are appended to it.'
+        ),
+        action='store_true',
+    )
+
 
 def main() -> None:
     parser = argparse.ArgumentParser()
@@ -234,18 +416,21 @@ def main() -> None:
         format='%(asctime)s | %(levelname)s | %(message)s',
     )
 
-    projects = get_all_file_system_items(args.dataset_path, item_type=FileSystemItem.SUBDIR, with_subdirs=False)
+    set_cache(create_cache(parser, args))
 
-    project_to_version = {}
-    for project in projects:
-        version = determine_version(project)
-        project_to_version[project.name] = None if version is None else version.value
+    classifier_index = None
+    if args.classifier_index is not None:
+        if not args.classifier_index.exists():
+            parser.error(f'The classifier index {args.classifier_index} does not exist.')
+        classifier_index = ClassifierIndex(args.classifier_index)
 
-    df = pd.DataFrame.from_dict(project_to_version, orient='index', columns=['python_version'])
-    df.index.name = 'project_name'
+    projects = get_all_file_system_items(args.dataset_path, item_type=FileSystemItem.SUBDIR, with_subdirs=False)
+    if args.resume:
+        processed_projects = read_processed_projects(args.output_path)
+        projects = [project for project in projects if project.name not in processed_projects]
+        logger.info(f'{len(processed_projects)} projects have already been processed.')
 
-    args.output_path.parent.mkdir(exist_ok=True, parents=True)
-    df.to_csv(args.output_path)
+    determine_versions(projects, args.output_path, classifier_index, args.n_cpu, args.resume)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,131 @@
+"""
+This script fills the PyPI metadata cache, so the other scripts can use it in the offline mode.
+
+It accepts
+    * path to the dataset with python projects or to a requirements file with the package names.
+    * path to the SQLite database where the PyPI metadata is cached.
+    * number of hours after which the cached PyPI metadata is revalidated (default is 24).
+    * maximum number of the concurrent requests to PyPI (default is 16).
+    * maximum number of the requests to PyPI per second (default is 50).
+
+The metadata of the latest version of each package is fetched, and also the metadata of each version specified in the
+requirements, except those used with the operators "<", ">", "!=", since only these versions are requested
+to determine the Python version.
+"""
+
+import argparse
+import logging
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from pkg_resources import parse_version
+
+from utils.python.pypi_cache import DEFAULT_TTL, PyPICache
+from utils.python.pypi_utils import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_REQUESTS_PER_SECOND,
+    prefetch_metadata,
+    set_cache,
+    set_rate_limit,
+)
+from utils.python.requirements_utils import (
+    Requirements,
+    gather_requirements,
+    gather_requirements_from_file,
+    normalize_requirement_name,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def read_requirements(path: Path) -> Requirements:
+    """
+    Read the requirements from the dataset or from the requirements file.
+
+    :param path: Path to the dataset with the projects or to the requirements file.
+    :return: Dictionary, where for each package the collected specs are listed.
+    """
+    if path.is_dir():
+        return gather_requirements(path)
+
+    requirements = defaultdict(set)
+    for requirement in gather_requirements_from_file(path):
+        specs = {(operator, parse_version(version)) for operator, version in requirement.specs}
+        requirements[normalize_requirement_name(requirement.key)] |= specs
+
+    return requirements
+
+
+def configure_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        'input_path',
+        help=(
+            'Path to the dataset with the projects or to a requirements file with the packages '
+            'whose metadata you want to cache.'
+        ),
+        type=lambda value: Path(value).absolute(),
+    )
+
+    parser.add_argument(
+        'pypi_cache',
+        help='Path to the SQLite database where the PyPI metadata is cached.',
+        type=lambda value: Path(value).absolute(),
+    )
+
+    parser.add_argument(
+        '--pypi-cache-ttl',
+        help='Number of hours after which the cached PyPI metadata is revalidated. By default, 24.',
+        type=float,
+        default=DEFAULT_TTL / 60 / 60,
+    )
+
+    parser.add_argument(
+        '--pypi-workers',
+        help=f'Maximum number of the concurrent requests to PyPI. By default, {DEFAULT_MAX_WORKERS}.',
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+    )
+
+    parser.add_argument(
+        '--pypi-rate-limit',
+        help=(
+            'Maximum number of the requests to PyPI per second. If it is 0, the requests are not limited. '
+            f'By default, {DEFAULT_REQUESTS_PER_SECOND}.'
+        ),
+        type=float,
+        default=DEFAULT_REQUESTS_PER_SECOND,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    configure_arguments(parser)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
+
+    args = parser.parse_args()
+
+    requirements = read_requirements(args.input_path)
+    package_versions = {
+        package_name: {
+            str(version)
+            for operator, version in specs
+            if operator not in {'<', '>', '!='} and not str(version).endswith('.*')
+        }
+        for package_name, specs in requirements.items()
+    }
+
+    set_cache(PyPICache(args.pypi_cache, args.pypi_cache_ttl * 60 * 60))
+    set_rate_limit(args.pypi_rate_limit)
+    number_of_failures = prefetch_metadata(requirements.keys(), package_versions, args.pypi_workers)
+    if number_of_failures:
+        logger.warning(f'Failed to fetch {number_of_failures} responses. Rerun the script to retry them.')
+        return 1
+
+    logger.info('The metadata has been cached.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""This module contains a manifest that records the state of the batches of a run, so that the run can be resumed."""
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass
+from enum import Enum, unique
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmark.metrics_collection.fingerprint import get_directory_fingerprint, get_head_commit
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'run_manifest.jsonl'
+
+
+@unique
+class BatchStatus(Enum):
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+
+@dataclass
+class BatchRecord:
+    index: int
+    input_hash: str
+    status: str
+    exit_code: int
+    duration: float
+    output_path: str
+
+
+def get_project_version(project: Path, use_files: bool = False) -> Optional[str]:
+    """
+    Get the version of the project, which changes when the project is updated.
+
+    :param project: Path to the project.
+    :param use_files: Whether the version of a project that is not a git repository is built from its files.
+                      It requires a pass over all the project files.
+    :return: The HEAD commit of the project or the fingerprint of its files. If the project is not a git repository
+             and the files are not used, None will be returned.
+    """
+    head_commit = get_head_commit(project)
+    if head_commit is not None or not use_files:
+        return head_commit
+
+    return get_directory_fingerprint(project)
+
+
+def get_batch_input_hash(
+    batch: List[Path],
+    analysis_arguments: List[str],
+    project_versions: Optional[Dict[Path, Optional[str]]] = None,
+) -> str:
+    """
+    Calculate a hash of the batch input.
+
+    The hash depends on the paths of the batch projects, their versions and the analysis arguments.
+
+    :param batch: List of project paths included in the batch.
+    :param analysis_arguments: Arguments that affect the analysis results, e.g. the analyzer name.
+    :param project_versions: Version of each project, see ``get_project_version``. If the version of a project
+                             is not specified, the hash does not change when the project is updated.
+    :return: Hex digest of the hash.
+    """
+    project_versions = project_versions or {}
+    batch_input = {
+        'projects': sorted([str(project), project_versions.get(project)] for project in batch),
+        'arguments': analysis_arguments,
+    }
+    return hashlib.sha256(json.dumps(batch_input).encode('utf-8')).hexdigest()
+
+
+class RunManifest:
+    """
+    A JSON-lines file with a record for each processed batch.
+
+    The records are only appended to the file, so the latest record for a batch index describes its current state.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.records: Dict[int, BatchRecord] = {}
+        self._is_last_line_complete = True
+
+        if not path.exists():
+            return
+
+        with open(path) as file:
+            for line_number, line in enumerate(file, start=1):
+                self._is_last_line_complete = line.endswith('\n')
+                if not line.strip():
+                    continue
+
+                try:
+                    record = BatchRecord(**json.loads(line))
+                except (ValueError, TypeError):
+                    # The last line may be corrupted if the previous run was killed while writing it
+                    logger.warning(f'Unable to parse line {line_number} in {path}. Skipping.')
+                    continue
+
+                self.records[record.index] = record
+
+    def get_record(self, index: int) -> Optional[BatchRecord]:
+        return self.records.get(index)
+
+    def is_completed(self, index: int, input_hash: str) -> bool:
+        """
+        Check whether the batch has been successfully processed with the same input.
+
+        :param index: Batch index.
+        :param input_hash: Hash of the batch input.
+        :return: True if the latest record of the batch is completed and has the same input hash.
+        """
+        record = self.records.get(index)
+        return (
+            record is not None
+            and record.input_hash == input_hash
+            and record.status == BatchStatus.COMPLETED.value
+        )
+
+    def add_record(self, record: BatchRecord) -> None:
+        self.records[record.index] = record
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a') as file:
+            if not self._is_last_line_complete:
+                file.write('\n')
+                self._is_last_line_complete = True
+
+            file.write(json.dumps(asdict(record)) + '\n')
@@ -1,8 +1,20 @@
+import shutil
+from multiprocessing.pool import Pool
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from test.benchmark.metrics_collection import COLLECT_PROJECT_METRICS_TEST_DATA_FOLDER
 from typing import Dict
 
-from benchmark.metrics_collection.collect_project_metrics import TOTAL_FIELD_NAME, collect_project_metrics
+from benchmark.metrics_collection.collect_project_metrics import (
+    METRICS_FILE,
+    ProjectChunks,
+    TOTAL_FIELD_NAME,
+    collect_and_save_metrics,
+    collect_chunked_metrics,
+    collect_project_metrics,
+)
 from benchmark.metrics_collection.metrics import MetricName
+from benchmark.metrics_collection.metrics_store import MetricsStore
 
 import pytest
 
@@ -97,3 +109,66 @@ def test_collect_project_metrics(project: str, metric_configs: Dict, expected_va
     assert (
         collect_project_metrics(COLLECT_PROJECT_METRICS_TEST_DATA_FOLDER / project, metric_configs) == expected_values
     )
+
+
+def test_collect_and_save_metrics_incrementally():
+    with TemporaryDirectory() as tmpdir:
+        project = Path(tmpdir) / 'project'
+        shutil.copytree(COLLECT_PROJECT_METRICS_TEST_DATA_FOLDER / 'project_with_one_language', project)
+        store = MetricsStore.for_dataset(Path(tmpdir))
+
+        # The fingerprint is computed only in the incremental mode
+        assert collect_and_save_metrics(project, COMMON_CONFIG, store).fingerprint is None
+
+        entry = collect_and_save_metrics(project, COMMON_CONFIG, store, incremental=True)
+        assert entry.fingerprint is not None
+        assert entry.metrics == collect_project_metrics(project, COMMON_CONFIG)
+        store.update([entry])
+        previous_entry = (entry.mtime_ns, entry.fingerprint)
+        metrics_file_content = (project / METRICS_FILE).read_text()
+
+        # The project has not changed
+        assert collect_and_save_metrics(project, COMMON_CONFIG, store, previous_entry, incremental=True) is None
+
+        # The metric file has been removed, so it is restored from the store
+        (project / METRICS_FILE).unlink()
+        restored_entry = collect_and_save_metrics(project, COMMON_CONFIG, store, previous_entry, incremental=True)
+        assert restored_entry.metrics == entry.metrics
+        assert restored_entry.fingerprint == entry.fingerprint
+        assert (project / METRICS_FILE).read_text() == metrics_file_content
+
+        # The project has changed, so the metrics are collected again
+        with open(project / 'new_file.txt', 'w') as file:
+            file.write('new line\n')
+
+        updated_entry = collect_and_save_metrics(project, COMMON_CONFIG, store, previous_entry, incremental=True)
+        assert updated_entry.fingerprint != entry.fingerprint
+        assert updated_entry.metrics[MetricName.NUMBER_OF_FILES.value][TOTAL_FIELD_NAME] == 4
+
+
+def test_collect_and_save_metrics_by_chunks():
+    with TemporaryDirectory() as tmpdir:
+        dataset = Path(tmpdir)
+        for project in ['project_with_one_language', 'project_with_multiple_languages']:
+            shutil.copytree(COLLECT_PROJECT_METRICS_TEST_DATA_FOLDER / project, dataset / project)
+
+        small_project = dataset / 'project_with_one_language'
+        large_project = dataset / 'project_with_multiple_languages'
+
+        # The small project fits into a chunk, so its metrics are collected right away
+        small_entry = collect_and_save_metrics(small_project, COMMON_CONFIG, chunk_size=300)
+        assert small_entry.metrics == collect_project_metrics(small_project, COMMON_CONFIG)
+
+        project_chunks = collect_and_save_metrics(large_project, COMMON_CONFIG, chunk_size=300, incremental=True)
+        assert isinstance(project_chunks, ProjectChunks)
+        assert len(project_chunks.chunks) > 1
+        assert not (large_project / METRICS_FILE).exists()
+
+        with Pool(2) as pool:
+            entries = collect_chunked_metrics(pool, [project_chunks], COMMON_CONFIG)
+
+        assert len(entries) == 1
+        assert entries[0].project == large_project.name
+        assert entries[0].fingerprint == project_chunks.fingerprint
+        assert entries[0].metrics == collect_project_metrics(large_project, COMMON_CONFIG)
+        assert (large_project / METRICS_FILE).exists()
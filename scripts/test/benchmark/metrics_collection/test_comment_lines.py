@@ -0,0 +1,84 @@
+import pytest
+
+from benchmark.metrics_collection.comment_lines import count_comment_lines
+
+from utils.language import Language
+
+COUNT_PYTHON_COMMENT_LINES_TEST_DATA = [
+    ('', 0),
+    ('x = 1\n', 0),
+    ('# comment\n', 1),
+    ('   # comment\nx = 1  # comment\n', 1),
+    ('"""Docstring."""\n', 1),
+    ('def f():\n    """\n    Docstring.\n\n    :return: None.\n    """\n    pass\n', 4),
+    ("class A:\n    '''\n    Docstring.\n    '''\n", 3),
+    ('def f():  # comment\n    # comment\n    """Docstring."""\n', 2),
+    ('def f():\n    r"""\n    Docstring.\n    """\n', 3),
+    ('x = f"""\n{y}\n"""\n', 0),
+    # Docstrings followed by a comment or by code
+    ('"""\nDocstring.\n"""  # comment\n', 3),
+    ('"""\nDocstring.\n""".strip()\n', 2),
+    # Multi-line strings that are a part of an expression are code
+    ('x = """\n# not a comment\n"""\n', 0),
+    ('x = (\n    """\n    text\n    """\n)\n', 0),
+    ('f(\n    1,\n    """\n    text\n    """,\n)\n', 0),
+    ('x = 1 + \\\n    """text"""\n', 0),
+    ('x = (\n    # comment,\n    """\n    text\n    """\n)\n', 1),
+    ('x = ("a"\n    """b\n    c""")\n', 0),
+    ('x = {\n    "(": """\n    text\n    """,  # )\n}\n', 0),
+    # The brackets are closed before the docstring
+    ('def f(\n    x,\n):\n    """\n    Docstring.\n    """\n', 3),
+    ('x = (\n    """text"""\n)\n"""Docstring."""\n', 1),
+    # Comment markers inside strings
+    ('x = "# not a comment"\n', 0),
+    ("x = '\\'# not a comment'\n", 0),
+    ('x = """ \\""" # not a comment """\n', 0),
+    ("x = '\"\"\"'\n# comment\n", 1),
+    ('# """ not a docstring\n# comment\n', 2),
+    # Unterminated strings
+    ('"""\nDocstring.\n', 2),
+    ('x = "\n# comment\n', 1),
+]
+
+
+@pytest.mark.parametrize(('text', 'expected_number'), COUNT_PYTHON_COMMENT_LINES_TEST_DATA)
+def test_count_python_comment_lines(text: str, expected_number: int):
+    assert count_comment_lines(f'\n{text}', Language.PYTHON) == expected_number
+    assert count_comment_lines(f'\n{text}'.encode(), Language.PYTHON) == expected_number
+
+
+COUNT_KOTLIN_COMMENT_LINES_TEST_DATA = [
+    ('', 0),
+    ('val x = 1\n', 0),
+    ('// comment\n', 1),
+    ('  // comment\nval x = 1 // comment\n', 1),
+    ('/* comment */\n', 1),
+    ('/**\n * KDoc.\n *\n * @return Nothing.\n */\nfun f() {}\n', 5),
+    ('/*\n\n*/\n', 2),
+    ('val x = 1 /* comment\ncomment\ncomment */ val y = 2\n', 1),
+    ('/* comment */ /* comment */ // comment\n', 1),
+    ('/* comment */ val x = 1\n', 0),
+    # Nested comments
+    ('/* outer\n/* inner */\nstill comment\n*/\nval x = 1\n', 4),
+    # Comment markers inside strings and characters
+    ('val x = "// not a comment"\n', 0),
+    ('val x = "/* not a comment"\nval y = 1\n', 0),
+    ('val x = """\n/* not a comment */\n"""\n', 0),
+    ("val x = '\\''\n// comment\n", 1),
+    ('val x = "\\"/*"\n', 0),
+    ('val x = """"quoted""""\n// comment\n', 1),
+    ('// /* not a block comment\nval x = 1\n', 1),
+    ('/*/ comment */\n', 1),
+    # Unterminated comment
+    ('/*\ncomment\n', 2),
+]
+
+
+@pytest.mark.parametrize(('text', 'expected_number'), COUNT_KOTLIN_COMMENT_LINES_TEST_DATA)
+def test_count_kotlin_comment_lines(text: str, expected_number: int):
+    assert count_comment_lines(f'\n{text}', Language.KOTLIN) == expected_number
+    assert count_comment_lines(f'\n{text}'.encode(), Language.KOTLIN) == expected_number
+
+
+def test_count_comment_lines_with_unicode_whitespace():
+    assert count_comment_lines('\n\u00a0# comment\n\u2028\n"""\n\u3000\n"""\n', Language.PYTHON) == 3
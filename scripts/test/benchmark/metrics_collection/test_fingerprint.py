@@ -0,0 +1,78 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, Optional
+
+import pytest
+
+from benchmark.metrics_collection.fingerprint import (
+    get_directory_fingerprint,
+    get_head_commit,
+    get_project_fingerprint,
+)
+from benchmark.metrics_collection.metrics import MetricName
+
+COMMIT = '0123456789abcdef0123456789abcdef01234567'
+
+GET_HEAD_COMMIT_TEST_DATA = [
+    # Not a git repository
+    ({}, None),
+    # Detached HEAD
+    ({'HEAD': f'{COMMIT}\n'}, COMMIT),
+    # Loose ref
+    ({'HEAD': 'ref: refs/heads/main\n', 'refs/heads/main': f'{COMMIT}\n'}, COMMIT),
+    # Packed ref
+    (
+        {
+            'HEAD': 'ref: refs/heads/main\n',
+            'packed-refs': f'# pack-refs with: peeled fully-peeled sorted\n{COMMIT} refs/heads/main\n',
+        },
+        COMMIT,
+    ),
+    # Unresolvable ref
+    ({'HEAD': 'ref: refs/heads/main\n'}, None),
+]
+
+
+def _create_files(root: Path, files: Dict[str, str]) -> None:
+    for file, content in files.items():
+        (root / file).parent.mkdir(parents=True, exist_ok=True)
+        (root / file).write_text(content)
+
+
+@pytest.mark.parametrize(('git_files', 'expected_commit'), GET_HEAD_COMMIT_TEST_DATA)
+def test_get_head_commit(git_files: Dict[str, str], expected_commit: Optional[str]):
+    with TemporaryDirectory() as tmpdir:
+        project = Path(tmpdir)
+        _create_files(project / '.git', git_files)
+
+        assert get_head_commit(project) == expected_commit
+
+
+def test_get_directory_fingerprint():
+    with TemporaryDirectory() as tmpdir:
+        project = Path(tmpdir)
+        _create_files(project, {'main.py': 'print(1)\n', 'src/utils.py': 'x = 1\n'})
+        fingerprint = get_directory_fingerprint(project, {'project_metrics.yaml'})
+
+        # Ignored files and directory modification times do not affect the fingerprint
+        _create_files(project, {'project_metrics.yaml': 'number_of_files: {}\n'})
+        (project / 'empty_dir').mkdir()
+        assert get_directory_fingerprint(project, {'project_metrics.yaml'}) == fingerprint
+
+        _create_files(project, {'src/utils.py': 'x = 2\n'})
+        os.utime(project / 'src' / 'utils.py', ns=(0, 10 ** 19))
+        assert get_directory_fingerprint(project, {'project_metrics.yaml'}) != fingerprint
+
+
+def test_get_project_fingerprint():
+    with TemporaryDirectory() as tmpdir:
+        project = Path(tmpdir)
+        _create_files(project, {'main.py': 'print(1)\n', '.git/HEAD': f'{COMMIT}\n'})
+
+        configs = {MetricName.NUMBER_OF_LINES: {'ignore_comments': True}, MetricName.FILE_SIZE: {}}
+        fingerprint = get_project_fingerprint(project, configs)
+
+        assert fingerprint.endswith(f':git:{COMMIT}')
+        assert get_project_fingerprint(project, dict(reversed(list(configs.items())))) == fingerprint
+        assert get_project_fingerprint(project, {MetricName.NUMBER_OF_LINES: {}}) != fingerprint
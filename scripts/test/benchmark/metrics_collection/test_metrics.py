@@ -12,6 +12,8 @@ from benchmark.metrics_collection.metrics import (
 
 import pytest
 
+from benchmark.metrics_collection.project_scanner import decode_lines
+
 from utils.language import Language
 
 
@@ -59,6 +61,22 @@ COLLECT_NUMBER_OF_LINES_TEST_DATA = [
         {Language.KOTLIN: 10},
         {MetricArgument.IGNORE_COMMENTS.value: True, MetricArgument.IGNORE_EMPTY_LINES.value: True},
     ),
+    (['multi_line_comments.py'], {Language.PYTHON: 17}, {}),
+    (['multi_line_comments.py'], {Language.PYTHON: 14}, {MetricArgument.IGNORE_EMPTY_LINES.value: True}),
+    (['multi_line_comments.py'], {Language.PYTHON: 10}, {MetricArgument.IGNORE_COMMENTS.value: True}),
+    (
+        ['multi_line_comments.py'],
+        {Language.PYTHON: 7},
+        {MetricArgument.IGNORE_COMMENTS.value: True, MetricArgument.IGNORE_EMPTY_LINES.value: True},
+    ),
+    (['multi_line_comments.kt'], {Language.KOTLIN: 18}, {}),
+    (['multi_line_comments.kt'], {Language.KOTLIN: 17}, {MetricArgument.IGNORE_EMPTY_LINES.value: True}),
+    (['multi_line_comments.kt'], {Language.KOTLIN: 10}, {MetricArgument.IGNORE_COMMENTS.value: True}),
+    (
+        ['multi_line_comments.kt'],
+        {Language.KOTLIN: 9},
+        {MetricArgument.IGNORE_COMMENTS.value: True, MetricArgument.IGNORE_EMPTY_LINES.value: True},
+    ),
     (
         [
             'empty_file.txt',
@@ -85,6 +103,36 @@ def test_collect_number_of_lines(files: List[str], expected_number_of_lines: Dic
     )
 
 
+COUNT_LINES_IN_BYTES_TEST_DATA = [
+    b'',
+    b'\n',
+    b'line',
+    b'line\n',
+    b'first\nsecond',
+    b'first\r\nsecond\r\n',
+    b'first\rsecond\r',
+    b'\r\n\r\r\n\n\r',
+    b'first\r\xff\nsecond',
+    b'line\n\xff\xfe',
+    b'line\n\xff \xfe',
+    b'  \t \n\x0b\x0c\n\x1c\x1f\nline',
+    b'\xc2\xa0\xe2\x80\xa8\n\xc2\x85\nline \xe2\x84\xa2\n',
+    '# комментарий\n  // comment\nкод\n'.encode('utf-8'),
+    b'# comment\n  // comment \n\t"""docstring"""\n"""\n""""\n\'\'\'text\'\'\' \n/*/\n/* comment */\ncode # comment\n',
+    b'"""start\ncode\nend"""\n\'\'\'\n/* comment *\n*/ code\n',
+    b'#\r//\r\n  \r"""x"""',
+    b'\xff# comment\n\xef\xbb\xbf# comment\n',
+]
+
+
+@pytest.mark.parametrize('content', COUNT_LINES_IN_BYTES_TEST_DATA)
+@pytest.mark.parametrize('ignore_empty_lines', [False, True])
+@pytest.mark.parametrize('ignore_comments', [False, True])
+def test_count_lines_in_bytes(content: bytes, ignore_empty_lines: bool, ignore_comments: bool):
+    expected_number_of_lines = NumberOfLines.count_lines(decode_lines(content), ignore_empty_lines, ignore_comments)
+    assert NumberOfLines.count_lines_in_bytes(content, ignore_empty_lines, ignore_comments) == expected_number_of_lines
+
+
 COLLECT_FILE_SIZE_TEST_DATA = [
     ([], {}),
     (['empty_file.txt'], {Language.TEXT: 0}),
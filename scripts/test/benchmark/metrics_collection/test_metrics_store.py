@@ -0,0 +1,81 @@
+import sqlite3
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from benchmark.metrics_collection.collect_project_metrics import TOTAL_FIELD_NAME
+from benchmark.metrics_collection.metrics import MetricName
+from benchmark.metrics_collection.metrics_store import METRICS_STORE_FILE, MetricsStore, MetricsStoreEntry
+from utils.language import Language
+
+PROJECT_A_METRICS = {
+    MetricName.NUMBER_OF_FILES.value: {Language.PYTHON.value: 2, Language.KOTLIN.value: 3, TOTAL_FIELD_NAME: 5},
+    MetricName.NUMBER_OF_LINES.value: {Language.PYTHON.value: 20, TOTAL_FIELD_NAME: 20},
+}
+
+PROJECT_B_METRICS = {
+    MetricName.NUMBER_OF_FILES.value: {Language.KOTLIN.value: 1, TOTAL_FIELD_NAME: 1},
+}
+
+
+def test_update_and_load():
+    with TemporaryDirectory() as tmpdir:
+        store = MetricsStore.for_dataset(Path(tmpdir))
+        store.update(
+            [
+                MetricsStoreEntry('project_A', 10, PROJECT_A_METRICS, 'fingerprint_A'),
+                MetricsStoreEntry('project_B', 20, PROJECT_B_METRICS),
+            ],
+        )
+
+        assert store.path == Path(tmpdir) / METRICS_STORE_FILE
+        assert store.load(Language.PYTHON.value) == {
+            'project_A': (10, {MetricName.NUMBER_OF_FILES.value: 2, MetricName.NUMBER_OF_LINES.value: 20}),
+            'project_B': (20, {}),
+        }
+        assert store.load(TOTAL_FIELD_NAME) == {
+            'project_A': (10, {MetricName.NUMBER_OF_FILES.value: 5, MetricName.NUMBER_OF_LINES.value: 20}),
+            'project_B': (20, {MetricName.NUMBER_OF_FILES.value: 1}),
+        }
+        assert store.load_fingerprints() == {'project_A': (10, 'fingerprint_A'), 'project_B': (20, None)}
+        assert store.get_metrics('project_A') == PROJECT_A_METRICS
+        assert store.get_metrics('project_C') is None
+
+
+def test_update_replaces_project():
+    with TemporaryDirectory() as tmpdir:
+        store = MetricsStore.for_dataset(Path(tmpdir))
+        store.update([MetricsStoreEntry('project_A', 10, PROJECT_A_METRICS)])
+        store.update([MetricsStoreEntry('project_A', 30, PROJECT_B_METRICS)])
+
+        assert store.load(TOTAL_FIELD_NAME) == {'project_A': (30, {MetricName.NUMBER_OF_FILES.value: 1})}
+
+
+def test_load_without_store():
+    with TemporaryDirectory() as tmpdir:
+        store = MetricsStore.for_dataset(Path(tmpdir))
+
+        assert store.load(TOTAL_FIELD_NAME) == {}
+        assert store.load_fingerprints() == {}
+        assert store.get_metrics('project_A') is None
+        assert not store.path.exists()
+
+
+def test_load_corrupted_store():
+    with TemporaryDirectory() as tmpdir:
+        store = MetricsStore.for_dataset(Path(tmpdir))
+        store.path.write_text('This is not a database.')
+
+        assert store.load(TOTAL_FIELD_NAME) == {}
+
+
+def test_store_without_fingerprints():
+    with TemporaryDirectory() as tmpdir:
+        store = MetricsStore.for_dataset(Path(tmpdir))
+
+        connection = sqlite3.connect(store.path)
+        connection.execute('CREATE TABLE projects (project TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL)')
+        connection.execute("INSERT INTO projects VALUES ('project_A', 10)")
+        connection.commit()
+        connection.close()
+
+        assert store.load_fingerprints() == {'project_A': (10, None)}
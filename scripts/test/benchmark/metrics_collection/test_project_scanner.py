@@ -0,0 +1,104 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from test.benchmark.metrics_collection import COLLECT_PROJECT_METRICS_TEST_DATA_FOLDER, METRICS_TEST_DATA_FOLDER
+from typing import Dict, List, Tuple
+
+from benchmark.metrics_collection.metrics import MetricArgument, MetricName
+from benchmark.metrics_collection.project_scanner import (
+    collect_values,
+    merge_values,
+    scan_files,
+    scan_project,
+    split_into_chunks,
+)
+
+import pytest
+
+from utils.file_utils import get_all_file_system_items
+
+ALL_METRICS_CONFIG = {
+    MetricName.FILE_SIZE: {},
+    MetricName.NUMBER_OF_FILES: {},
+    MetricName.NUMBER_OF_LINES: {},
+    MetricName.NUMBER_OF_DEPENDENCIES: {},
+}
+
+SCAN_PROJECT_TEST_DATA = [
+    (COLLECT_PROJECT_METRICS_TEST_DATA_FOLDER / 'project_with_one_language', ALL_METRICS_CONFIG),
+    (COLLECT_PROJECT_METRICS_TEST_DATA_FOLDER / 'project_with_multiple_languages', ALL_METRICS_CONFIG),
+    (COLLECT_PROJECT_METRICS_TEST_DATA_FOLDER / 'project_with_unknown_language', ALL_METRICS_CONFIG),
+    (METRICS_TEST_DATA_FOLDER, ALL_METRICS_CONFIG),
+    (
+        METRICS_TEST_DATA_FOLDER,
+        {
+            MetricName.NUMBER_OF_LINES: {
+                MetricArgument.IGNORE_EMPTY_LINES.value: True,
+                MetricArgument.IGNORE_COMMENTS.value: True,
+            },
+        },
+    ),
+    (METRICS_TEST_DATA_FOLDER, {MetricName.NUMBER_OF_DEPENDENCIES: {}}),
+]
+
+
+@pytest.mark.parametrize(('project', 'metric_configs'), SCAN_PROJECT_TEST_DATA)
+def test_scan_project(project: Path, metric_configs: Dict[MetricName, Dict]) -> None:
+    files = get_all_file_system_items(project)
+    expected_values = {metric: metric.execute(files, **config) for metric, config in metric_configs.items()}
+
+    assert scan_project(project, metric_configs) == expected_values
+
+
+def test_scan_empty_project() -> None:
+    with TemporaryDirectory() as tmp_dir:
+        (Path(tmp_dir) / 'empty_folder').mkdir()
+        assert scan_project(Path(tmp_dir), ALL_METRICS_CONFIG) is None
+
+
+def test_scan_files() -> None:
+    with TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir)
+        (root / 'folder' / 'subfolder').mkdir(parents=True)
+        (root / 'folder' / 'subfolder' / 'file.py').write_text('print(1)\n')
+        (root / 'folder' / 'ignored.yaml').write_text('ignored')
+        (root / 'file.txt').write_text('text')
+
+        # Symlinks to directories are not followed, and broken symlinks are skipped
+        os.symlink(root / 'folder', root / 'folder_link', target_is_directory=True)
+        os.symlink(root / 'non_existent_file', root / 'broken_link')
+        os.symlink(root / 'file.txt', root / 'file_link.txt')
+
+        files = {file.relative_to(root): stat.st_size for file, stat in scan_files(root, {'ignored.yaml'})}
+        assert files == {
+            Path('folder') / 'subfolder' / 'file.py': 9,
+            Path('file.txt'): 4,
+            Path('file_link.txt'): 4,
+        }
+
+
+SPLIT_INTO_CHUNKS_TEST_DATA = [
+    ([], 10, []),
+    ([(Path('a'), 3), (Path('b'), 4), (Path('c'), 3)], 10, [[(Path('a'), 3), (Path('b'), 4), (Path('c'), 3)]]),
+    ([(Path('a'), 3), (Path('b'), 4), (Path('c'), 5)], 10, [[(Path('a'), 3), (Path('b'), 4)], [(Path('c'), 5)]]),
+    # A file larger than the chunk size gets a chunk of its own
+    ([(Path('a'), 3), (Path('b'), 20), (Path('c'), 1)], 10, [[(Path('a'), 3)], [(Path('b'), 20)], [(Path('c'), 1)]]),
+]
+
+
+@pytest.mark.parametrize(('files', 'chunk_size', 'expected_chunks'), SPLIT_INTO_CHUNKS_TEST_DATA)
+def test_split_into_chunks(
+    files: List[Tuple[Path, int]],
+    chunk_size: int,
+    expected_chunks: List[List[Tuple[Path, int]]],
+) -> None:
+    assert split_into_chunks(files, chunk_size) == expected_chunks
+
+
+@pytest.mark.parametrize(('project', 'metric_configs'), SCAN_PROJECT_TEST_DATA)
+@pytest.mark.parametrize('chunk_size', [1, 100, 1000])
+def test_merge_chunk_values(project: Path, metric_configs: Dict[MetricName, Dict], chunk_size: int) -> None:
+    files = [(file, stat.st_size) for file, stat in scan_files(project, set())]
+    partial_values = [collect_values(chunk, metric_configs) for chunk in split_into_chunks(files, chunk_size)]
+
+    assert merge_values(partial_values) == scan_project(project, metric_configs)
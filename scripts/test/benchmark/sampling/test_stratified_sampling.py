@@ -1,3 +1,6 @@
+import shutil
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from typing import Any, Dict, List, Optional
 
 import pandas as pd
@@ -8,7 +11,10 @@ from benchmark.sampling.stratified_sampling import (
     get_stratified_sample,
     read_metrics,
     read_project_metrics,
+    read_projects_metrics,
 )
+from benchmark.metrics_collection.collect_project_metrics import METRICS_FILE, TOTAL_FIELD_NAME
+from benchmark.metrics_collection.metrics_store import MetricsStore, MetricsStoreEntry
 from test.benchmark.sampling import DATASETS_DATA_FOLDER, PROJECTS_DATA_FOLDER
 from utils.df_utils import assert_df_equals
 from utils.language import Language
@@ -44,6 +50,32 @@ def test_read_project_metrics(
     assert read_project_metrics(dataset_path, language) == expected_metrics
 
 
+def test_read_projects_metrics() -> None:
+    with TemporaryDirectory() as tmpdir:
+        dataset_path = Path(tmpdir) / 'dataset'
+        shutil.copytree(DATASETS_DATA_FOLDER / 'dataset_with_several_languages', dataset_path)
+        (dataset_path / 'project_C').mkdir()
+
+        project_a_mtime = (dataset_path / 'project_A' / METRICS_FILE).stat().st_mtime_ns
+        project_b_mtime = (dataset_path / 'project_B' / METRICS_FILE).stat().st_mtime_ns
+
+        # The entry of project_A is up-to-date, while the entry of project_B is stale, and project_C has no metric file
+        MetricsStore.for_dataset(dataset_path).update(
+            [
+                MetricsStoreEntry('project_A', project_a_mtime, {'number_of_files': {TOTAL_FIELD_NAME: 100}}),
+                MetricsStoreEntry('project_B', project_b_mtime - 1, {'number_of_files': {TOTAL_FIELD_NAME: 100}}),
+                MetricsStoreEntry('project_C', project_a_mtime, {'number_of_files': {TOTAL_FIELD_NAME: 100}}),
+            ],
+        )
+
+        projects = [dataset_path / project for project in ['project_A', 'project_B', 'project_C']]
+        assert read_projects_metrics(projects, None) == {
+            dataset_path / 'project_A': {'number_of_files': 100},
+            dataset_path / 'project_B': {'number_of_dependencies': 13, 'file_size': 93, 'number_of_files': 12},
+            dataset_path / 'project_C': None,
+        }
+
+
 READ_METRICS_TEST_DATA = [
     ('non_existent_dataset', Language.PYTHON, None),
     ('dataset_without_metrics', Language.PYTHON, None),
@@ -14,6 +14,7 @@ class CommandBuilder:
     data: str
     use_db: bool = False
     start_from: Optional[int] = None
+    parallel: Optional[int] = None
     task_name: Optional[str] = None
     kwargs: Optional[str] = None
 
@@ -33,6 +34,9 @@ class CommandBuilder:
         if self.start_from is not None:
             command.extend(['--start-from', str(self.start_from)])
 
+        if self.parallel is not None:
+            command.extend(['--parallel', str(self.parallel)])
+
         if self.task_name is not None:
             command.extend(['--task-name', self.task_name])
 
@@ -0,0 +1,124 @@
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List
+
+import pytest
+
+from plugin_runner.analysis_daemon import AnalysisDaemon, DaemonError
+from plugin_runner.batch_scheduler import BatchTask
+
+# A daemon that speaks the protocol of the analysis-daemon runner.
+# It fails the batches whose input ends with "fail", dies on the batches whose input ends with "die",
+# hangs on the pings after the batches whose input ends with "hang", and hangs on the batches whose input ends with
+# "stuck".
+FAKE_DAEMON = """
+import os, sys, time
+print("starting")
+print("LUPA_DAEMON\\tREADY", flush=True)
+hang = False
+for line in sys.stdin:
+    command = line.rstrip("\\n").split("\\t")
+    if command[0] == "PING":
+        if hang:
+            time.sleep(60)
+        print("LUPA_DAEMON\\tPONG", flush=True)
+    elif command[0] == "EXIT":
+        break
+    elif command[0] == "ANALYZE":
+        print(f"pid {os.getpid()}: {command[1]}", flush=True)
+        if command[1].endswith("die"):
+            sys.exit(1)
+        if command[1].endswith("stuck"):
+            time.sleep(60)
+        hang = command[1].endswith("hang")
+        if command[1].endswith("fail"):
+            print("LUPA_DAEMON\\tFAILED\\tsomething went wrong", flush=True)
+        else:
+            print("LUPA_DAEMON\\tDONE", flush=True)
+"""
+
+FAKE_DAEMON_COMMAND = [sys.executable, '-c', FAKE_DAEMON]
+
+RUN_TEST_DATA = [
+    (['a', 'b', 'c'], None, [0, 0, 0], 1),
+    (['a', 'b', 'c'], 1, [0, 0, 0], 3),
+    (['a', 'b', 'c', 'd', 'e'], 2, [0, 0, 0, 0, 0], 3),
+    (['a', 'fail', 'c'], None, [0, 1, 0], 1),
+    (['a', 'die', 'c'], None, [0, 1, 0], 2),
+    (['a', 'hang', 'c'], None, [0, 0, 0], 2),
+]
+
+
+def _create_tasks(tmpdir: Path, inputs: List[str]) -> List[BatchTask]:
+    return [
+        BatchTask(index, tmpdir / batch_input, tmpdir / f'output_{index}', tmpdir / f'log_{index}.txt')
+        for index, batch_input in enumerate(inputs)
+    ]
+
+
+def _get_pid(log_path: Path) -> str:
+    return log_path.read_text().split(':')[0]
+
+
+@pytest.mark.parametrize(('inputs', 'restart_after', 'expected_exit_codes', 'expected_processes'), RUN_TEST_DATA)
+def test_run(inputs: List[str], restart_after: int, expected_exit_codes: List[int], expected_processes: int):
+    finished = []
+
+    with TemporaryDirectory() as tmpdir:
+        tasks = _create_tasks(Path(tmpdir), inputs)
+        daemon = AnalysisDaemon(
+            FAKE_DAEMON_COMMAND,
+            Path(tmpdir) / 'log_daemon.txt',
+            restart_after=restart_after,
+            startup_timeout=10,
+            ping_timeout=1,
+        )
+        results = daemon.run(tasks, on_finish=lambda task, result: finished.append(task.index))
+
+        assert [result.exit_code for result in results] == expected_exit_codes
+        assert finished == list(range(len(inputs)))
+        assert not daemon.is_alive()
+
+        assert all(task.log_path.read_text().strip().endswith(str(task.batch_path)) for task in tasks)
+        assert len({_get_pid(task.log_path) for task in tasks}) == expected_processes
+        assert (Path(tmpdir) / 'log_daemon.txt').read_text().split() == ['starting'] * expected_processes
+
+
+def test_batch_timeout():
+    with TemporaryDirectory() as tmpdir:
+        tasks = _create_tasks(Path(tmpdir), ['a', 'stuck', 'c'])
+        daemon = AnalysisDaemon(
+            FAKE_DAEMON_COMMAND,
+            Path(tmpdir) / 'log_daemon.txt',
+            startup_timeout=10,
+            ping_timeout=1,
+            batch_timeout=2,
+        )
+        results = daemon.run(tasks)
+
+        assert [result.exit_code for result in results] == [0, 1, 0]
+        assert not daemon.is_alive()
+
+        # The stuck daemon is killed, so the next batch is processed by a new one
+        assert _get_pid(tasks[0].log_path) == _get_pid(tasks[1].log_path) != _get_pid(tasks[2].log_path)
+
+
+def test_startup_failure():
+    with TemporaryDirectory() as tmpdir:
+        daemon = AnalysisDaemon([sys.executable, '-c', 'pass'], Path(tmpdir) / 'log_daemon.txt', startup_timeout=10)
+
+        with pytest.raises(DaemonError):
+            daemon.start()
+
+        assert not daemon.is_alive()
+
+
+def test_incorrect_restart_after():
+    with pytest.raises(ValueError):
+        AnalysisDaemon(FAKE_DAEMON_COMMAND, Path('log_daemon.txt'), restart_after=0)
+
+
+def test_incorrect_batch_timeout():
+    with pytest.raises(ValueError):
+        AnalysisDaemon(FAKE_DAEMON_COMMAND, Path('log_daemon.txt'), batch_timeout=0)
@@ -6,7 +6,7 @@ import pytest
 
 from benchmark.metrics_collection.metrics import MetricName
 from plugin_runner.analyzers import AVAILABLE_ANALYZERS, Analyzer
-from plugin_runner.batch_processing import create_batches, split_into_batches
+from plugin_runner.batch_processing import create_batches, get_batch_costs, split_into_batches
 from plugin_runner.batcher import BatcherArgument, BatcherName
 from plugin_runner.batching_config import ConfigField
 from test.plugin_runner.batch_processing import COMMON_DATASET, DUMMY_CONFIG
@@ -121,6 +121,28 @@ SPLIT_INTO_BATCHES_TEST_DATA = [
         },
         [['project_3', 'project_5'], ['project_6', 'project_2'], ['project_7', 'project_1'], ['project_4']],
     ),
+    (
+        {
+            ConfigField.BATCHER_CONFIG.value: {
+                ConfigField.NAME.value: BatcherName.MULTIDIMENSIONAL_FIRST_FIT_DECREASING.value,
+            },
+            ConfigField.LANGUAGE.value: Language.PYTHON.value,
+            ConfigField.BATCH_CONSTRAINTS.value: {MetricName.FILE_SIZE.value: 10},
+        },
+        [['project_7', 'project_1'], ['project_6', 'project_2'], ['project_3', 'project_5']],
+    ),
+    (
+        {
+            ConfigField.BATCHER_CONFIG.value: {
+                ConfigField.NAME.value: BatcherName.LONGEST_PROCESSING_TIME.value,
+                BatcherArgument.WORKERS.value: 2,
+            },
+            ConfigField.METRIC.value: MetricName.FILE_SIZE.value,
+            ConfigField.LANGUAGE.value: Language.PYTHON.value,
+            ConfigField.BATCH_CONSTRAINTS.value: {MetricName.FILE_SIZE.value: 10},
+        },
+        [['project_7', 'project_1'], ['project_5'], ['project_6', 'project_2'], ['project_3']],
+    ),
 ]
 
 
@@ -152,3 +174,20 @@ def test_create_batches(batches: List[List[str]]):
         ]
 
         assert resolved_actual_batch_paths == expected_batch_paths
+
+
+GET_BATCH_COSTS_TEST_DATA = [
+    ({}, [], []),
+    ({}, [['project_1', 'project_2'], ['project_3']], [2, 1]),
+    (
+        {ConfigField.METRIC.value: MetricName.FILE_SIZE.value, ConfigField.LANGUAGE.value: Language.PYTHON.value},
+        [['project_1', 'project_2'], ['project_4'], ['project_6', 'project_without_metric_file']],
+        [4, 13, 7],
+    ),
+]
+
+
+@pytest.mark.parametrize(('batching_config', 'batches', 'expected_costs'), GET_BATCH_COSTS_TEST_DATA)
+def test_get_batch_costs(batching_config: Dict, batches: List[List[str]], expected_costs: List[float]):
+    batches = [[COMMON_DATASET / project for project in batch] for batch in batches]
+    assert get_batch_costs(batches, batching_config) == expected_costs
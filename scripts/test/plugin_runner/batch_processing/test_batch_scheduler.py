@@ -0,0 +1,118 @@
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List
+
+import pytest
+
+from plugin_runner.batch_scheduler import BatchResult, BatchScheduler, BatchTask
+from plugin_runner.execution_plan import ExecutionPlan
+
+DISPATCH_ORDER_TEST_DATA = [
+    (1, [1, 5, 3, 4], [0, 1, 2, 3]),
+    (2, [1, 5, 3, 4], [1, 3, 2, 0]),
+    (4, [1, 5, 3, 4], [1, 3, 2, 0]),
+    (2, [2, 2, 2], [0, 1, 2]),
+]
+
+
+def _create_tasks(tmpdir: Path, costs: List[float]) -> List[BatchTask]:
+    return [
+        BatchTask(index, tmpdir, tmpdir / f'output_{index}', tmpdir / f'log_{index}.txt', cost)
+        for index, cost in enumerate(costs)
+    ]
+
+
+@pytest.mark.parametrize(('workers', 'costs', 'expected_order'), DISPATCH_ORDER_TEST_DATA)
+def test_dispatch_order(workers: int, costs: List[float], expected_order: List[int]):
+    dispatched = []
+
+    def build_command(task: BatchTask, slot: int) -> List[str]:
+        dispatched.append(task.index)
+        return [sys.executable, '-c', 'pass']
+
+    with TemporaryDirectory() as tmpdir:
+        BatchScheduler(workers, build_command, poll_interval=0.01).run(_create_tasks(Path(tmpdir), costs))
+
+    assert dispatched == expected_order
+
+
+def test_slots_are_not_shared():
+    slots = []
+
+    def build_command(task: BatchTask, slot: int) -> List[str]:
+        slots.append(slot)
+        return [sys.executable, '-c', 'import time; time.sleep(0.2)']
+
+    with TemporaryDirectory() as tmpdir:
+        BatchScheduler(3, build_command, poll_interval=0.01).run(_create_tasks(Path(tmpdir), [1, 1, 1]))
+
+    assert sorted(slots) == [0, 1, 2]
+
+
+def test_results():
+    def build_command(task: BatchTask, slot: int) -> List[str]:
+        return [sys.executable, '-c', f'print("batch {task.index}"); exit({task.index})']
+
+    with TemporaryDirectory() as tmpdir:
+        tasks = _create_tasks(Path(tmpdir), [1, 3, 2])
+        results = BatchScheduler(2, build_command, poll_interval=0.01).run(tasks)
+
+        assert [(result.index, result.exit_code) for result in results] == [(0, 0), (1, 1), (2, 2)]
+        assert all(isinstance(result, BatchResult) and result.duration >= 0 for result in results)
+        assert [task.log_path.read_text().strip() for task in tasks] == ['batch 0', 'batch 1', 'batch 2']
+
+
+def test_execution_plan():
+    dispatched = []
+
+    def build_command(task: BatchTask, slot: int) -> List[str]:
+        dispatched.append((slot, task.index))
+        return [sys.executable, '-c', 'pass']
+
+    # Batch 2 has already been processed, so it is not passed to the scheduler
+    plan = ExecutionPlan([[3, 1], [0, 2, 4]], [1, 1, 1, 1, 1])
+
+    with TemporaryDirectory() as tmpdir:
+        tasks = [task for task in _create_tasks(Path(tmpdir), [1, 1, 1, 1, 1]) if task.index != 2]
+        results = BatchScheduler(2, build_command, poll_interval=0.01).run(tasks, plan)
+
+    assert [result.index for result in results] == [0, 1, 3, 4]
+    assert [index for slot, index in dispatched if slot == 0] == [3, 1]
+    assert [index for slot, index in dispatched if slot == 1] == [0, 4]
+
+
+INCORRECT_EXECUTION_PLAN_TEST_DATA = [
+    # Fewer queues than workers
+    ExecutionPlan([[0, 1, 2]], [1, 1, 1]),
+    # Batch 2 is not planned
+    ExecutionPlan([[0], [1]], [1, 1]),
+]
+
+
+@pytest.mark.parametrize('plan', INCORRECT_EXECUTION_PLAN_TEST_DATA)
+def test_incorrect_execution_plan(plan: ExecutionPlan):
+    with TemporaryDirectory() as tmpdir:
+        tasks = _create_tasks(Path(tmpdir), [1, 1, 1])
+        with pytest.raises(ValueError):
+            BatchScheduler(2, lambda task, slot: [], poll_interval=0.01).run(tasks, plan)
+
+
+def test_incorrect_number_of_workers():
+    with pytest.raises(ValueError):
+        BatchScheduler(0, lambda task, slot: [])
+
+
+def test_memory_limit():
+    def build_command(task: BatchTask, slot: int) -> List[str]:
+        return [sys.executable, '-c', 'import time; print(time.time()); time.sleep(0.3); print(time.time())']
+
+    with TemporaryDirectory() as tmpdir:
+        tasks = _create_tasks(Path(tmpdir), [1, 1, 1])
+        # Every batch exceeds the limit, so the batches are requeued until they are processed one by one
+        results = BatchScheduler(3, build_command, poll_interval=0.01, memory_limit=1).run(tasks)
+
+        intervals = sorted(tuple(map(float, task.log_path.read_text().split())) for task in tasks)
+
+    assert all(result.exit_code == 0 and result.peak_rss > 0 for result in results)
+    assert all(end <= next_start for (_, end), (next_start, _) in zip(intervals, intervals[1:]))
@@ -1,11 +1,15 @@
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from typing import Dict, List, Type
 
 import pytest
 
 from plugin_runner.batcher import (
     BatcherArgument,
+    CostModelBatcher,
     DummyBatcher,
+    LongestProcessingTimeBatcher,
+    MultiDimensionalFirstFitDecreasingBatcher,
     OneDimensionalAnyFitBatcher,
     OneDimensionalBestFitDecreasingBatcher,
     OneDimensionalFirstFitDecreasingBatcher,
@@ -13,7 +17,10 @@ from plugin_runner.batcher import (
     OneDimensionalWorstFitDecreasingBatcher,
 )
 from plugin_runner.batching_config import ConfigField
+from plugin_runner.cost_model import CostModel
+from plugin_runner.execution_plan import ExecutionPlan, SchedulingAlgorithm
 from benchmark.metrics_collection.metrics import MetricName
+from utils.process_tree_utils import KB_IN_GB
 
 
 COMMON_PROJECTS = {
@@ -284,3 +291,298 @@ def test_dummy_batcher(
     expected_batches: List[List[str]],
 ) -> None:
     assert DummyBatcher.split_into_batches(projects, {}, **kwargs) == expected_batches
+
+
+MULTIDIMENSIONAL_FIRST_FIT_DECREASING_BATCHER_TEST_DATA = [
+    ({}, SEVERAL_BATCH_CONSTRAINTS, EMPTY_KWARGS, []),
+    (
+        COMMON_PROJECTS,
+        SINGLE_BATCH_CONSTRAINTS,
+        EMPTY_KWARGS,
+        [
+            [Path('project0'), Path('project6')],
+            [Path('project3')],
+            [Path('project4'), Path('project5')],
+            [Path('project2')],
+            [Path('project1')],
+        ],
+    ),
+    (
+        COMMON_PROJECTS,
+        {MetricName.NUMBER_OF_FILES.value: 10, MetricName.FILE_SIZE.value: 10},
+        EMPTY_KWARGS,
+        [
+            [Path('project0'), Path('project6')],
+            [Path('project3')],
+            [Path('project5')],
+            [Path('project1')],
+            [Path('project4')],
+            [Path('project2')],
+        ],
+    ),
+    (
+        COMMON_PROJECTS,
+        {MetricName.NUMBER_OF_FILES.value: 10, MetricName.FILE_SIZE.value: 8},
+        {ConfigField.IGNORE_OVERSIZED_PROJECTS.value: False},
+        [
+            [Path('project1')],
+            [Path('project0'), Path('project6')],
+            [Path('project4')],
+            [Path('project2')],
+            [Path('project3')],
+            [Path('project5')],
+            [Path('oversized_project')],
+        ],
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    ('projects', 'batch_constraints', 'kwargs', 'expected_batches'),
+    MULTIDIMENSIONAL_FIRST_FIT_DECREASING_BATCHER_TEST_DATA,
+)
+def test_multidimensional_first_fit_decreasing_batcher(
+    projects: Dict[Path, Dict[str, int]],
+    batch_constraints: Dict[str, int],
+    kwargs: Dict,
+    expected_batches: List[List[str]],
+) -> None:
+    actual_batches = MultiDimensionalFirstFitDecreasingBatcher.split_into_batches(
+        projects,
+        batch_constraints,
+        **kwargs,
+    )
+
+    assert actual_batches == expected_batches
+
+
+def test_multidimensional_first_fit_decreasing_batcher_without_batch_constraints() -> None:
+    with pytest.raises(ValueError):
+        MultiDimensionalFirstFitDecreasingBatcher.split_into_batches(COMMON_PROJECTS, EMPTY_BATCH_CONSTRAINTS)
+
+
+# The IDE startup takes 10 seconds, each file takes 1 second, and each unit of the file size takes 0.1 GB
+COST_MODEL = CostModel(
+    features=[MetricName.NUMBER_OF_FILES.value, MetricName.FILE_SIZE.value],
+    time_intercept=10,
+    time_coefficients=[1, 0],
+    rss_intercept=0,
+    rss_coefficients=[0, KB_IN_GB / 10],
+)
+
+COST_MODEL_BATCHER_TEST_DATA = [
+    ({}, {BatcherArgument.TARGET_TIME.value: 20}, []),
+    (
+        COMMON_PROJECTS,
+        {BatcherArgument.TARGET_TIME.value: 20},
+        [
+            [Path('project0'), Path('project6'), Path('project_without_number_of_files')],
+            [Path('project3')],
+            [Path('project4'), Path('project5')],
+            [Path('project2')],
+            [Path('project1')],
+        ],
+    ),
+    (
+        COMMON_PROJECTS,
+        {BatcherArgument.TARGET_TIME.value: 20, BatcherArgument.MEMORY_LIMIT.value: 1},
+        [
+            [Path('project0'), Path('project6')],
+            [Path('project3')],
+            [Path('project5')],
+            [Path('project1')],
+            [Path('project4'), Path('project_without_number_of_files')],
+            [Path('project2')],
+        ],
+    ),
+    (
+        COMMON_PROJECTS,
+        {
+            BatcherArgument.TARGET_TIME.value: 20,
+            BatcherArgument.MEMORY_LIMIT.value: 1,
+            ConfigField.IGNORE_OVERSIZED_PROJECTS.value: False,
+        },
+        [
+            [Path('project0'), Path('project6')],
+            [Path('project3')],
+            [Path('project5')],
+            [Path('project1')],
+            [Path('project4'), Path('project_without_number_of_files')],
+            [Path('project2')],
+            [Path('oversized_project')],
+        ],
+    ),
+]
+
+
+@pytest.mark.parametrize(('projects', 'kwargs', 'expected_batches'), COST_MODEL_BATCHER_TEST_DATA)
+def test_cost_model_batcher(
+    projects: Dict[Path, Dict[str, int]],
+    kwargs: Dict,
+    expected_batches: List[List[str]],
+) -> None:
+    with TemporaryDirectory() as tmpdir:
+        model_path = Path(tmpdir) / 'cost_model.yaml'
+        COST_MODEL.save(model_path)
+
+        batches = CostModelBatcher.split_into_batches(
+            projects,
+            {},
+            **{BatcherArgument.COST_MODEL.value: str(model_path)},
+            **kwargs,
+        )
+
+    assert batches == expected_batches
+
+
+COST_MODEL_BATCHER_INVALID_ARGUMENTS_TEST_DATA = [
+    # No limits
+    {},
+    # The IDE startup time exceeds the target time
+    {BatcherArgument.TARGET_TIME.value: 5},
+]
+
+
+@pytest.mark.parametrize('kwargs', COST_MODEL_BATCHER_INVALID_ARGUMENTS_TEST_DATA)
+def test_cost_model_batcher_invalid_arguments(kwargs: Dict) -> None:
+    with TemporaryDirectory() as tmpdir:
+        model_path = Path(tmpdir) / 'cost_model.yaml'
+        COST_MODEL.save(model_path)
+
+        with pytest.raises(ValueError):
+            CostModelBatcher.split_into_batches(
+                COMMON_PROJECTS,
+                {},
+                **{BatcherArgument.COST_MODEL.value: str(model_path)},
+                **kwargs,
+            )
+
+
+def test_cost_model_batcher_without_cost_model() -> None:
+    with pytest.raises(ValueError):
+        CostModelBatcher.split_into_batches(COMMON_PROJECTS, {}, **{BatcherArgument.TARGET_TIME.value: 20})
+
+
+LONGEST_PROCESSING_TIME_BATCHER_TEST_DATA = [
+    # Empty project list
+    ({}, True, {BatcherArgument.WORKERS.value: 2}, [], ExecutionPlan([[], []], [])),
+    # Non-empty project list
+    (
+        COMMON_PROJECTS,
+        True,
+        {BatcherArgument.WORKERS.value: 1},
+        [
+            [Path('project4'), Path('project5')],
+            [Path('project0'), Path('project6')],
+            [Path('project3')],
+            [Path('project2')],
+            [Path('project1')],
+        ],
+        ExecutionPlan([[0, 1, 2, 3, 4]], [10, 10, 8, 6, 5]),
+    ),
+    (
+        COMMON_PROJECTS,
+        True,
+        {BatcherArgument.WORKERS.value: 2},
+        [
+            [Path('project0')],
+            [Path('project2')],
+            [Path('project1')],
+            [Path('project4'), Path('project5')],
+            [Path('project3'), Path('project6')],
+        ],
+        ExecutionPlan([[0, 1, 2], [3, 4]], [9, 6, 5, 10, 9]),
+    ),
+    (
+        COMMON_PROJECTS,
+        True,
+        {
+            BatcherArgument.WORKERS.value: 2,
+            BatcherArgument.SCHEDULING_ALGORITHM.value: SchedulingAlgorithm.KARMARKAR_KARP.value,
+        },
+        [
+            [Path('project3')],
+            [Path('project4')],
+            [Path('project1')],
+            [Path('project0'), Path('project6')],
+            [Path('project2'), Path('project5')],
+        ],
+        ExecutionPlan([[0, 1, 2], [3, 4]], [8, 7, 5, 10, 9]),
+    ),
+    (
+        COMMON_PROJECTS,
+        True,
+        {BatcherArgument.WORKERS.value: 3},
+        [
+            [Path('project0'), Path('project6')],
+            [Path('project5')],
+            [Path('project3')],
+            [Path('project1')],
+            [Path('project4')],
+            [Path('project2')],
+        ],
+        ExecutionPlan([[0, 1], [2, 3], [4, 5]], [10, 3, 8, 5, 7, 6]),
+    ),
+    # The oversized project takes a whole worker
+    (
+        COMMON_PROJECTS,
+        False,
+        {BatcherArgument.WORKERS.value: 3},
+        [
+            [Path('oversized_project')],
+            [Path('project0')],
+            [Path('project2')],
+            [Path('project1')],
+            [Path('project4'), Path('project5')],
+            [Path('project3'), Path('project6')],
+        ],
+        ExecutionPlan([[0], [1, 2, 3], [4, 5]], [20, 9, 6, 5, 10, 9]),
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    ('projects', 'ignore_oversized_projects', 'kwargs', 'expected_batches', 'expected_plan'),
+    LONGEST_PROCESSING_TIME_BATCHER_TEST_DATA,
+)
+def test_longest_processing_time_batcher(
+    projects: Dict[Path, Dict[str, int]],
+    ignore_oversized_projects: bool,
+    kwargs: Dict,
+    expected_batches: List[List[Path]],
+    expected_plan: ExecutionPlan,
+) -> None:
+    batches, plan = LongestProcessingTimeBatcher.plan(
+        projects,
+        SINGLE_BATCH_CONSTRAINTS,
+        ignore_oversized_projects,
+        **kwargs,
+    )
+
+    assert batches == expected_batches
+    assert plan == expected_plan
+    assert LongestProcessingTimeBatcher.split_into_batches(
+        projects,
+        SINGLE_BATCH_CONSTRAINTS,
+        ignore_oversized_projects,
+        **kwargs,
+    ) == expected_batches
+
+
+LONGEST_PROCESSING_TIME_BATCHER_INVALID_ARGUMENTS_TEST_DATA = [
+    (SINGLE_BATCH_CONSTRAINTS, {}),
+    (SINGLE_BATCH_CONSTRAINTS, {BatcherArgument.WORKERS.value: 0}),
+    (EMPTY_BATCH_CONSTRAINTS, {BatcherArgument.WORKERS.value: 2}),
+    (SEVERAL_BATCH_CONSTRAINTS, {BatcherArgument.WORKERS.value: 2}),
+]
+
+
+@pytest.mark.parametrize(('batch_constraints', 'kwargs'), LONGEST_PROCESSING_TIME_BATCHER_INVALID_ARGUMENTS_TEST_DATA)
+def test_longest_processing_time_batcher_invalid_arguments(batch_constraints: Dict[str, int], kwargs: Dict) -> None:
+    with pytest.raises(ValueError):
+        LongestProcessingTimeBatcher.plan(COMMON_PROJECTS, batch_constraints, **kwargs)
+
+
+def test_batchers_without_plan() -> None:
+    _, plan = DummyBatcher.plan(COMMON_PROJECTS, EMPTY_BATCH_CONSTRAINTS)
+    assert plan is None
@@ -0,0 +1,93 @@
+from typing import List
+
+import numpy as np
+import pytest
+from binpackp.bins import NumberBin
+from binpackp.fit import BinReduction, Fit
+
+from plugin_runner.bin_packing import FitStrategy, pack
+
+PACK_TEST_DATA = [
+    ([], 10, FitStrategy.FIRST_FIT, 1, [[]]),
+    # Full bins are closed first, then the open bins follow in the order in which the strategy considers them
+    ([9, 5, 6, 8, 7, 3, 1], 10, FitStrategy.FIRST_FIT, 1, [[4, 5], [0, 6], [3], [2], [1]]),
+    ([9, 5, 6, 8, 7, 3, 1], 10, FitStrategy.BEST_FIT, 1, [[4, 5], [0, 6], [3], [2], [1]]),
+    ([9, 5, 6, 8, 7, 3, 1], 10, FitStrategy.WORST_FIT, 1, [[2, 6], [4], [1, 5], [3], [0]]),
+    ([9, 5, 6, 8, 7, 3, 1], 10, FitStrategy.NEXT_FIT, 1, [[0], [3], [4], [2], [1, 5, 6]]),
+    ([9, 5, 6, 8, 7, 3, 1], 10, FitStrategy.NEXT_FIT, 3, [[0], [3], [4, 5], [2, 6], [1]]),
+    # Items of the bin size are put in separate bins, and the initial bin stays empty
+    ([10, 10], 10, FitStrategy.FIRST_FIT, 1, [[0], [1], []]),
+    # Items of the same size keep their order
+    ([2, 2, 2, 2], 4, FitStrategy.BEST_FIT, 1, [[0, 1], [2, 3]]),
+]
+
+
+@pytest.mark.parametrize(('sizes', 'capacity', 'strategy', 'max_open_bins', 'expected_bins'), PACK_TEST_DATA)
+def test_pack(
+    sizes: List[int],
+    capacity: int,
+    strategy: FitStrategy,
+    max_open_bins: int,
+    expected_bins: List[List[int]],
+) -> None:
+    assert pack(sizes, capacity, strategy, max_open_bins=max_open_bins) == expected_bins
+
+
+PACK_INVALID_ARGUMENTS_TEST_DATA = [
+    ([1, 2], 0),
+    ([1, -2], 10),
+    ([1, 11], 10),
+]
+
+
+@pytest.mark.parametrize(('sizes', 'capacity'), PACK_INVALID_ARGUMENTS_TEST_DATA)
+def test_pack_invalid_arguments(sizes: List[int], capacity: int) -> None:
+    with pytest.raises(ValueError):
+        pack(sizes, capacity, FitStrategy.FIRST_FIT)
+
+
+class IndexedNumberBin(NumberBin):
+    @classmethod
+    def size(cls, item):
+        _, value = item
+        return super().size(value)
+
+
+def _pack_with_binpackp(sizes: List[int], capacity: int, strategy: FitStrategy, max_open_bins: int) -> List[List[int]]:
+    items = list(enumerate(sizes))
+
+    if strategy == FitStrategy.FIRST_FIT:
+        result = Fit.ffd(IndexedNumberBin, capacity, items)
+    elif strategy == FitStrategy.BEST_FIT:
+        result = Fit.bfd(IndexedNumberBin, capacity, items)
+    elif strategy == FitStrategy.WORST_FIT:
+        result = Fit.wfd(IndexedNumberBin, capacity, items)
+    else:
+        result = Fit.fit(
+            IndexedNumberBin,
+            capacity,
+            items,
+            sort=True,
+            max_open_bins=max_open_bins,
+            bin_reduction=BinReduction.first,
+        )
+
+    return [[index for index, _ in result_bin] for result_bin in result.bins]
+
+
+@pytest.mark.parametrize('strategy', list(FitStrategy))
+@pytest.mark.parametrize('seed', range(5))
+def test_pack_is_identical_to_binpackp(strategy: FitStrategy, seed: int) -> None:
+    generator = np.random.default_rng(seed)
+
+    for _ in range(200):
+        capacity = int(generator.choice([5, 10, 100]))
+        # Small items, items of the bin size, and items of zero size are mixed to cover all the corner cases
+        sizes = [
+            int(generator.choice([0, capacity, generator.integers(capacity + 1), generator.integers(capacity // 3)]))
+            for _ in range(generator.integers(50))
+        ]
+        max_open_bins = int(generator.choice([0, 1, 2, 5]))
+
+        expected_bins = _pack_with_binpackp(sizes, capacity, strategy, max_open_bins)
+        assert pack(sizes, capacity, strategy, max_open_bins=max_open_bins) == expected_bins
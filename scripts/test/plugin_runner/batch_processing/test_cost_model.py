@@ -0,0 +1,74 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+import pytest
+
+from benchmark.metrics_collection.metrics import MetricName
+from plugin_runner.cost_model import CostModel, fit_cost_model
+from utils.language import Language
+
+FEATURES = [MetricName.NUMBER_OF_FILES.value, MetricName.NUMBER_OF_LINES.value]
+
+BATCH_METRICS = pd.DataFrame(
+    {
+        MetricName.NUMBER_OF_FILES.value: [10, 20, 5, 40, 25],
+        MetricName.NUMBER_OF_LINES.value: [1000, 500, 3000, 2000, 100],
+    },
+)
+
+
+def test_fit_cost_model():
+    files = BATCH_METRICS[MetricName.NUMBER_OF_FILES.value]
+    lines = BATCH_METRICS[MetricName.NUMBER_OF_LINES.value]
+
+    batch_time = 60 + 2 * files + 0.5 * lines
+    batch_rss = 1000 + 10 * lines
+
+    model = fit_cost_model(BATCH_METRICS, batch_time, batch_rss, FEATURES, Language.KOTLIN)
+
+    assert model.features == FEATURES
+    assert model.language == Language.KOTLIN.value
+    assert model.time_intercept == pytest.approx(60)
+    assert model.time_coefficients == pytest.approx([2, 0.5])
+    assert model.rss_intercept == pytest.approx(1000)
+    assert model.rss_coefficients == pytest.approx([0, 10], abs=1e-6)
+
+
+def test_fit_cost_model_non_negative():
+    # The number of files makes batches cheaper, so it must be excluded from the model
+    files = BATCH_METRICS[MetricName.NUMBER_OF_FILES.value]
+    lines = BATCH_METRICS[MetricName.NUMBER_OF_LINES.value]
+
+    batch_time = 100 - 2 * files + lines
+
+    model = fit_cost_model(BATCH_METRICS, batch_time, batch_time, FEATURES)
+
+    assert model.time_coefficients[0] == 0
+    assert model.time_coefficients[1] > 0
+
+
+def test_fit_cost_model_without_common_batches():
+    with pytest.raises(ValueError):
+        fit_cost_model(BATCH_METRICS, pd.Series([1], index=[10]), pd.Series([1], index=[10]), FEATURES)
+
+
+def test_predict():
+    model = CostModel(FEATURES, 10, [1, 0.5], 100, [0, 2])
+    projects = [
+        {MetricName.NUMBER_OF_FILES.value: 2, MetricName.NUMBER_OF_LINES.value: 10},
+        {MetricName.NUMBER_OF_FILES.value: 4},
+    ]
+
+    assert model.predict_time(projects) == 10 + 2 + 5 + 4
+    assert model.predict_rss(projects) == 100 + 20
+
+
+def test_save_and_load():
+    model = CostModel(FEATURES, 10.5, [1.5, 0.25], 100, [0, 2], Language.PYTHON.value)
+
+    with TemporaryDirectory() as tmpdir:
+        model_path = Path(tmpdir) / 'cost_model.yaml'
+        model.save(model_path)
+
+        assert CostModel.load(model_path) == model
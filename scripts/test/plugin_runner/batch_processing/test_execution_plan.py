@@ -0,0 +1,60 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List
+
+import pytest
+
+from plugin_runner.execution_plan import EXECUTION_PLAN_FILE, ExecutionPlan, SchedulingAlgorithm
+
+PARTITION_TEST_DATA = [
+    (SchedulingAlgorithm.LONGEST_PROCESSING_TIME, [], 2, [[], []]),
+    (SchedulingAlgorithm.KARMARKAR_KARP, [], 2, [[], []]),
+    (SchedulingAlgorithm.LONGEST_PROCESSING_TIME, [5], 3, [[0], [], []]),
+    (SchedulingAlgorithm.KARMARKAR_KARP, [5], 3, [[0], [], []]),
+    (SchedulingAlgorithm.LONGEST_PROCESSING_TIME, [3, 1, 2], 1, [[0, 2, 1]]),
+    (SchedulingAlgorithm.KARMARKAR_KARP, [3, 1, 2], 1, [[0, 2, 1]]),
+    # LPT gives the makespan of 17, while Karmarkar–Karp gives 16
+    (SchedulingAlgorithm.LONGEST_PROCESSING_TIME, [8, 7, 6, 5, 4], 2, [[0, 3, 4], [1, 2]]),
+    (SchedulingAlgorithm.KARMARKAR_KARP, [8, 7, 6, 5, 4], 2, [[1, 3, 4], [0, 2]]),
+    (SchedulingAlgorithm.LONGEST_PROCESSING_TIME, [9, 8, 7, 6, 5, 3, 1], 3, [[0, 5, 6], [1, 4], [2, 3]]),
+]
+
+
+@pytest.mark.parametrize(('algorithm', 'costs', 'workers', 'expected_queues'), PARTITION_TEST_DATA)
+def test_partition(
+    algorithm: SchedulingAlgorithm,
+    costs: List[float],
+    workers: int,
+    expected_queues: List[List[int]],
+) -> None:
+    assert algorithm.partition(costs, workers) == expected_queues
+
+
+@pytest.mark.parametrize('algorithm', list(SchedulingAlgorithm))
+def test_partition_contains_all_items(algorithm: SchedulingAlgorithm) -> None:
+    costs = [13, 2, 7, 7, 1, 20, 5, 9, 3, 3, 11]
+    queues = algorithm.partition(costs, 4)
+
+    assert len(queues) == 4
+    assert sorted(index for queue in queues for index in queue) == list(range(len(costs)))
+
+    # Each queue is in descending order of the costs
+    for queue in queues:
+        assert [costs[index] for index in queue] == sorted((costs[index] for index in queue), reverse=True)
+
+
+def test_makespan() -> None:
+    plan = ExecutionPlan([[0, 2], [1], []], [5, 6, 2.5])
+
+    assert plan.get_worker_costs() == [7.5, 6, 0]
+    assert plan.get_makespan() == 7.5
+
+
+def test_save_and_load() -> None:
+    plan = ExecutionPlan([[1, 0], [2]], [3, 4.5, 7])
+
+    with TemporaryDirectory() as tmpdir:
+        plan_path = Path(tmpdir) / EXECUTION_PLAN_FILE
+        plan.save(plan_path)
+
+        assert ExecutionPlan.load(plan_path) == plan
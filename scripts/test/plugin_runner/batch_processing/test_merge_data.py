@@ -0,0 +1,304 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List, Optional, Set
+
+import pandas as pd
+
+from plugin_runner.analyzers import CATEGORY, INTEGER
+from plugin_runner.merge_data import (
+    METHOD_INDEX,
+    OutputFormat,
+    PROJECT_INDEX,
+    get_index_offsets,
+    get_merged_file_names,
+    merge,
+    merge_clones,
+    merge_csv,
+    merge_csv_to_parquet,
+    remove_projects_from_csv,
+    update_merged_data,
+)
+from utils.df_utils import read_dataframe
+
+import pytest
+
+CSV_FILENAME = 'data.csv'
+CLONES_FILENAME = 'method_data.txt'
+IMPORTS_FILENAME = 'import_statements_data.csv'
+
+MERGE_CSV_TEST_DATA = [
+    (
+        ['a\tb\n1\tx\n2\ty\n', 'a\tb\n3\tz\n'],
+        'a\tb\n1\tx\n2\ty\n3\tz\n',
+    ),
+    # The last line of a file has no line ending
+    (
+        ['a\tb\n1\tx', 'a\tb\n2\ty\n'],
+        'a\tb\n1\tx\n2\ty\n',
+    ),
+    # Empty files are skipped
+    (
+        ['', 'a\tb\n1\tx\n', 'a\tb\n'],
+        'a\tb\n1\tx\n',
+    ),
+    # The columns are aligned
+    (
+        ['a\tb\n1\tx\n', 'b\tc\ny\t2\n', 'b\ta\nz\t3\n'],
+        'a\tb\tc\n1\tx\t\n\ty\t2\n3\tz\t\n',
+    ),
+    ([], ''),
+]
+
+
+@pytest.mark.parametrize(('batch_contents', 'expected_content'), MERGE_CSV_TEST_DATA)
+def test_merge_csv(batch_contents: List[str], expected_content: str):
+    with TemporaryDirectory() as tmpdir:
+        batch_output_paths = []
+        for index, content in enumerate(batch_contents):
+            batch_output_path = Path(tmpdir) / f'batch_{index}'
+            batch_output_path.mkdir()
+            (batch_output_path / CSV_FILENAME).write_text(content)
+            batch_output_paths.append(str(batch_output_path))
+
+        result_dir = Path(tmpdir) / 'result'
+        result_dir.mkdir()
+        merge_csv(batch_output_paths, CSV_FILENAME, str(result_dir), chunk_size=1)
+
+        assert (result_dir / CSV_FILENAME).read_text() == expected_content
+
+
+def test_merge_csv_is_the_same_as_concat():
+    with TemporaryDirectory() as tmpdir:
+        batch_dfs = [
+            pd.DataFrame({'project': ['p1', 'p1'], 'value': ['x', 'y, z']}),
+            pd.DataFrame({'project': ['p2'], 'value': ['"quoted"']}),
+        ]
+
+        batch_output_paths = []
+        for index, batch_df in enumerate(batch_dfs):
+            batch_output_path = Path(tmpdir) / f'batch_{index}'
+            batch_output_path.mkdir()
+            batch_df.to_csv(batch_output_path / CSV_FILENAME, index=False, sep='\t')
+            batch_output_paths.append(str(batch_output_path))
+
+        merge_csv(batch_output_paths, CSV_FILENAME, tmpdir)
+
+        merged_df = pd.read_csv(Path(tmpdir) / CSV_FILENAME, sep='\t')
+        pd.testing.assert_frame_equal(merged_df, pd.concat(batch_dfs, ignore_index=True))
+
+
+CLONES_BATCH_DATA = [
+    {
+        PROJECT_INDEX: '0\tproject_a\n1\tproject_b\n',
+        METHOD_INDEX: '0\t0\tfoo\n0\t1\tbar\n1\t2\tbaz\n',
+        CLONES_FILENAME: '0,0,fun foo(a, b)\n0,1,fun bar()\n1,2,fun baz()',
+    },
+    {
+        PROJECT_INDEX: '0\tproject_c\n',
+        METHOD_INDEX: '0\t0\tqux\n0\t1\tquux\n',
+        CLONES_FILENAME: '0,0,fun qux()\n0,1,fun quux(a, b, c)\n',
+    },
+    {
+        PROJECT_INDEX: '0\tproject_d\n',
+        METHOD_INDEX: '0\t0\tcorge\n',
+        CLONES_FILENAME: '0,0,fun corge()\n',
+    },
+]
+
+EXPECTED_CLONES_DATA = {
+    PROJECT_INDEX: '0\tproject_a\n1\tproject_b\n2\tproject_c\n3\tproject_d\n',
+    METHOD_INDEX: '0\t0\tfoo\n0\t1\tbar\n1\t2\tbaz\n2\t3\tqux\n2\t4\tquux\n3\t5\tcorge\n',
+    CLONES_FILENAME: '0,0,fun foo(a, b)\n0,1,fun bar()\n1,2,fun baz()\n2,3,fun qux()\n2,4,fun quux(a, b, c)\n'
+                     '3,5,fun corge()\n',
+}
+
+
+@pytest.mark.parametrize('n_cpu', [1, 2])
+def test_merge_clones(n_cpu: int):
+    with TemporaryDirectory() as tmpdir:
+        batch_output_paths = []
+        for index, batch_data in enumerate(CLONES_BATCH_DATA):
+            batch_output_path = Path(tmpdir) / f'batch_{index}'
+            batch_output_path.mkdir()
+            for file_name, content in batch_data.items():
+                (batch_output_path / file_name).write_text(content)
+            batch_output_paths.append(str(batch_output_path))
+
+        assert get_index_offsets(batch_output_paths) == [(0, 0), (2, 3), (3, 5)]
+
+        result_dir = Path(tmpdir) / 'result'
+        result_dir.mkdir()
+        merge_clones(batch_output_paths, str(result_dir), CLONES_FILENAME, n_cpu)
+
+        assert {file.name: file.read_text() for file in result_dir.iterdir()} == EXPECTED_CLONES_DATA
+
+
+REMOVE_PROJECTS_FROM_CSV_TEST_DATA = [
+    (
+        'project,value\np1,a\np2,b\np1,"c, d"\np3,e\n',
+        {'p1'},
+        ',',
+        'project,value\np2,b\np3,e\n',
+    ),
+    # The project column is not the first one
+    (
+        'value\tproject\na\tp1\nb\tp2\nc\tp3',
+        {'p2', 'p3'},
+        '\t',
+        'value\tproject\na\tp1\n',
+    ),
+    # The prefixes of the project names are kept
+    (
+        'project,value\np1,a\np10,b\n',
+        {'p1'},
+        ',',
+        'project,value\np10,b\n',
+    ),
+    ('project,value\np1,a\n', set(), ',', 'project,value\np1,a\n'),
+    ('', {'p1'}, ',', ''),
+]
+
+
+@pytest.mark.parametrize(('content', 'projects', 'sep', 'expected_content'), REMOVE_PROJECTS_FROM_CSV_TEST_DATA)
+def test_remove_projects_from_csv(content: str, projects: Set[str], sep: str, expected_content: str):
+    with TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir) / CSV_FILENAME
+        file_path.write_text(content)
+
+        result_path = Path(tmpdir) / 'result.csv'
+        remove_projects_from_csv(str(file_path), str(result_path), 'project', projects, sep, buffer_size=1)
+
+        assert result_path.read_text() == expected_content
+
+
+UPDATE_MERGED_DATA_TEST_DATA = [
+    (
+        'project_name,import\np1,os\np2,sys\np3,re\n',
+        ['project_name,import\np1,json\n', 'project_name,import\np3,re\np3,typing\n'],
+        {'p1', 'p3'},
+        'project_name,import\np2,sys\np1,json\np3,re\np3,typing\n',
+    ),
+    # The data of a project without the results is removed
+    (
+        'project_name,import\np1,os\np2,sys\n',
+        ['project_name,import\n'],
+        {'p1'},
+        'project_name,import\np2,sys\n',
+    ),
+    # The data is merged if there is no merged data yet
+    (
+        None,
+        ['project_name,import\np1,json\n'],
+        {'p1'},
+        'project_name,import\np1,json\n',
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    ('merged_content', 'batch_contents', 'projects', 'expected_content'),
+    UPDATE_MERGED_DATA_TEST_DATA,
+)
+def test_update_merged_data(
+    merged_content: Optional[str],
+    batch_contents: List[str],
+    projects: Set[str],
+    expected_content: str,
+):
+    with TemporaryDirectory() as tmpdir:
+        merged_path = Path(tmpdir) / IMPORTS_FILENAME
+        if merged_content is not None:
+            merged_path.write_text(merged_content)
+
+        batch_output_paths = []
+        for index, content in enumerate(batch_contents):
+            batch_output_path = Path(tmpdir) / 'output' / f'batch_{index}'
+            batch_output_path.mkdir(parents=True)
+            (batch_output_path / IMPORTS_FILENAME).write_text(content)
+            batch_output_paths.append(str(batch_output_path))
+
+        update_merged_data(batch_output_paths, tmpdir, 'python-imports', projects)
+
+        assert merged_path.read_text() == expected_content
+        assert sorted(file.name for file in Path(tmpdir).iterdir()) == sorted([IMPORTS_FILENAME, 'output'])
+
+
+GET_MERGED_FILE_NAMES_TEST_DATA = [
+    ('python-imports', OutputFormat.CSV, ['import_statements_data.csv']),
+    ('python-imports', OutputFormat.PARQUET, ['import_statements_data.parquet']),
+    ('kotlin-clones', OutputFormat.CSV, [PROJECT_INDEX, METHOD_INDEX, 'method_data.txt']),
+    ('kotlin-clones', OutputFormat.PARQUET, [PROJECT_INDEX, METHOD_INDEX, 'method_data.txt']),
+    ('kotlin-gradle-properties', OutputFormat.PARQUET, ['gradle_properties_data.csv']),
+]
+
+
+@pytest.mark.parametrize(('analyzer_name', 'output_format', 'expected_names'), GET_MERGED_FILE_NAMES_TEST_DATA)
+def test_get_merged_file_names(analyzer_name: str, output_format: OutputFormat, expected_names: List[str]):
+    assert get_merged_file_names(analyzer_name, output_format) == expected_names
+
+
+def test_merge_unparseable_data_to_parquet():
+    with TemporaryDirectory() as tmpdir:
+        content = 'project_name,property_key,property_value\np1,org.gradle.jvmargs,-Xmx2g,-XX:+UseG1GC\n'
+
+        batch_output_path = Path(tmpdir) / 'batch_0'
+        batch_output_path.mkdir()
+        (batch_output_path / 'gradle_properties_data.csv').write_text(content)
+
+        merge([str(batch_output_path)], tmpdir, 'kotlin-gradle-properties', output_format=OutputFormat.PARQUET)
+
+        assert (Path(tmpdir) / 'gradle_properties_data.csv').read_text() == content
+        assert not (Path(tmpdir) / 'gradle_properties_data.parquet').exists()
+
+
+def test_merge_csv_to_parquet():
+    with TemporaryDirectory() as tmpdir:
+        batch_contents = ['project,name,count\np1,NA,1\np1,b,\n', 'project,name\np2,a\n']
+
+        batch_output_paths = []
+        for index, content in enumerate(batch_contents):
+            batch_output_path = Path(tmpdir) / f'batch_{index}'
+            batch_output_path.mkdir()
+            (batch_output_path / CSV_FILENAME).write_text(content)
+            batch_output_paths.append(str(batch_output_path))
+
+        schema = {'project': CATEGORY, 'count': INTEGER}
+        merge_csv_to_parquet(batch_output_paths, CSV_FILENAME, tmpdir, chunk_size=1, schema=schema, sep=',')
+
+        merged_df = pd.read_parquet(Path(tmpdir) / 'data.parquet')
+        assert merged_df['project'].dtype == CATEGORY
+        assert merged_df['count'].dtype == INTEGER
+        assert merged_df['project'].tolist() == ['p1', 'p1', 'p2']
+        assert merged_df['name'].tolist() == ['NA', 'b', 'a']
+        assert merged_df['count'].tolist() == [1, pd.NA, pd.NA]
+
+
+def test_update_merged_parquet_data():
+    with TemporaryDirectory() as tmpdir:
+        batch_contents = [
+            ['project_name,import\np1,os\np2,sys\n', 'project_name,import\np3,re\n'],
+            ['project_name,import\np1,json\n', 'project_name,import\n'],
+        ]
+
+        batch_output_paths = []
+        for run_index, run_contents in enumerate(batch_contents):
+            run_output_paths = []
+            for index, content in enumerate(run_contents):
+                batch_output_path = Path(tmpdir) / 'output' / f'run_{run_index}' / f'batch_{index}'
+                batch_output_path.mkdir(parents=True)
+                (batch_output_path / IMPORTS_FILENAME).write_text(content)
+                run_output_paths.append(str(batch_output_path))
+            batch_output_paths.append(run_output_paths)
+
+        merge(batch_output_paths[0], tmpdir, 'python-imports', output_format=OutputFormat.PARQUET)
+        update_merged_data(
+            batch_output_paths[1],
+            tmpdir,
+            'python-imports',
+            {'p1', 'p3'},
+            output_format=OutputFormat.PARQUET,
+        )
+
+        merged_df = read_dataframe(Path(tmpdir) / 'import_statements_data.parquet')
+        assert merged_df['project_name'].dtype == CATEGORY
+        assert merged_df[['project_name', 'import']].astype(str).values.tolist() == [['p2', 'sys'], ['p1', 'json']]
@@ -0,0 +1,115 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List
+
+from plugin_runner.run_manifest import (
+    BatchRecord,
+    BatchStatus,
+    RunManifest,
+    get_batch_input_hash,
+    get_project_version,
+)
+
+
+def _create_record(index: int, input_hash: str, status: BatchStatus) -> BatchRecord:
+    exit_code = 0 if status == BatchStatus.COMPLETED else 1
+    return BatchRecord(index, input_hash, status.value, exit_code, 4.2, f'output/batch_{index}')
+
+
+def test_get_batch_input_hash():
+    batch = [Path('project_2'), Path('project_1')]
+    input_hash = get_batch_input_hash(batch, ['cli', 'python-imports'])
+
+    assert input_hash == get_batch_input_hash(list(reversed(batch)), ['cli', 'python-imports'])
+    assert input_hash != get_batch_input_hash(batch, ['cli', 'python-call-expressions'])
+    assert input_hash != get_batch_input_hash([Path('project_1')], ['cli', 'python-imports'])
+
+
+def _create_git_project(project: Path, commit: str) -> None:
+    (project / '.git' / 'refs' / 'heads').mkdir(parents=True, exist_ok=True)
+    (project / '.git' / 'HEAD').write_text('ref: refs/heads/master\n')
+    (project / '.git' / 'refs' / 'heads' / 'master').write_text(f'{commit}\n')
+
+
+def _get_input_hash(batch: List[Path], use_db: bool) -> str:
+    project_versions = {project: get_project_version(project, use_db) for project in batch}
+    return get_batch_input_hash(batch, ['cli', 'python-imports'], project_versions)
+
+
+def test_project_changes_between_runs():
+    with TemporaryDirectory() as tmpdir:
+        git_project = Path(tmpdir) / 'user#git_project'
+        _create_git_project(git_project, 'a' * 40)
+
+        other_project = Path(tmpdir) / 'user#other_project'
+        other_project.mkdir()
+        (other_project / 'main.py').write_text('print(1)')
+
+        manifest_path = Path(tmpdir) / 'manifest.jsonl'
+
+        # The first run processes both batches
+        manifest = RunManifest(manifest_path)
+        manifest.add_record(_create_record(0, _get_input_hash([git_project], use_db=True), BatchStatus.COMPLETED))
+        manifest.add_record(_create_record(1, _get_input_hash([other_project], use_db=True), BatchStatus.COMPLETED))
+
+        # Nothing has changed, so the next run skips both batches
+        manifest = RunManifest(manifest_path)
+        assert manifest.is_completed(0, _get_input_hash([git_project], use_db=True))
+        assert manifest.is_completed(1, _get_input_hash([other_project], use_db=True))
+
+        # The projects are updated before the next run, so both batches must be processed again
+        _create_git_project(git_project, 'b' * 40)
+        (other_project / 'main.py').write_text('print(2)\nprint(3)')
+
+        manifest = RunManifest(manifest_path)
+        assert not manifest.is_completed(0, _get_input_hash([git_project], use_db=True))
+        assert not manifest.is_completed(1, _get_input_hash([other_project], use_db=True))
+
+
+def test_get_project_version():
+    with TemporaryDirectory() as tmpdir:
+        git_project = Path(tmpdir) / 'git_project'
+        _create_git_project(git_project, 'a' * 40)
+        assert get_project_version(git_project) == 'a' * 40
+        assert get_project_version(git_project, use_files=True) == 'a' * 40
+
+        other_project = Path(tmpdir) / 'other_project'
+        other_project.mkdir()
+        (other_project / 'main.py').write_text('print(1)')
+        assert get_project_version(other_project) is None
+        assert get_project_version(other_project, use_files=True) is not None
+
+
+def test_is_completed():
+    with TemporaryDirectory() as tmpdir:
+        manifest = RunManifest(Path(tmpdir) / 'manifest.jsonl')
+        manifest.add_record(_create_record(0, 'hash_0', BatchStatus.COMPLETED))
+        manifest.add_record(_create_record(1, 'hash_1', BatchStatus.FAILED))
+
+        assert manifest.is_completed(0, 'hash_0')
+        assert not manifest.is_completed(0, 'another_hash')
+        assert not manifest.is_completed(1, 'hash_1')
+        assert not manifest.is_completed(2, 'hash_2')
+
+
+def test_reload():
+    with TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'manifest.jsonl'
+
+        manifest = RunManifest(path)
+        manifest.add_record(_create_record(0, 'hash_0', BatchStatus.FAILED))
+        manifest.add_record(_create_record(1, 'hash_1', BatchStatus.COMPLETED))
+        manifest.add_record(_create_record(0, 'hash_0', BatchStatus.COMPLETED))
+
+        with open(path, 'a') as file:
+            # Imitate a record that was interrupted while being written
+            file.write('{"index": 2, "input_')
+
+        reloaded_manifest = RunManifest(path)
+
+        assert reloaded_manifest.records == manifest.records
+        assert reloaded_manifest.get_record(0) == _create_record(0, 'hash_0', BatchStatus.COMPLETED)
+        assert reloaded_manifest.get_record(2) is None
+
+        reloaded_manifest.add_record(_create_record(2, 'hash_2', BatchStatus.COMPLETED))
+        assert RunManifest(path).get_record(2) == _create_record(2, 'hash_2', BatchStatus.COMPLETED)
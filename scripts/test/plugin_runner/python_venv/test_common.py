@@ -8,10 +8,16 @@ import httpretty
 import pkg_resources
 
 from plugin_runner.python_venv.common import (
+    LinkMode,
     Requirements,
     create_requirements_file,
     filter_unavailable_packages,
     filter_unavailable_versions,
+    gather_unique_requirements,
+    gather_unparsed_requirement_lines,
+    get_requirements_files_fingerprint,
+    get_requirements_fingerprint,
+    link_tree,
     merge_requirements,
 )
 
@@ -283,3 +289,166 @@ def test_create_requirements_file(version_by_package_name: Dict[str, Optional[Ve
         with open(requirements_file_path) as requirements_file:
             actual_lines = list(map(str.strip, requirements_file.readlines()))
             assert actual_lines == expected_lines
+
+
+GATHER_UNIQUE_REQUIREMENTS_TEST_DATA = [
+    (
+        [['numpy==3.2.1', 'pandas'], ['Pandas', 'numpy == 3.2.1']],
+        ['numpy==3.2.1', 'pandas'],
+    ),
+    (
+        [['numpy==3.2.1'], ['numpy>=3.0', 'pandas==6.5.4'], ['# comment', '']],
+        ['numpy==3.2.1', 'numpy>=3.0', 'pandas==6.5.4'],
+    ),
+    (
+        [[], []],
+        [],
+    ),
+]
+
+
+@pytest.mark.parametrize(('files_lines', 'expected_requirements'), GATHER_UNIQUE_REQUIREMENTS_TEST_DATA)
+def test_gather_unique_requirements(files_lines: List[List[str]], expected_requirements: List[str]):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        requirements_paths = []
+        for index, lines in enumerate(files_lines):
+            requirements_path = Path(temp_dir) / f'requirements_{index}.txt'
+            requirements_path.write_text('\n'.join(lines))
+            requirements_paths.append(requirements_path)
+
+        assert gather_unique_requirements(requirements_paths) == expected_requirements
+
+
+GATHER_UNPARSED_REQUIREMENT_LINES_TEST_DATA = [
+    (
+        [['numpy==3.2.1', '# comment', ''], ['pandas']],
+        [],
+    ),
+    (
+        [['-e .', 'numpy==3.2.1'], ['git+https://github.com/psf/requests.git#egg=requests', '  -e .  ']],
+        ['-e .', 'git+https://github.com/psf/requests.git#egg=requests'],
+    ),
+    (
+        [['--index-url https://example.com/simple', 'pandas']],
+        ['--index-url https://example.com/simple'],
+    ),
+]
+
+
+@pytest.mark.parametrize(('files_lines', 'expected_lines'), GATHER_UNPARSED_REQUIREMENT_LINES_TEST_DATA)
+def test_gather_unparsed_requirement_lines(files_lines: List[List[str]], expected_lines: List[str]):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        requirements_paths = []
+        for index, lines in enumerate(files_lines):
+            requirements_path = Path(temp_dir) / f'requirements_{index}.txt'
+            requirements_path.write_text('\n'.join(lines))
+            requirements_paths.append(requirements_path)
+
+        assert gather_unparsed_requirement_lines(requirements_paths) == expected_lines
+
+
+SAME_REQUIREMENTS_FINGERPRINT_TEST_DATA = [
+    (['numpy==3.2.1', 'pandas'], False, ['pandas', 'numpy==3.2.1'], False),
+    (['numpy==3.2.1', 'pandas'], False, ['pandas', 'numpy==3.2.1', 'pandas'], False),
+    ([], True, [], True),
+]
+
+
+@pytest.mark.parametrize(
+    ('first_requirements', 'first_no_deps', 'second_requirements', 'second_no_deps'),
+    SAME_REQUIREMENTS_FINGERPRINT_TEST_DATA,
+)
+def test_same_requirements_fingerprint(
+    first_requirements: List[str],
+    first_no_deps: bool,
+    second_requirements: List[str],
+    second_no_deps: bool,
+):
+    first_fingerprint = get_requirements_fingerprint(first_requirements, first_no_deps)
+    assert first_fingerprint == get_requirements_fingerprint(second_requirements, second_no_deps)
+
+
+DIFFERENT_REQUIREMENTS_FINGERPRINT_TEST_DATA = [
+    (['numpy==3.2.1', 'pandas'], False, ['numpy==3.2.2', 'pandas'], False),
+    (['numpy==3.2.1', 'pandas'], False, ['numpy==3.2.1'], False),
+    (['numpy==3.2.1', 'pandas'], False, ['numpy==3.2.1', 'pandas'], True),
+]
+
+
+@pytest.mark.parametrize(
+    ('first_requirements', 'first_no_deps', 'second_requirements', 'second_no_deps'),
+    DIFFERENT_REQUIREMENTS_FINGERPRINT_TEST_DATA,
+)
+def test_different_requirements_fingerprint(
+    first_requirements: List[str],
+    first_no_deps: bool,
+    second_requirements: List[str],
+    second_no_deps: bool,
+):
+    first_fingerprint = get_requirements_fingerprint(first_requirements, first_no_deps)
+    assert first_fingerprint != get_requirements_fingerprint(second_requirements, second_no_deps)
+
+
+REQUIREMENTS_FILES_FINGERPRINT_TEST_DATA = [
+    ([['numpy==3.2.1', 'pandas']], [['pandas', 'numpy==3.2.1']], True),
+    # The files without requirements are skipped
+    ([['numpy==3.2.1'], [], ['pandas']], [['numpy==3.2.1'], ['pandas']], True),
+    # The files with conflicting requirements are installed separately
+    ([['numpy==3.2.1'], ['numpy==3.2.2']], [['numpy==3.2.1', 'numpy==3.2.2']], False),
+    ([['numpy==3.2.1'], ['pandas']], [['pandas'], ['numpy==3.2.1']], False),
+]
+
+
+@pytest.mark.parametrize(
+    ('first_requirements_by_file', 'second_requirements_by_file', 'are_same'),
+    REQUIREMENTS_FILES_FINGERPRINT_TEST_DATA,
+)
+def test_requirements_files_fingerprint(
+    first_requirements_by_file: List[List[str]],
+    second_requirements_by_file: List[List[str]],
+    are_same: bool,
+):
+    first_fingerprint = get_requirements_files_fingerprint(first_requirements_by_file, False)
+    assert (first_fingerprint == get_requirements_files_fingerprint(second_requirements_by_file, False)) == are_same
+
+
+def _create_store_entry(entry_path: Path) -> None:
+    (entry_path / 'package' / 'subpackage').mkdir(parents=True)
+    (entry_path / 'package' / '__init__.py').write_text('VERSION = "1.0"')
+    (entry_path / 'package' / 'subpackage' / '__init__.py').write_text('')
+    (entry_path / 'package-1.0.dist-info').mkdir()
+    (entry_path / 'package-1.0.dist-info' / 'RECORD').write_text('package/__init__.py,,')
+    (entry_path / 'bin').mkdir()
+    (entry_path / 'bin' / 'script').write_text('#!/usr/bin/python')
+
+
+@pytest.mark.parametrize('link_mode', list(LinkMode))
+def test_link_tree(link_mode: LinkMode):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        entry_path = Path(temp_dir) / 'store' / 'package-1.0-py3-none-any'
+        _create_store_entry(entry_path)
+
+        site_packages_path = Path(temp_dir) / 'site-packages'
+        (site_packages_path / 'package').mkdir(parents=True)
+        (site_packages_path / 'package' / '__init__.py').write_text('VERSION = "0.1"')
+        (site_packages_path / 'other.py').write_text('')
+
+        copied_files = link_tree(entry_path, site_packages_path, link_mode, {'bin'})
+
+        linked_files = {
+            str(path.relative_to(site_packages_path)) for path in site_packages_path.rglob('*') if path.is_file()
+        }
+        assert linked_files == {
+            'other.py',
+            'package/__init__.py',
+            'package/subpackage/__init__.py',
+            'package-1.0.dist-info/RECORD',
+        }
+        assert (site_packages_path / 'package' / '__init__.py').read_text() == 'VERSION = "1.0"'
+
+        if link_mode == LinkMode.HARDLINK:
+            assert copied_files == 0
+            assert (site_packages_path / 'package' / '__init__.py').samefile(entry_path / 'package' / '__init__.py')
+        else:
+            # The reflinks are not supported by all the file systems, in which case the files are copied
+            assert copied_files <= 4
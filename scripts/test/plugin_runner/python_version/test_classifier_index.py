@@ -0,0 +1,124 @@
+import gzip
+import json
+import sqlite3
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List, Optional
+
+from pkg_resources import parse_version
+
+from plugin_runner.python_version.classifier_index import ClassifierIndex, SortedVersions
+from plugin_runner.python_version.determine_python_version import _try_to_determine_version_using_requirements
+from plugin_runner.python_version.python_classifiers import PythonVersion
+
+import pytest
+
+PYTHON_2 = 'Programming Language :: Python :: 2'
+PYTHON_3 = 'Programming Language :: Python :: 3'
+LICENSE = 'License :: OSI Approved :: MIT License'
+
+DUMP_RECORDS = [
+    {'info': {'name': 'Some_Package', 'version': '1.0', 'classifiers': [PYTHON_2, LICENSE]}, 'releases': {}},
+    {'name': 'some-package', 'version': '2.0.0', 'classifiers': [PYTHON_3, LICENSE]},
+    {'name': 'some-package', 'version': '2.1.0rc1', 'classifiers': [PYTHON_2, PYTHON_3]},
+    {'name': 'some-package', 'version': '1.10.0', 'classifiers': [PYTHON_2, PYTHON_3]},
+    {'name': 'other-package', 'version': '0.1', 'classifiers': None},
+]
+
+OTHER_DUMP_RECORDS = [
+    {'name': 'other-package', 'version': '0.1', 'classifiers': [PYTHON_3]},
+    {'name': 'other-package', 'version': '0.2a1', 'classifiers': [PYTHON_2]},
+]
+
+
+def build_index(tmpdir: str) -> ClassifierIndex:
+    dump_path = Path(tmpdir) / 'dump.jsonl'
+    dump_path.write_text('\n'.join([*map(json.dumps, DUMP_RECORDS), '', 'This is not a json.', '{"name": "x"}']))
+
+    other_dump_path = Path(tmpdir) / 'other_dump.jsonl.gz'
+    with gzip.open(other_dump_path, 'wt') as file:
+        file.write('\n'.join(map(json.dumps, OTHER_DUMP_RECORDS)))
+
+    return ClassifierIndex.build([dump_path, other_dump_path], Path(tmpdir) / 'index' / 'classifiers.sqlite')
+
+
+def test_build_classifier_index():
+    with TemporaryDirectory() as tmpdir:
+        index = build_index(tmpdir)
+
+        assert index.get_available_versions('some_package') == set(
+            map(parse_version, ['1.0', '1.10.0', '2.0.0', '2.1.0rc1']),
+        )
+        # The last occurrence of a package version is kept
+        assert index.get_available_versions('other-package') == set(map(parse_version, ['0.1', '0.2a1']))
+        assert index.get_package_classifiers('other-package', '0.1') == {PYTHON_3}
+        assert index.get_available_versions('missing-package') == set()
+
+        # Only the distinct sets of the Python classifiers are stored
+        connection = sqlite3.connect(index.path)
+        try:
+            rows = connection.execute('SELECT classifiers FROM classifier_sets')
+            classifier_sets = {classifiers for classifiers, in rows}
+        finally:
+            connection.close()
+        assert classifier_sets == {PYTHON_2, PYTHON_3, f'{PYTHON_2}\n{PYTHON_3}', ''}
+
+
+GET_PACKAGE_CLASSIFIERS_TEST_DATA = [
+    ('some-package', '1.0', {PYTHON_2}),
+    ('some-package', '1.0.0', set()),
+    ('SOME.PACKAGE', '2.0', set()),
+    ('some_package', '2.0.0', {PYTHON_3}),
+    ('some-package', '2.1.0-rc.1', {PYTHON_2, PYTHON_3}),
+    # The latest version is not a pre-release
+    ('some-package', None, {PYTHON_3}),
+    ('other-package', None, {PYTHON_3}),
+    ('missing-package', None, set()),
+    ('missing-package', '1.0', set()),
+]
+
+
+@pytest.mark.parametrize(('package_name', 'package_version', 'expected_classifiers'), GET_PACKAGE_CLASSIFIERS_TEST_DATA)
+def test_get_package_classifiers(package_name: str, package_version: Optional[str], expected_classifiers: set):
+    with TemporaryDirectory() as tmpdir:
+        index = build_index(tmpdir)
+        assert index.get_package_classifiers(package_name, package_version) == expected_classifiers
+
+
+FIND_BY_WILDCARD_TEST_DATA = [
+    (['1.0', '1.2', '1.2.1', '1.2.10', '1.20.0', '2.0'], '1.2.*', '1.2.10'),
+    (['1.0', '1.2', '1.2.1', '1.2.10', '1.20.0', '2.0'], '1.*', '1.20.0'),
+    (['1.0', '1.2', '1.2.1', '1.2.10', '1.20.0', '2.0'], '1.3.*', None),
+    (['1.0', '1.2', '1.2.1', '1.2.10', '1.20.0', '2.0'], '3.*', None),
+    # The pre-releases are taken only if there are no releases
+    (['1.2.0', '1.2.1rc1', '1.3.0a1'], '1.2.*', '1.2.0'),
+    (['1.2.0rc1', '1.2.0rc2', '1.3.0'], '1.2.*', '1.2.0rc2'),
+    # The versions with an epoch are not matched
+    (['1!1.2.0', '1.2.0'], '1.2.*', '1.2.0'),
+    (['1.2.0'], 'x.*', None),
+    ([], '1.*', None),
+]
+
+
+@pytest.mark.parametrize(('versions', 'wildcard', 'expected_version'), FIND_BY_WILDCARD_TEST_DATA)
+def test_find_by_wildcard(versions: List[str], wildcard: str, expected_version: Optional[str]):
+    sorted_versions = SortedVersions.from_versions(map(parse_version, reversed(versions)))
+    expected_version = None if expected_version is None else parse_version(expected_version)
+    assert sorted_versions.find_by_wildcard(wildcard) == expected_version
+
+
+DETERMINE_VERSION_USING_INDEX_TEST_DATA = [
+    ({'some-package': {('==', parse_version('2.0.0'))}}, PythonVersion.PYTHON_3),
+    ({'some-package': {('==', parse_version('1.0'))}}, PythonVersion.PYTHON_2),
+    ({'some-package': {('==', parse_version('1.10.*'))}}, PythonVersion.PYTHON_MIXED),
+    ({'some-package': {('==', parse_version('2.*'))}}, PythonVersion.PYTHON_3),
+    ({'some-package': {('<', parse_version('1.0'))}, 'other-package': set()}, PythonVersion.PYTHON_3),
+    ({'missing-package': set()}, None),
+]
+
+
+@pytest.mark.parametrize(('requirements', 'expected_version'), DETERMINE_VERSION_USING_INDEX_TEST_DATA)
+def test_determine_version_using_index(requirements, expected_version: Optional[PythonVersion]):
+    with TemporaryDirectory() as tmpdir:
+        index = build_index(tmpdir)
+        assert _try_to_determine_version_using_requirements(requirements, index) == expected_version
@@ -1,15 +1,26 @@
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from test.plugin_runner.python_version import SETUP_FILES_TEST_DATA_FOLDER
+from test.plugin_runner.python_version.test_classifier_index import build_index
 from typing import Optional, Set
 
+from httpretty import httpretty
+
+from pkg_resources import parse_version
+
 from plugin_runner.python_version.determine_python_version import (
     _try_to_determine_version_using_classifiers,
+    _try_to_determine_version_using_requirements,
     _try_to_find_version_in_setup_file,
+    determine_versions,
+    read_processed_projects,
 )
 from plugin_runner.python_version.python_classifiers import PythonVersion
 
 import pytest
 
+from utils.python.pypi_utils import PYPI_VERSION_METADATA_URL, close_session
+
 FIND_VERSION_IN_SETUP_FILE_TEST_DATA = [
     ('empty_file.py', None),
     ('without_python_classifiers.py', None),
@@ -74,3 +85,86 @@ DETERMINE_VERSION_USING_CLASSIFIERS_TEST_DATA = [
 @pytest.mark.parametrize(('classifiers', 'expected_versions'), DETERMINE_VERSION_USING_CLASSIFIERS_TEST_DATA)
 def test_try_to_determine_version_using_classifiers(classifiers: Set[str], expected_versions: Optional[PythonVersion]):
     assert _try_to_determine_version_using_classifiers(classifiers) == expected_versions
+
+
+def test_determine_version_using_memo():
+    with TemporaryDirectory() as tmpdir:
+        index = build_index(tmpdir)
+
+        memo = {('other-package', '1.0'): PythonVersion.PYTHON_2}
+        requirements = {
+            'other-package': {('==', parse_version('1.0'))},
+            'some-package': {('==', parse_version('2.0.0')), ('==', parse_version('3.*'))},
+        }
+
+        assert _try_to_determine_version_using_requirements(requirements, index, memo) == PythonVersion.PYTHON_MIXED
+        assert memo == {
+            ('other-package', '1.0'): PythonVersion.PYTHON_2,
+            ('some-package', '2.0.0'): PythonVersion.PYTHON_3,
+            ('some-package', '3.*'): None,
+        }
+
+
+def test_failed_lookups_are_not_memoized():
+    httpretty.enable(allow_net_connect=False)
+    try:
+        httpretty.register_uri(
+            httpretty.GET,
+            PYPI_VERSION_METADATA_URL.format(package_name='some-package', package_version='2.0.0'),
+            responses=[
+                httpretty.Response(body='{}', status=503),
+                httpretty.Response(
+                    body='{"info": {"classifiers": ["Programming Language :: Python :: 3 :: Only"]}}',
+                    status=200,
+                ),
+            ],
+        )
+
+        memo = {}
+        requirements = {'some-package': {('==', parse_version('2.0.0'))}}
+
+        assert _try_to_determine_version_using_requirements(requirements, memo=memo) is None
+        assert memo == {}
+
+        assert _try_to_determine_version_using_requirements(requirements, memo=memo) == PythonVersion.PYTHON_3
+        assert memo == {('some-package', '2.0.0'): PythonVersion.PYTHON_3}
+    finally:
+        httpretty.disable()
+        httpretty.reset()
+        close_session()
+
+
+PROJECT_REQUIREMENTS = {
+    'project_a': 'some-package==2.0.0\n',
+    'project_b': 'some-package==1.0\n',
+    'project_c': 'some-package==1.*\nother-package\n',
+    'project_d': '',
+}
+
+EXPECTED_VERSIONS_TABLE = (
+    'project_name,python_version\n'
+    'project_a,PYTHON_3\n'
+    'project_b,PYTHON_2\n'
+    'project_c,PYTHON_3\n'
+    'project_d,\n'
+)
+
+
+@pytest.mark.parametrize('n_cpu', [1, 2])
+def test_determine_versions(n_cpu: int):
+    with TemporaryDirectory() as tmpdir:
+        index = build_index(tmpdir)
+
+        projects = []
+        for project_name, requirements in PROJECT_REQUIREMENTS.items():
+            project_path = Path(tmpdir) / 'dataset' / project_name
+            project_path.mkdir(parents=True)
+            (project_path / 'requirements.txt').write_text(requirements)
+            projects.append(project_path)
+
+        output_path = Path(tmpdir) / 'output' / 'versions.csv'
+        determine_versions(projects[:2], output_path, index, n_cpu)
+        assert read_processed_projects(output_path) == {'project_a', 'project_b'}
+
+        determine_versions(projects[2:], output_path, index, n_cpu, append=True)
+        assert output_path.read_bytes().decode() == EXPECTED_VERSIONS_TABLE
@@ -0,0 +1,18 @@
+/**
+ * This is a factorial.
+ *
+ * @param n Non-negative number.
+ */
+fun factorial(n: Int): Int {
+    /* 0! = 1
+       /* Nested comment */
+    */
+    if (n == 0) {
+        return 1
+    }
+    return n * factorial(n - 1) /* n! = n * (n - 1)! */
+}
+
+val template = """
+    /* Not a comment */
+"""
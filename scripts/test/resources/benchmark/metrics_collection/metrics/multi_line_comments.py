@@ -0,0 +1,17 @@
+"""
+This is a module docstring.
+
+It spans several lines.
+"""
+QUERY = """
+SELECT * FROM table  # Not a comment
+"""
+
+
+def factorial(n: int) -> int:
+    '''
+    Calculate factorial: n!
+    '''
+    if n == 0:
+        return 1  # Return 1 because 0! = 1
+    return n * factorial(n - 1)
@@ -0,0 +1,60 @@
+import sqlite3
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from utils.python.pypi_cache import CachedResponse, PyPICache
+
+
+def test_pypi_cache():
+    with TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'cache' / 'pypi.sqlite'
+        cache = PyPICache(path)
+        assert cache.get('some_package') is None
+
+        latest_response = CachedResponse(200, b'{"releases": {}}', '"etag"', time.time())
+        version_response = CachedResponse(404, b'Not Found', None, time.time())
+        cache.put('some_package', None, latest_response)
+        cache.put('some_package', '1.0.0', version_response)
+
+        # The names are normalized
+        assert cache.get('Some.Package') == latest_response
+        assert cache.get('some-package', '1.0.0') == version_response
+        assert cache.get('some-package', '2.0.0') is None
+
+        # The responses are persisted
+        new_cache = PyPICache(path)
+        assert new_cache.get('some_package') == latest_response
+        assert new_cache.get('some_package', '1.0.0') == version_response
+
+        # The content is compressed
+        connection = sqlite3.connect(path)
+        try:
+            contents = [content for content, in connection.execute('SELECT content FROM responses')]
+        finally:
+            connection.close()
+        assert latest_response.content not in contents
+
+
+def test_pypi_cache_memory_layer():
+    with TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'pypi.sqlite'
+        cache = PyPICache(path, memory_cache_size=2)
+
+        responses = {name: CachedResponse(200, name.encode(), None, time.time()) for name in ['a', 'b', 'c']}
+        for name, response in responses.items():
+            cache.put(name, None, response)
+
+        # The least recently used response is evicted from memory, but it is still read from the database
+        assert list(cache._memory_cache) == [('b', ''), ('c', '')]
+        assert cache.get('a') == responses['a']
+        assert list(cache._memory_cache) == [('c', ''), ('a', '')]
+
+        path.unlink()
+        assert cache.get('c') == responses['c']
+        assert cache.get('b') is None
+
+
+def test_cached_response_is_fresh():
+    assert CachedResponse(200, b'', None, time.time()).is_fresh(60)
+    assert not CachedResponse(200, b'', None, time.time() - 120).is_fresh(60)
@@ -1,5 +1,11 @@
+import json
+import threading
+import time
 from distutils.version import Version
-from typing import Optional, Set
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, Iterator, List, Optional, Set
 
 from httpretty import httpretty
 
@@ -7,12 +13,22 @@ import pkg_resources
 
 import pytest
 
+from utils.python.pypi_cache import CachedResponse, PyPICache
+from utils.python import pypi_utils
 from utils.python.pypi_utils import (
     PYPI_PACKAGE_METADATA_URL,
     PYPI_VERSION_METADATA_URL,
+    PyPIError,
+    RateLimiter,
     check_package_exists,
+    check_packages_exist,
+    close_session,
     get_available_versions,
     get_package_classifiers,
+    get_packages_available_versions,
+    prefetch_metadata,
+    set_cache,
+    set_rate_limit,
 )
 
 
@@ -21,6 +37,17 @@ def _httpretty_fixture():
     httpretty.enable(allow_net_connect=False)
     yield
     httpretty.disable()
+    httpretty.reset()
+    close_session()
+
+
+@pytest.fixture
+def pypi_cache():
+    with TemporaryDirectory() as tmpdir:
+        cache = PyPICache(Path(tmpdir) / 'pypi.sqlite')
+        set_cache(cache)
+        yield cache
+        set_cache(None)
 
 
 GET_AVAILABLE_VERSIONS_TEST_DATA = [
@@ -239,6 +266,32 @@ def test_get_package_classifiers(
     assert expected_classifiers == get_package_classifiers('some_package', package_version)
 
 
+RAISE_ON_ERROR_TEST_DATA = [
+    (500, '{}', True),
+    (200, 'not json', True),
+    (404, '{"message": "Not Found"}', False),
+    (200, '{"info": {"classifiers": []}}', False),
+]
+
+
+@pytest.mark.parametrize(('status', 'body', 'is_error'), RAISE_ON_ERROR_TEST_DATA)
+def test_get_package_classifiers_raise_on_error(_httpretty_fixture, status: int, body: str, is_error: bool):
+    httpretty.register_uri(
+        httpretty.GET,
+        PYPI_PACKAGE_METADATA_URL.format(package_name='some_package'),
+        status=status,
+        body=body,
+    )
+
+    assert get_package_classifiers('some_package') == set()
+
+    if is_error:
+        with pytest.raises(PyPIError):
+            get_package_classifiers('some_package', raise_on_error=True)
+    else:
+        assert get_package_classifiers('some_package', raise_on_error=True) == set()
+
+
 CHECK_PACKAGE_EXISTS_TEST_DATA = [
     (
         200,
@@ -268,3 +321,224 @@ def test_check_package_exists(
     )
 
     assert expected_existence == check_package_exists('some_package')
+
+
+RELEASES_JSON = '{"releases": {"1.0.0": {}, "2.0.0": {}}}'
+RELEASES = set(map(pkg_resources.parse_version, ['1.0.0', '2.0.0']))
+
+
+def test_cached_metadata_is_reused(_httpretty_fixture, pypi_cache: PyPICache):
+    httpretty.register_uri(
+        httpretty.GET,
+        PYPI_PACKAGE_METADATA_URL.format(package_name='some_package'),
+        body=RELEASES_JSON,
+    )
+
+    assert get_available_versions('some_package') == RELEASES
+    assert check_package_exists('some_package')
+    assert get_available_versions('Some_Package') == RELEASES
+    assert len(httpretty.latest_requests) == 1
+
+
+def test_stale_metadata_is_revalidated(_httpretty_fixture, pypi_cache: PyPICache):
+    stale_response = CachedResponse(200, RELEASES_JSON.encode(), '"etag"', time.time() - 2 * pypi_cache.ttl)
+    pypi_cache.put('some_package', None, stale_response)
+
+    httpretty.register_uri(
+        httpretty.GET,
+        PYPI_PACKAGE_METADATA_URL.format(package_name='some_package'),
+        status=304,
+    )
+
+    assert get_available_versions('some_package') == RELEASES
+    assert httpretty.last_request.headers['If-None-Match'] == '"etag"'
+    assert pypi_cache.get('some_package').is_fresh(pypi_cache.ttl)
+
+
+def test_missing_packages_are_cached(_httpretty_fixture, pypi_cache: PyPICache):
+    httpretty.register_uri(
+        httpretty.GET,
+        PYPI_PACKAGE_METADATA_URL.format(package_name='some_package'),
+        status=404,
+    )
+
+    assert check_package_exists('some_package') is False
+    assert check_package_exists('some_package') is False
+    assert len(httpretty.latest_requests) == 1
+
+
+def test_server_errors_are_not_cached(_httpretty_fixture, pypi_cache: PyPICache):
+    httpretty.register_uri(
+        httpretty.GET,
+        PYPI_PACKAGE_METADATA_URL.format(package_name='some_package'),
+        status=300,
+    )
+
+    assert check_package_exists('some_package') is None
+    assert pypi_cache.get('some_package') is None
+
+
+def test_offline_mode(_httpretty_fixture, pypi_cache: PyPICache):
+    pypi_cache.offline = True
+    stale_response = CachedResponse(200, RELEASES_JSON.encode(), None, time.time() - 2 * pypi_cache.ttl)
+    pypi_cache.put('some_package', None, stale_response)
+
+    assert get_available_versions('some_package') == RELEASES
+    assert get_available_versions('other_package') == set()
+    assert check_package_exists('other_package') is None
+    assert get_package_classifiers('some_package', '1.0.0') == set()
+    assert not httpretty.latest_requests
+
+
+def test_prefetch_metadata(_httpretty_fixture, pypi_cache: PyPICache):
+    httpretty.register_uri(
+        httpretty.GET,
+        PYPI_PACKAGE_METADATA_URL.format(package_name='some_package'),
+        body=RELEASES_JSON,
+    )
+    httpretty.register_uri(
+        httpretty.GET,
+        PYPI_VERSION_METADATA_URL.format(package_name='some_package', package_version='1.0.0'),
+        body='{"info": {"classifiers": ["Programming Language :: Python :: 3"]}}',
+    )
+
+    assert prefetch_metadata(['some_package'], {'some_package': {'1.0.0'}}) == 0
+
+    pypi_cache.offline = True
+    assert get_available_versions('some_package') == RELEASES
+    assert get_package_classifiers('some_package', '1.0.0') == {'Programming Language :: Python :: 3'}
+
+
+class FakePyPI(ThreadingHTTPServer):
+    """A local stand-in for the PyPI JSON API, which serves the releases of the given packages."""
+
+    def __init__(self, releases: Dict[str, List[str]], delay: float = 0):
+        super().__init__(('127.0.0.1', 0), FakePyPIHandler)
+        self.releases = releases
+        self.delay = delay
+
+        self.client_ports = set()
+        self.number_of_requests = 0
+        self.number_of_active_requests = 0
+        self.max_number_of_active_requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_port}'
+
+
+class FakePyPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):  # noqa: N802
+        server = self.server
+        with server.lock:
+            server.client_ports.add(self.client_address[1])
+            server.number_of_requests += 1
+            server.number_of_active_requests += 1
+            server.max_number_of_active_requests = max(
+                server.max_number_of_active_requests,
+                server.number_of_active_requests,
+            )
+
+        time.sleep(server.delay)
+
+        package_name = self.path.split('/')[2]
+        if package_name in server.releases:
+            status = 200
+            body = json.dumps({'releases': {version: {} for version in server.releases[package_name]}}).encode()
+        else:
+            status = 404
+            body = b'Not Found'
+
+        with server.lock:
+            server.number_of_active_requests -= 1
+
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_pypi(monkeypatch) -> Iterator[FakePyPI]:
+    releases = {f'package_{index}': ['1.0.0', f'{index}.0.0'] for index in range(50)}
+    server = FakePyPI(releases, delay=0.01)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(pypi_utils, 'PYPI_PACKAGE_METADATA_URL', f'{server.url}/pypi/{{package_name}}/json')
+    close_session()
+    set_rate_limit(None)
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+    close_session()
+    set_rate_limit(pypi_utils.DEFAULT_REQUESTS_PER_SECOND)
+
+
+def test_check_packages_exist(fake_pypi: FakePyPI):
+    package_names = [*fake_pypi.releases.keys(), 'missing_package']
+
+    existence = check_packages_exist(package_names, max_workers=8)
+
+    assert existence == {**dict.fromkeys(fake_pypi.releases, True), 'missing_package': False}
+    assert fake_pypi.number_of_requests == len(package_names)
+    assert 1 < fake_pypi.max_number_of_active_requests <= 8
+    # The connections are reused
+    assert len(fake_pypi.client_ports) <= 8
+
+
+def test_get_packages_available_versions(fake_pypi: FakePyPI):
+    package_names = [*fake_pypi.releases.keys(), 'missing_package']
+
+    versions = get_packages_available_versions(package_names, max_workers=4)
+
+    assert versions == {
+        **{
+            package_name: set(map(pkg_resources.parse_version, releases))
+            for package_name, releases in fake_pypi.releases.items()
+        },
+        'missing_package': set(),
+    }
+    assert 1 < fake_pypi.max_number_of_active_requests <= 4
+
+
+def test_concurrent_lookups_use_cache(fake_pypi: FakePyPI, pypi_cache: PyPICache):
+    package_names = list(fake_pypi.releases.keys())
+
+    assert all(check_packages_exist(package_names).values())
+    assert get_packages_available_versions(package_names)['package_2'] == set(
+        map(pkg_resources.parse_version, ['1.0.0', '2.0.0']),
+    )
+    assert fake_pypi.number_of_requests == len(package_names)
+
+
+def test_rate_limit(fake_pypi: FakePyPI):
+    set_rate_limit(100)
+
+    start_time = time.monotonic()
+    check_packages_exist([f'package_{index}' for index in range(21)], max_workers=8)
+
+    # The first request is sent immediately, and the others are spaced by 10 ms
+    assert time.monotonic() - start_time >= 0.2
+
+
+def test_rate_limiter():
+    rate_limiter = RateLimiter(None)
+    start_time = time.monotonic()
+    for _ in range(100):
+        rate_limiter.wait()
+    assert time.monotonic() - start_time < 0.1
+
+    rate_limiter = RateLimiter(50)
+    start_time = time.monotonic()
+    for _ in range(6):
+        rate_limiter.wait()
+    assert time.monotonic() - start_time >= 0.1
@@ -4,7 +4,12 @@ import pkg_resources
 
 import pytest
 
-from utils.python.requirements_utils import Requirements, gather_requirements, normalize_requirement_name
+from utils.python.requirements_utils import (
+    Requirements,
+    gather_requirements,
+    normalize_requirement,
+    normalize_requirement_name,
+)
 
 NORMALIZE_REQUIREMENT_NAME_TEST_DATA = [
     ('', ''),
@@ -21,6 +26,21 @@ def test_normalize_requirement_name(given_name: str, expected_name: str):
     assert normalize_requirement_name(given_name) == expected_name
 
 
+NORMALIZE_REQUIREMENT_TEST_DATA = [
+    ('numpy', 'numpy'),
+    ('NumPy == 1.2.3', 'numpy==1.2.3'),
+    ('ruamel_yaml >=0.15, <0.17', 'ruamel-yaml<0.17,>=0.15'),
+    ('ruamel.yaml<0.17,>=0.15', 'ruamel-yaml<0.17,>=0.15'),
+    ('Requests[socks, security]>=2.0', 'requests[security,socks]>=2.0'),
+    ('pandas; python_version < "3.8"', 'pandas; python_version < "3.8"'),
+]
+
+
+@pytest.mark.parametrize(('requirement', 'expected_requirement'), NORMALIZE_REQUIREMENT_TEST_DATA)
+def test_normalize_requirement(requirement: str, expected_requirement: str):
+    assert normalize_requirement(pkg_resources.Requirement.parse(requirement)) == expected_requirement
+
+
 GATHER_REQUIREMENTS_TEST_DATA_FOLDER = REQUIREMENTS_UTILS_TEST_DATA_FOLDER / 'projects_with_requirements_files'
 
 
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+import time
+
+from utils.process_tree_utils import get_process_tree, get_process_tree_rss, get_rss, kill_process_tree
+
+
+def _spawn_process_tree() -> subprocess.Popen:
+    # The child process starts a grandchild and both sleep until they are killed
+    code = (
+        'import subprocess, sys, time; '
+        'subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"]); '
+        'time.sleep(60)'
+    )
+    process = subprocess.Popen([sys.executable, '-c', code])
+
+    for _ in range(100):
+        if len(get_process_tree(process.pid)) == 2:
+            break
+        time.sleep(0.05)
+
+    return process
+
+
+def test_get_process_tree():
+    process = _spawn_process_tree()
+    try:
+        tree = get_process_tree(process.pid)
+        assert len(tree) == 2
+        assert tree[0] == process.pid
+        assert process.pid in get_process_tree(os.getpid())
+    finally:
+        kill_process_tree(process.pid)
+        process.wait()
+
+
+def test_get_rss():
+    assert get_rss(os.getpid()) > 0
+    assert get_rss(-1) == 0
+
+
+def test_get_process_tree_rss():
+    process = _spawn_process_tree()
+    try:
+        assert get_process_tree_rss(process.pid) > get_rss(process.pid) > 0
+    finally:
+        kill_process_tree(process.pid)
+        process.wait()
+
+
+def test_kill_process_tree():
+    process = _spawn_process_tree()
+    grandchild = get_process_tree(process.pid)[1]
+
+    kill_process_tree(process.pid)
+    process.wait()
+
+    for _ in range(100):
+        if get_rss(grandchild) == 0:
+            break
+        time.sleep(0.05)
+
+    assert get_rss(grandchild) == 0
@@ -1,8 +1,11 @@
 from enum import Enum
-from typing import List, Optional
+from pathlib import Path
+from typing import List, Optional, Union
 
 import pandas as pd
 
+from utils.file_utils import Extensions
+
 
 class AggregationFunction(Enum):
     MIN = 'min'
@@ -15,6 +18,21 @@ class AggregationFunction(Enum):
         return [function.value for function in cls]
 
 
+def read_dataframe(path: Union[str, Path], **kwargs) -> pd.DataFrame:
+    """
+    Read a dataframe from a csv file or from a Parquet file or dataset.
+
+    :param path: Path to the csv file or to the Parquet file or dataset. The Parquet ones must have the ``.parquet``
+    extension.
+    :param kwargs: Arguments of ``pd.read_csv``. They are not used for Parquet, whose columns are already typed.
+    :return: The dataframe. The dictionary-encoded Parquet columns are categorical.
+    """
+    if Path(path).suffix == f'.{Extensions.PARQUET.value}':
+        return pd.read_parquet(path)
+
+    return pd.read_csv(path, **kwargs)
+
+
 def assert_df_equals(
     actual: Optional[pd.DataFrame],
     expected: Optional[pd.DataFrame],
@@ -11,6 +11,7 @@ class Extensions(str, enum.Enum):
     TXT = 'txt'
     JSON = 'json'
     PNG = 'png'
+    PARQUET = 'parquet'
 
 
 def create_directory(path: Union[str, Path]):
@@ -104,6 +105,22 @@ def get_file_content(file_path: Union[str, Path]) -> str:
         return file.read()
 
 
+def get_file_bytes(file_path: Union[str, Path], chunk_size: int = 1024 * 1024) -> bytes:
+    """
+    Get the binary content of the file. The file is read in large chunks.
+
+    :param file_path: Path to the file you want to read.
+    :param chunk_size: Size of the chunks in bytes.
+    :return: File content.
+    """
+    chunks = []
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            chunks.append(chunk)
+
+    return b''.join(chunks)
+
+
 def get_files_by_name(dir_path: Union[str, Path], file_name: str) -> List[str]:
     file_paths = []
     for root, _, files in os.walk(dir_path):
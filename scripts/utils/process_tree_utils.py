@@ -0,0 +1,89 @@
+import os
+import signal
+from collections import defaultdict
+from typing import Dict, List
+
+PROC_PATH = '/proc'
+
+KB_IN_GB = 1024 ** 2
+
+
+def _get_children_by_pid() -> Dict[int, List[int]]:
+    children_by_pid = defaultdict(list)
+    for name in os.listdir(PROC_PATH):
+        if not name.isdigit():
+            continue
+
+        try:
+            with open(os.path.join(PROC_PATH, name, 'stat')) as file:
+                stat = file.read()
+        except OSError:
+            # The process has already finished
+            continue
+
+        # The second field is the command name in parentheses, which may contain spaces, so we split after it
+        parent_pid = int(stat[stat.rindex(')') + 2:].split()[1])
+        children_by_pid[parent_pid].append(int(name))
+
+    return children_by_pid
+
+
+def get_process_tree(pid: int) -> List[int]:
+    """
+    Get the process and all its descendants using the information from procfs.
+
+    :param pid: Process id.
+    :return: List of process ids. The passed process comes first.
+    """
+    children_by_pid = _get_children_by_pid()
+
+    tree = [pid]
+    index = 0
+    while index < len(tree):
+        tree.extend(children_by_pid.get(tree[index], []))
+        index += 1
+
+    return tree
+
+
+def get_rss(pid: int) -> int:
+    """
+    Get the resident set size of the process.
+
+    :param pid: Process id.
+    :return: Resident set size in kilobytes. If the process does not exist, 0 will be returned.
+    """
+    try:
+        with open(os.path.join(PROC_PATH, str(pid), 'status')) as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+
+    # Zombie processes and kernel threads have no VmRSS field
+    return 0
+
+
+def get_process_tree_rss(pid: int) -> int:
+    """
+    Get the total resident set size of the process and all its descendants.
+
+    :param pid: Process id.
+    :return: Resident set size in kilobytes.
+    """
+    return sum(get_rss(process) for process in get_process_tree(pid))
+
+
+def kill_process_tree(pid: int, sig: int = signal.SIGKILL) -> None:
+    """
+    Send the signal to the process and all its descendants.
+
+    :param pid: Process id.
+    :param sig: Signal to send. By default, SIGKILL.
+    """
+    for process in reversed(get_process_tree(pid)):
+        try:
+            os.kill(process, sig)
+        except ProcessLookupError:
+            continue
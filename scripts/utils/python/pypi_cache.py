@@ -0,0 +1,192 @@
+"""
+This module contains a persistent cache of the PyPI metadata responses.
+
+The responses are stored in a SQLite database keyed by the normalized package name and the package version, and the
+recently used ones are also kept in memory. A stored response is used as is until it is older than the TTL, after which
+it is revalidated with its ETag, so the unchanged metadata is not downloaded again. In the offline mode, the stored
+responses are used regardless of their age, and PyPI is never accessed.
+"""
+import argparse
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+from utils.python.requirements_utils import normalize_requirement_name
+
+logger = logging.getLogger(__name__)
+
+# One day
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MEMORY_CACHE_SIZE = 4096
+
+# The metadata of the latest version of a package is stored with an empty version
+LATEST_VERSION = ''
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    status_code: int
+    content: bytes
+    etag: Optional[str]
+    fetched_at: float
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.fetched_at < ttl
+
+
+class PyPICache:
+    """
+    A cache of the PyPI metadata responses keyed by package name and version.
+
+    The content of the responses is compressed, since the metadata of the packages with many releases is large.
+    The in-memory layer is an LRU cache, so the metadata of the packages that are requested for many projects is neither
+    read from the database nor decompressed again.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: float = DEFAULT_TTL,
+        offline: bool = False,
+        memory_cache_size: int = DEFAULT_MEMORY_CACHE_SIZE,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.offline = offline
+        self.memory_cache_size = memory_cache_size
+
+        self._memory_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # The in-memory layer is not shared between processes
+        return {key: value for key, value in self.__dict__.items() if not key.startswith('_')}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @staticmethod
+    def _get_key(package_name: str, package_version: Optional[str]) -> Tuple[str, str]:
+        return normalize_requirement_name(package_name), LATEST_VERSION if package_version is None else package_version
+
+    def _connect(self) -> sqlite3.Connection:
+        # Several processes may use the same cache, so a connection waits for the writes of the others
+        connection = sqlite3.connect(self.path, timeout=60)
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'package TEXT NOT NULL, version TEXT NOT NULL, status_code INTEGER NOT NULL, content BLOB NOT NULL, '
+            'etag TEXT, fetched_at REAL NOT NULL, PRIMARY KEY (package, version))',
+        )
+        return connection
+
+    def _remember(self, key: Tuple[str, str], response: CachedResponse) -> None:
+        with self._lock:
+            self._memory_cache[key] = response
+            self._memory_cache.move_to_end(key)
+            while len(self._memory_cache) > self.memory_cache_size:
+                self._memory_cache.popitem(last=False)
+
+    def get(self, package_name: str, package_version: Optional[str] = None) -> Optional[CachedResponse]:
+        """
+        Get the stored response regardless of its age.
+
+        :param package_name: PyPI package name.
+        :param package_version: Version of the package. If it is None, the response for the latest version is returned.
+        :return: The response. If there is no response in the cache, None will be returned.
+        """
+        key = self._get_key(package_name, package_version)
+        with self._lock:
+            response = self._memory_cache.get(key)
+            if response is not None:
+                self._memory_cache.move_to_end(key)
+                return response
+
+        if not self.path.exists():
+            return None
+
+        try:
+            connection = self._connect()
+        except sqlite3.DatabaseError as error:
+            logger.warning(f'Unable to read the PyPI cache {self.path}: {error}')
+            return None
+
+        try:
+            row = connection.execute(
+                'SELECT status_code, content, etag, fetched_at FROM responses WHERE package = ? AND version = ?',
+                key,
+            ).fetchone()
+        finally:
+            connection.close()
+
+        if row is None:
+            return None
+
+        status_code, content, etag, fetched_at = row
+        response = CachedResponse(status_code, zlib.decompress(content), etag, fetched_at)
+        self._remember(key, response)
+        return response
+
+    def put(self, package_name: str, package_version: Optional[str], response: CachedResponse) -> None:
+        """
+        Add or replace the stored response.
+
+        :param package_name: PyPI package name.
+        :param package_version: Version of the package. If it is None, the response is for the latest version.
+        :param response: The response.
+        """
+        key = self._get_key(package_name, package_version)
+        self._remember(key, response)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                    (*key, response.status_code, zlib.compress(response.content), response.etag, response.fetched_at),
+                )
+        finally:
+            connection.close()
+
+
+def configure_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--pypi-cache',
+        help='Path to the SQLite database where the PyPI metadata is cached. By default, the metadata is not cached.',
+        type=lambda value: Path(value).absolute(),
+    )
+
+    parser.add_argument(
+        '--pypi-cache-ttl',
+        help='Number of hours after which the cached PyPI metadata is revalidated. By default, 24.',
+        type=float,
+        default=DEFAULT_TTL / 60 / 60,
+    )
+
+    parser.add_argument(
+        '--offline',
+        help='If specified, PyPI will not be accessed, and only the cached metadata will be used.',
+        action='store_true',
+    )
+
+
+def create_cache(parser: argparse.ArgumentParser, args: argparse.Namespace) -> Optional[PyPICache]:
+    """
+    Create the PyPI cache from the arguments added by ``configure_cache_arguments``.
+
+    :param parser: Parser of the arguments, which reports the errors.
+    :param args: Parsed arguments.
+    :return: The cache. If the cache path is not specified, None will be returned.
+    """
+    if args.pypi_cache is None:
+        if args.offline:
+            parser.error('--offline cannot be used without --pypi-cache.')
+        return None
+
+    return PyPICache(args.pypi_cache, args.pypi_cache_ttl * 60 * 60, args.offline)
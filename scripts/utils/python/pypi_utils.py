@@ -1,6 +1,12 @@
+import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from distutils.version import Version
-from typing import Optional, Set
+from json import JSONDecodeError
+from typing import Callable, Dict, Iterable, List, Optional, Set, TypeVar
 
 from pkg_resources import parse_version
 
@@ -9,43 +15,225 @@ from requests.adapters import HTTPAdapter
 
 from urllib3 import Retry
 
-# If the "simplejson" package is installed, then "requests" uses it to handle json,
-# otherwise it uses the standard "json" package.
-try:
-    from simplejson import JSONDecodeError
-except ImportError:
-    from json import JSONDecodeError
+from utils.python.pypi_cache import CachedResponse, PyPICache
 
 PYPI_PACKAGE_METADATA_URL = 'https://pypi.org/pypi/{package_name}/json'
 PYPI_VERSION_METADATA_URL = 'https://pypi.org/pypi/{package_name}/{package_version}/json'
 
+# The other responses, e.g. server errors, are not cached, so the requests will be repeated
+CACHEABLE_STATUS_CODES = {200, 404}
+
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_REQUESTS_PER_SECOND = 50
+
+# The maximum number of the connections kept open. It must not be less than the number of workers,
+# otherwise the extra connections will be closed after each request.
+CONNECTION_POOL_SIZE = 64
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class RateLimiter:
+    """Spaces the actions of all threads evenly, so that there are no more than the given number per second."""
+
+    def __init__(self, actions_per_second: Optional[float]):
+        self.actions_per_second = actions_per_second
+
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.actions_per_second:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            wait_time = self._next_time - now
+            self._next_time = max(now, self._next_time) + 1 / self.actions_per_second
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+_cache: Optional[PyPICache] = None
+_rate_limiter = RateLimiter(DEFAULT_REQUESTS_PER_SECOND)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+class PyPICacheMissError(requests.exceptions.RequestException):
+    """Raised in the offline mode when the requested metadata is not cached."""
+
+
+class PyPIError(Exception):
+    """Raised when the metadata could not be obtained because of a failure, which may not happen on the next attempt."""
+
+
+def set_cache(cache: Optional[PyPICache]) -> None:
+    """
+    Set the cache of the PyPI metadata used by all the functions of this module.
+
+    :param cache: The cache. If it is None, the metadata will not be cached.
+    """
+    global _cache
+    _cache = cache
+
+
+def get_cache() -> Optional[PyPICache]:
+    return _cache
+
+
+def set_rate_limit(requests_per_second: Optional[float]) -> None:
+    """
+    Set the maximum number of the requests to PyPI per second made by all the functions of this module.
+
+    :param requests_per_second: The number of requests. If it is None or 0, the requests will not be limited.
+    """
+    global _rate_limiter
+    _rate_limiter = RateLimiter(requests_per_second)
+
 
 def _create_session() -> requests.Session:
     session = requests.Session()
     retries = Retry(total=10, backoff_factor=0.1)
-    session.mount('https://', HTTPAdapter(max_retries=retries))
+    adapter = HTTPAdapter(pool_maxsize=CONNECTION_POOL_SIZE, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
     return session
 
 
-def get_available_versions(package_name: str) -> Set[Version]:
+def _get_session() -> requests.Session:
     """
-    By a given package, collect a list of all the versions available on PyPI.
+    Get the session shared by all threads, so the connections to PyPI are reused.
+
+    :return: The session.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _create_session()
+        return _session
+
+
+def close_session() -> None:
+    """Close the shared session and its connections. A new session will be created by the next request."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _get_metadata_response(package_name: str, package_version: Optional[str] = None) -> CachedResponse:
+    """
+    Get the PyPI metadata response of the given package by version, using the cache if it is set.
+
+    A stale cached response is revalidated with its ETag. If PyPI is unavailable, the stale response is used.
 
     :param package_name: PyPI package name.
-    :return: Set of available versions. If the version could not be obtained, None will be returned.
+    :param package_version: Version of the package. If it is None, the metadata of the latest version is requested.
+    :return: The response.
+    :raises PyPICacheMissError: In the offline mode, if the response is not cached.
+    :raises requests.exceptions.RequestException: If PyPI is unavailable and the response is not cached.
     """
-    session = _create_session()
-    url = PYPI_PACKAGE_METADATA_URL.format(package_name=package_name)
+    cache = _cache
+    cached_response = None if cache is None else cache.get(package_name, package_version)
+    if cached_response is not None and (cache.offline or cached_response.is_fresh(cache.ttl)):
+        return cached_response
+
+    if cache is not None and cache.offline:
+        raise PyPICacheMissError(
+            f'The metadata of the {package_name} package (version = {package_version}) is not cached.',
+        )
 
+    if package_version is None:
+        url = PYPI_PACKAGE_METADATA_URL.format(package_name=package_name)
+    else:
+        url = PYPI_VERSION_METADATA_URL.format(package_name=package_name, package_version=package_version)
+
+    headers = {}
+    if cached_response is not None and cached_response.etag is not None:
+        headers['If-None-Match'] = cached_response.etag
+
+    _rate_limiter.wait()
     try:
-        metadata = session.get(url).json()
+        response = _get_session().get(url, headers=headers)
     except requests.exceptions.RequestException:
+        if cached_response is None:
+            raise
+        logger.warning(f'Unable to revalidate the metadata of the {package_name} package, the cached one is used.')
+        return cached_response
+
+    if response.status_code == 304 and cached_response is not None:
+        metadata_response = replace(cached_response, fetched_at=time.time())
+    else:
+        metadata_response = CachedResponse(
+            response.status_code,
+            response.content,
+            response.headers.get('ETag'),
+            time.time(),
+        )
+
+    if cache is not None and metadata_response.status_code in CACHEABLE_STATUS_CODES:
+        cache.put(package_name, package_version, metadata_response)
+
+    return metadata_response
+
+
+def _get_metadata(
+    package_name: str,
+    package_version: Optional[str] = None,
+    raise_on_error: bool = False,
+) -> Optional[Dict]:
+    """
+    Get the PyPI metadata of the given package by version.
+
+    :param package_name: PyPI package name.
+    :param package_version: Version of the package. If it is None, the metadata of the latest version is returned.
+    :param raise_on_error: Whether to raise an error instead of returning None in case of failure.
+    :return: The metadata. In case of failure None will be returned.
+    :raises PyPIError: If raise_on_error is set and PyPI is unavailable or has returned an unexpected response.
+    """
+    try:
+        response = _get_metadata_response(package_name, package_version)
+    except PyPICacheMissError as error:
+        logger.error(str(error))
+        if raise_on_error:
+            raise PyPIError(str(error)) from error
+        return None
+    except requests.exceptions.RequestException as error:
         logger.error('An error occurred when accessing the PyPI.')
-        return set()
-    except JSONDecodeError:
-        logger.error(f'Failed to get a version for the {package_name} package.')
+        if raise_on_error:
+            raise PyPIError(f'Unable to access the PyPI: {error}') from error
+        return None
+
+    # The missing packages and versions are not failures, their metadata is just empty
+    if raise_on_error and response.status_code not in CACHEABLE_STATUS_CODES:
+        raise PyPIError(f'PyPI returned an unexpected code ({response.status_code}) for the {package_name} package.')
+
+    try:
+        return json.loads(response.content)
+    except JSONDecodeError as error:
+        logger.error(f'Failed to get the metadata of the {package_name} package (version = {package_version}).')
+        if raise_on_error:
+            raise PyPIError(f'Unable to parse the metadata of the {package_name} package.') from error
+        return None
+
+
+def get_available_versions(package_name: str, raise_on_error: bool = False) -> Set[Version]:
+    """
+    By a given package, collect a list of all the versions available on PyPI.
+
+    :param package_name: PyPI package name.
+    :param raise_on_error: Whether to raise ``PyPIError`` instead of returning an empty set in case of failure.
+    :return: Set of available versions. If the version could not be obtained, None will be returned.
+    """
+    metadata = _get_metadata(package_name, raise_on_error=raise_on_error)
+    if metadata is None:
         return set()
 
     if 'releases' in metadata.keys():
@@ -57,7 +245,11 @@ def get_available_versions(package_name: str) -> Set[Version]:
     return set(map(parse_version, versions))
 
 
-def get_package_classifiers(package_name: str, package_version: Optional[str] = None) -> Set[str]:
+def get_package_classifiers(
+    package_name: str,
+    package_version: Optional[str] = None,
+    raise_on_error: bool = False,
+) -> Set[str]:
     """
     Return the list of classifiers of the given package by version.
 
@@ -65,21 +257,11 @@ def get_package_classifiers(package_name: str, package_version: Optional[str] =
 
     :param package_name: The name of the PyPI package.
     :param package_version: The version of the PyPI package.
+    :param raise_on_error: Whether to raise ``PyPIError`` instead of returning an empty set in case of failure.
     :return: Set of classifiers. In case of failure an empty set will be returned.
     """
-    session = _create_session()
-    if package_version is None:
-        url = PYPI_PACKAGE_METADATA_URL.format(package_name=package_name)
-    else:
-        url = PYPI_VERSION_METADATA_URL.format(package_name=package_name, package_version=package_version)
-
-    try:
-        metadata = session.get(url).json()
-    except requests.exceptions.RequestException:
-        logger.error('An error occurred when accessing the PyPI.')
-        return set()
-    except JSONDecodeError:
-        logger.error(f'Failed to get classifiers for the {package_name} package (version = {package_name}).')
+    metadata = _get_metadata(package_name, package_version, raise_on_error)
+    if metadata is None:
         return set()
 
     if 'info' not in metadata.keys():
@@ -102,11 +284,11 @@ def check_package_exists(package_name: str) -> Optional[bool]:
     :param package_name: PyPI package name.
     :return: If it was not possible to find out whether the package exists or not, None will be returned.
     """
-    session = _create_session()
-    url = PYPI_PACKAGE_METADATA_URL.format(package_name=package_name)
-
     try:
-        response = session.get(url)
+        response = _get_metadata_response(package_name)
+    except PyPICacheMissError as error:
+        logger.error(str(error))
+        return None
     except requests.exceptions.RequestException:
         logger.error('An error occurred when accessing the PyPI.')
         return None
@@ -119,3 +301,95 @@ def check_package_exists(package_name: str) -> Optional[bool]:
 
     logger.warning(f'PyPI returned an unexpected code ({response.status_code}).')
     return None
+
+
+def _map_concurrently(function: Callable[[T], R], items: Iterable[T], max_workers: int, description: str) -> List[R]:
+    items = list(items)
+    if max_workers <= 1:
+        return list(map(function, items))
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for index, result in enumerate(executor.map(function, items), start=1):
+            results.append(result)
+            if index % 1000 == 0:
+                logger.info(f'{description}: {index} of {len(items)}.')
+
+    return results
+
+
+def check_packages_exist(
+    package_names: Iterable[str],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> Dict[str, Optional[bool]]:
+    """
+    Check if the packages exist, making the requests to PyPI concurrently.
+
+    :param package_names: PyPI package names.
+    :param max_workers: Maximum number of the concurrent requests.
+    :return: Dictionary, where for each package it is specified whether it exists. If it was not possible to find out
+    whether the package exists or not, None will be specified.
+    """
+    package_names = list(package_names)
+    results = _map_concurrently(check_package_exists, package_names, max_workers, 'Checked packages')
+    return dict(zip(package_names, results))
+
+
+def get_packages_available_versions(
+    package_names: Iterable[str],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> Dict[str, Set[Version]]:
+    """
+    Collect the versions available on PyPI of the packages, making the requests to PyPI concurrently.
+
+    :param package_names: PyPI package names.
+    :param max_workers: Maximum number of the concurrent requests.
+    :return: Dictionary, where for each package the set of available versions is specified. If the versions could not
+    be obtained, the set will be empty.
+    """
+    package_names = list(package_names)
+    results = _map_concurrently(get_available_versions, package_names, max_workers, 'Checked package versions')
+    return dict(zip(package_names, results))
+
+
+def _prefetch_response(package_name: str, package_version: Optional[str]) -> bool:
+    try:
+        _get_metadata_response(package_name, package_version)
+    except requests.exceptions.RequestException as error:
+        logger.warning(f'Failed to fetch the metadata of the {package_name} package: {error}')
+        return False
+    return True
+
+
+def prefetch_metadata(
+    packages: Iterable[str],
+    package_versions: Optional[Dict[str, Set[str]]] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> int:
+    """
+    Fill the cache with the PyPI metadata of the given packages, making the requests to PyPI concurrently.
+
+    :param packages: PyPI package names, the metadata of whose latest versions is fetched.
+    :param package_versions: Versions of the packages whose metadata is also fetched.
+    :param max_workers: Maximum number of the concurrent requests.
+    :return: Number of the requests that failed.
+    :raises ValueError: If the cache is not set.
+    """
+    if _cache is None:
+        raise ValueError('The PyPI cache is not set.')
+
+    requests_to_send = [(package_name, None) for package_name in packages]
+    if package_versions is not None:
+        requests_to_send.extend(
+            (package_name, version)
+            for package_name, versions in package_versions.items()
+            for version in sorted(versions)
+        )
+
+    results = _map_concurrently(
+        lambda request: _prefetch_response(*request),
+        requests_to_send,
+        max_workers,
+        'Prefetched responses',
+    )
+    return results.count(False)
@@ -4,7 +4,7 @@ import re
 from collections import defaultdict
 from distutils.version import Version
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterable, List, Set, Tuple
 
 from pkg_resources import Requirement, parse_requirements as parse_line, parse_version
 
@@ -31,6 +31,18 @@ def normalize_requirement_name(name: str) -> str:
     return normalized_name
 
 
+def normalize_requirement(requirement: Requirement) -> str:
+    """
+    Convert the requirement to a string with the normalized package name and the sorted extras and specs.
+
+    The same requirements written differently are converted to the same string.
+
+    :param requirement: The requirement.
+    :return: Normalized requirement.
+    """
+    return normalize_requirement_name(requirement.name) + str(requirement)[len(requirement.name):]
+
+
 def gather_requirements_file_paths(root: Path) -> List[Path]:
     """
     Gather paths to all files with requirements on the passed path.
@@ -58,18 +70,50 @@ def gather_requirements_from_file(file_path: Path) -> List[Requirement]:
     :param file_path: Path to the file from which the requirements should be parsed.
     :return: List of the gathered requirements.
     """
+    with open(file_path, encoding='utf8', errors='ignore') as file:
+        return gather_requirements_from_lines(file.readlines(), file_path)
+
+
+def gather_requirements_from_lines(lines: Iterable[str], file_path: Path) -> List[Requirement]:
+    """
+    Gather the requirements from the lines of a requirements file.
+
+    :param lines: Lines of the file.
+    :param file_path: Path to the file. Used for logging only.
+    :return: List of the gathered requirements.
+    """
     file_requirements = []
+    for line in lines:
+        try:
+            file_requirements.extend(list(parse_line(line)))
+        except Exception:
+            # For some reason you can't catch RequirementParseError
+            # (or InvalidRequirement), so we catch Exception.
+            logger.warning(f'Unable to parse line "{line.strip()}" in the file {str(file_path)}.')
+            continue
+
+    return file_requirements
+
+
+def gather_unparsed_lines_from_file(file_path: Path) -> List[str]:
+    """
+    Gather the lines of the requirements file that cannot be parsed as requirements.
+
+    Such lines are e.g. the editable installs, the URLs of the packages or the pip options,
+    which are skipped by ``gather_requirements_from_file``.
+
+    :param file_path: Path to the requirements file.
+    :return: List of the stripped lines. The empty lines and comments are not included.
+    """
+    unparsed_lines = []
     with open(file_path, encoding='utf8', errors='ignore') as file:
-        for line in file.readlines():
+        for line in file:
             try:
-                file_requirements.extend(list(parse_line(line)))
+                list(parse_line(line))
             except Exception:
-                # For some reason you can't catch RequirementParseError
-                # (or InvalidRequirement), so we catch Exception.
-                logger.warning(f'Unable to parse line "{line.strip()}" in the file {str(file_path)}.')
-                continue
+                unparsed_lines.append(line.strip())
 
-    return file_requirements
+    return unparsed_lines
 
 
 def gather_requirements(root: Path) -> Requirements: